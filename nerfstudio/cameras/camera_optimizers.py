@@ -106,32 +106,37 @@ class CameraOptimizer(nn.Module):
         indices: Int[Tensor, "camera_indices"],
     ) -> Float[Tensor, "camera_indices 3 4"]:
         """Indexing into camera adjustments.
+
+        The adjustments are computed once per distinct camera and gathered for each index, as a batch of rays only
+        covers a few cameras.
+
         Args:
             indices: indices of Cameras to optimize.
         Returns:
             Transformation matrices from optimized camera coordinates
             to given camera coordinates.
         """
+        if self.config.mode == "off" and self.pose_noise is None:
+            # Note that using repeat() instead of tile() here would result in unnecessary copies.
+            return torch.eye(4, device=self.device)[None, :3, :4].tile(indices.shape[0], 1, 1)
+        unique_indices, inverse_indices = torch.unique(indices, return_inverse=True)
         outputs = []
 
         # Apply learned transformation delta.
         if self.config.mode == "off":
             pass
         elif self.config.mode == "SO3xR3":
-            outputs.append(exp_map_SO3xR3(self.pose_adjustment[indices, :]))
+            outputs.append(exp_map_SO3xR3(self.pose_adjustment[unique_indices, :]))
         elif self.config.mode == "SE3":
-            outputs.append(exp_map_SE3(self.pose_adjustment[indices, :]))
+            outputs.append(exp_map_SE3(self.pose_adjustment[unique_indices, :]))
         else:
             assert_never(self.config.mode)
         # Detach non-trainable indices by setting to identity transform
-        if self.non_trainable_camera_indices is not None:
-            outputs[0][self.non_trainable_camera_indices] = torch.eye(4, device=self.device)[:3, :4]
+        if self.non_trainable_camera_indices is not None and outputs:
+            non_trainable = torch.isin(unique_indices, self.non_trainable_camera_indices.to(unique_indices.device))
+            outputs[0][non_trainable] = torch.eye(4, device=self.device)[:3, :4]
 
         # Apply initial pose noise.
         if self.pose_noise is not None:
-            outputs.append(self.pose_noise[indices, :, :])
-        # Return: identity if no transforms are needed, otherwise multiply transforms together.
-        if len(outputs) == 0:
-            # Note that using repeat() instead of tile() here would result in unnecessary copies.
-            return torch.eye(4, device=self.device)[None, :3, :4].tile(indices.shape[0], 1, 1)
-        return functools.reduce(pose_utils.multiply, outputs)
+            outputs.append(self.pose_noise[unique_indices, :, :])
+        return functools.reduce(pose_utils.multiply, outputs)[inverse_indices]
@@ -652,7 +652,33 @@ class Cameras(TensorDataclass):
         cam_types = torch.unique(self.camera_type, sorted=False)
         directions_stack = torch.empty((3,) + num_rays_shape + (3,), device=self.device)
 
-        c2w = self.camera_to_worlds[true_indices]
+        # When every ray comes from the same camera, eg. when rendering a full image, the camera to world matrix and its
+        # pose correction are broadcasted, so they are composed once rather than once per ray. Cameras whose origins
+        # are overwritten per ray below keep the per ray composition.
+        overwrites_origins = any(
+            cam_type.value in cam_types
+            for cam_type in (
+                CameraType.OMNIDIRECTIONALSTEREO_L,
+                CameraType.OMNIDIRECTIONALSTEREO_R,
+                CameraType.VR180_L,
+                CameraType.VR180_R,
+            )
+        )
+        if len(num_rays_shape) > 0 and all(stride == 0 for stride in camera_indices.stride()[:-1]):
+            first_ray = (0,) * len(num_rays_shape)
+            c2w = self.camera_to_worlds[tuple(camera_indices[first_ray])]
+            if (
+                camera_opt_to_camera is not None
+                and not overwrites_origins
+                and all(stride == 0 for stride in camera_opt_to_camera.stride()[:-2])
+            ):
+                c2w = pose_utils.multiply(c2w, camera_opt_to_camera[first_ray])
+                camera_opt_to_camera = None
+            c2w = c2w.expand(num_rays_shape + (3, 4))
+            if overwrites_origins:
+                c2w = c2w.clone()
+        else:
+            c2w = self.camera_to_worlds[true_indices]
         assert c2w.shape == num_rays_shape + (3, 4)
 
         def _compute_rays_for_omnidirectional_stereo(
@@ -840,7 +866,7 @@ class Cameras(TensorDataclass):
         directions_stack, directions_norm = camera_utils.normalize_with_norm(directions_stack, -1)
         assert directions_stack.shape == (3,) + num_rays_shape + (3,)
 
-        origins = c2w[..., :3, 3]  # (..., 3)
+        origins = c2w[..., :3, 3].contiguous()  # (..., 3), c2w may be broadcasted from a single camera
         assert origins.shape == num_rays_shape + (3,)
 
         directions = directions_stack[0]
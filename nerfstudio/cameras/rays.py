@@ -23,7 +23,7 @@ import torch
 from jaxtyping import Float, Int, Shaped
 from torch import Tensor
 
-from nerfstudio.utils.math import Gaussians, conical_frustum_to_gaussian
+from nerfstudio.utils.math import Gaussians, conical_frustum_to_gaussian, packed_cumsum
 from nerfstudio.utils.tensor_dataclass import TensorDataclass
 
 TORCH_DEVICE = Union[str, torch.device]
@@ -125,11 +125,17 @@ class RaySamples(TensorDataclass):
     times: Optional[Float[Tensor, "*batch 1"]] = None
     """Times at which rays are sampled"""
 
-    def get_weights(self, densities: Float[Tensor, "*batch num_samples 1"]) -> Float[Tensor, "*batch num_samples 1"]:
+    def get_weights(
+        self,
+        densities: Float[Tensor, "*batch num_samples 1"],
+        ray_indices: Optional[Int[Tensor, "num_samples"]] = None,
+    ) -> Float[Tensor, "*batch num_samples 1"]:
         """Return weights based on predicted densities
 
         Args:
             densities: Predicted densities for samples along ray
+            ray_indices: Ray index for each sample, used when samples are packed. The samples of a ray must be
+                contiguous and in order.
 
         Returns:
             Weights for each sample
@@ -138,10 +144,13 @@ class RaySamples(TensorDataclass):
         delta_density = self.deltas * densities
         alphas = 1 - torch.exp(-delta_density)
 
-        transmittance = torch.cumsum(delta_density[..., :-1, :], dim=-2)
-        transmittance = torch.cat(
-            [torch.zeros((*transmittance.shape[:1], 1, 1), device=densities.device), transmittance], dim=-2
-        )
+        if ray_indices is not None:
+            transmittance = packed_cumsum(delta_density[..., 0], ray_indices, exclusive=True)[..., None]
+        else:
+            transmittance = torch.cumsum(delta_density[..., :-1, :], dim=-2)
+            transmittance = torch.cat(
+                [torch.zeros((*transmittance.shape[:1], 1, 1), device=densities.device), transmittance], dim=-2
+            )
         transmittance = torch.exp(-transmittance)  # [..., "num_samples"]
 
         weights = alphas * transmittance  # [..., "num_samples"]
@@ -113,6 +113,9 @@ class LoggingConfig(PrintableConfig):
     max_buffer_size: int = 20
     """maximum history size to keep for computing running averages of stats.
      e.g. if 20, averages will be computed over past 20 occurrences."""
+    flush_in_background: bool = True
+    """if True, logged tensors are fetched from the GPU and written to the loggers by a background thread, so that
+    logging doesn't slow down training iterations."""
     local_writer: LocalWriterConfig = LocalWriterConfig(enable=True)
     """if provided, will print stats locally. if None, will disable printing"""
     profiler: Literal["none", "basic", "pytorch"] = "basic"
@@ -120,6 +123,17 @@ class LoggingConfig(PrintableConfig):
         "basic" - prints speed of all decorated functions at the end of a program.
         "pytorch" - same as basic, but it also traces few training steps.
     """
+    trace_spans: bool = False
+    """if True, records the time spent in each stage of the training step (data sampling, ray generation, proposal
+    sampling, field, rendering, loss, backward, optimizer step) and periodically exports the spans as a Chrome trace
+    and JSON lines in the profiler_traces directory."""
+    trace_buffer_size: int = 100000
+    """maximum number of spans kept in memory between exports"""
+    steps_per_trace_export: int = 1000
+    """number of steps between exports of the recorded spans"""
+    trace_synchronize_cuda: bool = False
+    """if True, synchronizes CUDA around each span so that spans include the GPU time of their kernels. This slows down
+    training."""
 
 
 # Viewer related configs
@@ -146,3 +160,13 @@ class ViewerConfig(PrintableConfig):
     """Image format viewer should use; jpeg is lossy compression, while png is lossless."""
     jpeg_quality: int = 90
     """Quality tradeoff to use for jpeg compression."""
+    progressive_render: bool = True
+    """Whether to render high resolution frames tile by tile, showing the finished tiles over the upsampled low
+    resolution frame while the rest is rendering."""
+    progressive_update_interval: float = 0.25
+    """Minimum time in seconds between two partial frames sent to the viewer during a progressive render."""
+    render_cache_size: int = 8
+    """Number of high resolution frames whose raw outputs are kept, keyed by camera, resolution, crop box and training
+    step, so that colormap or output changes and returns to a previous view skip the model. 0 disables the cache."""
+    target_fps: float = 24.0
+    """Frame rate that the resolution of the renders is adjusted to while the camera moves."""
@@ -64,9 +64,11 @@ from nerfstudio.data.utils.dataloaders import (
     FixedIndicesEvalDataloader,
     RandIndicesEvalDataloader,
 )
+from nerfstudio.data.utils.data_utils import ImageDecoder
 from nerfstudio.data.utils.nerfstudio_collate import nerfstudio_collate
 from nerfstudio.engine.callbacks import TrainingCallback, TrainingCallbackAttributes
 from nerfstudio.model_components.ray_generators import RayGenerator
+from nerfstudio.utils import comms, profiler
 from nerfstudio.utils.misc import IterableWrapper
 from nerfstudio.utils.rich_utils import CONSOLE
 from nerfstudio.utils.misc import get_orig_class
@@ -346,10 +348,22 @@ class VanillaDataManagerConfig(DataManagerConfig):
     """The scale factor for scaling spatial data such as images, mask, semantics
     along with relevant information about camera intrinsics
     """
+    image_decoder: ImageDecoder = "pil"
+    """Backend used to decode images, masks are always decoded with PIL. "pil-draft" and "opencv" decode JPEGs
+    directly at a reduced resolution when camera_res_scale_factor <= 0.5."""
     patch_size: int = 1
     """Size of patch to sample from. If >1, patch-based sampling will be used."""
     pixel_sampler: PixelSamplerConfig = PixelSamplerConfig()
     """Specifies the pixel sampler used to sample pixels from images."""
+    shard_train_images: bool = False
+    """When training with several processes, each process only loads and caches its own disjoint shard of the
+    training images, instead of every process caching all of them."""
+    train_cache_budget_gb: Optional[float] = None
+    """Per-process memory budget in GB of the cached training images. If the images of the process do not fit, only
+    as many as fit are cached at a time, and they are resampled every train_num_times_to_repeat_images iterations."""
+    sampling_seed: Optional[int] = None
+    """Seed of the choice of the cached training images, offset by the rank of the process. If None, uses the global
+    random state."""
 
 
 TDataset = TypeVar("TDataset", bound=InputDataset, default=InputDataset)
@@ -450,6 +464,7 @@ class VanillaDataManager(DataManager, Generic[TDataset]):
         return self.dataset_type(
             dataparser_outputs=self.train_dataparser_outputs,
             scale_factor=self.config.camera_res_scale_factor,
+            image_decoder=self.config.image_decoder,
         )
 
     def create_eval_dataset(self) -> TDataset:
@@ -457,6 +472,7 @@ class VanillaDataManager(DataManager, Generic[TDataset]):
         return self.dataset_type(
             dataparser_outputs=self.dataparser.get_dataparser_outputs(split=self.test_split),
             scale_factor=self.config.camera_res_scale_factor,
+            image_decoder=self.config.image_decoder,
         )
 
     def _get_pixel_sampler(self, dataset: TDataset, num_rays_per_batch: int) -> PixelSampler:
@@ -472,19 +488,56 @@ class VanillaDataManager(DataManager, Generic[TDataset]):
             is_equirectangular=is_equirectangular, num_rays_per_batch=num_rays_per_batch
         )
 
+    def get_train_image_indices(self) -> List[int]:
+        """Returns the indices of the training images loaded by this process. With shard_train_images, the images are
+        dealt out to the processes in turn, so that every shard covers the whole capture."""
+        indices = list(range(len(self.train_dataset)))
+        if not self.config.shard_train_images or self.world_size <= 1:
+            return indices
+        if len(indices) < self.world_size:
+            raise ValueError(f"Cannot shard {len(indices)} training images over {self.world_size} processes.")
+        return indices[comms.get_rank() :: self.world_size]
+
+    def get_train_num_images_to_sample_from(self, image_indices: List[int]) -> int:
+        """Returns the number of training images to cache at a time, within the memory budget of the process.
+
+        Args:
+            image_indices: Indices of the training images loaded by this process.
+        """
+        num_images = self.config.train_num_images_to_sample_from
+        if self.config.train_cache_budget_gb is None:
+            return num_images
+        cameras = self.train_dataset.cameras
+        # Cached images are float32 RGB(A), count the largest image so that any choice of images fits.
+        image_bytes = 4 * 4 * int((cameras.height * cameras.width)[image_indices].max())
+        num_images_in_budget = int(self.config.train_cache_budget_gb * 1e9) // image_bytes
+        if num_images_in_budget < 1:
+            raise ValueError(f"train_cache_budget_gb={self.config.train_cache_budget_gb} does not fit a single image.")
+        if num_images_in_budget < len(image_indices) and (num_images == -1 or num_images > num_images_in_budget):
+            CONSOLE.print(f"Caching {num_images_in_budget} images at a time to fit the memory budget.")
+            if self.config.train_num_times_to_repeat_images == -1:
+                CONSOLE.print(
+                    "[bold yellow]Warning: train_num_times_to_repeat_images is -1, the other images will never be used."
+                )
+            return num_images_in_budget
+        return num_images
+
     def setup_train(self):
         """Sets up the data loaders for training"""
         assert self.train_dataset is not None
         CONSOLE.print("Setting up training dataset...")
+        image_indices = self.get_train_image_indices()
         self.train_image_dataloader = CacheDataloader(
             self.train_dataset,
-            num_images_to_sample_from=self.config.train_num_images_to_sample_from,
+            num_images_to_sample_from=self.get_train_num_images_to_sample_from(image_indices),
             num_times_to_repeat_images=self.config.train_num_times_to_repeat_images,
             device=self.device,
             num_workers=self.world_size * 4,
             pin_memory=True,
             collate_fn=self.config.collate_fn,
             exclude_batch_keys_from_device=self.exclude_batch_keys_from_device,
+            image_indices=image_indices,
+            seed=None if self.config.sampling_seed is None else self.config.sampling_seed + comms.get_rank(),
         )
         self.iter_train_image_dataloader = iter(self.train_image_dataloader)
         self.train_pixel_sampler = self._get_pixel_sampler(self.train_dataset, self.config.train_num_rays_per_batch)
@@ -534,12 +587,14 @@ class VanillaDataManager(DataManager, Generic[TDataset]):
     def next_train(self, step: int) -> Tuple[RayBundle, Dict]:
         """Returns the next batch of data from the train dataloader."""
         self.train_count += 1
-        image_batch = next(self.iter_train_image_dataloader)
-        assert self.train_pixel_sampler is not None
-        assert isinstance(image_batch, dict)
-        batch = self.train_pixel_sampler.sample(image_batch)
+        with profiler.trace_span("data_sampling"):
+            image_batch = next(self.iter_train_image_dataloader)
+            assert self.train_pixel_sampler is not None
+            assert isinstance(image_batch, dict)
+            batch = self.train_pixel_sampler.sample(image_batch)
         ray_indices = batch["indices"]
-        ray_bundle = self.train_ray_generator(ray_indices)
+        with profiler.trace_span("ray_generation"):
+            ray_bundle = self.train_ray_generator(ray_indices)
         return ray_bundle, batch
 
     def next_eval(self, step: int) -> Tuple[RayBundle, Dict]:
@@ -23,7 +23,7 @@ import numpy as np
 from nerfstudio.data.dataparsers.base_dataparser import DataparserOutputs
 from nerfstudio.model_components import losses
 from nerfstudio.data.datasets.base_dataset import InputDataset
-from nerfstudio.data.utils.data_utils import get_depth_image_from_path
+from nerfstudio.data.utils.data_utils import ImageDecoder, get_depth_image_from_path
 from nerfstudio.utils.misc import torch_compile
 from nerfstudio.utils.rich_utils import CONSOLE
 
@@ -43,8 +43,10 @@ class DepthDataset(InputDataset):
         scale_factor: The scaling factor for the dataparser outputs.
     """
 
-    def __init__(self, dataparser_outputs: DataparserOutputs, scale_factor: float = 1.0):
-        super().__init__(dataparser_outputs, scale_factor)
+    def __init__(
+        self, dataparser_outputs: DataparserOutputs, scale_factor: float = 1.0, image_decoder: ImageDecoder = "pil"
+    ):
+        super().__init__(dataparser_outputs, scale_factor, image_decoder)
         # if there are no depth images than we want to generate them all with zoe depth
 
         if len(dataparser_outputs.image_filenames) > 0 and (
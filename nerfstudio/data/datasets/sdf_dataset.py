@@ -24,6 +24,7 @@ import torch
 
 from nerfstudio.data.dataparsers.base_dataparser import DataparserOutputs
 from nerfstudio.data.datasets.base_dataset import InputDataset
+from nerfstudio.data.utils.data_utils import ImageDecoder
 
 
 class SDFDataset(InputDataset):
@@ -36,8 +37,10 @@ class SDFDataset(InputDataset):
 
     exclude_batch_keys_from_device = InputDataset.exclude_batch_keys_from_device + ["depth", "normal"]
 
-    def __init__(self, dataparser_outputs: DataparserOutputs, scale_factor: float = 1.0):
-        super().__init__(dataparser_outputs, scale_factor)
+    def __init__(
+        self, dataparser_outputs: DataparserOutputs, scale_factor: float = 1.0, image_decoder: ImageDecoder = "pil"
+    ):
+        super().__init__(dataparser_outputs, scale_factor, image_decoder)
 
         # can be none if monoprior not included
         self.depth_filenames = self.metadata["depth_filenames"]
@@ -22,7 +22,7 @@ import torch
 
 from nerfstudio.data.dataparsers.base_dataparser import DataparserOutputs, Semantics
 from nerfstudio.data.datasets.base_dataset import InputDataset
-from nerfstudio.data.utils.data_utils import get_semantics_and_mask_tensors_from_path
+from nerfstudio.data.utils.data_utils import ImageDecoder, get_semantics_and_mask_tensors_from_path
 
 
 class SemanticDataset(InputDataset):
@@ -34,8 +34,10 @@ class SemanticDataset(InputDataset):
 
     exclude_batch_keys_from_device = InputDataset.exclude_batch_keys_from_device + ["mask", "semantics"]
 
-    def __init__(self, dataparser_outputs: DataparserOutputs, scale_factor: float = 1.0):
-        super().__init__(dataparser_outputs, scale_factor)
+    def __init__(
+        self, dataparser_outputs: DataparserOutputs, scale_factor: float = 1.0, image_decoder: ImageDecoder = "pil"
+    ):
+        super().__init__(dataparser_outputs, scale_factor, image_decoder)
         assert "semantics" in dataparser_outputs.metadata.keys() and isinstance(self.metadata["semantics"], Semantics)
         self.semantics = self.metadata["semantics"]
         self.mask_indices = torch.tensor(
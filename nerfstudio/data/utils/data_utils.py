@@ -14,24 +14,124 @@
 
 """Utility functions to allow easy re-use of common operations across dataloaders"""
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import List, Literal, Optional, Tuple, Union
 
 import cv2
 import numpy as np
+import numpy.typing as npt
 import torch
 from PIL import Image
 
+ImageDecoder = Literal["pil", "pil-draft", "opencv"]
+"""Backend used to decode images from disk.
+
+- "pil": decode at full resolution with PIL and resize.
+- "pil-draft": let libjpeg decode JPEGs directly at a reduced DCT scale (1/2, 1/4 or 1/8) before the final resize.
+- "opencv": decode with OpenCV, using its reduced-resolution JPEG modes when the scale factor allows it.
+"""
+
+_JPEG_SUFFIXES = (".jpg", ".jpeg", ".jpe")
+_OPENCV_REDUCED_FLAGS = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+
+def _scaled_size(width: int, height: int, scale_factor: float) -> Tuple[int, int]:
+    return int(width * scale_factor), int(height * scale_factor)
+
+
+def _decode_with_pil(
+    filepath: Path, scale_factor: float, nearest: bool, draft: bool, out: Optional[npt.NDArray[np.uint8]]
+) -> npt.NDArray[np.uint8]:
+    pil_image = Image.open(filepath)
+    if scale_factor != 1.0:
+        newsize = _scaled_size(*pil_image.size, scale_factor)
+        if draft and not nearest and pil_image.format == "JPEG":
+            # Picks the smallest DCT scale that still covers newsize, so only the residual resize is done by PIL.
+            pil_image.draft(pil_image.mode, newsize)
+        if pil_image.size != newsize:
+            pil_image = pil_image.resize(newsize, resample=Image.NEAREST if nearest else Image.BILINEAR)
+    if out is None:
+        return np.array(pil_image, dtype="uint8")
+    # asarray shares the PIL buffer, so the pixels are copied once, straight into out.
+    np.copyto(out, np.asarray(pil_image, dtype="uint8"))
+    return out
+
+
+def _decode_with_opencv(
+    filepath: Path, scale_factor: float, nearest: bool, out: Optional[npt.NDArray[np.uint8]]
+) -> npt.NDArray[np.uint8]:
+    # PIL only parses the header here, which is the cheapest way to get the exact target size.
+    newsize = _scaled_size(*Image.open(filepath).size, scale_factor)
+    # Largest reduction that still decodes at or above the target resolution.
+    reduction = max(r for r in (1, *_OPENCV_REDUCED_FLAGS) if r * scale_factor <= 1.0)
+    image = None
+    if not nearest and reduction > 1 and filepath.suffix.lower() in _JPEG_SUFFIXES:
+        # JPEGs have no alpha channel, and grayscale JPEGs are expanded to 3 channels by the datasets anyway. The EXIF
+        # orientation is ignored, as by the other decoders and the camera intrinsics.
+        image = cv2.imread(str(filepath), _OPENCV_REDUCED_FLAGS[reduction] | cv2.IMREAD_IGNORE_ORIENTATION)
+    if image is None:
+        image = cv2.imread(str(filepath), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise IOError(f"Could not decode image {filepath}")
+        if image.dtype != np.uint8:
+            image = (image >> 8).astype(np.uint8) if image.dtype == np.uint16 else image.astype(np.uint8)
+    # The last OpenCV step writes into out directly. Without a color conversion, the resize is that step.
+    convert = image.ndim == 3
+    if image.shape[1::-1] != newsize:
+        interpolation = cv2.INTER_NEAREST_EXACT if nearest else cv2.INTER_LINEAR
+        image = cv2.resize(image, newsize, dst=None if convert else out, interpolation=interpolation)
+    if convert:
+        code = cv2.COLOR_BGRA2RGBA if image.shape[2] == 4 else cv2.COLOR_BGR2RGB
+        image = cv2.cvtColor(image, code, dst=out)
+    if out is not None and image is not out:
+        np.copyto(out, image)
+        return out
+    return image
+
+
+def get_image_from_path(
+    filepath: Path,
+    scale_factor: float = 1.0,
+    decoder: ImageDecoder = "pil",
+    nearest: bool = False,
+    out: Optional[torch.Tensor] = None,
+) -> torch.Tensor:
+    """Decodes an image to a uint8 tensor of shape (H, W) or (H, W, C) at the requested scale.
+
+    Args:
+        filepath: Path to the image.
+        scale_factor: Factor by which to scale the image resolution.
+        decoder: Backend used to decode the image.
+        nearest: Use nearest neighbor resampling, e.g. for masks and label images. Disables reduced-resolution
+            decoding, which averages pixels.
+        out: Optional preallocated, contiguous uint8 CPU tensor of the decoded shape. The decoder writes its last
+            resampling or color conversion step into it, so no intermediate image of the output size is allocated.
+
+    Returns:
+        The decoded image. If ``out`` is given, it is returned.
+    """
+    out_array = None
+    if out is not None:
+        if out.dtype != torch.uint8 or out.device.type != "cpu" or not out.is_contiguous():
+            raise ValueError("out must be a contiguous uint8 CPU tensor")
+        out_array = out.numpy()
+    if decoder == "opencv":
+        image = _decode_with_opencv(filepath, scale_factor, nearest, out_array)
+    elif decoder in ("pil", "pil-draft"):
+        image = _decode_with_pil(filepath, scale_factor, nearest, draft=decoder == "pil-draft", out=out_array)
+    else:
+        raise ValueError(f"Unknown image decoder {decoder}")
+    if out is not None:
+        return out
+    return torch.from_numpy(image)
+
 
 def get_image_mask_tensor_from_path(filepath: Path, scale_factor: float = 1.0) -> torch.Tensor:
     """
-    Utility function to read a mask image from the given path and return a boolean tensor
+    Utility function to read a mask image from the given path and return a boolean tensor.
+    Masks are always decoded with PIL, which keeps the indices of palette PNGs where OpenCV would expand them to colors.
     """
-    pil_mask = Image.open(filepath)
-    if scale_factor != 1.0:
-        width, height = pil_mask.size
-        newsize = (int(width * scale_factor), int(height * scale_factor))
-        pil_mask = pil_mask.resize(newsize, resample=Image.NEAREST)
-    mask_tensor = torch.from_numpy(np.array(pil_mask)).unsqueeze(-1).bool()
+    mask_tensor = get_image_from_path(filepath, scale_factor=scale_factor, decoder="pil", nearest=True)
+    mask_tensor = mask_tensor.unsqueeze(-1).bool()
     if len(mask_tensor.shape) != 3:
         raise ValueError("The mask image should have 1 channel")
     return mask_tensor
@@ -76,11 +176,20 @@ def get_depth_image_from_path(
     Returns:
         Depth image torch tensor with shape [height, width, 1].
     """
-    if filepath.suffix == ".npy":
-        image = np.load(filepath) * scale_factor
-        image = cv2.resize(image, (width, height), interpolation=interpolation)
+    is_npy = filepath.suffix == ".npy"
+    if is_npy:
+        image = np.load(filepath)
     else:
         image = cv2.imread(str(filepath.absolute()), cv2.IMREAD_ANYDEPTH)
-        image = image.astype(np.float64) * scale_factor
-        image = cv2.resize(image, (width, height), interpolation=interpolation)
+
+    def to_metric(x: np.ndarray) -> np.ndarray:
+        return x * scale_factor if is_npy else x.astype(np.float64) * scale_factor
+
+    if image.shape[:2] == (height, width):
+        image = to_metric(image)
+    elif interpolation == cv2.INTER_NEAREST:
+        # Nearest neighbor commutes with scaling, so resize the raw image before converting it.
+        image = to_metric(cv2.resize(image, (width, height), interpolation=interpolation))
+    else:
+        image = cv2.resize(to_metric(image), (width, height), interpolation=interpolation)
     return torch.from_numpy(image[:, :, np.newaxis])
@@ -21,7 +21,7 @@ import concurrent.futures
 import multiprocessing
 import random
 from abc import abstractmethod
-from typing import Any, Callable, Dict, List, Optional, Sized, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Sized, Tuple, Union
 
 import torch
 from rich.progress import track
@@ -46,6 +46,8 @@ class CacheDataloader(DataLoader):
         num_times_to_repeat_images: How often to collate new images. -1 to never pick new images.
         device: Device to perform computation.
         collate_fn: The function we will use to collate our training data
+        image_indices: Indices of the images to sample from, eg. the shard of a process. None for all images.
+        seed: Seed of the random choice of the images to collate. None to use the global random state.
     """
 
     def __init__(
@@ -56,6 +58,8 @@ class CacheDataloader(DataLoader):
         device: Union[torch.device, str] = "cpu",
         collate_fn: Callable[[Any], Any] = nerfstudio_collate,
         exclude_batch_keys_from_device: Optional[List[str]] = None,
+        image_indices: Optional[Sequence[int]] = None,
+        seed: Optional[int] = None,
         **kwargs,
     ):
         if exclude_batch_keys_from_device is None:
@@ -64,9 +68,12 @@ class CacheDataloader(DataLoader):
         assert isinstance(self.dataset, Sized)
 
         super().__init__(dataset=dataset, **kwargs)  # This will set self.dataset
+        self.image_indices = list(range(len(self.dataset))) if image_indices is None else list(image_indices)
+        self.rng = random.Random(seed) if seed is not None else random
         self.num_times_to_repeat_images = num_times_to_repeat_images
-        self.cache_all_images = (num_images_to_sample_from == -1) or (num_images_to_sample_from >= len(self.dataset))
-        self.num_images_to_sample_from = len(self.dataset) if self.cache_all_images else num_images_to_sample_from
+        num_images = len(self.image_indices)
+        self.cache_all_images = (num_images_to_sample_from == -1) or (num_images_to_sample_from >= num_images)
+        self.num_images_to_sample_from = num_images if self.cache_all_images else num_images_to_sample_from
         self.device = device
         self.collate_fn = collate_fn
         self.num_workers = kwargs.get("num_workers", 0)
@@ -77,19 +84,19 @@ class CacheDataloader(DataLoader):
 
         self.cached_collated_batch = None
         if self.cache_all_images:
-            CONSOLE.print(f"Caching all {len(self.dataset)} images.")
-            if len(self.dataset) > 500:
+            CONSOLE.print(f"Caching all {num_images} images.")
+            if num_images > 500:
                 CONSOLE.print(
                     "[bold yellow]Warning: If you run out of memory, try reducing the number of images to sample from."
                 )
             self.cached_collated_batch = self._get_collated_batch()
         elif self.num_times_to_repeat_images == -1:
             CONSOLE.print(
-                f"Caching {self.num_images_to_sample_from} out of {len(self.dataset)} images, without resampling."
+                f"Caching {self.num_images_to_sample_from} out of {num_images} images, without resampling."
             )
         else:
             CONSOLE.print(
-                f"Caching {self.num_images_to_sample_from} out of {len(self.dataset)} images, "
+                f"Caching {self.num_images_to_sample_from} out of {num_images} images, "
                 f"resampling every {self.num_times_to_repeat_images} iters."
             )
 
@@ -99,8 +106,7 @@ class CacheDataloader(DataLoader):
     def _get_batch_list(self):
         """Returns a list of batches from the dataset attribute."""
 
-        assert isinstance(self.dataset, Sized)
-        indices = random.sample(range(len(self.dataset)), k=self.num_images_to_sample_from)
+        indices = self.rng.sample(self.image_indices, k=self.num_images_to_sample_from)
         batch_list = []
         results = []
 
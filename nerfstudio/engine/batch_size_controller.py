@@ -0,0 +1,174 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Controller adapting the number of rays per batch to a step time, memory and sample budget.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Type, Union
+
+import torch
+
+from nerfstudio.configs.base_config import InstantiateConfig
+from nerfstudio.pipelines.base_pipeline import Pipeline
+from nerfstudio.utils import writer
+from nerfstudio.utils.rich_utils import CONSOLE
+
+
+@dataclass
+class BatchSizeControllerConfig(InstantiateConfig):
+    """Configuration of the adaptive number of rays per batch"""
+
+    _target: Type = field(default_factory=lambda: BatchSizeController)
+    """Target class to instantiate."""
+    target_step_time: Optional[float] = None
+    """Target duration of a training step in seconds. If None, the step time is not a constraint."""
+    max_memory_fraction: Optional[float] = 0.85
+    """Fraction of the device memory that the peak allocated memory of a training step may reach. Only used on
+    CUDA devices. If None, the memory is not a constraint."""
+    target_num_samples: Optional[int] = None
+    """Target number of samples per batch, for models returning num_samples_per_batch in their metrics dict. If None,
+    the number of samples is not a constraint."""
+    min_num_rays_per_batch: int = 256
+    """Lower bound of the number of rays per batch."""
+    max_num_rays_per_batch: int = 1 << 16
+    """Upper bound of the number of rays per batch."""
+    steps_per_update: int = 50
+    """Number of training steps measured before each decision."""
+    max_change_factor: float = 2.0
+    """Largest factor by which the number of rays per batch may grow or shrink in a single decision."""
+    tolerance: float = 0.1
+    """Relative distance to the budget within which the number of rays per batch is left unchanged."""
+    adjust_eval_chunk: bool = True
+    """Scale the eval chunk size of the model along with the number of rays per batch."""
+
+
+class BatchSizeController:
+    """Adapts the number of rays per training batch, and the eval chunk size, to the hardware.
+
+    Every steps_per_update training steps, the mean step time, the peak allocated memory and the mean number of
+    samples are compared to their budgets. All of them grow about linearly with the number of rays, so the number of
+    rays is scaled by the ratio of budget to measurement of the tightest budget, within the configured bounds.
+    Measuring the step time synchronizes the device after every step.
+
+    Args:
+        config: The controller configuration.
+        pipeline: Pipeline whose datamanager and model are adjusted.
+        device: Device the pipeline trains on.
+    """
+
+    def __init__(self, config: BatchSizeControllerConfig, pipeline: Pipeline, device: Union[torch.device, str]):
+        self.config = config
+        self.pipeline = pipeline
+        self.device = torch.device(device)
+        if getattr(pipeline.datamanager, "train_pixel_sampler", None) is None:
+            raise ValueError("The batch size controller requires a datamanager with a train pixel sampler.")
+        self.num_rays_per_batch = pipeline.datamanager.get_train_rays_per_batch()
+        self.eval_chunk_ratio = pipeline.model.config.eval_num_rays_per_chunk / self.num_rays_per_batch
+        self.step_times: List[float] = []
+        self.num_samples: List[float] = []
+        self._reset_peak_memory()
+
+    def _reset_peak_memory(self) -> None:
+        if self.device.type == "cuda":
+            torch.cuda.reset_peak_memory_stats(self.device)
+
+    def synchronize(self) -> None:
+        """Waits for the queued work of the device, so that the measured step time is accurate."""
+        if self.device.type == "cuda":
+            torch.cuda.synchronize(self.device)
+
+    def get_scale_factor(
+        self, step_time: float, peak_memory: Optional[float], num_samples: Optional[float]
+    ) -> Tuple[float, str]:
+        """Returns the factor to scale the number of rays by, and the name of the budget limiting it.
+
+        Args:
+            step_time: Mean training step time in seconds.
+            peak_memory: Peak allocated memory in bytes, if known.
+            num_samples: Mean number of samples per batch, if known.
+        """
+        ratios: Dict[str, float] = {}
+        if self.config.target_step_time is not None:
+            ratios["step time"] = self.config.target_step_time / max(step_time, 1e-6)
+        if self.config.max_memory_fraction is not None and peak_memory:
+            total_memory = torch.cuda.get_device_properties(self.device).total_memory
+            ratios["memory"] = self.config.max_memory_fraction * total_memory / peak_memory
+        if self.config.target_num_samples is not None and num_samples:
+            ratios["samples"] = self.config.target_num_samples / num_samples
+        if not ratios:
+            return 1.0, "no budget"
+        reason = min(ratios, key=lambda name: ratios[name])
+        factor = min(max(ratios[reason], 1 / self.config.max_change_factor), self.config.max_change_factor)
+        if abs(factor - 1) <= self.config.tolerance:
+            factor = 1.0
+        return factor, reason
+
+    def set_num_rays_per_batch(self, num_rays_per_batch: int) -> None:
+        """Sets the number of rays per training batch, and scales the eval chunk size along with it.
+
+        Args:
+            num_rays_per_batch: Number of rays per training batch.
+        """
+        datamanager = self.pipeline.datamanager
+        datamanager.train_pixel_sampler.set_num_rays_per_batch(num_rays_per_batch)  # type: ignore
+        self.num_rays_per_batch = datamanager.train_pixel_sampler.num_rays_per_batch  # type: ignore
+        datamanager.config.train_num_rays_per_batch = self.num_rays_per_batch
+        if self.config.adjust_eval_chunk:
+            self.pipeline.model.config.eval_num_rays_per_chunk = max(
+                1, int(self.num_rays_per_batch * self.eval_chunk_ratio)
+            )
+
+    def update(self, step: int, step_time: float, metrics_dict: Dict[str, torch.Tensor]) -> None:
+        """Records a training step, and adjusts the number of rays per batch every steps_per_update steps.
+
+        Args:
+            step: Current training step.
+            step_time: Duration of the training step in seconds.
+            metrics_dict: Metrics dict of the training step.
+        """
+        self.step_times.append(step_time)
+        if "num_samples_per_batch" in metrics_dict:
+            self.num_samples.append(float(metrics_dict["num_samples_per_batch"]))
+        if len(self.step_times) < self.config.steps_per_update:
+            return
+
+        # The first step of a window can include a recompilation or reallocation, leave it out of the mean.
+        step_time = sum(self.step_times[1:]) / max(len(self.step_times) - 1, 1)
+        peak_memory = torch.cuda.max_memory_allocated(self.device) if self.device.type == "cuda" else None
+        num_samples = sum(self.num_samples) / len(self.num_samples) if self.num_samples else None
+        self.step_times, self.num_samples = [], []
+        self._reset_peak_memory()
+
+        factor, reason = self.get_scale_factor(step_time, peak_memory, num_samples)
+        num_rays_per_batch = int(
+            min(
+                max(self.num_rays_per_batch * factor, self.config.min_num_rays_per_batch),
+                self.config.max_num_rays_per_batch,
+            )
+        )
+        model_config = self.pipeline.model.config
+        if num_rays_per_batch != self.num_rays_per_batch:
+            previous_num_rays, previous_chunk = self.num_rays_per_batch, model_config.eval_num_rays_per_chunk
+            self.set_num_rays_per_batch(num_rays_per_batch)
+            CONSOLE.log(
+                f"Step {step}: limited by {reason} (step {1e3 * step_time:.1f} ms, "
+                f"peak memory {(peak_memory or 0) / 1024**2:.0f} MB, samples {num_samples or 0:.0f}), "
+                f"rays per batch {previous_num_rays} -> {self.num_rays_per_batch}, "
+                f"eval chunk {previous_chunk} -> {model_config.eval_num_rays_per_chunk}"
+            )
+        writer.put_scalar(name="Rays Per Batch", scalar=self.num_rays_per_batch, step=step)
+        writer.put_scalar(name="Eval Rays Per Chunk", scalar=model_config.eval_num_rays_per_chunk, step=step)
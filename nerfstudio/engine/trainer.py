@@ -34,12 +34,13 @@ from torch.cuda.amp.grad_scaler import GradScaler
 
 from nerfstudio.configs.experiment_config import ExperimentConfig
 from nerfstudio.data.datamanagers.base_datamanager import VanillaDataManager
+from nerfstudio.engine.batch_size_controller import BatchSizeController, BatchSizeControllerConfig
 from nerfstudio.engine.callbacks import TrainingCallback, TrainingCallbackAttributes, TrainingCallbackLocation
 from nerfstudio.engine.optimizers import Optimizers
 from nerfstudio.pipelines.base_pipeline import VanillaPipeline
 from nerfstudio.utils import profiler, writer
 from nerfstudio.utils.decorators import check_eval_enabled, check_main_thread, check_viewer_enabled
-from nerfstudio.utils.misc import step_check
+from nerfstudio.utils.misc import get_autocast_dtype, step_check
 from nerfstudio.utils.rich_utils import CONSOLE
 from nerfstudio.utils.writer import EventName, TimeWriter
 from nerfstudio.viewer.server.viewer_state import ViewerState
@@ -67,6 +68,8 @@ class TrainerConfig(ExperimentConfig):
     """Maximum number of iterations to run."""
     mixed_precision: bool = False
     """Whether or not to use mixed precision for training."""
+    cpu_mixed_precision: bool = False
+    """Whether mixed precision also applies to CPU training, in bfloat16. Otherwise it is disabled on CPU."""
     use_grad_scaler: bool = False
     """Use gradient scaler even if the automatic mixed precision is disabled."""
     save_only_latest_checkpoint: bool = True
@@ -84,6 +87,9 @@ class TrainerConfig(ExperimentConfig):
     """Optionally log gradients during training"""
     gradient_accumulation_steps: int = 1
     """Number of steps to accumulate gradients over."""
+    batch_size_controller: Optional[BatchSizeControllerConfig] = None
+    """Optionally adapt the number of rays per batch and the eval chunk size to a step time, memory and sample
+    budget."""
 
 
 class Trainer:
@@ -108,6 +114,7 @@ class Trainer:
     pipeline: VanillaPipeline
     optimizers: Optimizers
     callbacks: List[TrainingCallback]
+    batch_size_controller: Optional[BatchSizeController] = None
 
     def __init__(self, config: TrainerConfig, local_rank: int = 0, world_size: int = 1) -> None:
         self.train_lock = Lock()
@@ -122,7 +129,7 @@ class Trainer:
         self.training_state: Literal["training", "paused", "completed"] = "training"
         self.gradient_accumulation_steps: int = self.config.gradient_accumulation_steps
 
-        if self.device == "cpu":
+        if self.device == "cpu" and not self.config.cpu_mixed_precision:
             self.mixed_precision = False
             CONSOLE.print("Mixed precision is disabled for CPU training.")
         self._start_step: int = 0
@@ -153,6 +160,10 @@ class Trainer:
             grad_scaler=self.grad_scaler,
         )
         self.optimizers = self.setup_optimizers()
+        if self.config.batch_size_controller is not None:
+            self.batch_size_controller = self.config.batch_size_controller.setup(
+                pipeline=self.pipeline, device=self.device
+            )
 
         # set up viewer if enabled
         viewer_log_path = self.base_dir / self.config.viewer.relative_log_filename
@@ -241,6 +252,7 @@ class Trainer:
             for step in range(self._start_step, self._start_step + num_iterations):
                 while self.training_state == "paused":
                     time.sleep(0.01)
+                profiler.set_trace_step(step)
                 with self.train_lock:
                     with TimeWriter(writer, EventName.ITER_TRAIN_TIME, step=step) as train_t:
                         self.pipeline.train()
@@ -253,6 +265,8 @@ class Trainer:
 
                         # time the forward pass
                         loss, loss_dict, metrics_dict = self.train_iteration(step)
+                        if self.batch_size_controller is not None:
+                            self.batch_size_controller.synchronize()
 
                         # training callbacks after the training iteration
                         for callback in self.callbacks:
@@ -260,6 +274,9 @@ class Trainer:
                                 step, location=TrainingCallbackLocation.AFTER_TRAIN_ITERATION
                             )
 
+                if self.batch_size_controller is not None:
+                    self.batch_size_controller.update(step, train_t.duration, metrics_dict)
+
                 # Skip the first two steps to avoid skewed timings that break the viewer rendering speed estimate.
                 if step > 1:
                     writer.put_time(
@@ -301,6 +318,7 @@ class Trainer:
 
         # write out any remaining events (e.g., total train time)
         writer.write_out_storage()
+        writer.flush()
 
         table = Table(
             title=None,
@@ -470,12 +488,16 @@ class Trainer:
             self.gradient_accumulation_steps > 0
         ), f"gradient_accumulation_steps must be > 0, not {self.gradient_accumulation_steps}"
         for _ in range(self.gradient_accumulation_steps):
-            with torch.autocast(device_type=cpu_or_cuda_str, enabled=self.mixed_precision):
+            with torch.autocast(
+                device_type=cpu_or_cuda_str, dtype=get_autocast_dtype(cpu_or_cuda_str), enabled=self.mixed_precision
+            ):
                 _, loss_dict, metrics_dict = self.pipeline.get_train_loss_dict(step=step)
                 loss = functools.reduce(torch.add, loss_dict.values())
                 loss /= self.gradient_accumulation_steps
-            self.grad_scaler.scale(loss).backward()  # type: ignore
-        self.optimizers.optimizer_scaler_step_all(self.grad_scaler)
+            with profiler.trace_span("backward"):
+                self.grad_scaler.scale(loss).backward()  # type: ignore
+        with profiler.trace_span("optimizer_step"):
+            self.optimizers.optimizer_scaler_step_all(self.grad_scaler)
 
         if self.config.log_gradients:
             total_grad = 0
@@ -17,6 +17,8 @@ Code for embeddings.
 """
 
 
+from typing import Dict, Tuple
+
 import torch
 from jaxtyping import Shaped
 from torch import Tensor
@@ -41,10 +43,21 @@ class Embedding(FieldComponent):
 
     def build_nn_modules(self) -> None:
         self.embedding = torch.nn.Embedding(self.in_dim, self.out_dim)
+        self._mean_cache: Dict[Tuple[int, int, int], Tensor] = {}
 
     def mean(self, dim=0):
-        """Return the mean of the embedding weights along a dim."""
-        return self.embedding.weight.mean(dim)
+        """Return the mean of the embedding weights along a dim.
+
+        Outside of autograd, the mean is cached until the weights are updated, since inference calls it for every
+        batch of samples.
+        """
+        weight = self.embedding.weight
+        if torch.is_grad_enabled() and weight.requires_grad:
+            return weight.mean(dim)
+        key = (dim, weight.data_ptr(), weight._version)
+        if key not in self._mean_cache:
+            self._mean_cache = {key: weight.detach().mean(dim)}
+        return self._mean_cache[key]
 
     def forward(self, in_tensor: Shaped[Tensor, "*batch input_dim"]) -> Shaped[Tensor, "*batch output_dim"]:
         """Call forward
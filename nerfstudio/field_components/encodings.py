@@ -18,7 +18,7 @@ Encoding functions
 
 import itertools
 from abc import abstractmethod
-from typing import Literal, Optional, Sequence
+from typing import Literal, Optional, Sequence, Tuple
 
 import numpy as np
 import torch
@@ -286,6 +286,7 @@ class HashEncoding(Encoding):
 
         self.tcnn_encoding = None
         self.hash_table = torch.empty(0)
+        self._half_table_cache: Optional[Tuple[Tuple[int, int, torch.dtype], Tensor]] = None
         if implementation == "tcnn" and not TCNN_EXISTS:
             print_tcnn_speed_warning("HashEncoding")
             implementation = "torch"
@@ -338,10 +339,48 @@ class HashEncoding(Encoding):
         x += self.hash_offset.to(x.device)
         return x
 
+    def get_hash_table(self) -> Shaped[Tensor, "table_size features_per_level"]:
+        """Returns the hash table to look the features up in.
+
+        Outside of autograd and under autocast, it is a copy of the table stored in the reduced precision of autocast,
+        which halves the memory traffic of the lookups. The copy is kept until the table is updated, next to the float32
+        table, so it adds half of the table size to the memory. Use store_reduced_precision to avoid it at inference.
+        """
+        if self.hash_table.dtype in (torch.float16, torch.bfloat16):
+            return self.hash_table
+        if not torch.is_autocast_enabled() and not torch.is_autocast_cpu_enabled():
+            return self.hash_table
+        if torch.is_grad_enabled() and self.hash_table.requires_grad:
+            return self.hash_table
+        if self.hash_table.is_cuda:
+            dtype = torch.get_autocast_gpu_dtype()
+        else:
+            dtype = torch.get_autocast_cpu_dtype()
+        key = (self.hash_table.data_ptr(), self.hash_table._version, dtype)
+        if self._half_table_cache is None or self._half_table_cache[0] != key:
+            self._half_table_cache = (key, self.hash_table.detach().to(dtype))
+        return self._half_table_cache[1]
+
+    def store_reduced_precision(self, dtype: torch.dtype = torch.float16) -> None:
+        """Stores the hash table in a reduced precision, for inference only. The float32 table is replaced, which
+        halves the memory of the table, and it no longer gets gradients, so the encoding can no longer be trained.
+
+        Args:
+            dtype: Precision to store the table in, float16 or bfloat16.
+        """
+        assert self.tcnn_encoding is None, "Only the torch implementation can store its hash table in reduced precision"
+        assert dtype in (torch.float16, torch.bfloat16), f"Unsupported hash table precision {dtype}"
+        self.hash_table = nn.Parameter(self.hash_table.detach().to(dtype), requires_grad=False)
+        self._half_table_cache = None
+
     def pytorch_fwd(self, in_tensor: Float[Tensor, "*bs input_dim"]) -> Float[Tensor, "*bs output_dim"]:
-        """Forward pass using pytorch. Significantly slower than TCNN implementation."""
+        """Forward pass using pytorch. Significantly slower than TCNN implementation.
+
+        The features are interpolated in float32, even when they are looked up in a reduced precision table.
+        """
 
         assert in_tensor.shape[-1] == 3
+        hash_table = self.get_hash_table()
         in_tensor = in_tensor[..., None, :]  # [..., 1, 3]
         scaled = in_tensor * self.scalings.view(-1, 1).to(in_tensor.device)  # [..., L, 3]
         scaled_c = torch.ceil(scaled).type(torch.int32)
@@ -358,14 +397,14 @@ class HashEncoding(Encoding):
         hashed_6 = self.hash_fn(scaled_f)
         hashed_7 = self.hash_fn(torch.cat([scaled_f[..., 0:1], scaled_c[..., 1:2], scaled_f[..., 2:3]], dim=-1))
 
-        f_0 = self.hash_table[hashed_0]  # [..., num_levels, features_per_level]
-        f_1 = self.hash_table[hashed_1]
-        f_2 = self.hash_table[hashed_2]
-        f_3 = self.hash_table[hashed_3]
-        f_4 = self.hash_table[hashed_4]
-        f_5 = self.hash_table[hashed_5]
-        f_6 = self.hash_table[hashed_6]
-        f_7 = self.hash_table[hashed_7]
+        f_0 = hash_table[hashed_0].float()  # [..., num_levels, features_per_level]
+        f_1 = hash_table[hashed_1].float()
+        f_2 = hash_table[hashed_2].float()
+        f_3 = hash_table[hashed_3].float()
+        f_4 = hash_table[hashed_4].float()
+        f_5 = hash_table[hashed_5].float()
+        f_6 = hash_table[hashed_6].float()
+        f_7 = hash_table[hashed_7].float()
 
         f_03 = f_0 * offset[..., 0:1] + f_3 * (1 - offset[..., 0:1])
         f_12 = f_1 * offset[..., 0:1] + f_2 * (1 - offset[..., 0:1])
@@ -387,6 +426,17 @@ class HashEncoding(Encoding):
         return self.pytorch_fwd(in_tensor)
 
 
+def _resample_grids(
+    coef: Float[Tensor, "num_grids num_components height width"],
+    width_coords: Float[Tensor, "num_grids new_width"],
+    height_coords: Float[Tensor, "num_grids new_height"],
+) -> Float[Tensor, "num_grids num_components new_height new_width"]:
+    """Resamples stacked feature grids at new normalized coordinates along their width and height."""
+    width_coords, height_coords = torch.broadcast_tensors(width_coords[:, None, :], height_coords[:, :, None])
+    grid = torch.stack([width_coords, height_coords], dim=-1)
+    return F.grid_sample(coef, grid, align_corners=True)
+
+
 class TensorCPEncoding(Encoding):
     """Learned CANDECOMP/PARFAC (CP) decomposition encoding used in TensoRF
 
@@ -436,6 +486,21 @@ class TensorCPEncoding(Encoding):
 
         self.resolution = resolution
 
+    @torch.no_grad()
+    def shrink_grid(self, bounds: Float[Tensor, "2 3"], resolution: int) -> None:
+        """Crops the underlying feature grid to a sub box and resamples it
+
+        Args:
+            bounds: Min and max corners of the sub box, in normalized coordinates in [-1, 1].
+            resolution: Target resolution of the grid spanning the sub box.
+        """
+        coords = torch.stack([torch.linspace(lo, hi, resolution) for lo, hi in bounds.T.tolist()])
+        coords = coords.to(self.line_coef.device)
+        line_coef = _resample_grids(self.line_coef.data, torch.zeros_like(coords[:, :1]), coords[[2, 1, 0]])
+
+        self.line_coef = torch.nn.Parameter(line_coef)
+        self.resolution = resolution
+
 
 class TensorVMEncoding(Encoding):
     """Learned vector-matrix encoding proposed by TensoRF
@@ -505,6 +570,22 @@ class TensorVMEncoding(Encoding):
         self.plane_coef, self.line_coef = torch.nn.Parameter(plane_coef), torch.nn.Parameter(line_coef)
         self.resolution = resolution
 
+    @torch.no_grad()
+    def shrink_grid(self, bounds: Float[Tensor, "2 3"], resolution: int) -> None:
+        """Crops the underlying feature grid to a sub box and resamples it
+
+        Args:
+            bounds: Min and max corners of the sub box, in normalized coordinates in [-1, 1].
+            resolution: Target resolution of the grid spanning the sub box.
+        """
+        coords = torch.stack([torch.linspace(lo, hi, resolution) for lo, hi in bounds.T.tolist()])
+        coords = coords.to(self.plane_coef.device)
+        plane_coef = _resample_grids(self.plane_coef.data, coords[[0, 0, 1]], coords[[1, 2, 2]])
+        line_coef = _resample_grids(self.line_coef.data, torch.zeros_like(coords[:, :1]), coords[[2, 1, 0]])
+
+        self.plane_coef, self.line_coef = torch.nn.Parameter(plane_coef), torch.nn.Parameter(line_coef)
+        self.resolution = resolution
+
 
 class TriplaneEncoding(Encoding):
     """Learned triplane encoding
@@ -589,6 +670,21 @@ class TriplaneEncoding(Encoding):
         self.plane_coef = torch.nn.Parameter(plane_coef)
         self.resolution = resolution
 
+    @torch.no_grad()
+    def shrink_grid(self, bounds: Float[Tensor, "2 3"], resolution: int) -> None:
+        """Crops the underlying feature grid to a sub box and resamples it
+
+        Args:
+            bounds: Min and max corners of the sub box, in normalized coordinates in [-1, 1].
+            resolution: Target resolution of the grid spanning the sub box.
+        """
+        coords = torch.stack([torch.linspace(lo, hi, resolution) for lo, hi in bounds.T.tolist()])
+        coords = coords.to(self.plane_coef.device)
+        plane_coef = _resample_grids(self.plane_coef.data, coords[[0, 0, 1]], coords[[1, 2, 2]])
+
+        self.plane_coef = torch.nn.Parameter(plane_coef)
+        self.resolution = resolution
+
 
 class KPlanesEncoding(Encoding):
     """Learned K-Planes encoding
@@ -62,6 +62,17 @@ def activation_to_tcnn_string(activation: Union[nn.Module, None]) -> str:
     )
 
 
+_INPLACE_ACTIVATIONS = {nn.ReLU: torch.relu_, nn.Sigmoid: torch.sigmoid_, nn.Tanh: torch.tanh_}
+
+
+def _apply_activation(activation: nn.Module, x: Tensor, inplace: bool) -> Tensor:
+    """Applies an activation function, in place on x if possible and requested."""
+    inplace_fn = _INPLACE_ACTIVATIONS.get(type(activation))
+    if inplace and inplace_fn is not None:
+        return inplace_fn(x)
+    return activation(x)
+
+
 class MLP(FieldComponent):
     """Multilayer perceptron
 
@@ -155,23 +166,30 @@ class MLP(FieldComponent):
     def pytorch_fwd(self, in_tensor: Float[Tensor, "*bs in_dim"]) -> Float[Tensor, "*bs out_dim"]:
         """Process input with a multilayer perceptron.
 
+        The input is flattened, so that each layer is a single matrix multiplication with its bias addition (addmm),
+        and the activations are applied in place when no gradient is needed. This is not a fused linear+activation
+        kernel: PyTorch has none, and each activation is still a separate kernel launch.
+
         Args:
             in_tensor: Network input
 
         Returns:
             MLP network output
         """
+        batch_shape = in_tensor.shape[:-1]
+        in_tensor = in_tensor.reshape(-1, in_tensor.shape[-1])
+        inplace = not torch.is_grad_enabled()
         x = in_tensor
         for i, layer in enumerate(self.layers):
             # as checked in `build_nn_modules`, 0 should not be in `_skip_connections`
             if i in self._skip_connections:
-                x = torch.cat([in_tensor, x], -1)
+                x = torch.cat([in_tensor.to(x.dtype), x], -1)
             x = layer(x)
             if self.activation is not None and i < len(self.layers) - 1:
-                x = self.activation(x)
+                x = _apply_activation(self.activation, x, inplace)
         if self.out_activation is not None:
-            x = self.out_activation(x)
-        return x
+            x = _apply_activation(self.out_activation, x, inplace)
+        return x.view(*batch_shape, x.shape[-1])
 
     def forward(self, in_tensor: Float[Tensor, "*bs in_dim"]) -> Float[Tensor, "*bs out_dim"]:
         if self.tcnn_encoding is not None:
@@ -18,7 +18,7 @@ Base class for the graphs.
 
 from abc import abstractmethod
 from dataclasses import dataclass, field
-from typing import Dict, Optional, Tuple, Type
+from typing import Callable, Dict, Optional, Tuple, Type
 
 import torch
 from jaxtyping import Float, Shaped
@@ -140,3 +140,24 @@ def get_normalized_directions(directions: Float[Tensor, "*bs 3"]) -> Float[Tenso
         directions: batch of directions
     """
     return (directions + 1.0) / 2.0
+
+
+def compute_per_ray(
+    values: Shaped[Tensor, "*bs num_samples in_dim"],
+    fn: Callable[[Shaped[Tensor, "num_values in_dim"]], Shaped[Tensor, "num_values out_dim"]],
+) -> Shaped[Tensor, "*bs num_samples out_dim"]:
+    """Applies a function to per sample values that are shared by all the samples of a ray, like their directions or
+    camera indices, only once per ray. The values are shared when they are broadcast along the samples, as in the ray
+    samples generated from a ray bundle, and the result is then a broadcast view. Otherwise, fn is applied to every
+    sample, eg. for packed or culled samples.
+
+    Args:
+        values: Per sample values.
+        fn: Function of a flat batch of values, eg. an encoding.
+    """
+    if values.dim() >= 3 and values.stride(-2) == 0:
+        per_ray_values = fn(values[..., 0, :].reshape(-1, values.shape[-1]))
+        per_ray_values = per_ray_values.view(*values.shape[:-2], 1, per_ray_values.shape[-1])
+        return per_ray_values.expand(*values.shape[:-1], per_ray_values.shape[-1])
+    per_sample_values = fn(values.reshape(-1, values.shape[-1]))
+    return per_sample_values.view(*values.shape[:-1], per_sample_values.shape[-1])
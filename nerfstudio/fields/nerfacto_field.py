@@ -37,7 +37,7 @@ from nerfstudio.field_components.field_heads import (
 )
 from nerfstudio.field_components.mlp import MLP
 from nerfstudio.field_components.spatial_distortions import SpatialDistortion
-from nerfstudio.fields.base_field import Field, get_normalized_directions
+from nerfstudio.fields.base_field import Field, compute_per_ray, get_normalized_directions
 
 
 class NerfactoField(Field):
@@ -233,37 +233,37 @@ class NerfactoField(Field):
         outputs = {}
         if ray_samples.camera_indices is None:
             raise AttributeError("Camera indices are not provided.")
-        camera_indices = ray_samples.camera_indices.squeeze()
-        directions = get_normalized_directions(ray_samples.frustums.directions)
-        directions_flat = directions.view(-1, 3)
-        d = self.direction_encoding(directions_flat)
+        directions = ray_samples.frustums.directions
+        # the samples of a ray share their direction, so it is only encoded once per ray
+        d = compute_per_ray(directions, lambda x: self.direction_encoding(get_normalized_directions(x)))
 
         outputs_shape = ray_samples.frustums.directions.shape[:-1]
 
         # appearance
         if self.training:
-            embedded_appearance = self.embedding_appearance(camera_indices)
+            embedded_appearance = compute_per_ray(
+                ray_samples.camera_indices, lambda x: self.embedding_appearance(x[:, 0])
+            )
         else:
             if self.use_average_appearance_embedding:
-                embedded_appearance = torch.ones(
-                    (*directions.shape[:-1], self.appearance_embedding_dim), device=directions.device
-                ) * self.embedding_appearance.mean(dim=0)
+                embedded_appearance = self.embedding_appearance.mean(dim=0)
             else:
-                embedded_appearance = torch.zeros(
-                    (*directions.shape[:-1], self.appearance_embedding_dim), device=directions.device
-                )
+                embedded_appearance = directions.new_zeros(self.appearance_embedding_dim)
+            embedded_appearance = embedded_appearance.expand(*outputs_shape, self.appearance_embedding_dim)
 
         # transients
         if self.use_transient_embedding and self.training:
-            embedded_transient = self.embedding_transient(camera_indices)
+            embedded_transient = compute_per_ray(
+                ray_samples.camera_indices, lambda x: self.embedding_transient(x[:, 0])
+            )
             transient_input = torch.cat(
                 [
-                    density_embedding.view(-1, self.geo_feat_dim),
-                    embedded_transient.view(-1, self.transient_embedding_dim),
+                    density_embedding.view(*outputs_shape, self.geo_feat_dim),
+                    embedded_transient,
                 ],
                 dim=-1,
             )
-            x = self.mlp_transient(transient_input).view(*outputs_shape, -1).to(directions)
+            x = self.mlp_transient(transient_input.view(-1, transient_input.shape[-1])).view(*outputs_shape, -1).to(directions)
             outputs[FieldHeadNames.UNCERTAINTY] = self.field_head_transient_uncertainty(x)
             outputs[FieldHeadNames.TRANSIENT_RGB] = self.field_head_transient_rgb(x)
             outputs[FieldHeadNames.TRANSIENT_DENSITY] = self.field_head_transient_density(x)
@@ -290,12 +290,54 @@ class NerfactoField(Field):
         h = torch.cat(
             [
                 d,
-                density_embedding.view(-1, self.geo_feat_dim),
-                embedded_appearance.view(-1, self.appearance_embedding_dim),
+                density_embedding.view(*outputs_shape, self.geo_feat_dim),
+                embedded_appearance,
             ],
             dim=-1,
         )
-        rgb = self.mlp_head(h).view(*outputs_shape, -1).to(directions)
+        rgb = self.mlp_head(h.view(-1, h.shape[-1])).view(*outputs_shape, -1).to(directions)
         outputs.update({FieldHeadNames.RGB: rgb})
 
         return outputs
+
+    def get_culled_outputs(
+        self,
+        ray_samples: RaySamples,
+        weight_threshold: float,
+        compute_normals: bool = False,
+        ray_indices: Optional[Tensor] = None,
+    ) -> Dict[FieldHeadNames, Tensor]:
+        """Evaluates the field like forward, but only runs the color and auxiliary heads on the samples whose weight
+        along their ray is above the threshold. The samples outside of the scene box have a zero density, so they are
+        always culled. The other outputs of the culled samples are zero, which barely changes the rendered values.
+
+        Args:
+            ray_samples: Samples to evaluate field on.
+            weight_threshold: Weight below which the heads are not evaluated on a sample.
+            compute_normals: Whether to compute the normals from the density.
+            ray_indices: Ray index for each sample, used when samples are packed.
+        """
+        if compute_normals:
+            with torch.enable_grad():
+                density, density_embedding = self.get_density(ray_samples)
+        else:
+            density, density_embedding = self.get_density(ray_samples)
+
+        with torch.no_grad():
+            mask = ray_samples.get_weights(density, ray_indices=ray_indices)[..., 0] > weight_threshold
+            if not mask.any():
+                # keep one sample, so that the heads still give the shapes of their outputs
+                mask.view(-1)[0] = True
+        packed_outputs = self.get_outputs(ray_samples[mask], density_embedding=density_embedding[mask])
+        field_outputs = {}
+        for name, packed_output in packed_outputs.items():
+            output = packed_output.new_zeros(mask.shape + packed_output.shape[-1:])
+            output[mask] = packed_output
+            field_outputs[name] = output
+        field_outputs[FieldHeadNames.DENSITY] = density
+
+        if compute_normals:
+            with torch.enable_grad():
+                normals = self.get_normals()
+            field_outputs[FieldHeadNames.NORMALS] = normals
+        return field_outputs
@@ -32,7 +32,7 @@ from nerfstudio.field_components.field_heads import (
     UncertaintyFieldHead,
 )
 from nerfstudio.field_components.mlp import MLP
-from nerfstudio.fields.base_field import Field
+from nerfstudio.fields.base_field import Field, compute_per_ray
 
 
 class VanillaNerfWField(Field):
@@ -130,15 +130,15 @@ class VanillaNerfWField(Field):
             Outputs of the NeRF-W field.
         """
         outputs = {}
-        encoded_dir = self.direction_encoding(ray_samples.frustums.directions)
+        encoded_dir = compute_per_ray(ray_samples.frustums.directions, self.direction_encoding)
         if ray_samples.camera_indices is None:
             raise AttributeError("Camera indices are not provided.")
-        camera_indices = ray_samples.camera_indices.squeeze().to(ray_samples.frustums.origins.device)
-        embedded_appearance = self.embedding_appearance(camera_indices)
+        camera_indices = ray_samples.camera_indices.to(ray_samples.frustums.origins.device)
+        embedded_appearance = compute_per_ray(camera_indices, lambda x: self.embedding_appearance(x[:, 0]))
         mlp_in = torch.cat([density_embedding, encoded_dir, embedded_appearance], dim=-1)  # type: ignore
         mlp_head_out = self.mlp_head(mlp_in)
         outputs[self.field_head_rgb.field_head_name] = self.field_head_rgb(mlp_head_out)  # static rgb
-        embedded_transient = self.embedding_transient(camera_indices)
+        embedded_transient = compute_per_ray(camera_indices, lambda x: self.embedding_transient(x[:, 0]))
         transient_mlp_in = torch.cat([density_embedding, embedded_transient], dim=-1)  # type: ignore
         transient_mlp_out = self.mlp_transient(transient_mlp_in)
         outputs[self.field_head_transient_uncertainty.field_head_name] = self.field_head_transient_uncertainty(
@@ -29,7 +29,7 @@ from nerfstudio.field_components.field_heads import (
     SemanticFieldHead,
 )
 from nerfstudio.field_components.mlp import MLP
-from nerfstudio.fields.base_field import Field
+from nerfstudio.fields.base_field import Field, compute_per_ray
 
 
 class SemanticNerfField(Field):
@@ -96,7 +96,7 @@ class SemanticNerfField(Field):
     def get_outputs(
         self, ray_samples: RaySamples, density_embedding: Optional[Tensor] = None
     ) -> Dict[FieldHeadNames, Tensor]:
-        encoded_dir = self.direction_encoding(ray_samples.frustums.directions)
+        encoded_dir = compute_per_ray(ray_samples.frustums.directions, self.direction_encoding)
         mlp_out = self.mlp_head(torch.cat([encoded_dir, density_embedding], dim=-1))  # type: ignore
         outputs = {}
         # rgb
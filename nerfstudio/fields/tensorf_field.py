@@ -15,9 +15,12 @@
 """TensoRF Field"""
 
 
-from typing import Dict, Optional
+import itertools
+from typing import Any, Dict, Optional
 
 import torch
+import torch.nn.functional as F
+from jaxtyping import Bool, Float
 from torch import Tensor, nn
 from torch.nn.parameter import Parameter
 
@@ -57,6 +60,8 @@ class TensoRFField(Field):
     ) -> None:
         super().__init__()
         self.aabb = Parameter(aabb, requires_grad=False)
+        # occupancy of the voxels spanning the aabb, a single occupied voxel until the alpha mask is computed
+        self.register_buffer("alpha_mask", torch.ones((1, 1, 1), dtype=torch.bool, device=aabb.device))
         self.feature_encoding = feature_encoding
         self.direction_encoding = direction_encoding
         self.density_encoding = density_encoding
@@ -82,16 +87,52 @@ class TensoRFField(Field):
 
         self.field_output_rgb = RGBFieldHead(in_dim=self.mlp_head.get_out_dim(), activation=nn.Sigmoid())
 
-    def get_density(self, ray_samples: RaySamples) -> Tensor:
-        positions = SceneBox.get_normalized_positions(ray_samples.frustums.get_positions(), self.aabb)
-        positions = positions * 2 - 1
+    def has_alpha_mask(self) -> bool:
+        """Returns whether the alpha mask was computed, so that the samples in empty voxels are skipped."""
+        return self.alpha_mask.numel() > 1
+
+    def get_occupancy(self, positions: Float[Tensor, "*bs 3"]) -> Bool[Tensor, "*bs"]:
+        """Returns whether positions fall in an occupied voxel of the alpha mask.
+
+        Args:
+            positions: Positions normalized to [-1, 1] in the aabb.
+        """
+        resolution = torch.tensor(self.alpha_mask.shape, device=positions.device)
+        indices = torch.round((positions + 1) / 2 * (resolution - 1)).long()
+        indices = torch.minimum(indices.clamp(min=0), resolution - 1)
+        inside = torch.all((positions >= -1) & (positions <= 1), dim=-1)
+        return inside & self.alpha_mask[indices[..., 0], indices[..., 1], indices[..., 2]]
+
+    def get_density_from_positions(self, positions: Float[Tensor, "*bs 3"]) -> Float[Tensor, "*bs 1"]:
+        """Returns the densities at positions normalized to [-1, 1] in the aabb, ignoring the alpha mask."""
         density = self.density_encoding(positions)
-        density_enc = torch.sum(density, dim=-1)[:, :, None]
+        density_enc = torch.sum(density, dim=-1)[..., None]
         relu = torch.nn.ReLU()
         density_enc = relu(density_enc)
         return density_enc
 
+    def get_density(self, ray_samples: RaySamples) -> Tensor:
+        positions = SceneBox.get_normalized_positions(ray_samples.frustums.get_positions(), self.aabb)
+        positions = positions * 2 - 1
+        if not self.has_alpha_mask():
+            return self.get_density_from_positions(positions)
+        occupied = self.get_occupancy(positions)
+        density_enc = positions.new_zeros((*positions.shape[:-1], 1))
+        if occupied.any():
+            density_enc[occupied] = self.get_density_from_positions(positions[occupied])
+        return density_enc
+
     def get_outputs(self, ray_samples: RaySamples, density_embedding: Optional[Tensor] = None) -> Tensor:
+        if not self.has_alpha_mask():
+            return self._get_rgb(ray_samples)
+        positions = SceneBox.get_normalized_positions(ray_samples.frustums.get_positions(), self.aabb)
+        occupied = self.get_occupancy(positions * 2 - 1)
+        rgb = positions.new_zeros((*positions.shape[:-1], 3))
+        if occupied.any():
+            rgb[occupied] = self._get_rgb(ray_samples[occupied][:, None])[:, 0]
+        return rgb
+
+    def _get_rgb(self, ray_samples: RaySamples) -> Tensor:
         d = ray_samples.frustums.directions
         positions = SceneBox.get_normalized_positions(ray_samples.frustums.get_positions(), self.aabb)
         positions = positions * 2 - 1
@@ -141,3 +182,58 @@ class TensoRFField(Field):
             rgb = self.get_outputs(ray_samples, None)
 
         return {FieldHeadNames.DENSITY: density, FieldHeadNames.RGB: rgb}
+
+    @torch.no_grad()
+    def update_alpha_mask(self, resolution: int, step_size: float, threshold: float = 1e-4) -> None:
+        """Recomputes the alpha mask from the density grid. A voxel is occupied when the alpha of a step through one
+        of its neighbours is above the threshold.
+
+        Args:
+            resolution: Number of voxels of the alpha mask along each axis of the aabb.
+            step_size: Length of the step, in world units, the alpha is computed for.
+            threshold: Alpha at or below which a voxel is empty.
+        """
+        coords = torch.linspace(-1, 1, resolution, device=self.aabb.device)
+        alpha = torch.empty((resolution,) * 3, device=self.aabb.device)
+        # one slice at a time, to bound the memory of the density encoding
+        for i in range(resolution):
+            positions = torch.stack(torch.meshgrid(coords[i : i + 1], coords, coords, indexing="ij"), dim=-1)
+            density = self.get_density_from_positions(positions.view(-1, 3))
+            alpha[i] = (1 - torch.exp(-density * step_size)).view(resolution, resolution)
+        alpha = F.max_pool3d(alpha[None, None], kernel_size=3, stride=1, padding=1)[0, 0]
+        self.alpha_mask = alpha > threshold
+
+    def get_alpha_mask_bounds(self) -> Float[Tensor, "2 3"]:
+        """Returns the bounds of the occupied voxels of the alpha mask, with a margin of one voxel, in normalized
+        coordinates in [-1, 1]."""
+        occupied = torch.nonzero(self.alpha_mask)
+        resolution = torch.tensor(self.alpha_mask.shape, device=occupied.device)
+        if len(occupied) == 0 or not self.has_alpha_mask():
+            return torch.tensor([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]], device=occupied.device)
+        lower = (occupied.min(dim=0).values - 1).clamp(min=0)
+        upper = torch.minimum(occupied.max(dim=0).values + 1, resolution - 1)
+        return torch.stack([lower, upper]) / (resolution - 1) * 2 - 1
+
+    @torch.no_grad()
+    def shrink(self, bounds: Float[Tensor, "2 3"], resolution: int) -> None:
+        """Shrinks the aabb and the density and color grids to a sub box of the aabb. The alpha mask is reset.
+
+        Args:
+            bounds: Min and max corners of the sub box, in normalized coordinates in [-1, 1].
+            resolution: Resolution of the grids spanning the sub box.
+        """
+        self.density_encoding.shrink_grid(bounds, resolution)  # type: ignore
+        self.color_encoding.shrink_grid(bounds, resolution)  # type: ignore
+        bounds = bounds.to(self.aabb)
+        self.aabb.data = self.aabb[0] + (bounds + 1) / 2 * (self.aabb[1] - self.aabb[0])
+        self.alpha_mask = torch.ones((1, 1, 1), dtype=torch.bool, device=self.aabb.device)
+
+    def _load_from_state_dict(self, state_dict: Dict[str, Any], prefix: str, *args, **kwargs) -> None:
+        # the grids and the alpha mask are resized during training, by upsampling and shrinking
+        for name, tensor in itertools.chain(self.named_parameters(), self.named_buffers()):
+            if prefix + name in state_dict and state_dict[prefix + name].shape != tensor.shape:
+                tensor.data = tensor.new_empty(state_dict[prefix + name].shape)
+        for encoding in (self.density_encoding, self.color_encoding):
+            if hasattr(encoding, "resolution"):
+                encoding.resolution = next(encoding.parameters()).shape[-2]
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
@@ -15,11 +15,12 @@
 """
 Collection of Losses.
 """
+import math
 from enum import Enum
 from typing import Dict, Literal, Optional, Tuple, cast
 
 import torch
-from jaxtyping import Bool, Float
+from jaxtyping import Bool, Float, Int
 from torch import Tensor, nn
 
 from nerfstudio.cameras.rays import RaySamples
@@ -49,6 +50,20 @@ FORCE_PSEUDODEPTH_LOSS = False
 PSEUDODEPTH_COMPATIBLE_LOSSES = (DepthLossType.SPARSENERF_RANKING,)
 
 
+def _outer_indices(
+    t0_starts: Float[Tensor, "*batch num_samples_0"],
+    t0_ends: Float[Tensor, "*batch num_samples_0"],
+    t1_starts: Float[Tensor, "*batch num_samples_1"],
+    t1_ends: Float[Tensor, "*batch num_samples_1"],
+) -> Tuple[Int[Tensor, "*batch num_samples_0"], Int[Tensor, "*batch num_samples_0"]]:
+    """Returns the first and last intervals of t1 overlapping each interval of t0."""
+    idx_lo = torch.searchsorted(t1_starts.contiguous(), t0_starts.contiguous(), side="right") - 1
+    idx_lo = torch.clamp(idx_lo, min=0, max=t1_starts.shape[-1] - 1)
+    idx_hi = torch.searchsorted(t1_ends.contiguous(), t0_ends.contiguous(), side="right")
+    idx_hi = torch.clamp(idx_hi, min=0, max=t1_starts.shape[-1] - 1)
+    return idx_lo, idx_hi
+
+
 def outer(
     t0_starts: Float[Tensor, "*batch num_samples_0"],
     t0_ends: Float[Tensor, "*batch num_samples_0"],
@@ -70,10 +85,7 @@ def outer(
     """
     cy1 = torch.cat([torch.zeros_like(y1[..., :1]), torch.cumsum(y1, dim=-1)], dim=-1)
 
-    idx_lo = torch.searchsorted(t1_starts.contiguous(), t0_starts.contiguous(), side="right") - 1
-    idx_lo = torch.clamp(idx_lo, min=0, max=y1.shape[-1] - 1)
-    idx_hi = torch.searchsorted(t1_ends.contiguous(), t0_ends.contiguous(), side="right")
-    idx_hi = torch.clamp(idx_hi, min=0, max=y1.shape[-1] - 1)
+    idx_lo, idx_hi = _outer_indices(t0_starts, t0_ends, t1_starts, t1_ends)
     cy1_lo = torch.take_along_dim(cy1[..., :-1], idx_lo, dim=-1)
     cy1_hi = torch.take_along_dim(cy1[..., 1:], idx_hi, dim=-1)
     y0_outer = cy1_hi - cy1_lo
@@ -109,40 +121,134 @@ def ray_samples_to_sdist(ray_samples):
     return sdist
 
 
+class _InterlevelLoss(torch.autograd.Function):  # typing: ignore
+    """
+    Sum over the proposal levels of the mean of lossfun_outer, in a single pass. Only the overlapping interval indices
+    and the derivatives of the loss with respect to the upper bounds are kept for the backward pass, which scatters
+    them into the prefix sums of the proposal weights. Only differentiable with respect to the proposal weights. The
+    upper bounds only depend on the interval edges through the overlapping indices, so the loss has no gradient with
+    respect to them either, and they must be detached.
+    """
+
+    @staticmethod
+    def forward(ctx, t, w, *level_inputs):
+        assert not any(ctx.needs_input_grad[::2]), "The interval edges must not require gradients."
+        assert not ctx.needs_input_grad[1], "The weights of the last level must not require gradients."
+        # level_inputs alternates the interval edges and the weights of each proposal level
+        saved = []
+        loss = torch.zeros((), dtype=w.dtype, device=w.device)
+        for t_env, w_env in zip(level_inputs[::2], level_inputs[1::2]):
+            idx_lo, idx_hi = _outer_indices(t[..., :-1], t[..., 1:], t_env[..., :-1], t_env[..., 1:])
+            cw_env = torch.cat([torch.zeros_like(w_env[..., :1]), torch.cumsum(w_env, dim=-1)], dim=-1)
+            w_outer = torch.take_along_dim(cw_env[..., 1:], idx_hi, dim=-1)
+            w_outer -= torch.take_along_dim(cw_env[..., :-1], idx_lo, dim=-1)
+            residuals = torch.clip(w - w_outer, min=0)
+            loss += torch.mean(residuals**2 / (w + EPS))
+            # derivative of the mean with respect to the upper bounds
+            saved += [idx_lo, idx_hi, -2 * residuals / ((w + EPS) * residuals.numel())]
+        ctx.save_for_backward(*saved)
+        ctx.num_env_samples = [w_env.shape[-1] for w_env in level_inputs[1::2]]
+        return loss
+
+    @staticmethod
+    def backward(ctx, grad_loss):
+        grads = [None, None]
+        saved = ctx.saved_tensors
+        for level, num_env_samples in enumerate(ctx.num_env_samples):
+            idx_lo, idx_hi, grad_w_outer = saved[3 * level : 3 * level + 3]
+            grad_w_outer = grad_w_outer * grad_loss
+            # w_outer is the difference of the prefix sums of the weights up to idx_hi and before idx_lo
+            grad_cw_env = torch.zeros(
+                (*grad_w_outer.shape[:-1], num_env_samples + 1), dtype=grad_w_outer.dtype, device=grad_w_outer.device
+            )
+            grad_cw_env.scatter_add_(-1, idx_hi + 1, grad_w_outer)
+            grad_cw_env.scatter_add_(-1, idx_lo, -grad_w_outer)
+            grad_w_env = torch.flip(torch.cumsum(torch.flip(grad_cw_env[..., 1:], dims=(-1,)), dim=-1), dims=(-1,))
+            grads += [None, grad_w_env]
+        return tuple(grads)
+
+
 def interlevel_loss(weights_list, ray_samples_list) -> torch.Tensor:
     """Calculates the proposal loss in the MipNeRF-360 paper.
 
     https://github.com/kakaobrain/NeRF-Factory/blob/f61bb8744a5cb4820a4d968fb3bfbed777550f4a/src/model/mipnerf360/model.py#L515
     https://github.com/google-research/multinerf/blob/b02228160d3179300c7d499dca28cb9ca3677f32/internal/train_utils.py#L133
+
+    The bounds of all the proposal levels are computed in a single pass, only differentiable with respect to the
+    proposal weights.
     """
     c = ray_samples_to_sdist(ray_samples_list[-1]).detach()
     w = weights_list[-1][..., 0].detach()
     assert len(ray_samples_list) > 0
 
-    loss_interlevel = 0.0
+    level_inputs = []
     for ray_samples, weights in zip(ray_samples_list[:-1], weights_list[:-1]):
-        sdist = ray_samples_to_sdist(ray_samples)
-        cp = sdist  # (num_rays, num_samples + 1)
-        wp = weights[..., 0]  # (num_rays, num_samples)
-        loss_interlevel += torch.mean(lossfun_outer(c, w, cp, wp))
+        level_inputs += [ray_samples_to_sdist(ray_samples).detach(), weights[..., 0]]
+    loss_interlevel = _InterlevelLoss.apply(c, w, *level_inputs)
 
     assert isinstance(loss_interlevel, Tensor)
     return loss_interlevel
 
 
+class _DistortionLoss(torch.autograd.Function):  # typing: ignore
+    """
+    Distortion loss of each ray in its O(num_samples) prefix sum form. Requires sorted midpoints, and is only
+    differentiable with respect to the weights, use _distortion_loss for sample distances that require gradients.
+    """
+
+    @staticmethod
+    def _exclusive_cumsum(values: Tensor) -> Tensor:
+        return torch.cumsum(values, dim=-1) - values
+
+    @staticmethod
+    def loss(midpoints: Tensor, deltas: Tensor, w: Tensor) -> Tensor:
+        """The prefix sum form of the loss, differentiable with respect to all its inputs through autograd."""
+        # sum_ij w_i w_j |u_i - u_j| = 2 sum_i w_i sum_{j < i} w_j (u_i - u_j)
+        wm = w * midpoints
+        loss_inter = 2 * torch.sum(
+            w * (midpoints * _DistortionLoss._exclusive_cumsum(w) - _DistortionLoss._exclusive_cumsum(wm)), dim=-1
+        )
+        loss_intra = torch.sum(w**2 * deltas, dim=-1) / 3
+        return loss_inter + loss_intra
+
+    @staticmethod
+    def forward(ctx, midpoints, deltas, w):
+        ctx.save_for_backward(midpoints, deltas, w)
+        return _DistortionLoss.loss(midpoints, deltas, w)
+
+    @staticmethod
+    def backward(ctx, grad_loss):
+        midpoints, deltas, w = ctx.saved_tensors
+        wm = w * midpoints
+        w_before, wm_before = _DistortionLoss._exclusive_cumsum(w), _DistortionLoss._exclusive_cumsum(wm)
+        w_after = torch.sum(w, dim=-1, keepdim=True) - w_before - w
+        wm_after = torch.sum(wm, dim=-1, keepdim=True) - wm_before - wm
+        # 2 sum_j w_j |u_i - u_j|, split into the samples before and after the sample i
+        grad_w = 2 * (midpoints * (w_before - w_after) - wm_before + wm_after) + 2 * w * deltas / 3
+        return None, None, grad_w * grad_loss[..., None]
+
+
+def _distortion_loss(midpoints: Tensor, deltas: Tensor, w: Tensor) -> Tensor:
+    """Distortion loss of each ray. The backward pass of _DistortionLoss is used when only the weights require
+    gradients, which is the case for the detached sample distances of the samplers. Otherwise autograd
+    differentiates the same prefix sums, so that the sample distances get their gradients too."""
+    if torch.is_grad_enabled() and (midpoints.requires_grad or deltas.requires_grad):
+        return _DistortionLoss.loss(midpoints, deltas, w)
+    loss = _DistortionLoss.apply(midpoints, deltas, w)
+    assert isinstance(loss, Tensor)
+    return loss
+
+
 # Verified
 def lossfun_distortion(t, w):
     """
     https://github.com/kakaobrain/NeRF-Factory/blob/f61bb8744a5cb4820a4d968fb3bfbed777550f4a/src/model/mipnerf360/helper.py#L142
     https://github.com/google-research/multinerf/blob/b02228160d3179300c7d499dca28cb9ca3677f32/internal/stepfun.py#L266
+
+    Computed in O(num_samples) with prefix sums over the sorted interval midpoints.
     """
     ut = (t[..., 1:] + t[..., :-1]) / 2
-    dut = torch.abs(ut[..., :, None] - ut[..., None, :])
-    loss_inter = torch.sum(w * torch.sum(w[..., None, :] * dut, dim=-1), dim=-1)
-
-    loss_intra = torch.sum(w**2 * (t[..., 1:] - t[..., :-1]), dim=-1) / 3
-
-    return loss_inter + loss_intra
+    return _distortion_loss(ut, t[..., 1:] - t[..., :-1], w)
 
 
 def distortion_loss(weights_list, ray_samples_list):
@@ -188,13 +294,8 @@ def nerfstudio_distortion_loss(
     assert starts is not None and ends is not None, "Ray samples must have spacing starts and ends"
     midpoints = (starts + ends) / 2.0  # (..., num_samples, 1)
 
-    loss = (
-        weights * weights[..., None, :, 0] * torch.abs(midpoints - midpoints[..., None, :, 0])
-    )  # (..., num_samples, num_samples)
-    loss = torch.sum(loss, dim=(-1, -2))[..., None]  # (..., num_samples)
-    loss = loss + 1 / 3.0 * torch.sum(weights**2 * (ends - starts), dim=-2)
-
-    return loss
+    loss = _distortion_loss(midpoints[..., 0], (ends - starts)[..., 0], weights[..., 0])
+    return loss[..., None]
 
 
 def orientation_loss(
@@ -221,15 +322,45 @@ def pred_normal_loss(
     return (weights[..., 0] * (1.0 - torch.sum(normals * pred_normals, dim=-1))).sum(dim=-1)
 
 
+def _ds_nerf_kernel(
+    termination_depth: Float[Tensor, "*batch 1"],
+    steps: Float[Tensor, "*batch num_samples 1"],
+    lengths: Float[Tensor, "*batch num_samples 1"],
+    sigma: Float[Tensor, "1"],
+) -> Float[Tensor, "*batch num_samples 1"]:
+    """Returns the weighting of the negative log weights of each sample in the DS-NeRF depth loss."""
+    return torch.exp(-((steps - termination_depth[..., None, :]) ** 2) / (2 * sigma)) * lengths
+
+
+class _DSNeRFDepthLoss(torch.autograd.Function):  # typing: ignore
+    """
+    DS-NeRF depth loss of each ray, which recomputes the per sample terms in the backward pass instead of keeping them
+    for it. Only differentiable with respect to the weights, the samplers detach the sample distances.
+    """
+
+    @staticmethod
+    def forward(ctx, weights, termination_depth, steps, lengths, sigma):
+        ctx.save_for_backward(weights, termination_depth, steps, lengths, sigma)
+        return (-torch.log(weights + EPS) * _ds_nerf_kernel(termination_depth, steps, lengths, sigma)).sum(-2)
+
+    @staticmethod
+    def backward(ctx, grad_loss):
+        weights, termination_depth, steps, lengths, sigma = ctx.saved_tensors
+        kernel = _ds_nerf_kernel(termination_depth, steps, lengths, sigma)
+        return -kernel / (weights + EPS) * grad_loss[..., None, :], None, None, None, None
+
+
 def ds_nerf_depth_loss(
     weights: Float[Tensor, "*batch num_samples 1"],
     termination_depth: Float[Tensor, "*batch 1"],
     steps: Float[Tensor, "*batch num_samples 1"],
     lengths: Float[Tensor, "*batch num_samples 1"],
-    sigma: Float[Tensor, "0"],
-) -> Float[Tensor, "*batch 1"]:
+    sigma: Float[Tensor, "1"],
+) -> Float[Tensor, ""]:
     """Depth loss from Depth-supervised NeRF (Deng et al., 2022).
 
+    Only the per ray losses are kept for the backward pass, the per sample terms are recomputed in it.
+
     Args:
         weights: Weights predicted for each sample.
         termination_depth: Ground truth depth of rays.
@@ -241,20 +372,56 @@ def ds_nerf_depth_loss(
     """
     depth_mask = termination_depth > 0
 
-    loss = -torch.log(weights + EPS) * torch.exp(-((steps - termination_depth[:, None]) ** 2) / (2 * sigma)) * lengths
-    loss = loss.sum(-2) * depth_mask
+    loss = cast(Tensor, _DSNeRFDepthLoss.apply(weights, termination_depth, steps, lengths, sigma))
+    loss = loss * depth_mask
     return torch.mean(loss)
 
 
+def _urf_line_of_sight_residuals(
+    weights: Float[Tensor, "*batch num_samples 1"],
+    termination_depth: Float[Tensor, "*batch 1"],
+    steps: Float[Tensor, "*batch num_samples 1"],
+    sigma: Float[Tensor, "1"],
+) -> Float[Tensor, "*batch num_samples 1"]:
+    """Returns the differences between the weights and the target distribution of the line of sight losses of Urban
+    Radiance Fields, which are zero behind the depth."""
+    distances = steps - termination_depth[..., None, :]
+    target_sigma = sigma / URF_SIGMA_SCALE_FACTOR
+    target = torch.exp(-0.5 * (distances / target_sigma) ** 2) / (target_sigma * math.sqrt(2 * math.pi))
+    # the target is zero in the empty space in front of the depth
+    target = torch.where(distances < -sigma, 0.0, target)
+    return torch.where(distances <= sigma, weights - target, 0.0)
+
+
+class _URFLineOfSightLoss(torch.autograd.Function):  # typing: ignore
+    """
+    Line of sight loss of Urban Radiance Fields of each ray, which recomputes the per sample terms in the backward pass
+    instead of keeping them for it. Only differentiable with respect to the weights, the samplers detach the sample
+    distances.
+    """
+
+    @staticmethod
+    def forward(ctx, weights, termination_depth, steps, sigma):
+        ctx.save_for_backward(weights, termination_depth, steps, sigma)
+        return (_urf_line_of_sight_residuals(weights, termination_depth, steps, sigma) ** 2).sum(-2)
+
+    @staticmethod
+    def backward(ctx, grad_loss):
+        residuals = _urf_line_of_sight_residuals(*ctx.saved_tensors)
+        return 2 * residuals * grad_loss[..., None, :], None, None, None
+
+
 def urban_radiance_field_depth_loss(
     weights: Float[Tensor, "*batch num_samples 1"],
     termination_depth: Float[Tensor, "*batch 1"],
     predicted_depth: Float[Tensor, "*batch 1"],
     steps: Float[Tensor, "*batch num_samples 1"],
-    sigma: Float[Tensor, "0"],
-) -> Float[Tensor, "*batch 1"]:
+    sigma: Float[Tensor, "1"],
+) -> Float[Tensor, ""]:
     """Lidar losses from Urban Radiance Fields (Rematas et al., 2022).
 
+    Only the per ray losses are kept for the backward pass, the per sample terms are recomputed in it.
+
     Args:
         weights: Weights predicted for each sample.
         termination_depth: Ground truth depth of rays.
@@ -270,16 +437,7 @@ def urban_radiance_field_depth_loss(
     expected_depth_loss = (termination_depth - predicted_depth) ** 2
 
     # Line of sight losses
-    target_distribution = torch.distributions.normal.Normal(0.0, sigma / URF_SIGMA_SCALE_FACTOR)
-    termination_depth = termination_depth[:, None]
-    line_of_sight_loss_near_mask = torch.logical_and(
-        steps <= termination_depth + sigma, steps >= termination_depth - sigma
-    )
-    line_of_sight_loss_near = (weights - torch.exp(target_distribution.log_prob(steps - termination_depth))) ** 2
-    line_of_sight_loss_near = (line_of_sight_loss_near_mask * line_of_sight_loss_near).sum(-2)
-    line_of_sight_loss_empty_mask = steps < termination_depth - sigma
-    line_of_sight_loss_empty = (line_of_sight_loss_empty_mask * weights**2).sum(-2)
-    line_of_sight_loss = line_of_sight_loss_near + line_of_sight_loss_empty
+    line_of_sight_loss = cast(Tensor, _URFLineOfSightLoss.apply(weights, termination_depth, steps, sigma))
 
     loss = (expected_depth_loss + line_of_sight_loss) * depth_mask
     return torch.mean(loss)
@@ -290,11 +448,11 @@ def depth_loss(
     ray_samples: RaySamples,
     termination_depth: Float[Tensor, "*batch 1"],
     predicted_depth: Float[Tensor, "*batch 1"],
-    sigma: Float[Tensor, "0"],
+    sigma: Float[Tensor, "1"],
     directions_norm: Float[Tensor, "*batch 1"],
     is_euclidean: bool,
     depth_loss_type: DepthLossType,
-) -> Float[Tensor, "0"]:
+) -> Float[Tensor, ""]:
     """Implementation of depth losses.
 
     Args:
@@ -356,10 +514,10 @@ class MiDaSMSELoss(nn.Module):
 
     def forward(
         self,
-        prediction: Float[Tensor, "1 32 mult"],
-        target: Float[Tensor, "1 32 mult"],
-        mask: Bool[Tensor, "1 32 mult"],
-    ) -> Float[Tensor, "0"]:
+        prediction: Float[Tensor, "batch height width"],
+        target: Float[Tensor, "batch height width"],
+        mask: Bool[Tensor, "batch height width"],
+    ) -> Float[Tensor, ""]:
         """
         Args:
             prediction: predicted depth map
@@ -377,6 +535,47 @@ class MiDaSMSELoss(nn.Module):
 
 
 # losses based on https://github.com/autonomousvision/monosdf/blob/main/code/model/loss.py
+class _MultiscaleGradientLoss(torch.autograd.Function):  # typing: ignore
+    """
+    Sums of the absolute gradients of a masked depth difference, subsampled by a factor 2**scale for each scale.
+    Only the difference is kept for the backward pass, which scatters the signs of the gradients back into it.
+    """
+
+    @staticmethod
+    def _masked_gradients(diff, mask, step):
+        diff, mask = diff[:, ::step, ::step], mask[:, ::step, ::step]
+        grad_x = (diff[:, :, 1:] - diff[:, :, :-1]) * (mask[:, :, 1:] & mask[:, :, :-1])
+        grad_y = (diff[:, 1:, :] - diff[:, :-1, :]) * (mask[:, 1:, :] & mask[:, :-1, :])
+        return grad_x, grad_y
+
+    @staticmethod
+    def forward(ctx, diff, mask, scales):
+        ctx.save_for_backward(diff, mask)
+        ctx.scales = scales
+        image_losses = []
+        for scale in range(scales):
+            grad_x, grad_y = _MultiscaleGradientLoss._masked_gradients(diff, mask, pow(2, scale))
+            image_losses.append(grad_x.abs().sum((1, 2)) + grad_y.abs().sum((1, 2)))
+        return torch.stack(image_losses)
+
+    @staticmethod
+    def backward(ctx, grad_image_losses):
+        diff, mask = ctx.saved_tensors
+        grad_diff = torch.zeros_like(diff)
+        for scale in range(ctx.scales):
+            step = pow(2, scale)
+            grad_x, grad_y = _MultiscaleGradientLoss._masked_gradients(diff, mask, step)
+            grad = grad_image_losses[scale][:, None, None]
+            grad_x = torch.sign(grad_x) * grad
+            grad_y = torch.sign(grad_y) * grad
+            grad_diff_scale = grad_diff[:, ::step, ::step]
+            grad_diff_scale[:, :, 1:] += grad_x
+            grad_diff_scale[:, :, :-1] -= grad_x
+            grad_diff_scale[:, 1:, :] += grad_y
+            grad_diff_scale[:, :-1, :] -= grad_y
+        return grad_diff, None, None
+
+
 class GradientLoss(nn.Module):
     """
     multiscale, scale-invariant gradient matching term to the disparity space.
@@ -396,10 +595,10 @@ class GradientLoss(nn.Module):
 
     def forward(
         self,
-        prediction: Float[Tensor, "1 32 mult"],
-        target: Float[Tensor, "1 32 mult"],
-        mask: Bool[Tensor, "1 32 mult"],
-    ) -> Float[Tensor, "0"]:
+        prediction: Float[Tensor, "batch height width"],
+        target: Float[Tensor, "batch height width"],
+        mask: Bool[Tensor, "batch height width"],
+    ) -> Float[Tensor, ""]:
         """
         Args:
             prediction: predicted depth map
@@ -411,25 +610,23 @@ class GradientLoss(nn.Module):
         assert self.__scales >= 1
         total = 0.0
 
+        # the masked difference is subsampled at every scale, without allocating a pyramid of it
+        diff = torch.mul(mask, prediction - target)
+        image_losses = cast(Tensor, _MultiscaleGradientLoss.apply(diff, mask, self.__scales))
         for scale in range(self.__scales):
             step = pow(2, scale)
-
-            grad_loss = self.gradient_loss(
-                prediction[:, ::step, ::step],
-                target[:, ::step, ::step],
-                mask[:, ::step, ::step],
-            )
-            total += grad_loss
+            summed_mask = torch.sum(mask[:, ::step, ::step], (1, 2))
+            total += masked_reduction(image_losses[scale], summed_mask, self.reduction_type)
 
         assert isinstance(total, Tensor)
         return total
 
     def gradient_loss(
         self,
-        prediction: Float[Tensor, "1 32 mult"],
-        target: Float[Tensor, "1 32 mult"],
-        mask: Bool[Tensor, "1 32 mult"],
-    ) -> Float[Tensor, "0"]:
+        prediction: Float[Tensor, "batch height width"],
+        target: Float[Tensor, "batch height width"],
+        mask: Bool[Tensor, "batch height width"],
+    ) -> Float[Tensor, ""]:
         """
         multiscale, scale-invariant gradient matching term to the disparity space.
         This term biases discontinuities to be sharp and to coincide with discontinuities in the ground truth
@@ -482,10 +679,10 @@ class ScaleAndShiftInvariantLoss(nn.Module):
 
     def forward(
         self,
-        prediction: Float[Tensor, "1 32 mult"],
-        target: Float[Tensor, "1 32 mult"],
-        mask: Bool[Tensor, "1 32 mult"],
-    ) -> Float[Tensor, "0"]:
+        prediction: Float[Tensor, "batch height width"],
+        target: Float[Tensor, "batch height width"],
+        mask: Bool[Tensor, "batch height width"],
+    ) -> Float[Tensor, ""]:
         """
         Args:
             prediction: predicted depth map (unnormalized)
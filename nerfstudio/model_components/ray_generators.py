@@ -15,12 +15,14 @@
 """
 Ray generator.
 """
+import torch
 from jaxtyping import Int
 from torch import Tensor, nn
 
 from nerfstudio.cameras.camera_optimizers import CameraOptimizer
-from nerfstudio.cameras.cameras import Cameras
+from nerfstudio.cameras.cameras import Cameras, CameraType
 from nerfstudio.cameras.rays import RayBundle
+from nerfstudio.utils import poses as pose_utils
 
 
 class RayGenerator(nn.Module):
@@ -39,6 +41,18 @@ class RayGenerator(nn.Module):
         self.cameras = cameras
         self.pose_optimizer = pose_optimizer
         self.register_buffer("image_coords", cameras.get_image_coords(), persistent=False)
+        # The ray origins of these cameras are overwritten per ray after the camera to world matrices are applied, so
+        # their pose correction has to be applied per ray, after the overwrite.
+        cam_types = torch.unique(cameras.camera_type)
+        self.per_ray_pose_correction = any(
+            cam_type.value in cam_types
+            for cam_type in (
+                CameraType.OMNIDIRECTIONALSTEREO_L,
+                CameraType.OMNIDIRECTIONALSTEREO_R,
+                CameraType.VR180_L,
+                CameraType.VR180_R,
+            )
+        )
 
     def forward(self, ray_indices: Int[Tensor, "num_rays 3"]) -> RayBundle:
         """Index into the cameras to generate the rays.
@@ -51,11 +65,18 @@ class RayGenerator(nn.Module):
         x = ray_indices[:, 2]  # col indices
         coords = self.image_coords[y, x]
 
-        camera_opt_to_camera = self.pose_optimizer(c)
+        # A batch only covers a few cameras, so the pose correction is computed and composed with the camera to world
+        # matrices once per camera, and the rays are generated from the corrected cameras.
+        unique_c, inverse_c = torch.unique(c, return_inverse=True)
+        if self.per_ray_pose_correction:
+            return self.cameras.generate_rays(
+                camera_indices=c.unsqueeze(-1),
+                coords=coords,
+                camera_opt_to_camera=self.pose_optimizer(unique_c)[inverse_c],
+            )
+        cameras = self.cameras[unique_c]
+        cameras.camera_to_worlds = pose_utils.multiply(cameras.camera_to_worlds, self.pose_optimizer(unique_c))
 
-        ray_bundle = self.cameras.generate_rays(
-            camera_indices=c.unsqueeze(-1),
-            coords=coords,
-            camera_opt_to_camera=camera_opt_to_camera,
-        )
+        ray_bundle = cameras.generate_rays(camera_indices=inverse_c.unsqueeze(-1), coords=coords)
+        ray_bundle.camera_indices = c.unsqueeze(-1)
         return ray_bundle
@@ -17,14 +17,15 @@ Collection of sampling strategies
 """
 
 from abc import abstractmethod
-from typing import Any, Callable, List, Optional, Protocol, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple, Union
 
 import torch
-from jaxtyping import Float
+from jaxtyping import Bool, Float, Int
 from nerfacc import OccGridEstimator
 from torch import Tensor, nn
 
 from nerfstudio.cameras.rays import Frustums, RayBundle, RaySamples
+from nerfstudio.field_components.field_heads import FieldHeadNames
 
 
 class Sampler(nn.Module):
@@ -612,6 +613,38 @@ class ProposalNetworkSampler(Sampler):
         assert ray_samples is not None
         return ray_samples, weights_list, ray_samples_list
 
+    @staticmethod
+    def pack_ray_samples(
+        ray_samples: RaySamples,
+        proposal_ray_samples: RaySamples,
+        proposal_weights: Float[Tensor, "num_rays num_proposal_samples 1"],
+        weight_threshold: float,
+    ) -> Tuple[RaySamples, Int[Tensor, "num_packed_samples"]]:
+        """Packs the samples of the last level, only keeping the samples that fall in an interval of the last
+        proposal level whose weight is above the threshold, and the last sample of each ray. Rays that miss the scene
+        then carry a single sample, and the empty space in front of a surface and the space hidden behind it carry
+        none.
+
+        Args:
+            ray_samples: Samples of the last level.
+            proposal_ray_samples: Samples of the last proposal level.
+            proposal_weights: Weights of the last proposal level.
+            weight_threshold: Proposal weight at or below which the samples of an interval are dropped.
+
+        Returns:
+            The packed samples, in ray order, and the ray index of each of them.
+        """
+        assert ray_samples.spacing_starts is not None and ray_samples.spacing_ends is not None
+        assert proposal_ray_samples.spacing_ends is not None
+        midpoints = (ray_samples.spacing_starts[..., 0] + ray_samples.spacing_ends[..., 0]) / 2
+        interval_indices = torch.searchsorted(proposal_ray_samples.spacing_ends[..., 0].contiguous(), midpoints)
+        interval_indices = interval_indices.clamp(max=proposal_weights.shape[-2] - 1)
+        keep = torch.gather(proposal_weights[..., 0], -1, interval_indices) > weight_threshold
+        # the last sample of each ray is always kept, for the "last_sample" background color
+        keep[..., -1] = True
+        ray_indices = torch.nonzero(keep)[:, 0]
+        return ray_samples[keep], ray_indices
+
 
 class NeuSSampler(Sampler):
     """NeuS sampler that uses a sdf network to generate samples with fixed variance value in each iterations."""
@@ -780,3 +813,181 @@ class NeuSSampler(Sampler):
         )
 
         return ray_samples, sorted_index
+
+
+class SphereTracingSampler(Sampler):
+    """Finds the first zero crossing of a SDF along each ray by sphere tracing, and places samples in a thin band
+    around it. Each step moves the rays forward by their SDF value, and only queries the rays that have neither hit a
+    surface nor left the [near, far] range. A step that overshoots the surface is refined with a secant step.
+
+    Meant for inference of SDF models with a sharp surface, where a few queries per ray replace the hierarchical
+    upsampling of the NeuS sampler. The rays that miss the surface get their band at the far plane.
+
+    Args:
+        num_samples: Number of samples in the band around the surface.
+        num_steps: Maximum number of sphere tracing steps.
+        band_width: Width of the band around the surface, in world units.
+        step_scale: Fraction of the SDF value the rays step forward by, below 1 to account for SDFs that overestimate
+            the distance.
+        min_step_size: Smallest step, so that grazing rays still make progress.
+        convergence_threshold: SDF value below which a ray has hit the surface.
+        unconverged_threshold_scale: The rays still marching after num_steps steps, eg. rays grazing a surface, have
+            hit it if their last SDF value is below this multiple of convergence_threshold. The others are misses.
+    """
+
+    def __init__(
+        self,
+        num_samples: int = 16,
+        num_steps: int = 64,
+        band_width: float = 0.04,
+        step_scale: float = 0.9,
+        min_step_size: float = 1e-3,
+        convergence_threshold: float = 5e-4,
+        unconverged_threshold_scale: float = 10.0,
+    ) -> None:
+        super().__init__(num_samples=num_samples)
+        self.num_steps = num_steps
+        self.band_width = band_width
+        self.step_scale = step_scale
+        self.min_step_size = min_step_size
+        self.convergence_threshold = convergence_threshold
+        self.unconverged_threshold_scale = unconverged_threshold_scale
+
+    @torch.no_grad()
+    def find_surface(
+        self, ray_bundle: RayBundle, sdf_fn: Callable[[RaySamples], Tensor]
+    ) -> Tuple[Float[Tensor, "num_rays 1"], Bool[Tensor, "num_rays 1"]]:
+        """Sphere traces the rays.
+
+        Args:
+            ray_bundle: Rays to trace, with unit directions, nears and fars.
+            sdf_fn: Function returning the SDF of the start positions of ray samples.
+
+        Returns:
+            The distance to the surface along each ray, and whether the ray hit the surface.
+        """
+        assert ray_bundle.nears is not None and ray_bundle.fars is not None
+        nears, fars = ray_bundle.nears[..., 0], ray_bundle.fars[..., 0]
+        t = nears.clone()
+        prev_t = nears.clone()
+        prev_sdf = torch.full_like(nears, float("inf"))
+        hit = torch.zeros_like(nears, dtype=torch.bool)
+        alive = torch.ones_like(nears, dtype=torch.bool)
+        for _ in range(self.num_steps):
+            indices = torch.nonzero(alive)[:, 0]
+            if len(indices) == 0:
+                break
+            t_alive, prev_t_alive, prev_sdf_alive = t[indices], prev_t[indices], prev_sdf[indices]
+            ray_samples = ray_bundle[indices].get_ray_samples(
+                bin_starts=t_alive[:, None, None], bin_ends=t_alive[:, None, None]
+            )
+            sdf = sdf_fn(ray_samples).reshape(-1).to(t.dtype)
+
+            # a negative SDF means the last step crossed the surface, which lies between the last two positions
+            crossed = sdf < 0
+            secant_t = t_alive - sdf * (t_alive - prev_t_alive) / (sdf - prev_sdf_alive)
+            t_alive = torch.where(crossed & torch.isfinite(prev_sdf_alive), secant_t, t_alive)
+            converged = crossed | (sdf < self.convergence_threshold)
+
+            hit[indices] = converged
+            prev_t[indices] = t_alive
+            prev_sdf[indices] = sdf
+            t_alive = torch.where(converged, t_alive, t_alive + (sdf * self.step_scale).clamp(self.min_step_size))
+            t[indices] = t_alive
+            alive[indices] = ~converged & (t_alive < fars[indices])
+        # rays still marching after the last step only hit a surface if they ended up close to it, eg. running along
+        # it, the others have not reached any surface yet
+        near_surface = alive & (prev_sdf < self.unconverged_threshold_scale * self.convergence_threshold)
+        hit |= near_surface
+        t = torch.minimum(torch.where(near_surface, prev_t, t), fars)
+        return t[:, None], hit[:, None]
+
+    def generate_ray_samples(
+        self,
+        ray_bundle: Optional[RayBundle] = None,
+        sdf_fn: Optional[Callable[[RaySamples], Tensor]] = None,
+    ) -> RaySamples:
+        """Generates ray samples in a band around the surface found by sphere tracing.
+
+        Args:
+            ray_bundle: Rays to generate samples for, with unit directions, nears and fars.
+            sdf_fn: Function returning the SDF of the start positions of ray samples.
+
+        Returns:
+            Positions and deltas for samples along a ray
+        """
+        assert ray_bundle is not None and sdf_fn is not None
+        assert ray_bundle.nears is not None and ray_bundle.fars is not None
+        assert self.num_samples is not None
+        surface_t, hit = self.find_surface(ray_bundle, sdf_fn)
+        centers = torch.where(hit, surface_t, ray_bundle.fars - 0.5 * self.band_width)
+        offsets = torch.linspace(-0.5, 0.5, self.num_samples + 1, device=centers.device) * self.band_width
+        bins = torch.maximum(centers + offsets, ray_bundle.nears)
+        return ray_bundle.get_ray_samples(bin_starts=bins[..., :-1, None], bin_ends=bins[..., 1:, None])
+
+
+class SegmentedRayMarcher(nn.Module):
+    """Evaluates a field on the samples of a ray sampler front to back, a segment of samples at a time, and stops
+    querying the rays whose transmittance falls below a threshold. Only the rays that are still alive are queried for
+    the next segment. The samples that are never evaluated get zero outputs, so zero densities and zero weights.
+
+    Meant for inference: the samples behind an opaque surface no longer cost any field query, and they would have
+    contributed less than the threshold to the renders. Render colors with the same transmittance_threshold in
+    RGBRenderer, so that the terminated rays do not get any background.
+
+    Args:
+        transmittance_threshold: Transmittance below which a ray is terminated.
+        segment_size: Number of samples per ray evaluated at a time.
+    """
+
+    def __init__(self, transmittance_threshold: float = 1e-4, segment_size: int = 16) -> None:
+        super().__init__()
+        self.transmittance_threshold = transmittance_threshold
+        self.segment_size = segment_size
+
+    def forward(
+        self,
+        ray_samples: RaySamples,
+        field_fn: Callable[[RaySamples], Dict[FieldHeadNames, Tensor]],
+        ray_mask: Optional[Tensor] = None,
+    ) -> Dict[FieldHeadNames, Tensor]:
+        """Evaluates the field on the samples along the rays, until the rays are terminated.
+
+        Args:
+            ray_samples: Samples to evaluate, of shape (num_rays, num_samples).
+            field_fn: Function returning the field outputs, including the density, of a (num_alive_rays,
+                segment_size) subset of the samples.
+            ray_mask: Rays to evaluate. The other rays are never evaluated.
+
+        Returns:
+            The field outputs of all the samples.
+        """
+        assert len(ray_samples.shape) == 2, "The marched samples must be of shape (num_rays, num_samples)."
+        assert ray_samples.deltas is not None
+        num_rays, num_samples = ray_samples.shape
+        device = ray_samples.frustums.starts.device
+        alive = torch.arange(num_rays, device=device)
+        if ray_mask is not None:
+            alive = alive[ray_mask]
+        optical_depth = torch.zeros(num_rays, device=device)
+        field_outputs: Dict[FieldHeadNames, Tensor] = {}
+        for start in range(0, num_samples, self.segment_size):
+            if len(alive) == 0:
+                break
+            end = min(start + self.segment_size, num_samples)
+            segment = ray_samples[alive, start:end]
+            segment_outputs = field_fn(segment)
+            for name, output in segment_outputs.items():
+                if name not in field_outputs:
+                    field_outputs[name] = output.new_zeros((num_rays, num_samples) + output.shape[2:])
+                field_outputs[name][alive, start:end] = output
+            assert segment.deltas is not None
+            delta_density = segment.deltas * segment_outputs[FieldHeadNames.DENSITY]
+            optical_depth[alive] += torch.nan_to_num(torch.sum(delta_density[..., 0], dim=-1))
+            alive = alive[torch.exp(-optical_depth[alive]) >= self.transmittance_threshold]
+        if FieldHeadNames.DENSITY not in field_outputs:
+            # no ray is evaluated, the outputs are given their shapes by the first sample
+            first_outputs = field_fn(ray_samples[:1, :1])
+            for name, output in first_outputs.items():
+                field_outputs[name] = output.new_zeros((num_rays, num_samples) + output.shape[2:])
+        return field_outputs
@@ -37,7 +37,7 @@ from torch import Tensor, nn
 
 from nerfstudio.cameras.rays import RaySamples
 from nerfstudio.utils import colors
-from nerfstudio.utils.math import components_from_spherical_harmonics, safe_normalize
+from nerfstudio.utils.math import components_from_spherical_harmonics, packed_cumsum, safe_normalize
 
 BackgroundColor = Union[Literal["random", "last_sample", "black", "white"], Float[Tensor, "3"], Float[Tensor, "*bs 3"]]
 BACKGROUND_COLOR_OVERRIDE: Optional[Float[Tensor, "3"]] = None
@@ -74,6 +74,7 @@ class RGBRenderer(nn.Module):
         background_color: BackgroundColor = "random",
         ray_indices: Optional[Int[Tensor, "num_samples"]] = None,
         num_rays: Optional[int] = None,
+        transmittance_threshold: Optional[float] = None,
     ) -> Float[Tensor, "*bs 3"]:
         """Composite samples along ray and render color image.
         If background color is random, no BG color is added - as if the background was black!
@@ -84,14 +85,21 @@ class RGBRenderer(nn.Module):
             background_color: Background color as RGB.
             ray_indices: Ray index for each sample, used when samples are packed.
             num_rays: Number of rays, used when samples are packed.
+            transmittance_threshold: If set, rays are terminated once their transmittance falls below it: the samples
+                behind that point and the background are not composited.
 
         Returns:
             Outputs rgb values.
         """
+        terminated = None
+        if transmittance_threshold is not None:
+            if ray_indices is not None and num_rays is not None:
+                transmittance = 1 - packed_cumsum(weights[..., 0], ray_indices, exclusive=True)[..., None]
+            else:
+                transmittance = 1 - (torch.cumsum(weights, dim=-2) - weights)
+            weights = weights * (transmittance >= transmittance_threshold)
         if ray_indices is not None and num_rays is not None:
             # Necessary for packed samples from volumetric ray sampler
-            if background_color == "last_sample":
-                raise NotImplementedError("Background color 'last_sample' not implemented for packed samples.")
             comp_rgb = nerfacc.accumulate_along_rays(
                 weights[..., 0], values=rgb, ray_indices=ray_indices, n_rays=num_rays
             )
@@ -101,6 +109,8 @@ class RGBRenderer(nn.Module):
         else:
             comp_rgb = torch.sum(weights * rgb, dim=-2)
             accumulated_weight = torch.sum(weights, dim=-2)
+        if transmittance_threshold is not None:
+            terminated = 1.0 - accumulated_weight < transmittance_threshold
 
         if background_color == "random":
             # If background color is random, the predicted color is returned without blending,
@@ -108,12 +118,22 @@ class RGBRenderer(nn.Module):
             return comp_rgb
 
         elif background_color == "last_sample":
-            # Note, this is only supported for non-packed samples.
-            background_color = rgb[..., -1, :]
+            if ray_indices is not None and num_rays is not None:
+                # the color of the last packed sample of each ray, black for the rays without samples
+                positions = torch.arange(len(ray_indices), device=rgb.device)
+                last_index = torch.full((num_rays,), -1, device=rgb.device).scatter_reduce(
+                    0, ray_indices, positions, reduce="amax"
+                )
+                background_color = rgb[last_index.clamp(min=0)] * (last_index >= 0)[..., None]
+            else:
+                background_color = rgb[..., -1, :]
         else:
             background_color = cls.get_background_color(background_color, shape=comp_rgb.shape, device=comp_rgb.device)
         assert isinstance(background_color, torch.Tensor)
-        comp_rgb = comp_rgb + background_color * (1.0 - accumulated_weight)
+        background_weight = 1.0 - accumulated_weight
+        if terminated is not None:
+            background_weight = background_weight * ~terminated
+        comp_rgb = comp_rgb + background_color * background_weight
         return comp_rgb
 
     @classmethod
@@ -203,6 +223,7 @@ class RGBRenderer(nn.Module):
         ray_indices: Optional[Int[Tensor, "num_samples"]] = None,
         num_rays: Optional[int] = None,
         background_color: Optional[BackgroundColor] = None,
+        transmittance_threshold: Optional[float] = None,
     ) -> Float[Tensor, "*bs 3"]:
         """Composite samples along ray and render color image
 
@@ -212,6 +233,7 @@ class RGBRenderer(nn.Module):
             ray_indices: Ray index for each sample, used when samples are packed.
             num_rays: Number of rays, used when samples are packed.
             background_color: The background color to use for rendering.
+            transmittance_threshold: Transmittance below which rays are terminated, see combine_rgb.
 
         Returns:
             Outputs of rgb values.
@@ -222,7 +244,12 @@ class RGBRenderer(nn.Module):
         if not self.training:
             rgb = torch.nan_to_num(rgb)
         rgb = self.combine_rgb(
-            rgb, weights, background_color=background_color, ray_indices=ray_indices, num_rays=num_rays
+            rgb,
+            weights,
+            background_color=background_color,
+            ray_indices=ray_indices,
+            num_rays=num_rays,
+            transmittance_threshold=transmittance_threshold,
         )
         if not self.training:
             torch.clamp_(rgb, min=0.0, max=1.0)
@@ -352,7 +379,7 @@ class DepthRenderer(nn.Module):
             steps = (ray_samples.frustums.starts + ray_samples.frustums.ends) / 2
 
             if ray_indices is not None and num_rays is not None:
-                raise NotImplementedError("Median depth calculation is not implemented for packed samples.")
+                return self._get_packed_median_depth(weights, steps, ray_indices, num_rays)
             cumulative_weights = torch.cumsum(weights[..., 0], dim=-1)  # [..., num_samples]
             split = torch.ones((*weights.shape[:-2], 1), device=weights.device) * 0.5  # [..., 1]
             median_index = torch.searchsorted(cumulative_weights, split, side="left")  # [..., 1]
@@ -381,23 +408,57 @@ class DepthRenderer(nn.Module):
 
         raise NotImplementedError(f"Method {self.method} not implemented")
 
+    @staticmethod
+    def _get_packed_median_depth(
+        weights: Float[Tensor, "num_samples 1"],
+        steps: Float[Tensor, "num_samples 1"],
+        ray_indices: Int[Tensor, "num_samples"],
+        num_rays: int,
+    ) -> Float[Tensor, "num_rays 1"]:
+        """Median depth of packed samples: the first sample of each ray where the accumulated weight reaches 0.5,
+        or its last sample if it never does. Rays without samples get the farthest sample depth.
+        """
+        cumulative_weights = packed_cumsum(weights[..., 0], ray_indices)
+        num_samples = len(steps)
+        positions = torch.arange(num_samples, device=steps.device)
+        median_index = torch.full((num_rays,), num_samples, device=steps.device).scatter_reduce(
+            0, ray_indices, torch.where(cumulative_weights >= 0.5, positions, num_samples), reduce="amin"
+        )
+        last_index = torch.full((num_rays,), -1, device=steps.device).scatter_reduce(
+            0, ray_indices, positions, reduce="amax"
+        )
+        median_index = torch.where(median_index < num_samples, median_index, last_index)
+        median_depth = steps[median_index.clamp(min=0), 0]
+        median_depth = torch.where(median_index >= 0, median_depth, steps.max())
+        return median_depth[..., None]
+
 
 class UncertaintyRenderer(nn.Module):
     """Calculate uncertainty along the ray."""
 
     @classmethod
     def forward(
-        cls, betas: Float[Tensor, "*bs num_samples 1"], weights: Float[Tensor, "*bs num_samples 1"]
+        cls,
+        betas: Float[Tensor, "*bs num_samples 1"],
+        weights: Float[Tensor, "*bs num_samples 1"],
+        ray_indices: Optional[Int[Tensor, "num_samples"]] = None,
+        num_rays: Optional[int] = None,
     ) -> Float[Tensor, "*bs 1"]:
         """Calculate uncertainty along the ray.
 
         Args:
             betas: Uncertainty betas for each sample.
             weights: Weights of each sample.
+            ray_indices: Ray index for each sample, used when samples are packed.
+            num_rays: Number of rays, used when samples are packed.
 
         Returns:
             Rendering of uncertainty.
         """
+        if ray_indices is not None and num_rays is not None:
+            return nerfacc.accumulate_along_rays(
+                weights[..., 0], values=betas, ray_indices=ray_indices, n_rays=num_rays
+            )
         uncertainty = torch.sum(weights * betas, dim=-2)
         return uncertainty
 
@@ -432,6 +493,8 @@ class NormalsRenderer(nn.Module):
         normals: Float[Tensor, "*bs num_samples 3"],
         weights: Float[Tensor, "*bs num_samples 1"],
         normalize: bool = True,
+        ray_indices: Optional[Int[Tensor, "num_samples"]] = None,
+        num_rays: Optional[int] = None,
     ) -> Float[Tensor, "*bs 3"]:
         """Calculate normals along the ray.
 
@@ -439,8 +502,13 @@ class NormalsRenderer(nn.Module):
             normals: Normals for each sample.
             weights: Weights of each sample.
             normalize: Normalize normals.
+            ray_indices: Ray index for each sample, used when samples are packed.
+            num_rays: Number of rays, used when samples are packed.
         """
-        n = torch.sum(weights * normals, dim=-2)
+        if ray_indices is not None and num_rays is not None:
+            n = nerfacc.accumulate_along_rays(weights[..., 0], values=normals, ray_indices=ray_indices, n_rays=num_rays)
+        else:
+            n = torch.sum(weights * normals, dim=-2)
         if normalize:
             n = safe_normalize(n)
         return n
@@ -33,6 +33,8 @@ from nerfstudio.configs.config_utils import to_immutable_dict
 from nerfstudio.data.scene_box import SceneBox
 from nerfstudio.engine.callbacks import TrainingCallback, TrainingCallbackAttributes
 from nerfstudio.model_components.scene_colliders import NearFarCollider
+from nerfstudio.utils.cancellation import check_cancelled
+from nerfstudio.utils.misc import get_autocast_dtype
 
 
 # Model related configs
@@ -50,6 +52,9 @@ class ModelConfig(InstantiateConfig):
     """parameters to instantiate density field with"""
     eval_num_rays_per_chunk: int = 4096
     """specifies number of rays per chunk during eval"""
+    eval_mixed_precision: bool = False
+    """Whether to render full images, eg. for evaluation and the viewer, with mixed precision: in float16 on GPU and in
+    bfloat16 on CPU. The outputs are returned in float32."""
     prompt: Optional[str] = None
     """A prompt to be used in text to NeRF models"""
 
@@ -165,6 +170,8 @@ class Model(nn.Module):
     def get_outputs_for_camera_ray_bundle(self, camera_ray_bundle: RayBundle) -> Dict[str, torch.Tensor]:
         """Takes in camera parameters and computes the output of the model.
 
+        The cancellation token of the current thread, if any, is checked before every chunk.
+
         Args:
             camera_ray_bundle: ray bundle to calculate outputs over
         """
@@ -173,14 +180,22 @@ class Model(nn.Module):
         num_rays = len(camera_ray_bundle)
         outputs_lists = defaultdict(list)
         for i in range(0, num_rays, num_rays_per_chunk):
+            check_cancelled()
             start_idx = i
             end_idx = i + num_rays_per_chunk
             ray_bundle = camera_ray_bundle.get_row_major_sliced_ray_bundle(start_idx, end_idx)
-            outputs = self.forward(ray_bundle=ray_bundle)
+            if self.config.eval_mixed_precision:
+                device_type = ray_bundle.origins.device.type
+                with torch.autocast(device_type=device_type, dtype=get_autocast_dtype(device_type)):
+                    outputs = self.forward(ray_bundle=ray_bundle)
+            else:
+                outputs = self.forward(ray_bundle=ray_bundle)
             for output_name, output in outputs.items():  # type: ignore
                 if not torch.is_tensor(output):
                     # TODO: handle lists of tensors as well
                     continue
+                if self.config.eval_mixed_precision and output.is_floating_point():
+                    output = output.float()
                 outputs_lists[output_name].append(output)
         outputs = {}
         for output_name, outputs_list in outputs_lists.items():
@@ -42,7 +42,10 @@ from nerfstudio.model_components.losses import (
     ScaleAndShiftInvariantLoss,
     monosdf_normal_loss,
 )
-from nerfstudio.model_components.ray_samplers import LinearDisparitySampler
+from nerfstudio.model_components.ray_samplers import (
+    LinearDisparitySampler,
+    SphereTracingSampler,
+)
 from nerfstudio.model_components.renderers import (
     AccumulationRenderer,
     DepthRenderer,
@@ -89,6 +92,14 @@ class SurfaceModelConfig(ModelConfig):
     """Total variational loss multiplier"""
     overwrite_near_far_plane: bool = False
     """whether to use near and far collider from command line"""
+    use_sphere_tracing: bool = False
+    """Whether to find the surface by sphere tracing at inference, and only evaluate the field in a band around it."""
+    num_sphere_tracing_steps: int = 64
+    """Maximum number of sphere tracing steps at inference."""
+    num_surface_samples: int = 16
+    """Number of samples in the band around the surface found by sphere tracing."""
+    surface_band_width: float = 0.04
+    """Width of the band around the surface found by sphere tracing, in world units."""
 
 
 class SurfaceModel(Model):
@@ -148,6 +159,11 @@ class SurfaceModel(Model):
             self.field_background = Parameter(torch.ones(1), requires_grad=False)
 
         self.sampler_bg = LinearDisparitySampler(num_samples=self.config.num_samples_outside)
+        self.surface_sampler = SphereTracingSampler(
+            num_samples=self.config.num_surface_samples,
+            num_steps=self.config.num_sphere_tracing_steps,
+            band_width=self.config.surface_band_width,
+        )
 
         # renderers
         background_color = (
@@ -192,6 +208,27 @@ class SurfaceModel(Model):
             Outputs of model. (ie. rendered colors)
         """
 
+    def sample_and_forward_surface(self, ray_bundle: RayBundle) -> Dict[str, Any]:
+        """Finds the surface along the rays by sphere tracing and only evaluates the field in a band around it.
+
+        Args:
+            ray_bundle: Input bundle of rays, with nears and fars.
+
+        Returns:
+            Samples and field outputs, as sample_and_forward_field.
+        """
+        ray_samples = self.surface_sampler(ray_bundle, sdf_fn=self.field.get_sdf)
+        field_outputs = self.field(ray_samples, return_alphas=True)
+        weights, transmittance = ray_samples.get_weights_and_transmittance_from_alphas(
+            field_outputs[FieldHeadNames.ALPHA]
+        )
+        return {
+            "ray_samples": ray_samples,
+            "field_outputs": field_outputs,
+            "weights": weights,
+            "bg_transmittance": transmittance[:, -1, :],
+        }
+
     def get_outputs(self, ray_bundle: RayBundle) -> Dict[str, torch.Tensor]:
         """Takes in a Ray Bundle and returns a dictionary of outputs.
 
@@ -206,7 +243,10 @@ class SurfaceModel(Model):
             ray_bundle.metadata is not None and "directions_norm" in ray_bundle.metadata
         ), "directions_norm is required in ray_bundle.metadata"
 
-        samples_and_field_outputs = self.sample_and_forward_field(ray_bundle=ray_bundle)
+        if self.config.use_sphere_tracing and not self.training:
+            samples_and_field_outputs = self.sample_and_forward_surface(ray_bundle=ray_bundle)
+        else:
+            samples_and_field_outputs = self.sample_and_forward_field(ray_bundle=ray_bundle)
 
         # shortcuts
         field_outputs: Dict[FieldHeadNames, torch.Tensor] = cast(
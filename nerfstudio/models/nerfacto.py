@@ -19,10 +19,11 @@ NeRF implementation that combines many recent advancements.
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Literal, Tuple, Type
+from typing import Dict, List, Literal, Optional, Tuple, Type
 
 import numpy as np
 import torch
+from torch import Tensor
 from torch.nn import Parameter
 from torchmetrics.functional import structural_similarity_index_measure
 from torchmetrics.image import PeakSignalNoiseRatio
@@ -42,12 +43,13 @@ from nerfstudio.model_components.losses import (
     pred_normal_loss,
     scale_gradients_by_distance_squared,
 )
-from nerfstudio.model_components.ray_samplers import ProposalNetworkSampler, UniformSampler
+from nerfstudio.model_components.ray_samplers import ProposalNetworkSampler, SegmentedRayMarcher, UniformSampler
 from nerfstudio.model_components.renderers import AccumulationRenderer, DepthRenderer, NormalsRenderer, RGBRenderer
 from nerfstudio.model_components.scene_colliders import NearFarCollider
 from nerfstudio.model_components.shaders import NormalsShader
 from nerfstudio.models.base_model import Model, ModelConfig
-from nerfstudio.utils import colormaps
+from nerfstudio.utils import colormaps, profiler
+from nerfstudio.utils.misc import StaticShapeCompiled
 
 
 @dataclass
@@ -126,6 +128,27 @@ class NerfactoModelConfig(ModelConfig):
     """Which implementation to use for the model."""
     appearance_embed_dim: int = 32
     """Dimension of the appearance embedding."""
+    compile_mode: Literal["none", "default", "reduce-overhead", "max-autotune"] = "none"
+    """Compile the networks of the training step with torch.compile. Only the training batch shapes are captured,
+    other shapes run eagerly. "reduce-overhead" also captures them with CUDA graphs. Works best with the torch
+    implementation, tcnn kernels are not traced."""
+    color_culling: Literal["never", "eval", "always"] = "never"
+    """When to run the color and auxiliary heads of the field only on the samples whose weight is above
+    color_weight_threshold, instead of on every sample. "eval" culls outside of training, eg. for evaluation and the
+    viewer. The culled samples get zero colors, so the renders only change by less than their total weight."""
+    color_weight_threshold: float = 1e-4
+    """Weight below which a sample is culled from the color and auxiliary heads."""
+    packed_sample_threshold: Optional[float] = None
+    """Outside of training, only evaluate the field on the samples that fall in an interval of the last proposal level
+    whose weight is above this threshold. The samples are packed, so that the rays that miss the scene or end early
+    carry no samples. If None, every sample is evaluated."""
+    early_termination_threshold: Optional[float] = None
+    """Outside of training, evaluate the field on the samples front to back and stop querying the rays whose
+    transmittance falls below this threshold, ie. the samples hidden behind opaque surfaces. The samples and the
+    background behind the termination point are not rendered. If None, rays are never terminated. Not applied to
+    packed samples."""
+    early_termination_segment_size: int = 16
+    """Number of samples per ray evaluated at a time before checking for terminated rays."""
 
 
 class NerfactoModel(Model):
@@ -192,6 +215,13 @@ class NerfactoModel(Model):
                 self.proposal_networks.append(network)
             self.density_fns.extend([network.density_fn for network in self.proposal_networks])
 
+        if self.config.compile_mode != "none":
+            networks = [self.field.mlp_base, self.field.mlp_head]
+            networks += [network.mlp_base for network in self.proposal_networks if not network.use_linear]
+            for network in networks:
+                # Wrap the forward rather than the module, so that the state dict keys stay the same.
+                network.forward = StaticShapeCompiled(network.forward, mode=self.config.compile_mode)
+
         # Samplers
         def update_schedule(step):
             return np.clip(
@@ -214,6 +244,12 @@ class NerfactoModel(Model):
             initial_sampler=initial_sampler,
         )
 
+        if self.config.early_termination_threshold is not None:
+            self.ray_marcher = SegmentedRayMarcher(
+                transmittance_threshold=self.config.early_termination_threshold,
+                segment_size=self.config.early_termination_segment_size,
+            )
+
         # Collider
         self.collider = NearFarCollider(near_plane=self.config.near_plane, far_plane=self.config.far_plane)
 
@@ -279,20 +315,59 @@ class NerfactoModel(Model):
 
     def get_outputs(self, ray_bundle: RayBundle):
         ray_samples: RaySamples
-        ray_samples, weights_list, ray_samples_list = self.proposal_sampler(ray_bundle, density_fns=self.density_fns)
-        field_outputs = self.field.forward(ray_samples, compute_normals=self.config.predict_normals)
+        with profiler.trace_span("proposal_sampling"):
+            ray_samples, weights_list, ray_samples_list = self.proposal_sampler(
+                ray_bundle, density_fns=self.density_fns
+            )
+        ray_indices, num_rays = None, None
+        if self.config.packed_sample_threshold is not None and not self.training:
+            assert len(ray_bundle.shape) == 1, "Packed samples require a flat ray bundle."
+            ray_samples, ray_indices = self.proposal_sampler.pack_ray_samples(
+                ray_samples, ray_samples_list[-1], weights_list[-1], self.config.packed_sample_threshold
+            )
+            num_rays = len(ray_bundle)
+        transmittance_threshold = None
+        if self.config.early_termination_threshold is not None and not self.training and ray_indices is None:
+            transmittance_threshold = self.config.early_termination_threshold
+
+        def field_fn(samples: RaySamples) -> Dict[FieldHeadNames, Tensor]:
+            if self.config.color_culling == "always" or (self.config.color_culling == "eval" and not self.training):
+                return self.field.get_culled_outputs(
+                    samples,
+                    self.config.color_weight_threshold,
+                    compute_normals=self.config.predict_normals,
+                    ray_indices=ray_indices,
+                )
+            return self.field.forward(samples, compute_normals=self.config.predict_normals)
+
+        with profiler.trace_span("field"):
+            if transmittance_threshold is not None:
+                field_outputs = self.ray_marcher(ray_samples, field_fn)
+            else:
+                field_outputs = field_fn(ray_samples)
         if self.config.use_gradient_scaling:
             field_outputs = scale_gradients_by_distance_squared(field_outputs, ray_samples)
 
-        weights = ray_samples.get_weights(field_outputs[FieldHeadNames.DENSITY])
-        weights_list.append(weights)
-        ray_samples_list.append(ray_samples)
-
-        rgb = self.renderer_rgb(rgb=field_outputs[FieldHeadNames.RGB], weights=weights)
-        with torch.no_grad():
-            depth = self.renderer_depth(weights=weights, ray_samples=ray_samples)
-        expected_depth = self.renderer_expected_depth(weights=weights, ray_samples=ray_samples)
-        accumulation = self.renderer_accumulation(weights=weights)
+        with profiler.trace_span("rendering"):
+            weights = ray_samples.get_weights(field_outputs[FieldHeadNames.DENSITY], ray_indices=ray_indices)
+            weights_list.append(weights)
+            ray_samples_list.append(ray_samples)
+
+            rgb = self.renderer_rgb(
+                rgb=field_outputs[FieldHeadNames.RGB],
+                weights=weights,
+                ray_indices=ray_indices,
+                num_rays=num_rays,
+                transmittance_threshold=transmittance_threshold,
+            )
+            with torch.no_grad():
+                depth = self.renderer_depth(
+                    weights=weights, ray_samples=ray_samples, ray_indices=ray_indices, num_rays=num_rays
+                )
+            expected_depth = self.renderer_expected_depth(
+                weights=weights, ray_samples=ray_samples, ray_indices=ray_indices, num_rays=num_rays
+            )
+            accumulation = self.renderer_accumulation(weights=weights, ray_indices=ray_indices, num_rays=num_rays)
 
         outputs = {
             "rgb": rgb,
@@ -302,8 +377,15 @@ class NerfactoModel(Model):
         }
 
         if self.config.predict_normals:
-            normals = self.renderer_normals(normals=field_outputs[FieldHeadNames.NORMALS], weights=weights)
-            pred_normals = self.renderer_normals(field_outputs[FieldHeadNames.PRED_NORMALS], weights=weights)
+            normals = self.renderer_normals(
+                normals=field_outputs[FieldHeadNames.NORMALS],
+                weights=weights,
+                ray_indices=ray_indices,
+                num_rays=num_rays,
+            )
+            pred_normals = self.renderer_normals(
+                field_outputs[FieldHeadNames.PRED_NORMALS], weights=weights, ray_indices=ray_indices, num_rays=num_rays
+            )
             outputs["normals"] = self.normals_shader(normals)
             outputs["pred_normals"] = self.normals_shader(pred_normals)
         # These use a lot of GPU memory, so we avoid storing them for eval.
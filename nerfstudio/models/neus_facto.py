@@ -217,6 +217,9 @@ class NeuSFactoModel(NeuSModel):
         metrics_dict, images_dict = super().get_image_metrics_and_images(outputs, batch)
         for i in range(self.config.num_proposal_iterations):
             key = f"prop_depth_{i}"
+            if key not in outputs:
+                # sphere traced renders do not use the proposal networks
+                continue
             prop_depth_i = colormaps.apply_depth_colormap(
                 outputs[key],
                 accumulation=outputs["accumulation"],
@@ -19,7 +19,7 @@ TensorRF implementation.
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Literal, Tuple, Type, cast
+from typing import Dict, List, Literal, Optional, Tuple, Type, cast
 
 import numpy as np
 import torch
@@ -30,6 +30,7 @@ from torchmetrics.image.lpip import LearnedPerceptualImagePatchSimilarity
 
 from nerfstudio.cameras.rays import RayBundle
 from nerfstudio.configs.config_utils import to_immutable_dict
+from nerfstudio.data.scene_box import SceneBox
 from nerfstudio.engine.callbacks import (
     TrainingCallback,
     TrainingCallbackAttributes,
@@ -44,7 +45,7 @@ from nerfstudio.field_components.encodings import (
 from nerfstudio.field_components.field_heads import FieldHeadNames
 from nerfstudio.fields.tensorf_field import TensoRFField
 from nerfstudio.model_components.losses import MSELoss, tv_loss
-from nerfstudio.model_components.ray_samplers import PDFSampler, UniformSampler
+from nerfstudio.model_components.ray_samplers import PDFSampler, SegmentedRayMarcher, UniformSampler
 from nerfstudio.model_components.renderers import (
     AccumulationRenderer,
     DepthRenderer,
@@ -67,6 +68,13 @@ class TensoRFModelConfig(ModelConfig):
     """final render resolution"""
     upsampling_iters: Tuple[int, ...] = (2000, 3000, 4000, 5500, 7000)
     """specifies a list of iteration step numbers to perform upsampling"""
+    alpha_mask_iters: Tuple[int, ...] = (2000, 4000)
+    """specifies a list of iteration step numbers to recompute the alpha mask at, the samples in the empty voxels of
+    the alpha mask are skipped"""
+    alpha_mask_threshold: float = 1e-4
+    """alpha at or below which a voxel of the alpha mask is empty"""
+    shrink_to_alpha_mask: bool = True
+    """whether to shrink the grids to the bounding box of the occupied voxels at the first alpha mask update"""
     loss_coefficients: Dict[str, float] = to_immutable_dict(
         {
             "rgb_loss": 1.0,
@@ -89,6 +97,11 @@ class TensoRFModelConfig(ModelConfig):
     tensorf_encoding: Literal["triplane", "vm", "cp"] = "vm"
     regularization: Literal["none", "l1", "tv"] = "l1"
     """Regularization method used in tensorf paper"""
+    early_termination_threshold: Optional[float] = None
+    """Outside of training, evaluate the fine field on the samples front to back and stop querying the rays whose
+    transmittance falls below this threshold. If None, rays are never terminated."""
+    early_termination_segment_size: int = 10
+    """Number of samples per ray evaluated at a time before checking for terminated rays."""
 
 
 class TensoRFModel(Model):
@@ -128,18 +141,9 @@ class TensoRFModel(Model):
     def get_training_callbacks(
         self, training_callback_attributes: TrainingCallbackAttributes
     ) -> List[TrainingCallback]:
-        # the callback that we want to run every X iterations after the training iteration
-        def reinitialize_optimizer(self, training_callback_attributes: TrainingCallbackAttributes, step: int):
+        def reinitialize_encodings_optimizer(training_callback_attributes: TrainingCallbackAttributes):
             assert training_callback_attributes.optimizers is not None
             assert training_callback_attributes.pipeline is not None
-            index = self.upsampling_iters.index(step)
-            resolution = self.upsampling_steps[index]
-
-            # upsample the position and direction grids
-            self.field.density_encoding.upsample_grid(resolution)
-            self.field.color_encoding.upsample_grid(resolution)
-
-            # reinitialize the encodings optimizer
             optimizers_config = training_callback_attributes.optimizers.config
             enc = training_callback_attributes.pipeline.get_param_groups()["encodings"]
             lr_init = optimizers_config["encodings"]["optimizer"].lr
@@ -156,16 +160,59 @@ class TensoRFModel(Model):
                     )
                 )
 
+        def update_alpha_mask(self, training_callback_attributes: TrainingCallbackAttributes, step: int):
+            resolution = self.field.density_encoding.resolution
+            self.field.update_alpha_mask(resolution, self._get_voxel_size(), self.config.alpha_mask_threshold)
+            if self.config.shrink_to_alpha_mask and step == self.config.alpha_mask_iters[0]:
+                # compact the grids to the occupied bounding box, keeping their voxel size
+                bounds = self.field.get_alpha_mask_bounds()
+                scale = torch.max(bounds[1] - bounds[0]).item() / 2
+                self.field.shrink(bounds, max(round(resolution * scale), 2))
+                self.field.update_alpha_mask(
+                    self.field.density_encoding.resolution, self._get_voxel_size(), self.config.alpha_mask_threshold
+                )
+                reinitialize_encodings_optimizer(training_callback_attributes)
+
+        # the callback that we want to run every X iterations after the training iteration
+        def reinitialize_optimizer(self, training_callback_attributes: TrainingCallbackAttributes, step: int):
+            index = self.upsampling_iters.index(step)
+            resolution = self._get_grid_resolution(self.upsampling_steps[index])
+
+            # upsample the position and direction grids
+            self.field.density_encoding.upsample_grid(resolution)
+            self.field.color_encoding.upsample_grid(resolution)
+
+            # reinitialize the encodings optimizer
+            reinitialize_encodings_optimizer(training_callback_attributes)
+
         callbacks = [
+            TrainingCallback(
+                where_to_run=[TrainingCallbackLocation.AFTER_TRAIN_ITERATION],
+                iters=self.config.alpha_mask_iters,
+                func=update_alpha_mask,
+                args=[self, training_callback_attributes],
+            ),
             TrainingCallback(
                 where_to_run=[TrainingCallbackLocation.AFTER_TRAIN_ITERATION],
                 iters=self.upsampling_iters,
                 func=reinitialize_optimizer,
                 args=[self, training_callback_attributes],
-            )
+            ),
         ]
         return callbacks
 
+    def _get_grid_resolution(self, resolution: int) -> int:
+        """Returns the resolution of the grids for a resolution of the whole scene box, so that shrunk grids keep
+        the voxel size of the grids of the scene box along their longest side."""
+        scene_aabb = self.scene_box.aabb.to(self.field.aabb)
+        scale = torch.max((self.field.aabb[1] - self.field.aabb[0]) / (scene_aabb[1] - scene_aabb[0]))
+        return max(round(resolution * scale.item()), 2)
+
+    def _get_voxel_size(self) -> float:
+        """Returns the mean side of the voxels of the grids, in world units."""
+        voxel_sides = (self.field.aabb[1] - self.field.aabb[0]) / (self.field.density_encoding.resolution - 1)
+        return voxel_sides.mean().item()
+
     def update_to_step(self, step: int) -> None:
         if step < self.upsampling_iters[0]:
             return
@@ -218,7 +265,7 @@ class TensoRFModel(Model):
         direction_encoding = NeRFEncoding(in_dim=3, num_frequencies=2, min_freq_exp=0, max_freq_exp=2)
 
         self.field = TensoRFField(
-            self.scene_box.aabb,
+            self.scene_box.aabb.clone(),
             feature_encoding=feature_encoding,
             direction_encoding=direction_encoding,
             density_encoding=density_encoding,
@@ -232,6 +279,11 @@ class TensoRFModel(Model):
         # samplers
         self.sampler_uniform = UniformSampler(num_samples=self.config.num_uniform_samples, single_jitter=True)
         self.sampler_pdf = PDFSampler(num_samples=self.config.num_samples, single_jitter=True, include_original=False)
+        if self.config.early_termination_threshold is not None:
+            self.ray_marcher = SegmentedRayMarcher(
+                transmittance_threshold=self.config.early_termination_threshold,
+                segment_size=self.config.early_termination_segment_size,
+            )
 
         # renderers
         self.renderer_rgb = RGBRenderer(background_color=colors.WHITE)
@@ -248,7 +300,8 @@ class TensoRFModel(Model):
 
         # colliders
         if self.config.enable_collider:
-            self.collider = AABBBoxCollider(scene_box=self.scene_box)
+            # the collider follows the aabb of the field, as it shrinks to the occupied space
+            self.collider = AABBBoxCollider(scene_box=SceneBox(aabb=self.field.aabb))
 
         # regularizations
         if self.config.tensorf_encoding == "cp" and self.config.regularization == "tv":
@@ -280,9 +333,14 @@ class TensoRFModel(Model):
         ray_samples_pdf = self.sampler_pdf(ray_bundle, ray_samples_uniform, weights)
 
         # fine field:
-        field_outputs_fine = self.field.forward(
-            ray_samples_pdf, mask=acc_mask, bg_color=colors.WHITE.to(weights.device)
-        )
+        transmittance_threshold = None
+        if self.config.early_termination_threshold is not None and not self.training:
+            transmittance_threshold = self.config.early_termination_threshold
+            field_outputs_fine = self.ray_marcher(ray_samples_pdf, self.field.forward, ray_mask=acc_mask)
+        else:
+            field_outputs_fine = self.field.forward(
+                ray_samples_pdf, mask=acc_mask, bg_color=colors.WHITE.to(weights.device)
+            )
 
         weights_fine = ray_samples_pdf.get_weights(field_outputs_fine[FieldHeadNames.DENSITY])
 
@@ -292,6 +350,7 @@ class TensoRFModel(Model):
         rgb = self.renderer_rgb(
             rgb=field_outputs_fine[FieldHeadNames.RGB],
             weights=weights_fine,
+            transmittance_threshold=transmittance_threshold,
         )
 
         rgb = torch.where(accumulation < 0, colors.WHITE.to(rgb.device), rgb)
@@ -147,8 +147,9 @@ class Pipeline(nn.Module):
             self.datamanager.train_sampler.set_epoch(step)
         ray_bundle, batch = self.datamanager.next_train(step)
         model_outputs = self.model(ray_bundle, batch)
-        metrics_dict = self.model.get_metrics_dict(model_outputs, batch)
-        loss_dict = self.model.get_loss_dict(model_outputs, batch, metrics_dict)
+        with profiler.trace_span("loss"):
+            metrics_dict = self.model.get_metrics_dict(model_outputs, batch)
+            loss_dict = self.model.get_loss_dict(model_outputs, batch, metrics_dict)
 
         return model_outputs, loss_dict, metrics_dict
 
@@ -278,8 +279,10 @@ class VanillaPipeline(Pipeline):
 
         self.world_size = world_size
         if world_size > 1:
-            self._model = typing.cast(Model, DDP(self._model, device_ids=[local_rank], find_unused_parameters=True))
-            dist.barrier(device_ids=[local_rank])
+            # The gloo backend used on the CPU does not take device ids.
+            device_ids = [local_rank] if torch.device(device).type == "cuda" else None
+            self._model = typing.cast(Model, DDP(self._model, device_ids=device_ids, find_unused_parameters=True))
+            dist.barrier(device_ids=device_ids)
 
     @property
     def device(self):
@@ -21,6 +21,7 @@ from typing import Dict, List, Literal, Optional, Tuple
 from nerfstudio.process_data import colmap_utils, hloc_utils, process_data_utils
 from nerfstudio.process_data.base_converter_to_nerfstudio_dataset import BaseConverterToNerfstudioDataset
 from nerfstudio.process_data.process_data_utils import CAMERA_MODELS
+from nerfstudio.process_data.stage_cache import StageCache
 from nerfstudio.utils import install_checks
 from nerfstudio.utils.rich_utils import CONSOLE
 
@@ -31,10 +32,11 @@ class ColmapConverterToNerfstudioDataset(BaseConverterToNerfstudioDataset):
 
     camera_type: Literal["perspective", "fisheye", "equirectangular"] = "perspective"
     """Camera model to use."""
-    matching_method: Literal["exhaustive", "sequential", "vocab_tree"] = "vocab_tree"
+    matching_method: Literal["exhaustive", "sequential", "vocab_tree", "planned"] = "vocab_tree"
     """Feature matching method to use. Vocab tree is recommended for a balance of speed
     and accuracy. Exhaustive is slower but more accurate. Sequential is faster but
-    should only be used for videos."""
+    should only be used for videos. Planned matches consecutive images, GPS neighbors and
+    visually similar images, and scales linearly to very large captures."""
     sfm_tool: Literal["any", "colmap", "hloc"] = "any"
     """Structure from motion tool to use. Colmap will use sift features, hloc can use
     many modern methods such as superpoint features and superglue matcher"""
@@ -96,6 +98,9 @@ class ColmapConverterToNerfstudioDataset(BaseConverterToNerfstudioDataset):
     """If --use-sfm-depth and this flag is True, also export debug images showing Sf overlaid upon input images."""
     same_dimensions: bool = True
     """Whether to assume all images are same dimensions and so to use fast downscaling with no autorotation."""
+    incremental: bool = False
+    """If True, skips the stages whose parameters and input files did not change since the last run into the same
+    output directory, and registers newly added images into the existing COLMAP reconstruction."""
 
     @staticmethod
     def default_colmap_path() -> Path:
@@ -151,6 +156,14 @@ class ColmapConverterToNerfstudioDataset(BaseConverterToNerfstudioDataset):
         summary_log = []
         if self.use_sfm_depth:
             depth_dir = self.output_dir / "depth"
+            fingerprint = self.stage_cache.fingerprint(
+                {"num_downscales": self.num_downscales, "include_depth_debug": self.include_depth_debug},
+                self.stage_cache.hash_files((self.output_dir / self.default_colmap_path()).glob("*.bin")),
+            )
+            if self.stage_cache.is_up_to_date("depth", fingerprint, [depth_dir]):
+                CONSOLE.log("[bold green]Skipping depth export, the reconstruction is unchanged.")
+                depth_paths = self.stage_cache.get_metadata("depth")["image_id_to_depth_path"]
+                return {int(image_id): Path(path) for image_id, path in depth_paths.items()}, summary_log
             depth_dir.mkdir(parents=True, exist_ok=True)
             image_id_to_depth_path = colmap_utils.create_sfm_depth(
                 recon_dir=self.output_dir / self.default_colmap_path(),
@@ -168,6 +181,11 @@ class ColmapConverterToNerfstudioDataset(BaseConverterToNerfstudioDataset):
                     verbose=self.verbose,
                 )
             )
+            self.stage_cache.record(
+                "depth",
+                fingerprint,
+                {"image_id_to_depth_path": {image_id: str(path) for image_id, path in image_id_to_depth_path.items()}},
+            )
             return image_id_to_depth_path, summary_log
         return None, summary_log
 
@@ -195,6 +213,34 @@ class ColmapConverterToNerfstudioDataset(BaseConverterToNerfstudioDataset):
         else:
             image_dir = self.image_dir
 
+        params = {
+            "sfm_tool": sfm_tool,
+            "feature_type": feature_type,
+            "matcher_type": matcher_type,
+            "matching_method": self.matching_method,
+            "camera_type": self.camera_type,
+            "refine_pixsfm": self.refine_pixsfm,
+            "mask": None if mask_path is None else self.stage_cache.hash_file(mask_path),
+        }
+        image_hashes = self.stage_cache.hash_files(process_data_utils.list_images(image_dir))
+        fingerprint = self.stage_cache.fingerprint(params, image_hashes)
+        if self.stage_cache.is_up_to_date("colmap", fingerprint, [self.absolute_colmap_model_path / "cameras.bin"]):
+            CONSOLE.log("[bold green]Skipping COLMAP, the images and parameters are unchanged.")
+            return
+        # New images can only be registered into the previous reconstruction if the images it was built from are
+        # unchanged, since COLMAP identifies images by name.
+        previous = self.stage_cache.get_metadata("colmap")
+        incremental = (
+            sfm_tool == "colmap"
+            and previous.get("params") == self.stage_cache.fingerprint(params)
+            and all(image_hashes.get(name) == sha1 for name, sha1 in previous.get("images", {}).items())
+        )
+        if incremental:
+            CONSOLE.log(
+                f"Registering {len(image_hashes.keys() - previous['images'].keys())} new images into the existing "
+                "COLMAP reconstruction."
+            )
+
         if sfm_tool == "colmap":
             colmap_utils.run_colmap(
                 image_dir=image_dir,
@@ -205,6 +251,7 @@ class ColmapConverterToNerfstudioDataset(BaseConverterToNerfstudioDataset):
                 verbose=self.verbose,
                 matching_method=self.matching_method,
                 colmap_cmd=self.colmap_cmd,
+                incremental=incremental,
             )
         elif sfm_tool == "hloc":
             if mask_path is not None:
@@ -225,9 +272,15 @@ class ColmapConverterToNerfstudioDataset(BaseConverterToNerfstudioDataset):
             )
         else:
             raise RuntimeError("Invalid combination of sfm_tool, feature_type, and matcher_type, " "exiting")
+        self.stage_cache.record(
+            "colmap",
+            fingerprint,
+            {"params": self.stage_cache.fingerprint(params), "images": image_hashes},
+        )
 
     def __post_init__(self) -> None:
         super().__post_init__()
+        self.stage_cache = StageCache(self.output_dir, enabled=self.incremental)
         install_checks.check_ffmpeg_installed()
         install_checks.check_colmap_installed()
 
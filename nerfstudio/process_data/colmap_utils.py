@@ -35,7 +35,8 @@ from nerfstudio.data.utils.colmap_parsing_utils import (
     read_images_binary,
     read_points3D_binary,
 )
-from nerfstudio.process_data.process_data_utils import CameraModel
+from nerfstudio.process_data import match_planning_utils
+from nerfstudio.process_data.process_data_utils import CameraModel, list_images
 from nerfstudio.utils import colormaps
 from nerfstudio.utils.rich_utils import CONSOLE, status
 from nerfstudio.utils.scripts import run_command
@@ -92,8 +93,9 @@ def run_colmap(
     camera_mask_path: Optional[Path] = None,
     gpu: bool = True,
     verbose: bool = False,
-    matching_method: Literal["vocab_tree", "exhaustive", "sequential"] = "vocab_tree",
+    matching_method: Literal["vocab_tree", "exhaustive", "sequential", "planned"] = "vocab_tree",
     colmap_cmd: str = "colmap",
+    incremental: bool = False,
 ) -> None:
     """Runs COLMAP on the images.
 
@@ -104,14 +106,19 @@ def run_colmap(
         camera_mask_path: Path to the camera mask.
         gpu: If True, use GPU.
         verbose: If True, logs the output of the command.
-        matching_method: Matching method to use.
+        matching_method: Matching method to use. "planned" only matches the candidate pairs built by
+            match_planning_utils.plan_image_pairs from capture order, GPS metadata and global image similarity.
         colmap_cmd: Path to the COLMAP executable.
+        incremental: If True, reuses the existing database and reconstruction. COLMAP then only extracts features of
+            images that are not in the database, only matches image pairs that were not matched yet, and registers
+            the new images into the existing model.
     """
 
     colmap_version = get_colmap_version(colmap_cmd)
 
     colmap_database_path = colmap_dir / "database.db"
-    colmap_database_path.unlink(missing_ok=True)
+    if not incremental:
+        colmap_database_path.unlink(missing_ok=True)
 
     # Feature extraction
     feature_extractor_cmd = [
@@ -131,11 +138,23 @@ def run_colmap(
     CONSOLE.log("[bold green]:tada: Done extracting COLMAP features.")
 
     # Feature matching
-    feature_matcher_cmd = [
-        f"{colmap_cmd} {matching_method}_matcher",
-        f"--database_path {colmap_dir / 'database.db'}",
-        f"--SiftMatching.use_gpu {int(gpu)}",
-    ]
+    if matching_method == "planned":
+        match_pairs_path = colmap_dir / "match_pairs.txt"
+        pairs = match_planning_utils.plan_image_pairs(list_images(image_dir))
+        match_planning_utils.write_image_pairs(pairs, image_dir, match_pairs_path)
+        feature_matcher_cmd = [
+            f"{colmap_cmd} matches_importer",
+            f"--database_path {colmap_dir / 'database.db'}",
+            f"--match_list_path {match_pairs_path}",
+            "--match_type pairs",
+            f"--SiftMatching.use_gpu {int(gpu)}",
+        ]
+    else:
+        feature_matcher_cmd = [
+            f"{colmap_cmd} {matching_method}_matcher",
+            f"--database_path {colmap_dir / 'database.db'}",
+            f"--SiftMatching.use_gpu {int(gpu)}",
+        ]
     if matching_method == "vocab_tree":
         vocab_tree_filename = get_vocab_tree()
         feature_matcher_cmd.append(f'--VocabTreeMatching.vocab_tree_path "{vocab_tree_filename}"')
@@ -151,8 +170,13 @@ def run_colmap(
         f"{colmap_cmd} mapper",
         f"--database_path {colmap_dir / 'database.db'}",
         f"--image_path {image_dir}",
-        f"--output_path {sparse_dir}",
     ]
+    if incremental and (sparse_dir / "0" / "cameras.bin").exists():
+        # Continues the previous reconstruction, which is written back in place.
+        mapper_cmd.append(f"--input_path {sparse_dir / '0'}")
+        mapper_cmd.append(f"--output_path {sparse_dir / '0'}")
+    else:
+        mapper_cmd.append(f"--output_path {sparse_dir}")
     if colmap_version >= 3.7:
         mapper_cmd.append("--Mapper.ba_global_function_tolerance 1e-6")
 
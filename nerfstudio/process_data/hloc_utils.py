@@ -23,6 +23,7 @@ import sys
 from pathlib import Path
 from typing import Literal
 
+from nerfstudio.process_data import match_planning_utils
 from nerfstudio.process_data.process_data_utils import CameraModel
 from nerfstudio.utils.rich_utils import CONSOLE
 
@@ -54,7 +55,7 @@ def run_hloc(
     colmap_dir: Path,
     camera_model: CameraModel,
     verbose: bool = False,
-    matching_method: Literal["vocab_tree", "exhaustive", "sequential"] = "vocab_tree",
+    matching_method: Literal["vocab_tree", "exhaustive", "sequential", "planned"] = "vocab_tree",
     feature_type: Literal[
         "sift", "superpoint_aachen", "superpoint_max", "superpoint_inloc", "r2d2", "d2net-ss", "sosnet", "disk"
     ] = "superpoint_aachen",
@@ -103,6 +104,9 @@ def run_hloc(
     extract_features.main(feature_conf, image_dir, image_list=references, feature_path=features)
     if matching_method == "exhaustive":
         pairs_from_exhaustive.main(sfm_pairs, image_list=references)
+    elif matching_method == "planned":
+        pairs = match_planning_utils.plan_image_pairs(sorted(image_dir / reference for reference in references))
+        match_planning_utils.write_image_pairs(pairs, image_dir, sfm_pairs)
     else:
         retrieval_path = extract_features.main(retrieval_conf, image_dir, outputs)
         if num_matched >= len(references):
@@ -15,7 +15,8 @@
 """Processes an image sequence to a nerfstudio compatible dataset."""
 
 from dataclasses import dataclass
-from typing import Optional
+from pathlib import Path
+from typing import Dict, List, Optional
 
 from nerfstudio.process_data import equirect_utils, process_data_utils
 from nerfstudio.process_data.colmap_converter_to_nerfstudio_dataset import ColmapConverterToNerfstudioDataset
@@ -63,31 +64,51 @@ class ImagesToNerfstudioDataset(ColmapConverterToNerfstudioDataset):
 
         # Copy and downscale images
         if not self.skip_image_processing:
-            # Copy images to output directory
-            image_rename_map_paths = process_data_utils.copy_images(
-                self.data,
-                image_dir=self.image_dir,
-                crop_factor=self.crop_factor,
-                image_prefix="frame_train_" if self.eval_data is not None else "frame_",
-                verbose=self.verbose,
-                num_downscales=self.num_downscales,
-                same_dimensions=self.same_dimensions,
-                keep_image_dir=False,
-            )
+            source_images = process_data_utils.list_images(self.data)
             if self.eval_data is not None:
-                eval_image_rename_map_paths = process_data_utils.copy_images(
-                    self.eval_data,
-                    image_dir=self.image_dir,
-                    crop_factor=self.crop_factor,
-                    image_prefix="frame_eval_",
-                    verbose=self.verbose,
-                    num_downscales=self.num_downscales,
-                    same_dimensions=self.same_dimensions,
-                    keep_image_dir=True,
+                source_images += process_data_utils.list_images(self.eval_data)
+            params = {
+                "crop_factor": self.crop_factor,
+                "num_downscales": self.num_downscales,
+                "same_dimensions": self.same_dimensions,
+                "eval_data": self.eval_data,
+            }
+            image_hashes = {str(path): self.stage_cache.hash_file(path) for path in source_images}
+            fingerprint = self.stage_cache.fingerprint(params, image_hashes)
+            previous = self.stage_cache.get_metadata("copy")
+            if self.stage_cache.is_up_to_date("copy", fingerprint, [self.image_dir]):
+                CONSOLE.log("[bold green]Skipping copying images, the input images are unchanged.")
+                image_rename_map = previous["image_rename_map"]
+            else:
+                # Images that were only added keep the frame names of the previous run, so that only the new images
+                # are copied and the incremental COLMAP run sees the previous images unchanged.
+                previous_frames = previous.get("frames", {})
+                if (
+                    self.image_dir.exists()
+                    and previous.get("params") == self.stage_cache.fingerprint(params)
+                    and all(image_hashes.get(path) == sha1 for path, sha1 in previous.get("images", {}).items())
+                ):
+                    frames = dict(previous_frames)
+                else:
+                    frames = {}
+                new_images = [path for path in source_images if str(path) not in frames]
+                if new_images:
+                    CONSOLE.log(f"Copying {len(new_images)} new images, keeping {len(frames)} copied images.")
+                    frames.update(self._copy_new_images(new_images, frames, keep_image_dir=len(frames) > 0))
+                if not frames:
+                    raise RuntimeError("No usable images in the data folder.")
+
+                image_rename_map = {Path(path).name: name for path, name in frames.items()}
+                self.stage_cache.record(
+                    "copy",
+                    fingerprint,
+                    {
+                        "image_rename_map": image_rename_map,
+                        "params": self.stage_cache.fingerprint(params),
+                        "images": image_hashes,
+                        "frames": frames,
+                    },
                 )
-                image_rename_map_paths.update(eval_image_rename_map_paths)
-
-            image_rename_map = dict((a.name, b.name) for a, b in image_rename_map_paths.items())
             num_frames = len(image_rename_map)
             summary_log.append(f"Starting with {num_frames} images")
 
@@ -131,3 +152,46 @@ class ImagesToNerfstudioDataset(ColmapConverterToNerfstudioDataset):
 
         for summary in summary_log:
             CONSOLE.log(summary)
+
+    def _copy_new_images(self, new_images: List[Path], frames: Dict[str, str], keep_image_dir: bool) -> Dict[str, str]:
+        """Copies and downscales images that are not in the output directory yet.
+
+        The new images are numbered after the highest frame number already copied with the same prefix, so the names of
+        the copied images never change.
+
+        Args:
+            new_images: Source paths of the images to copy.
+            frames: Frame names of the already copied images, indexed by source path.
+            keep_image_dir: If False, the output directories are cleared first.
+        Returns:
+            The frame names of the new images, indexed by source path.
+        """
+        eval_images = set(process_data_utils.list_images(self.eval_data)) if self.eval_data is not None else set()
+        new_frames = {}
+        for is_eval in (False, True):
+            image_paths = [path for path in new_images if (path in eval_images) == is_eval]
+            if not image_paths:
+                continue
+            if is_eval:
+                image_prefix = "frame_eval_"
+            else:
+                image_prefix = "frame_train_" if self.eval_data is not None else "frame_"
+            numbers = [
+                int(Path(name).stem[len(image_prefix) :])
+                for name in frames.values()
+                if Path(name).stem[len(image_prefix) :].isdigit() and name.startswith(image_prefix)
+            ]
+            copied_paths = process_data_utils.copy_images_list(
+                image_paths=list(image_paths),
+                image_dir=self.image_dir,
+                num_downscales=self.num_downscales,
+                image_prefix=image_prefix,
+                crop_factor=self.crop_factor,
+                verbose=self.verbose,
+                keep_image_dir=keep_image_dir,
+                same_dimensions=self.same_dimensions,
+                start_index=max(numbers, default=0) + 1,
+            )
+            new_frames.update({str(path): copied.name for path, copied in zip(image_paths, copied_paths)})
+            keep_image_dir = True
+        return new_frames
@@ -0,0 +1,194 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Planning of the image pairs to match for structure from motion, so that large captures don't need exhaustive matching.
+"""
+
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+from rich.progress import track
+
+from nerfstudio.utils.rich_utils import CONSOLE
+
+EARTH_RADIUS = 6378137.0
+"""Equatorial radius of the earth in meters, used to convert GPS coordinates to local metric coordinates."""
+_GPS_IFD = 0x8825
+
+
+def _dms_to_degrees(dms, ref: str) -> float:
+    degrees = float(dms[0]) + float(dms[1]) / 60.0 + float(dms[2]) / 3600.0
+    return -degrees if ref in ("S", "W") else degrees
+
+
+def get_image_gps(image_path: Path) -> Optional[np.ndarray]:
+    """Reads the GPS position of an image from its EXIF metadata.
+
+    Args:
+        image_path: Path to the image.
+
+    Returns:
+        Latitude and longitude in degrees and altitude in meters, or None if the image has no GPS metadata.
+    """
+    try:
+        with Image.open(image_path) as image:
+            gps = image.getexif().get_ifd(_GPS_IFD)
+    except (OSError, ValueError):
+        return None
+    # Keys are defined by the EXIF standard: 1/2 latitude ref/value, 3/4 longitude ref/value, 6 altitude.
+    if not all(key in gps for key in (1, 2, 3, 4)):
+        return None
+    latitude = _dms_to_degrees(gps[2], gps[1])
+    longitude = _dms_to_degrees(gps[4], gps[3])
+    altitude = float(gps.get(6, 0.0))
+    return np.array([latitude, longitude, altitude])
+
+
+def gps_to_local_coordinates(gps: np.ndarray) -> np.ndarray:
+    """Converts latitude/longitude/altitude to approximate east/north/up coordinates in meters.
+
+    Uses an equirectangular projection around the mean position, which is accurate at the scale of a capture.
+
+    Args:
+        gps: Array of shape [N, 3] as returned by get_image_gps.
+
+    Returns:
+        Array of shape [N, 3] in meters.
+    """
+    origin = gps.mean(axis=0)
+    north = np.radians(gps[:, 0] - origin[0]) * EARTH_RADIUS
+    east = np.radians(gps[:, 1] - origin[1]) * EARTH_RADIUS * np.cos(np.radians(origin[0]))
+    return np.stack([east, north, gps[:, 2] - origin[2]], axis=-1)
+
+
+def compute_global_descriptors(image_paths: List[Path], size: int = 32) -> np.ndarray:
+    """Computes a cheap global descriptor per image: a normalized grayscale thumbnail.
+
+    JPEGs are decoded directly at a reduced resolution, so this is much faster than loading the full images.
+
+    Args:
+        image_paths: Paths to the images.
+        size: Side of the square thumbnail.
+
+    Returns:
+        Unit norm descriptors of shape [N, size * size].
+    """
+    descriptors = np.empty((len(image_paths), size * size), dtype=np.float32)
+    for i, image_path in enumerate(track(image_paths, description="Computing global descriptors", transient=True)):
+        with Image.open(image_path) as image:
+            image.draft("L", (size * 4, size * 4))
+            thumbnail = np.asarray(image.convert("L").resize((size, size), resample=Image.BILINEAR), np.float32)
+        thumbnail = thumbnail.ravel() - thumbnail.mean()
+        descriptors[i] = thumbnail / max(float(np.linalg.norm(thumbnail)), 1e-6)
+    return descriptors
+
+
+def _nearest_neighbors(points: np.ndarray, num_neighbors: int, similarity: bool, chunk_size: int = 1024) -> np.ndarray:
+    """Returns the indices of the nearest neighbors of each point, excluding the point itself.
+
+    Processed in chunks so that memory stays O(chunk_size * N) for large captures.
+    """
+    num_neighbors = min(num_neighbors, len(points) - 1)
+    neighbors = np.empty((len(points), num_neighbors), dtype=np.int64)
+    if num_neighbors <= 0:
+        return neighbors
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start : start + chunk_size]
+        if similarity:
+            scores = -(chunk @ points.T)
+        else:
+            scores = ((chunk[:, None, :] - points[None, :, :]) ** 2).sum(-1)
+        scores[np.arange(len(chunk)), np.arange(start, start + len(chunk))] = np.inf
+        neighbors[start : start + len(chunk)] = np.argpartition(scores, num_neighbors - 1, axis=1)[:, :num_neighbors]
+    return neighbors
+
+
+def plan_image_pairs(
+    image_paths: List[Path],
+    sequential_overlap: int = 10,
+    num_retrieval_neighbors: int = 20,
+    num_gps_neighbors: int = 20,
+    max_gps_distance: Optional[float] = None,
+) -> List[Tuple[Path, Path]]:
+    """Builds the list of candidate image pairs to match.
+
+    The candidates are the union of
+    1. consecutive images in capture order (useful for videos and sequential captures),
+    2. the nearest neighbors by GPS position, for images that have GPS metadata,
+    3. the nearest neighbors by global descriptor similarity, which also provides loop closures.
+
+    The number of pairs grows linearly with the number of images instead of quadratically as with exhaustive matching.
+
+    Args:
+        image_paths: Paths to the images, in capture order.
+        sequential_overlap: Number of following images each image is matched to. 0 disables sequential pairs.
+        num_retrieval_neighbors: Number of most similar images each image is matched to. 0 disables retrieval.
+        num_gps_neighbors: Number of closest images by GPS position each image is matched to. 0 disables GPS pairs.
+        max_gps_distance: If set, GPS neighbors further away than this distance in meters are discarded.
+
+    Returns:
+        Image pairs, each pair appearing once.
+    """
+    num_images = len(image_paths)
+    pairs: Set[Tuple[int, int]] = set()
+
+    for i in range(num_images):
+        for j in range(i + 1, min(i + 1 + sequential_overlap, num_images)):
+            pairs.add((i, j))
+    num_sequential = len(pairs)
+
+    num_gps = 0
+    if num_gps_neighbors > 0:
+        gps = [get_image_gps(image_path) for image_path in image_paths]
+        has_gps = np.array([position is not None for position in gps])
+        if has_gps.sum() > 1:
+            indices = np.nonzero(has_gps)[0]
+            positions = gps_to_local_coordinates(np.stack([gps[i] for i in indices]))
+            neighbors = _nearest_neighbors(positions, num_gps_neighbors, similarity=False)
+            for i, row in enumerate(neighbors):
+                for j in row:
+                    if max_gps_distance is None or np.linalg.norm(positions[i] - positions[j]) <= max_gps_distance:
+                        pairs.add((min(indices[i], indices[j]), max(indices[i], indices[j])))
+            num_gps = len(pairs) - num_sequential
+
+    if num_retrieval_neighbors > 0:
+        descriptors = compute_global_descriptors(image_paths)
+        neighbors = _nearest_neighbors(descriptors, num_retrieval_neighbors, similarity=True)
+        for i, row in enumerate(neighbors):
+            for j in row:
+                pairs.add((min(i, int(j)), max(i, int(j))))
+    num_retrieval = len(pairs) - num_sequential - num_gps
+
+    CONSOLE.log(
+        f"Planned {len(pairs)} image pairs ({num_sequential} sequential, {num_gps} GPS, {num_retrieval} retrieval) "
+        f"instead of {num_images * (num_images - 1) // 2} exhaustive pairs."
+    )
+    return [(image_paths[i], image_paths[j]) for i, j in sorted(pairs)]
+
+
+def write_image_pairs(pairs: List[Tuple[Path, Path]], image_dir: Path, output_path: Path) -> None:
+    """Writes image pairs in the format expected by COLMAP's matches_importer and hloc.
+
+    Args:
+        pairs: Image pairs as returned by plan_image_pairs.
+        image_dir: Directory the image names are relative to.
+        output_path: Path of the pairs text file.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf8") as file:
+        for image_a, image_b in pairs:
+            file.write(f"{image_a.relative_to(image_dir).as_posix()} {image_b.relative_to(image_dir).as_posix()}\n")
@@ -14,10 +14,11 @@
 
 """Helper utils for processing polycam data into the nerfstudio format."""
 
-import json
 import sys
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from rich.progress import track
 
 from nerfstudio.process_data import process_data_utils
 from nerfstudio.process_data.process_data_utils import CAMERA_MODELS
@@ -25,6 +26,30 @@ from nerfstudio.utils import io
 from nerfstudio.utils.rich_utils import CONSOLE
 
 
+def _get_frame(
+    frame_json: Dict[str, Any], file_path: str, depth_file_path: Optional[str], crop_border_pixels: int
+) -> Dict[str, Any]:
+    """Converts the camera of a Polycam frame into a nerfstudio frame."""
+    frame = {}
+    frame["fl_x"] = frame_json["fx"]
+    frame["fl_y"] = frame_json["fy"]
+    frame["cx"] = frame_json["cx"] - crop_border_pixels
+    frame["cy"] = frame_json["cy"] - crop_border_pixels
+    frame["w"] = frame_json["width"] - crop_border_pixels * 2
+    frame["h"] = frame_json["height"] - crop_border_pixels * 2
+    frame["file_path"] = file_path
+    if depth_file_path is not None:
+        frame["depth_file_path"] = depth_file_path
+    # Transform matrix to nerfstudio format. Please refer to the documentation for coordinate system conventions.
+    frame["transform_matrix"] = [
+        [frame_json["t_20"], frame_json["t_21"], frame_json["t_22"], frame_json["t_23"]],
+        [frame_json["t_00"], frame_json["t_01"], frame_json["t_02"], frame_json["t_03"]],
+        [frame_json["t_10"], frame_json["t_11"], frame_json["t_12"], frame_json["t_13"]],
+        [0.0, 0.0, 0.0, 1.0],
+    ]
+    return frame
+
+
 def polycam_to_json(
     image_filenames: List[Path],
     depth_filenames: List[Path],
@@ -35,6 +60,9 @@ def polycam_to_json(
 ) -> List[str]:
     """Convert Polycam data into a nerfstudio dataset.
 
+    Writes the transforms.json file of images and depth maps copied by process_images and process_depth_maps, one
+    frame at a time as process_polycam does. New code should use process_polycam, which also copies the files.
+
     Args:
         image_filenames: List of paths to the original images.
         depth_filenames: List of paths to the original depth maps.
@@ -47,41 +75,28 @@ def polycam_to_json(
         Summary of the conversion.
     """
     use_depth = len(image_filenames) == len(depth_filenames)
-    data = {}
-    data["camera_model"] = CAMERA_MODELS["perspective"].value
-    # Needs to be a string for camera_utils.auto_orient_and_center_poses
-    data["orientation_override"] = "none"
+    header = {
+        "camera_model": CAMERA_MODELS["perspective"].value,
+        # Needs to be a string for camera_utils.auto_orient_and_center_poses
+        "orientation_override": "none",
+    }
 
-    frames = []
     skipped_frames = 0
-    for i, image_filename in enumerate(image_filenames):
-        json_filename = cameras_dir / f"{image_filename.stem}.json"
-        frame_json = io.load_from_json(json_filename)
-        if "blur_score" in frame_json and frame_json["blur_score"] < min_blur_score:
-            skipped_frames += 1
-            continue
-        frame = {}
-        frame["fl_x"] = frame_json["fx"]
-        frame["fl_y"] = frame_json["fy"]
-        frame["cx"] = frame_json["cx"] - crop_border_pixels
-        frame["cy"] = frame_json["cy"] - crop_border_pixels
-        frame["w"] = frame_json["width"] - crop_border_pixels * 2
-        frame["h"] = frame_json["height"] - crop_border_pixels * 2
-        frame["file_path"] = f"./images/frame_{i+1:05d}{image_filename.suffix}"
-        if use_depth:
-            frame["depth_file_path"] = f"./depth/frame_{i+1:05d}{depth_filenames[i].suffix}"
-        # Transform matrix to nerfstudio format. Please refer to the documentation for coordinate system conventions.
-        frame["transform_matrix"] = [
-            [frame_json["t_20"], frame_json["t_21"], frame_json["t_22"], frame_json["t_23"]],
-            [frame_json["t_00"], frame_json["t_01"], frame_json["t_02"], frame_json["t_03"]],
-            [frame_json["t_10"], frame_json["t_11"], frame_json["t_12"], frame_json["t_13"]],
-            [0.0, 0.0, 0.0, 1.0],
-        ]
-        frames.append(frame)
-    data["frames"] = frames
-
-    with open(output_dir / "transforms.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    with process_data_utils.TransformsJsonWriter(output_dir / "transforms.json", header) as writer:
+        for i, image_filename in enumerate(image_filenames):
+            json_filename = cameras_dir / f"{image_filename.stem}.json"
+            frame_json = io.load_from_json(json_filename)
+            if "blur_score" in frame_json and frame_json["blur_score"] < min_blur_score:
+                skipped_frames += 1
+                continue
+            writer.write_frame(
+                _get_frame(
+                    frame_json,
+                    f"./images/frame_{i+1:05d}{image_filename.suffix}",
+                    f"./depth/frame_{i+1:05d}{depth_filenames[i].suffix}" if use_depth else None,
+                    crop_border_pixels,
+                )
+            )
 
     summary = []
     if skipped_frames > 0:
@@ -214,3 +229,94 @@ def process_depth_maps(
         summary_log.append(f"Started with {num_processed_depth_maps} images")
 
     return summary_log, polycam_depth_maps_filenames
+
+
+def process_polycam(
+    image_filenames: List[Path],
+    depth_filenames: List[Path],
+    cameras_dir: Path,
+    output_dir: Path,
+    min_blur_score: float = 0.0,
+    crop_border_pixels: int = 15,
+    num_downscales: int = 3,
+    num_workers: int = 8,
+) -> List[str]:
+    """Copies Polycam images and depth maps and writes the transforms.json file in a single streaming pass.
+
+    Each frame's camera is read, and its image and depth map are cropped, resized and written on a pool of threads.
+    Frames are appended to transforms.json as soon as they are done, so memory use doesn't grow with the number of
+    frames, and frames below the blur threshold are never copied.
+
+    Args:
+        image_filenames: List of paths to the original images.
+        depth_filenames: List of paths to the original depth maps. If empty, depth maps are not processed.
+        cameras_dir: Path to the polycam cameras directory.
+        output_dir: Path to the output directory.
+        min_blur_score: Minimum blur score to use an image. Images below this value will be skipped.
+        crop_border_pixels: Number of pixels to crop from each border of the image.
+        num_downscales: Number of times to downscale the images and depth maps. Downscales by 2 each time.
+        num_workers: Number of threads used to process the frames.
+
+    Returns:
+        Summary of the conversion.
+    """
+    use_depth = len(depth_filenames) > 0
+    if use_depth and len(image_filenames) != len(depth_filenames):
+        raise ValueError(
+            f"Expected same amount of depth maps as images. "
+            f"Instead got {len(image_filenames)} images and {len(depth_filenames)} depth maps"
+        )
+    image_dirs = process_data_utils.prepare_downscale_dirs(output_dir / "images", num_downscales)
+    depth_dirs = process_data_utils.prepare_downscale_dirs(output_dir / "depth", num_downscales) if use_depth else []
+
+    def process_frame(i: int) -> Optional[Dict[str, Any]]:
+        frame_json = io.load_from_json(cameras_dir / f"{image_filenames[i].stem}.json")
+        if "blur_score" in frame_json and frame_json["blur_score"] < min_blur_score:
+            return None
+        image_filename = f"frame_{i+1:05d}{image_filenames[i].suffix}"
+        process_data_utils.copy_and_resize_image(
+            image_filenames[i], image_filename, image_dirs, crop_border_pixels=crop_border_pixels
+        )
+        depth_filename = None
+        if use_depth:
+            depth_filename = f"frame_{i+1:05d}{depth_filenames[i].suffix}"
+            process_data_utils.copy_and_resize_image(
+                depth_filenames[i],
+                depth_filename,
+                depth_dirs,
+                crop_border_pixels=crop_border_pixels,
+                upscale_factor=2**process_data_utils.POLYCAM_UPSCALING_TIMES,
+                nearest_neighbor=True,
+            )
+        return _get_frame(
+            frame_json,
+            f"./images/{image_filename}",
+            f"./depth/{depth_filename}" if depth_filename is not None else None,
+            crop_border_pixels,
+        )
+
+    header = {
+        "camera_model": CAMERA_MODELS["perspective"].value,
+        # Needs to be a string for camera_utils.auto_orient_and_center_poses
+        "orientation_override": "none",
+    }
+    with process_data_utils.TransformsJsonWriter(output_dir / "transforms.json", header) as writer:
+        for frame in track(
+            process_data_utils.imap_ordered(process_frame, range(len(image_filenames)), num_workers),
+            total=len(image_filenames),
+            description="Processing frames",
+        ):
+            if frame is not None:
+                writer.write_frame(frame)
+
+    summary = []
+    skipped_frames = len(image_filenames) - writer.num_frames
+    if skipped_frames > 0:
+        summary.append(f"Skipped {skipped_frames} frames due to low blur score.")
+    summary.append(f"Final dataset is {writer.num_frames} frames.")
+
+    if writer.num_frames == 0:
+        CONSOLE.print("[bold red]No images remain after filtering, exiting")
+        sys.exit(1)
+
+    return summary
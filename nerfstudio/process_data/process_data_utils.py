@@ -14,14 +14,36 @@
 
 """Helper utils for processing data into the nerfstudio format."""
 
+import collections
+import concurrent.futures
+import functools
+import json
 import math
+import os
 import re
 import shutil
 import sys
+import textwrap
 from enum import Enum
 from pathlib import Path
-from typing import List, Literal, Optional, OrderedDict, Tuple, Union
-
+from types import TracebackType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    OrderedDict,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+import av
 import cv2
 import imageio
 import numpy as np
@@ -37,6 +59,9 @@ ALLOWED_RAW_EXTS = [".cr2"]
 """Suffix to use for converted images from raw."""
 RAW_CONVERTED_SUFFIX = ".jpg"
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 class CameraModel(Enum):
     """Enum for camera types."""
@@ -106,6 +131,197 @@ def get_num_frames_in_video(video: Path) -> int:
     return int(number_match[0])
 
 
+def get_video_frame_rate(video: Path) -> float:
+    """Returns the average frame rate of a video.
+
+    Args:
+        video: Path to a video.
+
+    Returns:
+        The number of frames per second.
+    """
+    cmd = f'ffprobe -v error -select_streams v:0 -show_entries stream=avg_frame_rate -of csv=p=0 "{video}"'
+    output = run_command(cmd)
+    assert output is not None
+    rate_match = re.search(r"(\d+)/(\d+)", output)
+    assert rate_match is not None and int(rate_match[2]) > 0
+    return int(rate_match[1]) / int(rate_match[2])
+
+
+def _frame_sharpness(gray_frame: np.ndarray) -> float:
+    """Variance of the Laplacian, higher values mean sharper (less blurry) frames."""
+    return float(cv2.Laplacian(gray_frame, cv2.CV_32F).var())
+
+
+def _get_display_rotation(frame: av.VideoFrame, stream: av.video.stream.VideoStream) -> float:
+    """Returns the counterclockwise rotation in degrees of the display matrix of a decoded frame.
+
+    VideoFrame.rotation only exists in recent PyAV releases. Older releases expose the display matrix as frame side
+    data, or with older ffmpeg builds as the clockwise "rotate" tag of the stream.
+    """
+    rotation = getattr(frame, "rotation", None)
+    if rotation is not None:
+        return rotation
+    for side_data in frame.side_data:
+        if getattr(side_data.type, "name", None) == "DISPLAYMATRIX":
+            # 3x3 matrix of 16.16 fixed point values, read as av_display_rotation_get does
+            matrix = np.frombuffer(bytes(side_data), dtype=np.int32)[:9].astype(np.float64)
+            scale_x, scale_y = math.hypot(matrix[0], matrix[3]), math.hypot(matrix[1], matrix[4])
+            if scale_x == 0 or scale_y == 0:
+                return 0
+            return -math.degrees(math.atan2(matrix[1] / scale_y, matrix[0] / scale_x))
+    return -float(stream.metadata.get("rotate", 0))
+
+
+def _rotate_to_display(frame: np.ndarray, rotation: float) -> np.ndarray:
+    """Rotates a decoded frame by the counterclockwise rotation of the display matrix of its stream, as the autorotation
+    of ffmpeg does. Flips of the display matrix are not applied."""
+    rotation = round(rotation / 90) % 4
+    if rotation == 0:
+        return frame
+    return cv2.rotate(
+        frame, [cv2.ROTATE_90_COUNTERCLOCKWISE, cv2.ROTATE_180, cv2.ROTATE_90_CLOCKWISE][rotation - 1]
+    )
+
+
+def _write_extracted_frame(
+    frame: np.ndarray,
+    index: int,
+    crop_factor: Tuple[float, float, float, float],
+    downscale_dirs: List[Path],
+    image_prefix: str,
+    image_format: Literal["png", "jpg"],
+) -> None:
+    """Crops a BGR frame and writes it along with its downscaled versions."""
+    height, width = frame.shape[:2]
+    frame = frame[
+        int(height * crop_factor[0]) : height - int(height * crop_factor[1]),
+        int(width * crop_factor[2]) : width - int(width * crop_factor[3]),
+    ]
+    params = [cv2.IMWRITE_JPEG_QUALITY, 95] if image_format == "jpg" else [cv2.IMWRITE_PNG_COMPRESSION, 3]
+    for i, downscale_dir in enumerate(downscale_dirs):
+        if i > 0:
+            frame = cv2.resize(frame, (frame.shape[1] // 2, frame.shape[0] // 2), interpolation=cv2.INTER_AREA)
+        cv2.imwrite(str(downscale_dir / f"{image_prefix}{index:05d}.{image_format}"), frame, params)
+
+
+def _extract_sharpest_frames_in_segment(
+    video_path: Path,
+    windows: np.ndarray,
+    first_index: int,
+    crop_factor: Tuple[float, float, float, float],
+    downscale_dirs: List[Path],
+    image_prefix: str,
+    image_format: Literal["png", "jpg"],
+) -> None:
+    """Decodes a contiguous range of frame windows and writes the sharpest frame of every window, rotated for display.
+
+    Args:
+        video_path: Path to the video.
+        windows: Array of shape [num_windows, 2] with the first and one-past-last frame index of each window.
+        first_index: Output index of the first window.
+        crop_factor: Portion of the image to crop. (top, bottom, left, right)
+        downscale_dirs: Output directories, each one downscaled by 2 with respect to the previous one.
+        image_prefix: Prefix to use for the image filenames.
+        image_format: Format of the extracted images.
+    """
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        time_base = float(stream.time_base)
+        fps = float(stream.average_rate)
+        start_pts = stream.start_time or 0
+        # Seeks to the closest keyframe before the segment, frames up to the segment start are decoded and dropped.
+        container.seek(start_pts + int(windows[0, 0] / fps / time_base), stream=stream, backward=True)
+
+        window = 0
+        best_frame, best_score = None, -1.0
+        for frame in container.decode(stream):
+            if frame.pts is None:
+                continue
+            frame_index = round((frame.pts - start_pts) * time_base * fps)
+            while window < len(windows) and frame_index >= windows[window, 1]:
+                if best_frame is not None:
+                    _write_extracted_frame(
+                        best_frame, first_index + window, crop_factor, downscale_dirs, image_prefix, image_format
+                    )
+                best_frame, best_score = None, -1.0
+                window += 1
+            if window == len(windows):
+                break
+            if frame_index < windows[window, 0]:
+                continue
+            # Scores are computed at a reduced resolution, which is enough to rank blur within a window.
+            gray = frame.reformat(width=max(frame.width // 4, 1), height=max(frame.height // 4, 1), format="gray")
+            score = _frame_sharpness(gray.to_ndarray())
+            if score > best_score:
+                best_frame, best_score = _rotate_to_display(frame.to_ndarray(format="bgr24"), _get_display_rotation(frame, stream)), score
+        if window < len(windows) and best_frame is not None:
+            _write_extracted_frame(
+                best_frame, first_index + window, crop_factor, downscale_dirs, image_prefix, image_format
+            )
+
+
+def _get_ffmpeg_thumbnail_cmd(
+    video_path: Path,
+    windows: np.ndarray,
+    first_index: int,
+    fps: Optional[float],
+    spacing: int,
+    crop_factor: Tuple[float, float, float, float],
+    downscale_dirs: List[Path],
+    image_prefix: str,
+    image_format: Literal["png", "jpg"],
+) -> str:
+    """Builds the ffmpeg command extracting one thumbnail per window of a time segment.
+
+    If fps is None, the whole video is processed, otherwise the segment is located with a keyframe seek.
+    """
+    ffmpeg_cmd = "ffmpeg"
+    if fps is not None:
+        # Input seeking jumps to the preceding keyframe and decodes up to the exact start time.
+        start_time = windows[0, 0] / fps
+        duration = (windows[-1, 1] - windows[0, 0]) / fps
+        ffmpeg_cmd += f" -ss {start_time:.6f} -t {duration:.6f}"
+    ffmpeg_cmd += f' -i "{video_path}"'
+
+    crop_cmd = ""
+    if crop_factor != (0.0, 0.0, 0.0, 0.0):
+        height = 1 - crop_factor[0] - crop_factor[1]
+        width = 1 - crop_factor[2] - crop_factor[3]
+        start_x = crop_factor[2]
+        start_y = crop_factor[0]
+        crop_cmd = f"crop=w=iw*{width}:h=ih*{height}:x=iw*{start_x}:y=ih*{start_y},"
+
+    num_downscales = len(downscale_dirs) - 1
+    downscale_chains = [f"[t{i}]scale=iw/{2**i}:ih/{2**i}[out{i}]" for i in range(num_downscales + 1)]
+    downscale_paths = [downscale_dirs[i] / f"{image_prefix}%05d.{image_format}" for i in range(num_downscales + 1)]
+
+    downscale_chain = (
+        f"split={num_downscales + 1}"
+        + "".join([f"[t{i}]" for i in range(num_downscales + 1)])
+        + ";"
+        + ";".join(downscale_chains)
+    )
+
+    if spacing > 1:
+        ffmpeg_cmd += " -vsync vfr"
+        select_cmd = f"thumbnail={spacing},setpts=N/TB,"
+    else:
+        if image_format == "png":
+            ffmpeg_cmd += " -pix_fmt bgr8"
+        select_cmd = ""
+
+    output_args = f" -start_number {first_index}"
+    if image_format == "jpg":
+        output_args += " -q:v 2"
+    downscale_cmd = f' -filter_complex "{select_cmd}{crop_cmd}{downscale_chain}"' + "".join(
+        [f' -map "[out{i}]"{output_args} "{downscale_paths[i]}"' for i in range(num_downscales + 1)]
+    )
+
+    return ffmpeg_cmd + downscale_cmd
+
+
 def convert_video_to_images(
     video_path: Path,
     image_dir: Path,
@@ -115,9 +331,15 @@ def convert_video_to_images(
     verbose: bool = False,
     image_prefix: str = "frame_",
     keep_image_dir: bool = False,
+    frame_selection: Literal["thumbnail", "sharpest"] = "thumbnail",
+    image_format: Literal["png", "jpg"] = "png",
+    num_workers: int = 1,
 ) -> Tuple[List[str], int]:
     """Converts a video into a sequence of images.
 
+    The video is split into windows of consecutive frames and one frame is kept per window. Windows are grouped into
+    contiguous time segments that are extracted in parallel, each one starting from the closest preceding keyframe.
+
     Args:
         video_path: Path to the video.
         output_dir: Path to the output directory.
@@ -127,6 +349,10 @@ def convert_video_to_images(
         verbose: If True, logs the output of the command.
         image_prefix: Prefix to use for the image filenames.
         keep_image_dir: If True, don't delete the output directory if it already exists.
+        frame_selection: How to pick the frame of each window. "thumbnail" uses the ffmpeg thumbnail filter (most
+            representative frame), "sharpest" keeps the frame with the highest variance of the Laplacian.
+        image_format: Format of the extracted images. "png" is lossless, "jpg" is written at quality 95.
+        num_workers: Number of time segments to extract in parallel.
     Returns:
         A tuple containing summary of the conversion and the number of extracted frames.
     """
@@ -157,51 +383,61 @@ def convert_video_to_images(
             sys.exit(1)
         CONSOLE.print("Number of frames in video:", num_frames)
 
-        ffmpeg_cmd = f'ffmpeg -i "{video_path}"'
-
-        crop_cmd = ""
-        if crop_factor != (0.0, 0.0, 0.0, 0.0):
-            height = 1 - crop_factor[0] - crop_factor[1]
-            width = 1 - crop_factor[2] - crop_factor[3]
-            start_x = crop_factor[2]
-            start_y = crop_factor[0]
-            crop_cmd = f"crop=w=iw*{width}:h=ih*{height}:x=iw*{start_x}:y=ih*{start_y},"
-
-        num_frames = get_num_frames_in_video(video_path)
         spacing = num_frames // num_frames_target
-
-        downscale_chains = [f"[t{i}]scale=iw/{2**i}:ih/{2**i}[out{i}]" for i in range(num_downscales + 1)]
-        downscale_dirs = [Path(str(image_dir) + (f"_{2**i}" if i > 0 else "")) for i in range(num_downscales + 1)]
-        downscale_paths = [downscale_dirs[i] / f"{image_prefix}%05d.png" for i in range(num_downscales + 1)]
-
-        for dir in downscale_dirs:
-            dir.mkdir(parents=True, exist_ok=True)
-
-        downscale_chain = (
-            f"split={num_downscales + 1}"
-            + "".join([f"[t{i}]" for i in range(num_downscales + 1)])
-            + ";"
-            + ";".join(downscale_chains)
-        )
-
         if spacing > 1:
             CONSOLE.print("Number of frames to extract:", math.ceil(num_frames / spacing))
-            ffmpeg_cmd += " -vsync vfr"
-            select_cmd = f"thumbnail={spacing},setpts=N/TB,"
         else:
             CONSOLE.print("[bold red]Can't satisfy requested number of frames. Extracting all frames.")
-            ffmpeg_cmd += " -pix_fmt bgr8"
-            select_cmd = ""
+            spacing = 1
+        window_starts = np.arange(0, num_frames, spacing)
+        windows = np.stack([window_starts, np.minimum(window_starts + spacing, num_frames)], axis=-1)
+        segments = [w for w in np.array_split(np.arange(len(windows)), max(num_workers, 1)) if len(w) > 0]
 
-        downscale_cmd = f' -filter_complex "{select_cmd}{crop_cmd}{downscale_chain}"' + "".join(
-            [f' -map "[out{i}]" "{downscale_paths[i]}"' for i in range(num_downscales + 1)]
-        )
+        downscale_dirs = [Path(str(image_dir) + (f"_{2**i}" if i > 0 else "")) for i in range(num_downscales + 1)]
+        for dir in downscale_dirs:
+            dir.mkdir(parents=True, exist_ok=True)
 
-        ffmpeg_cmd += downscale_cmd
+        if frame_selection == "sharpest":
+            jobs = [
+                functools.partial(
+                    _extract_sharpest_frames_in_segment,
+                    video_path,
+                    windows[segment],
+                    int(segment[0]) + 1,
+                    crop_factor,
+                    downscale_dirs,
+                    image_prefix,
+                    image_format,
+                )
+                for segment in segments
+            ]
+        else:
+            fps = get_video_frame_rate(video_path) if len(segments) > 1 else None
+            jobs = [
+                functools.partial(
+                    run_command,
+                    _get_ffmpeg_thumbnail_cmd(
+                        video_path,
+                        windows[segment],
+                        int(segment[0]) + 1,
+                        fps,
+                        spacing,
+                        crop_factor,
+                        downscale_dirs,
+                        image_prefix,
+                        image_format,
+                    ),
+                    verbose=verbose,
+                )
+                for segment in segments
+            ]
 
-        run_command(ffmpeg_cmd, verbose=verbose)
+        # Decoding happens in ffmpeg/libav, which release the GIL, so threads are enough to use all cores.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            for future in [executor.submit(job) for job in jobs]:
+                future.result()
 
-        num_final_frames = len(list(image_dir.glob("*.png")))
+        num_final_frames = len(list(image_dir.glob(f"*.{image_format}")))
         summary_log = []
         summary_log.append(f"Starting with {num_frames} video frames")
         summary_log.append(f"We extracted {num_final_frames} images with prefix '{image_prefix}'")
@@ -222,6 +458,7 @@ def copy_images_list(
     upscale_factor: Optional[int] = None,
     nearest_neighbor: bool = False,
     same_dimensions: bool = True,
+    start_index: int = 1,
 ) -> List[Path]:
     """Copy all images in a list of Paths. Useful for filtering from a directory.
     Args:
@@ -233,6 +470,7 @@ def copy_images_list(
         crop_factor: Portion of the image to crop. Should be in [0,1] (top, bottom, left, right)
         verbose: If True, print extra logging.
         keep_image_dir: If True, don't delete the output directory if it already exists.
+        start_index: Number of the first copied image, to append images after the ones already in the output directory.
     Returns:
         A list of the copied image Paths.
     """
@@ -253,11 +491,12 @@ def copy_images_list(
     for idx, image_path in enumerate(image_paths):
         if verbose:
             CONSOLE.log(f"Copying image {idx + 1} of {len(image_paths)}...")
-        copied_image_path = image_dir / f"{image_prefix}{idx + 1:05d}{image_path.suffix}"
+        framenum = start_index + idx
+        copied_image_path = image_dir / f"{image_prefix}{framenum:05d}{image_path.suffix}"
         try:
             # if CR2 raw, we want to read raw and write RAW_CONVERTED_SUFFIX, and change the file suffix for downstream processing
             if image_path.suffix.lower() in ALLOWED_RAW_EXTS:
-                copied_image_path = image_dir / f"{image_prefix}{idx + 1:05d}{RAW_CONVERTED_SUFFIX}"
+                copied_image_path = image_dir / f"{image_prefix}{framenum:05d}{RAW_CONVERTED_SUFFIX}"
                 with rawpy.imread(str(image_path)) as raw:
                     rgb = raw.postprocess()
                 imageio.imsave(copied_image_path, rgb)
@@ -293,9 +532,14 @@ def copy_images_list(
     # ffmpeg batch commands assume all images are the same dimensions.
     # When this is not the case (e.g. mixed portrait and landscape images), we need to do individually.
     # (Unfortunately, that is much slower.)
-    for framenum in range(1, (1 if same_dimensions else num_frames) + 1):
+    for framenum in range(start_index, start_index + (1 if same_dimensions else num_frames)):
         framename = f"{image_prefix}%05d" if same_dimensions else f"{image_prefix}{framenum:05d}"
-        ffmpeg_cmd = f'ffmpeg -y -noautorotate -i "{image_dir / f"{framename}{copied_image_paths[0].suffix}"}" -q:v 2 '
+        # the numbering of the input and output patterns both start at the first new image
+        start_number = f" -start_number {start_index}" if same_dimensions else ""
+        ffmpeg_cmd = (
+            f"ffmpeg -y -noautorotate{start_number} "
+            f'-i "{image_dir / f"{framename}{copied_image_paths[0].suffix}"}" -q:v 2 '
+        )
 
         crop_cmd = ""
         if crop_border_pixels is not None:
@@ -313,7 +557,7 @@ def copy_images_list(
 
         downscale_cmd = f' -filter_complex "{select_cmd}{crop_cmd}{downscale_chain}"' + "".join(
             [
-                f' -map "[out{i}]" "{downscale_dirs[i] / f"{framename}{copied_image_paths[0].suffix}"}"'
+                f' -map "[out{i}]"{start_number} "{downscale_dirs[i] / f"{framename}{copied_image_paths[0].suffix}"}"'
                 for i in range(num_downscales + 1)
             ]
         )
@@ -371,6 +615,136 @@ def copy_and_upscale_polycam_depth_maps_list(
     return copied_depth_map_paths
 
 
+def prepare_downscale_dirs(image_dir: Path, num_downscales: int, keep_image_dir: bool = False) -> List[Path]:
+    """Creates the output directory and the directories of its downscaled versions.
+
+    Args:
+        image_dir: Path to the output directory.
+        num_downscales: Number of times the images are downscaled by 2.
+        keep_image_dir: If True, don't delete the directories if they already exist.
+    Returns:
+        The directories, from full resolution to the most downscaled.
+    """
+    downscale_dirs = [Path(str(image_dir) + (f"_{2**i}" if i > 0 else "")) for i in range(num_downscales + 1)]
+    for downscale_dir in downscale_dirs:
+        if not keep_image_dir:
+            shutil.rmtree(downscale_dir, ignore_errors=True)
+        downscale_dir.mkdir(parents=True, exist_ok=True)
+    return downscale_dirs
+
+
+def copy_and_resize_image(
+    image_path: Path,
+    filename: str,
+    downscale_dirs: List[Path],
+    crop_border_pixels: Optional[int] = None,
+    upscale_factor: Optional[int] = None,
+    nearest_neighbor: bool = False,
+) -> None:
+    """Copies a single image along with its downscaled versions, without spawning an ffmpeg process.
+
+    Images that don't need to be modified are copied as is. Otherwise they are decoded with their original bit depth,
+    so this also works for 16 bit depth maps.
+
+    Args:
+        image_path: Path of the image to copy.
+        filename: Filename of the copied image, the same in every directory.
+        downscale_dirs: Output directories as returned by prepare_downscale_dirs.
+        crop_border_pixels: If not None, crops each edge by the specified number of pixels.
+        upscale_factor: If not None, upscales the image by this factor before cropping.
+        nearest_neighbor: Use nearest neighbor sampling (useful for depth images).
+    """
+    if not crop_border_pixels and upscale_factor is None and len(downscale_dirs) == 1:
+        shutil.copy(image_path, downscale_dirs[0] / filename)
+        return
+
+    image = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise RuntimeError(f"Could not read image {image_path}")
+    if upscale_factor is not None:
+        image = cv2.resize(
+            image,
+            (image.shape[1] * upscale_factor, image.shape[0] * upscale_factor),
+            interpolation=cv2.INTER_NEAREST,
+        )
+    if crop_border_pixels:
+        image = image[crop_border_pixels:-crop_border_pixels, crop_border_pixels:-crop_border_pixels]
+    interpolation = cv2.INTER_NEAREST if nearest_neighbor else cv2.INTER_AREA
+    for i, downscale_dir in enumerate(downscale_dirs):
+        if i > 0:
+            image = cv2.resize(image, (image.shape[1] // 2, image.shape[0] // 2), interpolation=interpolation)
+        cv2.imwrite(str(downscale_dir / filename), image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+
+
+def imap_ordered(fn: Callable[[T], R], items: Iterable[T], num_workers: int = 8) -> Iterator[R]:
+    """Lazily applies a function to items on a pool of threads, yielding the results in order.
+
+    Unlike executor.map, items are consumed as the results are yielded, so only a bounded number of items and results
+    are alive at any time, whatever the number of items.
+
+    Args:
+        fn: Function to apply. Should release the GIL (image decoding/encoding, file IO) to benefit from threads.
+        items: Items to process, possibly a generator.
+        num_workers: Number of threads. The number of items in flight is twice this value.
+    """
+    max_in_flight = 2 * max(num_workers, 1)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+        futures: collections.deque = collections.deque()
+        for item in items:
+            futures.append(executor.submit(fn, item))
+            if len(futures) >= max_in_flight:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+class TransformsJsonWriter:
+    """Writes a transforms.json file one frame at a time, so that the frames never need to be held in memory.
+
+    The content is the same as json.dump of the header with a "frames" list, with an indent of 4. The file is written
+    to a temporary path and moved into place when closed, so an interrupted run never leaves a truncated file.
+
+    Args:
+        path: Path of the transforms.json file.
+        header: Fields of the file other than the frames, such as shared intrinsics.
+    """
+
+    def __init__(self, path: Path, header: Dict[str, Any]) -> None:
+        self.path = path
+        self.num_frames = 0
+        self._tmp_path = path.with_name(f".{path.name}.tmp")
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        # Leave the header object open to append the frames list to it.
+        self._file.write((json.dumps(header, indent=4)[:-2] + ",\n" if header else "{\n") + '    "frames": [')
+
+    def write_frame(self, frame: Dict[str, Any]) -> None:
+        """Appends a frame to the file."""
+        separator = "\n" if self.num_frames == 0 else ",\n"
+        self._file.write(separator + textwrap.indent(json.dumps(frame, indent=4), " " * 8))
+        self.num_frames += 1
+
+    def close(self) -> None:
+        """Finishes the file and moves it to its final path."""
+        self._file.write("\n    ]\n}" if self.num_frames > 0 else "]\n}")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self) -> "TransformsJsonWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            self._tmp_path.unlink()
+
+
 def copy_images(
     data: Path,
     image_dir: Path,
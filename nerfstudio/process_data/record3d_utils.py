@@ -16,32 +16,19 @@
 
 import json
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List
 
 import numpy as np
+from rich.progress import track
 from scipy.spatial.transform import Rotation
 
+from nerfstudio.process_data import process_data_utils
 from nerfstudio.process_data.process_data_utils import CAMERA_MODELS
 from nerfstudio.utils import io
 
 
-def record3d_to_json(images_paths: List[Path], metadata_path: Path, output_dir: Path, indices: np.ndarray) -> int:
-    """Converts Record3D's metadata and image paths to a JSON file.
-
-    Args:
-        images_paths: list if image paths.
-        metadata_path: Path to the Record3D metadata JSON file.
-        output_dir: Path to the output directory.
-        indices: Indices to sample the metadata_path. Should be the same length as images_paths.
-
-    Returns:
-        The number of registered images.
-    """
-
-    assert len(images_paths) == len(indices)
-
-    metadata_dict = io.load_from_json(metadata_path)
-
+def _get_camera_to_worlds(metadata_dict: Dict[str, Any], indices: np.ndarray) -> np.ndarray:
+    """Returns the (N, 4, 4) camera to world matrices of the sampled frames."""
     poses_data = np.array(metadata_dict["poses"])  # (N, 3, 4)
     # NB: Record3D / scipy use "scalar-last" format quaternions (x y z w)
     # https://fzheng.me/2017/11/12/quaternion_conventions_en/
@@ -53,18 +40,11 @@ def record3d_to_json(images_paths: List[Path], metadata_path: Path, output_dir:
 
     homogeneous_coord = np.zeros_like(camera_to_worlds[..., :1, :])
     homogeneous_coord[..., :, 3] = 1
-    camera_to_worlds = np.concatenate([camera_to_worlds, homogeneous_coord], -2)
+    return np.concatenate([camera_to_worlds, homogeneous_coord], -2)
 
-    frames = []
-    for i, im_path in enumerate(images_paths):
-        c2w = camera_to_worlds[i]
-        frame = {
-            "file_path": im_path.as_posix(),
-            "transform_matrix": c2w.tolist(),
-        }
-        frames.append(frame)
 
-    # Camera intrinsics
+def _get_intrinsics(metadata_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the camera intrinsics shared by all frames."""
     K = np.array(metadata_dict["K"]).reshape((3, 3)).T
     focal_length = K[0, 0]
 
@@ -75,7 +55,7 @@ def record3d_to_json(images_paths: List[Path], metadata_path: Path, output_dir:
     # but caused errors in image coord indexing. Should update once that is fixed.
     cx, cy = W / 2, H / 2
 
-    out = {
+    return {
         "fl_x": focal_length,
         "fl_y": focal_length,
         "cx": cx,
@@ -85,9 +65,84 @@ def record3d_to_json(images_paths: List[Path], metadata_path: Path, output_dir:
         "camera_model": CAMERA_MODELS["perspective"].name,
     }
 
+
+def record3d_to_json(images_paths: List[Path], metadata_path: Path, output_dir: Path, indices: np.ndarray) -> int:
+    """Converts Record3D's metadata and image paths to a JSON file.
+
+    Args:
+        images_paths: list if image paths.
+        metadata_path: Path to the Record3D metadata JSON file.
+        output_dir: Path to the output directory.
+        indices: Indices to sample the metadata_path. Should be the same length as images_paths.
+
+    Returns:
+        The number of registered images.
+    """
+
+    assert len(images_paths) == len(indices)
+
+    metadata_dict = io.load_from_json(metadata_path)
+    camera_to_worlds = _get_camera_to_worlds(metadata_dict, indices)
+
+    frames = []
+    for i, im_path in enumerate(images_paths):
+        c2w = camera_to_worlds[i]
+        frame = {
+            "file_path": im_path.as_posix(),
+            "transform_matrix": c2w.tolist(),
+        }
+        frames.append(frame)
+
+    out = _get_intrinsics(metadata_dict)
     out["frames"] = frames
 
     with open(output_dir / "transforms.json", "w", encoding="utf-8") as f:
         json.dump(out, f, indent=4)
 
     return len(frames)
+
+
+def process_record3d(
+    image_filenames: List[Path],
+    metadata_path: Path,
+    output_dir: Path,
+    indices: np.ndarray,
+    num_downscales: int = 3,
+    num_workers: int = 8,
+) -> int:
+    """Copies Record3D images and writes the transforms.json file in a single streaming pass.
+
+    Images are copied and downscaled on a pool of threads, and each frame is appended to transforms.json as soon as
+    its image is written, so memory use doesn't grow with the number of frames.
+
+    Args:
+        image_filenames: Paths to the sampled Record3D images.
+        metadata_path: Path to the Record3D metadata JSON file.
+        output_dir: Path to the output directory.
+        indices: Indices of the sampled images in the metadata. Should be the same length as image_filenames.
+        num_downscales: Number of times to downscale the images. Downscales by 2 each time.
+        num_workers: Number of threads used to copy and downscale the images.
+
+    Returns:
+        The number of registered images.
+    """
+    assert len(image_filenames) == len(indices)
+
+    metadata_dict = io.load_from_json(metadata_path)
+    camera_to_worlds = _get_camera_to_worlds(metadata_dict, indices)
+    downscale_dirs = process_data_utils.prepare_downscale_dirs(output_dir / "images", num_downscales)
+
+    def copy_frame(i: int) -> Dict[str, Any]:
+        filename = f"frame_{i + 1:05d}{image_filenames[i].suffix}"
+        process_data_utils.copy_and_resize_image(image_filenames[i], filename, downscale_dirs)
+        return {"file_path": f"images/{filename}", "transform_matrix": camera_to_worlds[i].tolist()}
+
+    header = _get_intrinsics(metadata_dict)
+    with process_data_utils.TransformsJsonWriter(output_dir / "transforms.json", header) as writer:
+        for frame in track(
+            process_data_utils.imap_ordered(copy_frame, range(len(image_filenames)), num_workers),
+            total=len(image_filenames),
+            description="Copying images",
+        ):
+            writer.write_frame(frame)
+    return writer.num_frames
@@ -0,0 +1,95 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content-addressed cache of the stages run by ns-process-data, used to skip stages whose inputs are unchanged."""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from nerfstudio.utils.io import load_from_json, write_to_json
+
+CACHE_FILENAME = "process_data_cache.json"
+"""Name of the cache manifest, stored in the output directory."""
+
+
+class StageCache:
+    """Records, for every processing stage, a fingerprint of its parameters and the content of its input files.
+
+    A stage is up to date if it was recorded with the same fingerprint and all of its outputs still exist. File
+    contents are hashed once and memoized by (size, mtime), so checking an unchanged image set only costs a stat
+    per file.
+
+    Args:
+        output_dir: Directory where the manifest is stored.
+        enabled: If False, every stage is reported as out of date, and nothing is hashed or recorded.
+    """
+
+    def __init__(self, output_dir: Path, enabled: bool = True) -> None:
+        self.path = output_dir / CACHE_FILENAME
+        self.enabled = enabled
+        manifest = load_from_json(self.path) if enabled and self.path.exists() else {}
+        self.stages: Dict[str, Dict[str, Any]] = manifest.get("stages", {})
+        self.file_hashes: Dict[str, Dict[str, Any]] = manifest.get("file_hashes", {})
+
+    def hash_file(self, path: Path) -> str:
+        """Returns the sha1 of the content of a file, reusing the previous hash if the file was not modified."""
+        if not self.enabled:
+            return ""
+        stat = path.stat()
+        key = str(path.resolve())
+        cached = self.file_hashes.get(key)
+        if cached is not None and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["sha1"]
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                sha1.update(chunk)
+        self.file_hashes[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": sha1.hexdigest()}
+        return sha1.hexdigest()
+
+    def hash_files(self, paths: Iterable[Path]) -> Dict[str, str]:
+        """Returns the content hash of each file, indexed by file name."""
+        return {path.name: self.hash_file(path) for path in paths}
+
+    def fingerprint(self, params: Dict[str, Any], inputs: Optional[Dict[str, str]] = None) -> str:
+        """Returns a fingerprint of the stage parameters and input file hashes.
+
+        Args:
+            params: JSON serializable stage parameters. Paths and other objects are converted with str.
+            inputs: Content hashes of the input files, as returned by hash_files.
+        """
+        content = json.dumps({"params": params, "inputs": inputs or {}}, sort_keys=True, default=str)
+        return hashlib.sha1(content.encode("utf8")).hexdigest()
+
+    def is_up_to_date(self, stage: str, fingerprint: str, outputs: Iterable[Path] = ()) -> bool:
+        """Returns whether the stage already ran with the same fingerprint and its outputs still exist."""
+        if not self.enabled or stage not in self.stages:
+            return False
+        return self.stages[stage]["fingerprint"] == fingerprint and all(output.exists() for output in outputs)
+
+    def get_metadata(self, stage: str) -> Dict[str, Any]:
+        """Returns the metadata recorded with the last run of a stage, or an empty dict."""
+        if not self.enabled or stage not in self.stages:
+            return {}
+        return self.stages[stage].get("metadata", {})
+
+    def record(self, stage: str, fingerprint: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Records a successful run of a stage and saves the manifest."""
+        if not self.enabled:
+            return
+        self.stages[stage] = {"fingerprint": fingerprint, "metadata": metadata or {}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_to_json(self.path, {"stages": self.stages, "file_hashes": self.file_hashes})
@@ -16,6 +16,7 @@
 
 import shutil
 from dataclasses import dataclass
+from typing import Literal
 
 from nerfstudio.process_data import equirect_utils, process_data_utils
 from nerfstudio.process_data.colmap_converter_to_nerfstudio_dataset import ColmapConverterToNerfstudioDataset
@@ -36,6 +37,13 @@ class VideoToNerfstudioDataset(ColmapConverterToNerfstudioDataset):
     """Target number of frames to use per video, results may not be exact."""
     percent_radius_crop: float = 1.0
     """Create circle crop mask. The radius is the percent of the image diagonal."""
+    frame_selection: Literal["thumbnail", "sharpest"] = "thumbnail"
+    """How to pick one frame out of each group of consecutive frames. "thumbnail" picks the most representative
+    frame, "sharpest" the one with the least motion blur."""
+    image_format: Literal["png", "jpg"] = "png"
+    """Format of the extracted frames. "jpg" is much smaller and faster to write for long videos."""
+    num_extraction_workers: int = 1
+    """Number of video segments to extract frames from in parallel."""
 
     def main(self) -> None:
         """Process video into a nerfstudio dataset."""
@@ -54,32 +62,62 @@ class VideoToNerfstudioDataset(ColmapConverterToNerfstudioDataset):
                 num_downscales=0,
                 crop_factor=(0.0, 0.0, 0.0, 0.0),
                 verbose=self.verbose,
+                frame_selection=self.frame_selection,
+                image_format=self.image_format,
+                num_workers=self.num_extraction_workers,
             )
         else:
             # If we're not dealing with equirects we can downscale in one step.
-            summary_log, num_extracted_frames = process_data_utils.convert_video_to_images(
-                self.data,
-                image_dir=self.image_dir,
-                num_frames_target=self.num_frames_target,
-                num_downscales=self.num_downscales,
-                crop_factor=self.crop_factor,
-                verbose=self.verbose,
-                image_prefix="frame_train_" if self.eval_data is not None else "frame_",
-                keep_image_dir=False,
+            videos = [self.data] if self.eval_data is None else [self.data, self.eval_data]
+            fingerprint = self.stage_cache.fingerprint(
+                {
+                    "num_frames_target": self.num_frames_target,
+                    "num_downscales": self.num_downscales,
+                    "crop_factor": self.crop_factor,
+                    "frame_selection": self.frame_selection,
+                    "image_format": self.image_format,
+                },
+                {str(video): self.stage_cache.hash_file(video) for video in videos},
             )
-            if self.eval_data is not None:
-                summary_log_eval, num_extracted_frames_eval = process_data_utils.convert_video_to_images(
-                    self.eval_data,
+            if self.stage_cache.is_up_to_date("extract_frames", fingerprint, [self.image_dir]):
+                CONSOLE.log("[bold green]Skipping frame extraction, the videos are unchanged.")
+                metadata = self.stage_cache.get_metadata("extract_frames")
+                summary_log, num_extracted_frames = metadata["summary_log"], metadata["num_extracted_frames"]
+            else:
+                summary_log, num_extracted_frames = process_data_utils.convert_video_to_images(
+                    self.data,
                     image_dir=self.image_dir,
                     num_frames_target=self.num_frames_target,
                     num_downscales=self.num_downscales,
                     crop_factor=self.crop_factor,
                     verbose=self.verbose,
-                    image_prefix="frame_eval_",
-                    keep_image_dir=True,
+                    image_prefix="frame_train_" if self.eval_data is not None else "frame_",
+                    keep_image_dir=False,
+                    frame_selection=self.frame_selection,
+                    image_format=self.image_format,
+                    num_workers=self.num_extraction_workers,
+                )
+                if self.eval_data is not None:
+                    summary_log_eval, num_extracted_frames_eval = process_data_utils.convert_video_to_images(
+                        self.eval_data,
+                        image_dir=self.image_dir,
+                        num_frames_target=self.num_frames_target,
+                        num_downscales=self.num_downscales,
+                        crop_factor=self.crop_factor,
+                        verbose=self.verbose,
+                        image_prefix="frame_eval_",
+                        keep_image_dir=True,
+                        frame_selection=self.frame_selection,
+                        image_format=self.image_format,
+                        num_workers=self.num_extraction_workers,
+                    )
+                    summary_log += summary_log_eval
+                    num_extracted_frames += num_extracted_frames_eval
+                self.stage_cache.record(
+                    "extract_frames",
+                    fingerprint,
+                    {"summary_log": list(summary_log), "num_extracted_frames": num_extracted_frames},
                 )
-                summary_log += summary_log_eval
-                num_extracted_frames += num_extracted_frames_eval
 
         # Generate planar projections if equirectangular
         if self.camera_type == "equirectangular":
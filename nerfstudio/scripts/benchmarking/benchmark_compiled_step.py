@@ -0,0 +1,129 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#!/usr/bin/env python
+"""
+benchmark_compiled_step.py
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Literal, Tuple
+
+import torch
+import tyro
+from rich import box
+from rich.table import Table
+
+from nerfstudio.cameras.rays import RayBundle
+from nerfstudio.data.scene_box import SceneBox
+from nerfstudio.models.nerfacto import NerfactoModelConfig
+from nerfstudio.utils.rich_utils import CONSOLE
+
+
+@dataclass
+class BenchmarkCompiledStep:
+    """Compare the training steps/sec of an eager and a compiled nerfacto model."""
+
+    # Number of rays in a batch.
+    num_rays: int = 4096
+    # Number of steps run before timing, these include the compilation.
+    num_warmup_steps: int = 3
+    # Number of timed steps.
+    num_steps: int = 20
+    # Devices to run on, unavailable devices are skipped.
+    devices: Tuple[Literal["cpu", "cuda"], ...] = ("cpu", "cuda")
+    # Compile mode to compare against eager execution.
+    compile_mode: Literal["default", "reduce-overhead", "max-autotune"] = "reduce-overhead"
+    # Which implementation of the fields to use.
+    implementation: Literal["tcnn", "torch"] = "torch"
+
+    def _random_ray_bundle(self, device: str) -> RayBundle:
+        directions = torch.nn.functional.normalize(torch.randn((self.num_rays, 3), device=device), dim=-1)
+        return RayBundle(
+            origins=torch.zeros((self.num_rays, 3), device=device),
+            directions=directions,
+            pixel_area=torch.full((self.num_rays, 1), 1e-6, device=device),
+            camera_indices=torch.zeros((self.num_rays, 1), dtype=torch.long, device=device),
+            nears=torch.full((self.num_rays, 1), 0.05, device=device),
+            fars=torch.full((self.num_rays, 1), 1000.0, device=device),
+        )
+
+    def _run(self, device: str, compile_mode: str) -> Tuple[float, float]:
+        """Returns the warmup time in seconds and the steps/sec of the training step."""
+        torch.manual_seed(0)
+        model = NerfactoModelConfig(implementation=self.implementation, compile_mode=compile_mode).setup(
+            scene_box=SceneBox(aabb=torch.tensor([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]])), num_train_data=1
+        )
+        model.to(device)
+        model.train()
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+        batch = {"image": torch.rand((self.num_rays, 3), device=device)}
+
+        def step() -> None:
+            outputs = model(self._random_ray_bundle(device))
+            loss_dict = model.get_loss_dict(outputs, batch, model.get_metrics_dict(outputs, batch))
+            optimizer.zero_grad(set_to_none=True)
+            sum(loss_dict.values()).backward()
+            optimizer.step()
+
+        start = time.perf_counter()
+        for _ in range(self.num_warmup_steps):
+            step()
+        if device == "cuda":
+            torch.cuda.synchronize()
+        warmup_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(self.num_steps):
+            step()
+        if device == "cuda":
+            torch.cuda.synchronize()
+        return warmup_time, self.num_steps / (time.perf_counter() - start)
+
+    def main(self) -> None:
+        """Main function."""
+        table = Table(title=f"Nerfacto training step ({self.num_rays} rays)", box=box.MINIMAL)
+        for column in ["Device", "Mode", "Warmup (s)", "Steps/sec", "Speedup"]:
+            table.add_column(column, justify="right")
+        for device in self.devices:
+            if device == "cuda" and not torch.cuda.is_available():
+                CONSOLE.print("[yellow]CUDA is not available, skipping.")
+                continue
+            eager_steps_per_sec = None
+            for compile_mode in ("none", self.compile_mode):
+                warmup_time, steps_per_sec = self._run(device, compile_mode)
+                eager_steps_per_sec = eager_steps_per_sec or steps_per_sec
+                table.add_row(
+                    device,
+                    "eager" if compile_mode == "none" else compile_mode,
+                    f"{warmup_time:.1f}",
+                    f"{steps_per_sec:.2f}",
+                    f"{steps_per_sec / eager_steps_per_sec:.2f}x",
+                )
+        CONSOLE.print(table)
+
+
+def entrypoint():
+    """Entrypoint for use with pyproject scripts."""
+    tyro.extras.set_accent_color("bright_yellow")
+    tyro.cli(BenchmarkCompiledStep).main()
+
+
+if __name__ == "__main__":
+    entrypoint()
+
+# For sphinx docs
+get_parser_fn = lambda: tyro.extras.get_parser(BenchmarkCompiledStep)  # noqa
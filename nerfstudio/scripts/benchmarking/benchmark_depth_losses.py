@@ -0,0 +1,169 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#!/usr/bin/env python
+"""
+benchmark_depth_losses.py
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Literal, Optional, Tuple
+
+import torch
+import tyro
+from rich import box
+from rich.table import Table
+from torch import Tensor
+
+from nerfstudio.model_components.losses import (
+    EPS,
+    URF_SIGMA_SCALE_FACTOR,
+    GradientLoss,
+    ds_nerf_depth_loss,
+    urban_radiance_field_depth_loss,
+)
+from nerfstudio.utils.rich_utils import CONSOLE
+
+
+def reference_ds_nerf_depth_loss(weights, termination_depth, steps, lengths, sigma) -> Tensor:
+    """DS-NeRF depth loss keeping the per sample terms in the autograd graph."""
+    loss = -torch.log(weights + EPS) * torch.exp(-((steps - termination_depth[:, None]) ** 2) / (2 * sigma)) * lengths
+    return torch.mean(loss.sum(-2) * (termination_depth > 0))
+
+
+def reference_urban_radiance_field_depth_loss(weights, termination_depth, predicted_depth, steps, sigma) -> Tensor:
+    """Urban Radiance Fields depth loss keeping the per sample terms in the autograd graph."""
+    expected_depth_loss = (termination_depth - predicted_depth) ** 2
+    target_distribution = torch.distributions.normal.Normal(0.0, sigma / URF_SIGMA_SCALE_FACTOR)
+    termination_depth = termination_depth[:, None]
+    near_mask = torch.logical_and(steps <= termination_depth + sigma, steps >= termination_depth - sigma)
+    near = (weights - torch.exp(target_distribution.log_prob(steps - termination_depth))) ** 2
+    empty_mask = steps < termination_depth - sigma
+    line_of_sight_loss = (near_mask * near).sum(-2) + (empty_mask * weights**2).sum(-2)
+    return torch.mean((expected_depth_loss + line_of_sight_loss) * (termination_depth[:, 0] > 0))
+
+
+@dataclass
+class BenchmarkDepthLosses:
+    """Compare the memory kept for the backward pass, besides the loss arguments, and the time of the depth losses
+    against their per sample implementations."""
+
+    # Number of rays of the batch.
+    num_rays: int = 4096
+    # Number of samples per ray.
+    num_samples: int = 256
+    # Number of multiscale gradient loss scales.
+    scales: int = 4
+    # Number of iterations to average the time over.
+    num_iters: int = 10
+    # Device to run on.
+    device: Literal["cpu", "cuda"] = "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _measure(
+        self, loss_fn: Callable[[], Tensor], inputs: Tuple[Tensor, ...], arguments: Tuple[Tensor, ...]
+    ) -> Tuple[float, Optional[float], float]:
+        """Returns the memory saved for the backward pass besides the arguments and the peak memory on CUDA in MB, and
+        the time in ms, of a forward and backward pass."""
+        saved: Dict[int, int] = {}
+        argument_storages = {argument.untyped_storage().data_ptr() for argument in arguments}
+
+        def pack(tensor: Tensor) -> Tensor:
+            storage = tensor.untyped_storage()
+            if storage.data_ptr() not in argument_storages:
+                saved[storage.data_ptr()] = storage.nbytes()
+            return tensor
+
+        with torch.autograd.graph.saved_tensors_hooks(pack, lambda tensor: tensor):
+            loss = loss_fn()
+        torch.autograd.grad(loss, inputs)
+        peak_memory = None
+        if self.device == "cuda":
+            torch.cuda.synchronize()
+            torch.cuda.reset_peak_memory_stats()
+            torch.autograd.grad(loss_fn(), inputs)
+            peak_memory = torch.cuda.max_memory_allocated() / 2**20
+        start = time.perf_counter()
+        for _ in range(self.num_iters):
+            torch.autograd.grad(loss_fn(), inputs)
+        if self.device == "cuda":
+            torch.cuda.synchronize()
+        return sum(saved.values()) / 2**20, peak_memory, 1e3 * (time.perf_counter() - start) / self.num_iters
+
+    def main(self) -> None:
+        """Main function."""
+        device = self.device
+        weights = torch.rand((self.num_rays, self.num_samples, 1), device=device).requires_grad_()
+        predicted_depth = torch.rand((self.num_rays, 1), device=device).requires_grad_()
+        bins = torch.sort(torch.rand((self.num_rays, self.num_samples + 1, 1), device=device) * 4, dim=-2).values
+        steps, lengths = (bins[:, 1:] + bins[:, :-1]) / 2, bins[:, 1:] - bins[:, :-1]
+        termination_depth = torch.rand((self.num_rays, 1), device=device) * 4
+        sigma = torch.tensor([0.01], device=device)
+        # monocular depth supervision reshapes the batch into a 32 rows image
+        prediction = torch.rand((1, 32, self.num_rays // 32), device=device).requires_grad_()
+        target = torch.rand((1, 32, self.num_rays // 32), device=device)
+        mask = torch.ones_like(target, dtype=torch.bool)
+        gradient_loss = GradientLoss(scales=self.scales)
+
+        losses: Dict[str, Tuple[Callable[[], Tensor], Callable[[], Tensor], Tuple[Tensor, ...]]] = {
+            "DS-NeRF": (
+                lambda: reference_ds_nerf_depth_loss(weights, termination_depth, steps, lengths, sigma),
+                lambda: ds_nerf_depth_loss(weights, termination_depth, steps, lengths, sigma),
+                (weights,),
+            ),
+            "URF": (
+                lambda: reference_urban_radiance_field_depth_loss(
+                    weights, termination_depth, predicted_depth, steps, sigma
+                ),
+                lambda: urban_radiance_field_depth_loss(weights, termination_depth, predicted_depth, steps, sigma),
+                (weights, predicted_depth),
+            ),
+            "Gradient": (
+                lambda: sum(
+                    gradient_loss.gradient_loss(
+                        prediction[:, :: 2**scale, :: 2**scale],
+                        target[:, :: 2**scale, :: 2**scale],
+                        mask[:, :: 2**scale, :: 2**scale],
+                    )
+                    for scale in range(self.scales)
+                ),  # type: ignore
+                lambda: gradient_loss(prediction, target, mask),
+                (prediction,),
+            ),
+        }
+
+        table = Table(title=f"Depth losses of {self.num_rays} rays with {self.num_samples} samples", box=box.MINIMAL)
+        for column in ["Loss", "Implementation", "Saved for backward (MB)", "Peak memory (MB)", "Time (ms)"]:
+            table.add_column(column, justify="right")
+        arguments = (weights, predicted_depth, steps, lengths, termination_depth, sigma, prediction, target, mask)
+        for name, (reference_fn, loss_fn, inputs) in losses.items():
+            for implementation, fn in (("per sample", reference_fn), ("fused", loss_fn)):
+                saved_memory, peak_memory, duration = self._measure(fn, inputs, arguments)
+                peak = "-" if peak_memory is None else f"{peak_memory:.1f}"
+                table.add_row(name, implementation, f"{saved_memory:.1f}", peak, f"{duration:.2f}")
+        CONSOLE.print(table)
+
+
+def entrypoint():
+    """Entrypoint for use with pyproject scripts."""
+    tyro.extras.set_accent_color("bright_yellow")
+    tyro.cli(BenchmarkDepthLosses).main()
+
+
+if __name__ == "__main__":
+    entrypoint()
+
+# For sphinx docs
+get_parser_fn = lambda: tyro.extras.get_parser(BenchmarkDepthLosses)  # noqa
@@ -0,0 +1,80 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#!/usr/bin/env python
+"""
+benchmark_image_decoders.py
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+import tyro
+from rich import box
+from rich.table import Table
+
+from nerfstudio.data.utils.data_utils import ImageDecoder, get_image_from_path
+from nerfstudio.process_data.process_data_utils import list_images
+from nerfstudio.utils.rich_utils import CONSOLE
+
+
+@dataclass
+class BenchmarkImageDecoders:
+    """Measure image decoding throughput of every image decoder backend at several scale factors."""
+
+    # Directory containing the images to decode.
+    data: Path
+    # Decoder backends to compare.
+    decoders: Tuple[ImageDecoder, ...] = ("pil", "pil-draft", "opencv")
+    # Scale factors to decode at, as used by camera_res_scale_factor.
+    scale_factors: Tuple[float, ...] = (1.0, 0.5, 0.25)
+    # Maximum number of images to decode per configuration.
+    max_num_images: int = 50
+
+    def main(self) -> None:
+        """Main function."""
+        image_paths = list_images(self.data)[: self.max_num_images]
+        if len(image_paths) == 0:
+            CONSOLE.print(f"[bold red]No images found in {self.data}")
+            return
+
+        table = Table(title="Image decoding throughput", box=box.MINIMAL)
+        table.add_column("Scale factor")
+        for decoder in self.decoders:
+            table.add_column(f"{decoder} (img/s)", justify="right")
+        for scale_factor in self.scale_factors:
+            row = [str(scale_factor)]
+            for decoder in self.decoders:
+                start = time.perf_counter()
+                for image_path in image_paths:
+                    get_image_from_path(image_path, scale_factor=scale_factor, decoder=decoder)
+                row.append(f"{len(image_paths) / (time.perf_counter() - start):.1f}")
+            table.add_row(*row)
+        CONSOLE.print(table)
+
+
+def entrypoint():
+    """Entrypoint for use with pyproject scripts."""
+    tyro.extras.set_accent_color("bright_yellow")
+    tyro.cli(BenchmarkImageDecoders).main()
+
+
+if __name__ == "__main__":
+    entrypoint()
+
+# For sphinx docs
+get_parser_fn = lambda: tyro.extras.get_parser(BenchmarkImageDecoders)  # noqa
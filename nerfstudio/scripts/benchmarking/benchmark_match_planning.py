@@ -0,0 +1,104 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#!/usr/bin/env python
+"""
+benchmark_match_planning.py
+"""
+from __future__ import annotations
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal, Tuple
+
+import tyro
+from rich import box
+from rich.table import Table
+
+from nerfstudio.data.utils.colmap_parsing_utils import read_images_binary
+from nerfstudio.process_data.colmap_utils import run_colmap
+from nerfstudio.process_data.process_data_utils import CAMERA_MODELS, list_images
+from nerfstudio.utils.rich_utils import CONSOLE
+
+
+@dataclass
+class BenchmarkMatchPlanning:
+    """Run COLMAP with several matching methods and report matched pairs against registered images."""
+
+    # Directory containing the images.
+    data: Path
+    # Directory where one COLMAP workspace per matching method is written.
+    output_dir: Path
+    # Matching methods to compare.
+    matching_methods: Tuple[Literal["exhaustive", "sequential", "vocab_tree", "planned"], ...] = (
+        "exhaustive",
+        "vocab_tree",
+        "planned",
+    )
+    # Camera model to use.
+    camera_type: Literal["perspective", "fisheye"] = "perspective"
+    # If True, use GPU.
+    gpu: bool = True
+    # How to call the COLMAP executable.
+    colmap_cmd: str = "colmap"
+
+    def main(self) -> None:
+        """Main function."""
+        num_images = len(list_images(self.data))
+        table = Table(title=f"Matching methods on {num_images} images", box=box.MINIMAL)
+        for column in ["Method", "Matched pairs", "Verified pairs", "Registered images", "Time (s)"]:
+            table.add_column(column, justify="right")
+
+        for matching_method in self.matching_methods:
+            colmap_dir = self.output_dir / matching_method
+            colmap_dir.mkdir(parents=True, exist_ok=True)
+            start = time.perf_counter()
+            run_colmap(
+                image_dir=self.data,
+                colmap_dir=colmap_dir,
+                camera_model=CAMERA_MODELS[self.camera_type],
+                gpu=self.gpu,
+                matching_method=matching_method,
+                colmap_cmd=self.colmap_cmd,
+            )
+            elapsed = time.perf_counter() - start
+
+            with sqlite3.connect(colmap_dir / "database.db") as database:
+                (num_pairs,) = database.execute("SELECT COUNT(*) FROM matches").fetchone()
+                (num_verified,) = database.execute("SELECT COUNT(*) FROM two_view_geometries WHERE rows > 0").fetchone()
+            images_path = colmap_dir / "sparse" / "0" / "images.bin"
+            num_registered = len(read_images_binary(images_path)) if images_path.exists() else 0
+            table.add_row(
+                matching_method,
+                str(num_pairs),
+                str(num_verified),
+                f"{num_registered} ({100 * num_registered / max(num_images, 1):.1f}%)",
+                f"{elapsed:.1f}",
+            )
+        CONSOLE.print(table)
+
+
+def entrypoint():
+    """Entrypoint for use with pyproject scripts."""
+    tyro.extras.set_accent_color("bright_yellow")
+    tyro.cli(BenchmarkMatchPlanning).main()
+
+
+if __name__ == "__main__":
+    entrypoint()
+
+# For sphinx docs
+get_parser_fn = lambda: tyro.extras.get_parser(BenchmarkMatchPlanning)  # noqa
@@ -0,0 +1,129 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#!/usr/bin/env python
+"""
+benchmark_mixed_precision.py
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Literal, Optional, Tuple
+
+import torch
+import tyro
+from rich import box
+from rich.table import Table
+
+from nerfstudio.cameras.cameras import Cameras
+from nerfstudio.data.scene_box import SceneBox
+from nerfstudio.models.base_model import Model
+from nerfstudio.models.nerfacto import NerfactoModelConfig
+from nerfstudio.utils.eval_utils import eval_setup
+from nerfstudio.utils.rich_utils import CONSOLE
+
+
+@dataclass
+class BenchmarkMixedPrecision:
+    """Compare the rendering throughput and the PSNR of the float32 and mixed precision torch fallbacks of nerfacto."""
+
+    # Config of a trained nerfacto model to render its first eval camera. If None, a randomly initialized model renders
+    # a synthetic camera, which only measures the throughput meaningfully.
+    load_config: Optional[Path] = None
+    # Height of the synthetic camera.
+    image_height: int = 128
+    # Width of the synthetic camera.
+    image_width: int = 128
+    # Number of renders to average the throughput over.
+    num_iters: int = 3
+    # Devices to run on, unavailable devices are skipped.
+    devices: Tuple[Literal["cpu", "cuda"], ...] = ("cpu", "cuda")
+
+    def _setup(self) -> Tuple[Model, Cameras]:
+        if self.load_config is not None:
+            _, pipeline, _, _ = eval_setup(self.load_config, test_mode="inference")
+            cameras = pipeline.datamanager.eval_dataset.cameras  # type: ignore
+            return pipeline.model, cameras[0:1]
+        torch.manual_seed(0)
+        model = NerfactoModelConfig(implementation="torch").setup(
+            scene_box=SceneBox(aabb=torch.tensor([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]])), num_train_data=1
+        )
+        camera = Cameras(
+            camera_to_worlds=torch.eye(4)[None, :3],
+            fx=float(self.image_width),
+            fy=float(self.image_width),
+            cx=self.image_width / 2,
+            cy=self.image_height / 2,
+            width=self.image_width,
+            height=self.image_height,
+        )
+        return model, camera
+
+    def _render(self, model: Model, camera: Cameras, device: str) -> Tuple[Dict[str, torch.Tensor], float]:
+        """Returns the outputs and the rays/sec of the renders."""
+        ray_bundle = camera.generate_rays(camera_indices=0)
+        outputs = model.get_outputs_for_camera_ray_bundle(ray_bundle)
+        if device == "cuda":
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        for _ in range(self.num_iters):
+            model.get_outputs_for_camera_ray_bundle(ray_bundle)
+        if device == "cuda":
+            torch.cuda.synchronize()
+        return outputs, self.num_iters * len(ray_bundle) / (time.perf_counter() - start)
+
+    def main(self) -> None:
+        """Main function."""
+        model, camera = self._setup()
+        model.eval()
+        table = Table(title="Nerfacto torch fallback renders", box=box.MINIMAL)
+        for column in ["Device", "Precision", "Rays/sec", "Speedup", "PSNR vs float32 (dB)"]:
+            table.add_column(column, justify="right")
+        for device in self.devices:
+            if device == "cuda" and not torch.cuda.is_available():
+                CONSOLE.print("[yellow]CUDA is not available, skipping.")
+                continue
+            model.to(device)
+            camera = camera.to(device)
+            reference_outputs, reference_rays_per_sec = None, None
+            for mixed_precision in (False, True):
+                model.config.eval_mixed_precision = mixed_precision
+                outputs, rays_per_sec = self._render(model, camera, device)
+                reference_outputs = reference_outputs or outputs
+                reference_rays_per_sec = reference_rays_per_sec or rays_per_sec
+                mse = torch.mean((outputs["rgb"] - reference_outputs["rgb"]) ** 2)
+                table.add_row(
+                    device,
+                    "float32" if not mixed_precision else "bfloat16" if device == "cpu" else "float16",
+                    f"{rays_per_sec:,.0f}",
+                    f"{rays_per_sec / reference_rays_per_sec:.2f}x",
+                    "-" if mse == 0 else f"{-10 * torch.log10(mse).item():.1f}",
+                )
+            model.config.eval_mixed_precision = False
+        CONSOLE.print(table)
+
+
+def entrypoint():
+    """Entrypoint for use with pyproject scripts."""
+    tyro.extras.set_accent_color("bright_yellow")
+    tyro.cli(BenchmarkMixedPrecision).main()
+
+
+if __name__ == "__main__":
+    entrypoint()
+
+# For sphinx docs
+get_parser_fn = lambda: tyro.extras.get_parser(BenchmarkMixedPrecision)  # noqa
@@ -0,0 +1,148 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#!/usr/bin/env python
+"""
+benchmark_proposal_losses.py
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Literal, Optional, Tuple
+
+import torch
+import tyro
+from rich import box
+from rich.table import Table
+from torch import Tensor
+
+from nerfstudio.cameras.rays import Frustums, RaySamples
+from nerfstudio.model_components.losses import interlevel_loss, lossfun_distortion, lossfun_outer
+from nerfstudio.utils.rich_utils import CONSOLE
+
+
+def reference_distortion_loss(t: Tensor, w: Tensor) -> Tensor:
+    """Distortion loss summing the pairwise sample terms."""
+    ut = (t[..., 1:] + t[..., :-1]) / 2
+    dut = torch.abs(ut[..., :, None] - ut[..., None, :])
+    loss_inter = torch.sum(w * torch.sum(w[..., None, :] * dut, dim=-1), dim=-1)
+    loss_intra = torch.sum(w**2 * (t[..., 1:] - t[..., :-1]), dim=-1) / 3
+    return torch.mean(loss_inter + loss_intra)
+
+
+@dataclass
+class BenchmarkProposalLosses:
+    """Compare the memory kept for the backward pass and the time of the distortion and interlevel losses against
+    their pairwise and per level implementations."""
+
+    # Number of rays of the batch.
+    num_rays: int = 4096
+    # Number of samples per ray of each proposal level, followed by the number of samples of the final level.
+    num_samples: Tuple[int, ...] = (256, 96, 48)
+    # Number of iterations to average the time over.
+    num_iters: int = 10
+    # Device to run on.
+    device: Literal["cpu", "cuda"] = "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _measure(
+        self, loss_fn: Callable[[], Tensor], inputs: List[Tensor], arguments: List[Tensor]
+    ) -> Tuple[float, Optional[float], float]:
+        """Returns the memory saved for the backward pass besides the arguments and the peak memory on CUDA in MB, and
+        the time in ms, of a forward and backward pass."""
+        saved: Dict[int, int] = {}
+        argument_storages = {argument.untyped_storage().data_ptr() for argument in arguments}
+
+        def pack(tensor: Tensor) -> Tensor:
+            storage = tensor.untyped_storage()
+            if storage.data_ptr() not in argument_storages:
+                saved[storage.data_ptr()] = storage.nbytes()
+            return tensor
+
+        with torch.autograd.graph.saved_tensors_hooks(pack, lambda tensor: tensor):
+            loss = loss_fn()
+        torch.autograd.grad(loss, inputs)
+        peak_memory = None
+        if self.device == "cuda":
+            torch.cuda.synchronize()
+            torch.cuda.reset_peak_memory_stats()
+            torch.autograd.grad(loss_fn(), inputs)
+            peak_memory = torch.cuda.max_memory_allocated() / 2**20
+        start = time.perf_counter()
+        for _ in range(self.num_iters):
+            torch.autograd.grad(loss_fn(), inputs)
+        if self.device == "cuda":
+            torch.cuda.synchronize()
+        return sum(saved.values()) / 2**20, peak_memory, 1e3 * (time.perf_counter() - start) / self.num_iters
+
+    def main(self) -> None:
+        """Main function."""
+        sdists = [
+            torch.sort(torch.rand((self.num_rays, num_samples + 1), device=self.device), dim=-1).values
+            for num_samples in self.num_samples
+        ]
+        weights = [
+            torch.rand((self.num_rays, num_samples, 1), device=self.device).requires_grad_()
+            for num_samples in self.num_samples
+        ]
+        ray_samples_list = [
+            RaySamples(
+                frustums=Frustums.get_mock_frustum(self.device),
+                spacing_starts=sdist[..., :-1, None],
+                spacing_ends=sdist[..., 1:, None],
+            )
+            for sdist in sdists
+        ]
+
+        def reference_interlevel_loss() -> Tensor:
+            return sum(  # type: ignore
+                torch.mean(lossfun_outer(sdists[-1], weights[-1][..., 0].detach(), sdist, w[..., 0]))
+                for sdist, w in zip(sdists[:-1], weights[:-1])
+            )
+
+        losses = {
+            "Distortion": (
+                lambda: reference_distortion_loss(sdists[-1], weights[-1][..., 0]),
+                lambda: torch.mean(lossfun_distortion(sdists[-1], weights[-1][..., 0])),
+                weights[-1:],
+            ),
+            "Interlevel": (
+                reference_interlevel_loss,
+                lambda: interlevel_loss(weights, ray_samples_list),
+                weights[:-1],
+            ),
+        }
+
+        table = Table(title=f"Proposal losses of {self.num_rays} rays with {self.num_samples} samples", box=box.MINIMAL)
+        for column in ["Loss", "Implementation", "Saved for backward (MB)", "Peak memory (MB)", "Time (ms)"]:
+            table.add_column(column, justify="right")
+        for name, (reference_fn, loss_fn, inputs) in losses.items():
+            for implementation, fn in (("reference", reference_fn), ("fused", loss_fn)):
+                saved_memory, peak_memory, duration = self._measure(fn, inputs, sdists + weights)
+                peak = "-" if peak_memory is None else f"{peak_memory:.1f}"
+                table.add_row(name, implementation, f"{saved_memory:.1f}", peak, f"{duration:.2f}")
+        CONSOLE.print(table)
+
+
+def entrypoint():
+    """Entrypoint for use with pyproject scripts."""
+    tyro.extras.set_accent_color("bright_yellow")
+    tyro.cli(BenchmarkProposalLosses).main()
+
+
+if __name__ == "__main__":
+    entrypoint()
+
+# For sphinx docs
+get_parser_fn = lambda: tyro.extras.get_parser(BenchmarkProposalLosses)  # noqa
@@ -0,0 +1,158 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#!/usr/bin/env python
+"""
+benchmark_render_interruption.py
+"""
+from __future__ import annotations
+
+import contextlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, ContextManager, Dict, Literal, Optional
+
+import torch
+import tyro
+from rich import box
+from rich.table import Table
+
+from nerfstudio.cameras.cameras import Cameras
+from nerfstudio.data.scene_box import SceneBox
+from nerfstudio.models.base_model import Model
+from nerfstudio.models.nerfacto import NerfactoModelConfig
+from nerfstudio.utils.cancellation import CancellationToken, CancelledException, cancellation_context
+from nerfstudio.utils.rich_utils import CONSOLE
+from nerfstudio.viewer.server import viewer_utils
+
+Mechanism = Literal["none", "trace", "token"]
+
+
+def get_interruption_context(mechanism: Mechanism, token: CancellationToken) -> ContextManager:
+    """Returns the context making a render stop once the token is cancelled.
+
+    Args:
+        mechanism: "trace" checks the token on every line executed, as the viewer used to, and "token" checks it
+            between chunks of rays.
+        token: token requesting the interruption.
+    """
+    if mechanism == "trace":
+
+        def check_interrupt(frame, event, arg) -> Callable:
+            if event == "line" and token.cancelled:
+                raise viewer_utils.IOChangeException
+            return check_interrupt
+
+        return viewer_utils.SetTrace(check_interrupt)
+    if mechanism == "token":
+        return cancellation_context(token)
+    return contextlib.nullcontext()
+
+
+@dataclass
+class BenchmarkRenderInterruption:
+    """Compare the rendering speed and the interruption latency of the viewer interruption mechanisms."""
+
+    # Height of the rendered image.
+    image_height: int = 256
+    # Width of the rendered image.
+    image_width: int = 256
+    # Number of rays per chunk of the full image renderer.
+    eval_num_rays_per_chunk: int = 4096
+    # Number of renders to average the speed over.
+    num_iters: int = 5
+    # Fraction of a render after which the interruption is requested.
+    interrupt_fraction: float = 0.5
+    # Device to run on.
+    device: Literal["cpu", "cuda"] = "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _synchronize(self) -> None:
+        if self.device == "cuda":
+            torch.cuda.synchronize()
+
+    def _render(self, model: Model, camera: Cameras, mechanism: Mechanism, token: CancellationToken) -> None:
+        with get_interruption_context(mechanism, token):
+            model.get_outputs_for_camera_ray_bundle(camera.generate_rays(camera_indices=0))
+        self._synchronize()
+
+    def _measure_latency(self, model: Model, camera: Cameras, mechanism: Mechanism, render_time: float) -> float:
+        """Returns the time between the interruption request and the end of the render, in seconds."""
+        token = CancellationToken()
+        end_time: Dict[str, float] = {}
+
+        def render() -> None:
+            with contextlib.suppress(CancelledException):
+                self._render(model, camera, mechanism, token)
+            end_time["end"] = time.perf_counter()
+
+        render_thread = threading.Thread(target=render)
+        render_thread.start()
+        time.sleep(self.interrupt_fraction * render_time)
+        start = time.perf_counter()
+        token.cancel()
+        render_thread.join()
+        return max(end_time["end"] - start, 0.0)
+
+    def main(self) -> None:
+        """Main function."""
+        model = NerfactoModelConfig(implementation="torch", eval_num_rays_per_chunk=self.eval_num_rays_per_chunk).setup(
+            scene_box=SceneBox(aabb=torch.tensor([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]])), num_train_data=1
+        )
+        model.to(self.device).eval()
+        camera = Cameras(
+            camera_to_worlds=torch.eye(4)[None, :3],
+            fx=float(self.image_width),
+            fy=float(self.image_width),
+            cx=self.image_width / 2,
+            cy=self.image_height / 2,
+            width=self.image_width,
+            height=self.image_height,
+        ).to(self.device)
+        num_rays = self.image_height * self.image_width
+
+        table = Table(title=f"Viewer renders of {self.image_height}x{self.image_width} px", box=box.MINIMAL)
+        table.add_column("Interruption")
+        table.add_column("Rays/sec", justify="right")
+        table.add_column("Relative speed", justify="right")
+        table.add_column("Interruption latency (ms)", justify="right")
+        baseline: Optional[float] = None
+        mechanism: Mechanism
+        for mechanism in ("none", "trace", "token"):
+            token = CancellationToken()
+            self._render(model, camera, mechanism, token)
+            start = time.perf_counter()
+            for _ in range(self.num_iters):
+                self._render(model, camera, mechanism, token)
+            render_time = (time.perf_counter() - start) / self.num_iters
+            rays_per_sec = num_rays / render_time
+            baseline = baseline or rays_per_sec
+            latency = "-"
+            if mechanism != "none":
+                latency = f"{1e3 * self._measure_latency(model, camera, mechanism, render_time):.1f}"
+            table.add_row(mechanism, f"{rays_per_sec:,.0f}", f"{rays_per_sec / baseline:.2f}x", latency)
+        CONSOLE.print(table)
+
+
+def entrypoint():
+    """Entrypoint for use with pyproject scripts."""
+    tyro.extras.set_accent_color("bright_yellow")
+    tyro.cli(BenchmarkRenderInterruption).main()
+
+
+if __name__ == "__main__":
+    entrypoint()
+
+# For sphinx docs
+get_parser_fn = lambda: tyro.extras.get_parser(BenchmarkRenderInterruption)  # noqa
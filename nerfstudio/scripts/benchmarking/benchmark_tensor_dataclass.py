@@ -0,0 +1,149 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#!/usr/bin/env python
+"""
+benchmark_tensor_dataclass.py
+"""
+from __future__ import annotations
+
+import contextlib
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Literal
+
+import torch
+import tyro
+from rich import box
+from rich.markup import escape
+from rich.table import Table
+
+from nerfstudio.cameras.rays import RayBundle
+from nerfstudio.data.scene_box import SceneBox
+from nerfstudio.models.nerfacto import NerfactoModelConfig
+from nerfstudio.utils.rich_utils import CONSOLE
+from nerfstudio.utils.tensor_dataclass import TensorDataclass
+
+
+@contextlib.contextmanager
+def count_constructions() -> Iterator[Dict[str, Counter]]:
+    """Counts the TensorDataclass constructions, and the time spent in them, per class and construction path."""
+    stats: Dict[str, Counter] = {"count": Counter(), "time": Counter()}
+    post_init = TensorDataclass.__post_init__
+    from_broadcasted = TensorDataclass.from_broadcasted.__func__  # type: ignore
+
+    def timed(name: str, fn: Callable, instance_or_cls, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(instance_or_cls, *args, **kwargs)
+        key = f"{getattr(instance_or_cls, '__name__', type(instance_or_cls).__name__)} ({name})"
+        stats["count"][key] += 1
+        stats["time"][key] += time.perf_counter() - start
+        return result
+
+    TensorDataclass.__post_init__ = lambda self: timed("validated", post_init, self)  # type: ignore
+    TensorDataclass.from_broadcasted = classmethod(  # type: ignore
+        lambda cls, *args, **kwargs: timed("fast path", from_broadcasted, cls, *args, **kwargs)
+    )
+    try:
+        yield stats
+    finally:
+        TensorDataclass.__post_init__ = post_init  # type: ignore
+        TensorDataclass.from_broadcasted = classmethod(from_broadcasted)  # type: ignore
+
+
+@dataclass
+class BenchmarkTensorDataclass:
+    """Time common TensorDataclass operations, and count constructions during a nerfacto training step."""
+
+    # Number of rays in a batch.
+    num_rays: int = 4096
+    # Number of samples per ray for get_ray_samples.
+    num_samples: int = 48
+    # Number of repetitions of each micro-benchmark.
+    num_iters: int = 200
+    # Number of training steps to average the construction counts over.
+    num_steps: int = 5
+    # Device to run on.
+    device: Literal["cpu", "cuda"] = "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _random_ray_bundle(self) -> RayBundle:
+        directions = torch.nn.functional.normalize(torch.randn((self.num_rays, 3), device=self.device), dim=-1)
+        return RayBundle(
+            origins=torch.zeros((self.num_rays, 3), device=self.device),
+            directions=directions,
+            pixel_area=torch.full((self.num_rays, 1), 1e-6, device=self.device),
+            camera_indices=torch.zeros((self.num_rays, 1), dtype=torch.long, device=self.device),
+            nears=torch.full((self.num_rays, 1), 0.05, device=self.device),
+            fars=torch.full((self.num_rays, 1), 1000.0, device=self.device),
+        )
+
+    def main(self) -> None:
+        """Main function."""
+        ray_bundle = self._random_ray_bundle()
+        bins = torch.linspace(0.05, 6.0, self.num_samples + 1, device=self.device).expand(self.num_rays, -1)[..., None]
+        mask = torch.rand(self.num_rays, device=self.device) > 0.5
+        operations = {
+            "RayBundle(...)": self._random_ray_bundle,
+            "ray_bundle[mask]": lambda: ray_bundle[mask],
+            "ray_bundle[:1024]": lambda: ray_bundle[:1024],
+            "ray_bundle.reshape": lambda: ray_bundle.reshape((64, -1)),
+            "get_ray_samples": lambda: ray_bundle.get_ray_samples(bins[:, :-1], bins[:, 1:]),
+        }
+
+        table = Table(title="TensorDataclass operations", box=box.MINIMAL)
+        table.add_column("Operation")
+        table.add_column("Time (us)", justify="right")
+        for name, operation in operations.items():
+            operation()
+            start = time.perf_counter()
+            for _ in range(self.num_iters):
+                operation()
+            table.add_row(escape(name), f"{1e6 * (time.perf_counter() - start) / self.num_iters:.1f}")
+        CONSOLE.print(table)
+
+        model = NerfactoModelConfig(implementation="torch").setup(
+            scene_box=SceneBox(aabb=torch.tensor([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]])), num_train_data=1
+        )
+        model.to(self.device)
+        batch = {"image": torch.rand((self.num_rays, 3), device=self.device)}
+        with count_constructions() as stats:
+            start = time.perf_counter()
+            for _ in range(self.num_steps):
+                outputs = model(self._random_ray_bundle())
+                loss_dict = model.get_loss_dict(outputs, batch, model.get_metrics_dict(outputs, batch))
+                sum(loss_dict.values()).backward()
+            step_time = (time.perf_counter() - start) / self.num_steps
+
+        title = f"TensorDataclass constructions per training step ({1e3 * step_time:.1f} ms)"
+        table = Table(title=title, box=box.MINIMAL)
+        table.add_column("Class")
+        table.add_column("Constructions", justify="right")
+        table.add_column("Time (ms)", justify="right")
+        for key, count in stats["count"].most_common():
+            table.add_row(key, f"{count / self.num_steps:.0f}", f"{1e3 * stats['time'][key] / self.num_steps:.3f}")
+        CONSOLE.print(table)
+
+
+def entrypoint():
+    """Entrypoint for use with pyproject scripts."""
+    tyro.extras.set_accent_color("bright_yellow")
+    tyro.cli(BenchmarkTensorDataclass).main()
+
+
+if __name__ == "__main__":
+    entrypoint()
+
+# For sphinx docs
+get_parser_fn = lambda: tyro.extras.get_parser(BenchmarkTensorDataclass)  # noqa
@@ -55,13 +55,13 @@ class ProcessRecord3D(BaseConverterToNerfstudioDataset):
     max_dataset_size: int = 300
     """Max number of images to train on. If the dataset has more, images will be sampled approximately evenly. If -1,
     use all images."""
+    num_workers: int = 8
+    """Number of threads used to copy and downscale the images."""
 
     def main(self) -> None:
         """Process images into a nerfstudio dataset."""
 
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        image_dir = self.output_dir / "images"
-        image_dir.mkdir(parents=True, exist_ok=True)
 
         summary_log = []
 
@@ -83,16 +83,17 @@ class ProcessRecord3D(BaseConverterToNerfstudioDataset):
             idx = np.round(np.linspace(0, num_images - 1, self.max_dataset_size)).astype(int)
 
         record3d_image_filenames = list(np.array(record3d_image_filenames)[idx])
-        # Copy images to output directory
-        copied_image_paths = process_data_utils.copy_images_list(
+        # Copy images to output directory while writing their frames
+        metadata_path = self.data / "metadata.json"
+        num_frames = record3d_utils.process_record3d(
             record3d_image_filenames,
-            image_dir=image_dir,
-            verbose=self.verbose,
+            metadata_path,
+            self.output_dir,
+            indices=idx,
             num_downscales=self.num_downscales,
+            num_workers=self.num_workers,
         )
-        num_frames = len(copied_image_paths)
 
-        copied_image_paths = [Path("images/" + copied_image_path.name) for copied_image_path in copied_image_paths]
         summary_log.append(f"Used {num_frames} images out of {num_images} total")
         if self.max_dataset_size > 0:
             summary_log.append(
@@ -100,8 +101,6 @@ class ProcessRecord3D(BaseConverterToNerfstudioDataset):
                 f"larger than the current value ({self.max_dataset_size}), or -1 to use all images."
             )
 
-        metadata_path = self.data / "metadata.json"
-        record3d_utils.record3d_to_json(copied_image_paths, metadata_path, self.output_dir, indices=idx)
         CONSOLE.rule("[bold green]:tada: :tada: :tada: All DONE :tada: :tada: :tada:")
 
         for summary in summary_log:
@@ -137,6 +136,8 @@ class ProcessPolycam(BaseConverterToNerfstudioDataset):
     """Number of pixels to crop from each border of the image. Useful as borders may be black due to undistortion."""
     use_depth: bool = False
     """If True, processes the generated depth maps from Polycam"""
+    num_workers: int = 8
+    """Number of threads used to copy and resize the images and depth maps."""
 
     def main(self) -> None:
         """Process images into a nerfstudio dataset."""
@@ -169,41 +170,38 @@ class ProcessPolycam(BaseConverterToNerfstudioDataset):
             depth_dir = self.data / "keyframes" / "depth"
             raise ValueError(f"Depth map directory {depth_dir} doesn't exist")
 
-        (image_processing_log, polycam_image_filenames) = polycam_utils.process_images(
-            polycam_image_dir,
-            image_dir,
-            crop_border_pixels=self.crop_border_pixels,
-            max_dataset_size=self.max_dataset_size,
-            num_downscales=self.num_downscales,
-            verbose=self.verbose,
+        polycam_image_filenames, num_orig_images = process_data_utils.get_image_filenames(
+            polycam_image_dir, self.max_dataset_size
         )
-
-        summary_log.extend(image_processing_log)
+        if len(polycam_image_filenames) == 0:
+            CONSOLE.print("[bold red]No images found, exiting")
+            sys.exit(1)
+        if self.max_dataset_size > 0 and len(polycam_image_filenames) != num_orig_images:
+            summary_log.append(f"Started with {len(polycam_image_filenames)} images out of {num_orig_images} total")
+            summary_log.append(
+                "To change the size of the dataset add the argument --max_dataset_size to larger than the "
+                f"current value ({self.max_dataset_size}), or -1 to use all images."
+            )
+        else:
+            summary_log.append(f"Started with {len(polycam_image_filenames)} images")
 
         polycam_depth_filenames = []
         if self.use_depth:
-            polycam_depth_image_dir = self.data / "keyframes" / "depth"
-            depth_dir = self.output_dir / "depth"
-            depth_dir.mkdir(parents=True, exist_ok=True)
-            (depth_processing_log, polycam_depth_filenames) = polycam_utils.process_depth_maps(
-                polycam_depth_image_dir,
-                depth_dir,
-                num_processed_images=len(polycam_image_filenames),
-                crop_border_pixels=self.crop_border_pixels,
-                max_dataset_size=self.max_dataset_size,
-                num_downscales=self.num_downscales,
-                verbose=self.verbose,
+            polycam_depth_filenames, _ = process_data_utils.get_image_filenames(
+                self.data / "keyframes" / "depth", self.max_dataset_size
             )
-            summary_log.extend(depth_processing_log)
 
+        # Copy images and depth maps to output directory while writing their frames
         summary_log.extend(
-            polycam_utils.polycam_to_json(
+            polycam_utils.process_polycam(
                 image_filenames=polycam_image_filenames,
                 depth_filenames=polycam_depth_filenames,
                 cameras_dir=polycam_cameras_dir,
                 output_dir=self.output_dir,
                 min_blur_score=self.min_blur_score,
                 crop_border_pixels=self.crop_border_pixels,
+                num_downscales=self.num_downscales,
+                num_workers=self.num_workers,
             )
         )
 
@@ -70,7 +70,7 @@ DEFAULT_TIMEOUT = timedelta(minutes=30)
 torch.backends.cudnn.benchmark = True  # type: ignore
 
 
-def _find_free_port() -> str:
+def _find_free_port() -> int:
     """Finds a free port."""
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     sock.bind(("", 0))
@@ -132,7 +132,8 @@ def _distributed_worker(
     Returns:
         Any: TODO: determine the return type
     """
-    assert torch.cuda.is_available(), "cuda is not available. Please check your installation."
+    if device_type == "cuda":
+        assert torch.cuda.is_available(), "cuda is not available. Please check your installation."
     global_rank = machine_rank * num_devices_per_machine + local_rank
 
     dist.init_process_group(
@@ -150,7 +151,8 @@ def _distributed_worker(
         if i == machine_rank:
             comms.LOCAL_PROCESS_GROUP = pg
 
-    assert num_devices_per_machine <= torch.cuda.device_count()
+    if device_type == "cuda":
+        assert num_devices_per_machine <= torch.cuda.device_count()
     output = main_func(local_rank, world_size, config, global_rank)
     comms.synchronize()
     dist.destroy_process_group()
@@ -0,0 +1,88 @@
+# Copyright 2022 the Regents of the University of California, Nerfstudio Team and contributors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cooperative cancellation of long running computations, such as renders for the viewer.
+"""
+from __future__ import annotations
+
+import contextlib
+import threading
+from typing import Optional
+
+
+class CancelledException(Exception):
+    """Raised when a computation notices that its cancellation token was cancelled"""
+
+
+class CancellationToken:
+    """Flag shared between the thread requesting a cancellation and the thread doing the work.
+
+    Unlike a trace function, which can interrupt the work at any line, the work only checks the token at points where
+    stopping is safe and cheap, eg. between the chunks of rays of a render.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Requests the cancellation of the work checking this token."""
+        self._event.set()
+
+    def reset(self) -> None:
+        """Clears a cancellation request, before starting new work."""
+        self._event.clear()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether a cancellation was requested."""
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        """Raises a CancelledException if a cancellation was requested, and clears the request."""
+        if self._event.is_set():
+            self._event.clear()
+            raise CancelledException
+
+
+_LOCAL = threading.local()
+
+
+def get_current_token() -> Optional[CancellationToken]:
+    """Returns the cancellation token of the current thread, if any."""
+    return getattr(_LOCAL, "token", None)
+
+
+@contextlib.contextmanager
+def cancellation_context(token: CancellationToken):
+    """Makes the token checked by check_cancelled in the current thread, for the duration of the context.
+
+    Args:
+        token: token to check.
+    """
+    previous_token = get_current_token()
+    _LOCAL.token = token
+    try:
+        yield token
+    finally:
+        _LOCAL.token = previous_token
+
+
+def check_cancelled() -> None:
+    """Raises a CancelledException if the token of the current thread was cancelled. Does nothing outside of a
+    cancellation context, so that computations can always check for cancellation.
+    """
+    token = get_current_token()
+    if token is not None:
+        token.raise_if_cancelled()
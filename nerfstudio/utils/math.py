@@ -18,7 +18,7 @@ from dataclasses import dataclass
 from typing import Literal, Tuple
 
 import torch
-from jaxtyping import Bool, Float
+from jaxtyping import Bool, Float, Int
 from torch import Tensor
 
 from nerfstudio.utils.misc import torch_compile
@@ -256,9 +256,40 @@ def safe_normalize(
     return vectors / (torch.norm(vectors, dim=-1, keepdim=True) + eps)
 
 
+def packed_cumsum(
+    values: Float[Tensor, "num_samples"],
+    ray_indices: Int[Tensor, "num_samples"],
+    exclusive: bool = False,
+) -> Float[Tensor, "num_samples"]:
+    """Cumulative sum of packed values along each ray. The samples of a ray must be contiguous and in order.
+
+    The sum runs over all the samples and the sum of the previous rays is subtracted. It is accumulated in double
+    precision, so that this subtraction does not cost precision.
+
+    Args:
+        values: Value of each sample.
+        ray_indices: Ray index of each sample.
+        exclusive: Whether to leave out the value of the sample itself.
+
+    Returns:
+        Sum of the values of the samples of the ray up to each sample.
+    """
+    values_double = values.double()
+    cumsum = torch.cumsum(values_double, dim=0)
+    positions = torch.arange(len(values), device=values.device)
+    is_first = torch.ones_like(ray_indices, dtype=torch.bool)
+    is_first[1:] = ray_indices[1:] != ray_indices[:-1]
+    # position of the first sample of the ray of each sample
+    first_positions = torch.cummax(torch.where(is_first, positions, 0), dim=0).values
+    cumsum = cumsum - (cumsum[first_positions] - values_double[first_positions])
+    if exclusive:
+        cumsum = cumsum - values_double
+    return cumsum.to(values.dtype)
+
+
 def masked_reduction(
-    input_tensor: Float[Tensor, "1 32 mult"],
-    mask: Bool[Tensor, "1 32 mult"],
+    input_tensor: Float[Tensor, "batch"],
+    mask: Int[Tensor, "batch"],
     reduction_type: Literal["image", "batch"],
 ) -> Tensor:
     """
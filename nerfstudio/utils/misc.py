@@ -25,6 +25,8 @@ import warnings
 
 import torch
 
+from nerfstudio.utils.rich_utils import CONSOLE
+
 T = TypeVar("T")
 TKey = TypeVar("TKey")
 
@@ -164,6 +166,16 @@ def strtobool(val) -> bool:
     return val.lower() in ("yes", "y", "true", "t", "on", "1")
 
 
+def get_autocast_dtype(device_type: str) -> torch.dtype:
+    """Returns the reduced precision of mixed precision on a device type: bfloat16 on CPU, which lacks fast float16
+    kernels, and float16 on GPU.
+
+    Args:
+        device_type: "cpu" or "cuda".
+    """
+    return torch.bfloat16 if device_type == "cpu" else torch.float16
+
+
 def torch_compile(*args, **kwargs) -> Any:
     """
     Safe torch.compile with backward compatibility for PyTorch 1.x
@@ -192,6 +204,85 @@ def torch_compile(*args, **kwargs) -> Any:
         return torch.compile(*args, **kwargs)
 
 
+class StaticShapeCompiled:
+    """Wraps a function so that it runs compiled for one fixed set of input shapes, and eagerly otherwise.
+
+    The shapes are captured from the first call made with gradients enabled, ie. the first training step, which is
+    where the input shapes stay the same from one step to the next. Calls with other shapes (eval chunks, rendering
+    from the viewer) or with gradients disabled use the eager function, since torch.compile guards on both and would
+    recompile for them. When the training shapes change for good, eg. with an adaptive batch size, the new shapes are
+    captured once they are used for recapture_after consecutive training calls, at most max_recaptures times, after
+    which the other shapes stay eager. If the compilation fails, a warning is emitted and the eager function is used
+    from then on.
+
+    Args:
+        fn: Function to compile. Its tensor arguments define the captured shapes.
+        mode: torch.compile mode. "reduce-overhead" captures the compiled step with CUDA graphs.
+        max_recaptures: Maximum number of times new training shapes are captured, each one costing a recompilation.
+        recapture_after: Number of consecutive training calls with the same new shapes before they are captured.
+    """
+
+    def __init__(self, fn: Callable, mode: str = "default", max_recaptures: int = 4, recapture_after: int = 2) -> None:
+        self.fn = fn
+        self.mode = mode
+        self.max_recaptures = max_recaptures
+        self.recapture_after = recapture_after
+        self.compiled_fn: Optional[Callable] = None
+        self.signature: Optional[tuple] = None
+        self.num_compiled_calls = 0
+        self.num_recaptures = 0
+        self.failed = False
+        self._new_signature: Optional[tuple] = None
+        self._new_signature_calls = 0
+
+    def _update_signature(self, signature: tuple) -> None:
+        """Captures the signature of a training call if it is the first one, or if the training shapes changed."""
+        if self.signature is None:
+            self.signature = signature
+            return
+        if signature == self.signature:
+            self._new_signature, self._new_signature_calls = None, 0
+            return
+        if signature != self._new_signature:
+            self._new_signature, self._new_signature_calls = signature, 0
+        self._new_signature_calls += 1
+        if self._new_signature_calls < self.recapture_after or self.failed:
+            return
+        if self.num_recaptures >= self.max_recaptures:
+            if self.num_recaptures == self.max_recaptures:
+                warnings.warn(
+                    f"The training input shapes changed more than {self.max_recaptures} times, the other shapes run "
+                    "eagerly from now on.",
+                    RuntimeWarning,
+                )
+                self.num_recaptures += 1
+            return
+        CONSOLE.log(f"The training input shapes changed, recompiling {getattr(self.fn, '__qualname__', self.fn)}.")
+        self.signature = signature
+        self.num_recaptures += 1
+        self._new_signature, self._new_signature_calls = None, 0
+
+    def __call__(self, *args):
+        signature = tuple((arg.shape, arg.dtype, arg.device) if isinstance(arg, torch.Tensor) else arg for arg in args)
+        signature += (torch.is_grad_enabled(),)
+        if torch.is_grad_enabled():
+            self._update_signature(signature)
+        if self.failed or signature != self.signature:
+            return self.fn(*args)
+        try:
+            if self.compiled_fn is None:
+                self.compiled_fn = torch_compile(dynamic=False, mode=self.mode)(self.fn)
+            outputs = self.compiled_fn(*args)
+        except Exception as e:
+            if self.num_compiled_calls:
+                raise
+            warnings.warn(f"Compilation failed, falling back to eager execution: {e}", RuntimeWarning)
+            self.failed = True
+            return self.fn(*args)
+        self.num_compiled_calls += 1
+        return outputs
+
+
 def get_orig_class(obj, default=None):
     """Returns the __orig_class__ class of `obj` even when it is not initialized in __init__ (Python>=3.8).
 
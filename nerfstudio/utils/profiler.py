@@ -18,16 +18,21 @@ Profiler base class and functionality
 from __future__ import annotations
 
 import functools
+import itertools
+import json
 import os
+import threading
 import time
 import typing
 from collections import deque
-from contextlib import ContextDecorator, contextmanager
+from contextlib import ContextDecorator, contextmanager, nullcontext
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import (
     Any,
     Callable,
     ContextManager,
+    Deque,
     Dict,
     List,
     Optional,
@@ -37,6 +42,7 @@ from typing import (
     overload,
 )
 
+import torch
 from torch.profiler import ProfilerActivity, profile, record_function
 
 from nerfstudio.configs import base_config as cfg
@@ -50,6 +56,9 @@ from nerfstudio.utils.rich_utils import CONSOLE
 
 PROFILER = []
 PYTORCH_PROFILER = None
+TRACER: Optional["SpanTracer"] = None
+
+_NULL_SPAN = nullcontext()
 
 
 CallableT = TypeVar("CallableT", bound=Callable)
@@ -100,6 +109,10 @@ class _TimeFunction(ContextDecorator):
 
     def __enter__(self):
         self.start = time.time()
+        if TRACER is not None:
+            ctx = TRACER.span(self.name)
+            ctx.__enter__()
+            self._profiler_contexts.append(ctx)
         if PYTORCH_PROFILER is not None:
             args, kwargs = tuple(), {}
             if self._function_call_args is not None:
@@ -131,19 +144,161 @@ class _TimeFunction(ContextDecorator):
         return inner
 
 
+def trace_span(name: str) -> ContextManager[Any]:
+    """Time a block of code as a span of the current step, if span tracing is enabled.
+
+    When tracing is disabled this returns a shared no-op context, so it can be left in hot code.
+
+    Args:
+        name: Name of the span, for example "field" or "backward".
+
+    Returns:
+        A context to use in a `with` statement.
+    """
+    if TRACER is None:
+        return _NULL_SPAN
+    return TRACER.span(name)
+
+
+def set_trace_step(step: int) -> None:
+    """Sets the step that the following spans belong to, and exports the spans periodically."""
+    if TRACER is not None:
+        TRACER.set_step(step)
+
+
 def flush_profiler(config: cfg.LoggingConfig):
     """Method that checks if profiler is enabled before flushing"""
     if config.profiler != "none" and PROFILER:
         PROFILER[0].print_profile()
+    if TRACER is not None:
+        TRACER.export()
 
 
 def setup_profiler(config: cfg.LoggingConfig, log_dir: Path):
     """Initialization of profilers"""
-    global PYTORCH_PROFILER
+    global PYTORCH_PROFILER, TRACER
     if comms.is_main_process():
         PROFILER.append(Profiler(config))
         if config.profiler == "pytorch":
             PYTORCH_PROFILER = PytorchProfiler(log_dir)
+        if config.trace_spans:
+            TRACER = SpanTracer(
+                log_dir / "profiler_traces",
+                buffer_size=config.trace_buffer_size,
+                steps_per_export=config.steps_per_trace_export,
+                synchronize_cuda=config.trace_synchronize_cuda,
+            )
+
+
+@dataclass(frozen=True)
+class Span:
+    """A timed block of code."""
+
+    name: str
+    """Name of the span."""
+    step: int
+    """Training step during which the span was recorded."""
+    depth: int
+    """Number of spans this span is nested in."""
+    thread: int
+    """Identifier of the thread that recorded the span."""
+    start_ns: int
+    """Start time, in nanoseconds since the tracer was created."""
+    duration_ns: int
+    """Duration in nanoseconds."""
+    index: int
+    """Index of the span among all the recorded spans, used to export each span once."""
+
+
+class SpanTracer:
+    """Records nested timing spans in a ring buffer and periodically exports them.
+
+    Spans are appended to `spans.jsonl` in the output directory, one JSON object per line, so a long run can be
+    analyzed after the fact, and the content of the buffer is written as `spans_trace.json`, which can be opened in
+    chrome://tracing or Perfetto. The buffer should hold at least the spans of steps_per_export steps, older spans are
+    dropped otherwise.
+
+    Args:
+        output_dir: Directory where the spans are exported.
+        buffer_size: Maximum number of spans kept in memory.
+        steps_per_export: Number of steps between exports. 0 disables periodic exports.
+        synchronize_cuda: If True, synchronizes CUDA at span boundaries so that spans measure the GPU time of the
+            kernels they launch instead of the time to launch them.
+    """
+
+    def __init__(
+        self, output_dir: Path, buffer_size: int = 100000, steps_per_export: int = 1000, synchronize_cuda: bool = False
+    ):
+        self.output_dir = output_dir
+        self.spans: Deque[Span] = deque(maxlen=buffer_size)
+        self.steps_per_export = steps_per_export
+        self.synchronize_cuda = synchronize_cuda and torch.cuda.is_available()
+        self.step = 0
+        self._origin_ns = time.perf_counter_ns()
+        self._counter = itertools.count()
+        self._num_exported = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def span(self, name: str):
+        """Context manager that records the enclosed block as a span."""
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        if self.synchronize_cuda:
+            torch.cuda.synchronize()
+        start = time.perf_counter_ns()
+        try:
+            yield None
+        finally:
+            if self.synchronize_cuda:
+                torch.cuda.synchronize()
+            end = time.perf_counter_ns()
+            self._local.depth = depth
+            self.spans.append(
+                Span(
+                    name,
+                    self.step,
+                    depth,
+                    threading.get_ident(),
+                    start - self._origin_ns,
+                    end - start,
+                    next(self._counter),
+                )
+            )
+
+    def set_step(self, step: int) -> None:
+        """Sets the current step, exporting the spans every steps_per_export steps."""
+        self.step = step
+        if self.steps_per_export > 0 and step > 0 and step % self.steps_per_export == 0:
+            self.export()
+
+    def export(self) -> None:
+        """Appends the spans recorded since the last export to spans.jsonl, and writes the buffer as a Chrome trace."""
+        spans = list(self.spans)
+        if not spans:
+            return
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.output_dir / "spans.jsonl", "a", encoding="utf-8") as file:
+            for span in spans:
+                if span.index >= self._num_exported:
+                    file.write(json.dumps(asdict(span)) + "\n")
+        self._num_exported = spans[-1].index + 1
+
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": span.start_ns / 1e3,
+                "dur": span.duration_ns / 1e3,
+                "pid": pid,
+                "tid": span.thread,
+                "args": {"step": span.step},
+            }
+            for span in spans
+        ]
+        with open(self.output_dir / "spans_trace.json", "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
 
 
 class PytorchProfiler:
@@ -15,8 +15,9 @@
 """Tensor dataclass"""
 
 import dataclasses
+import functools
 from copy import deepcopy
-from typing import Callable, Dict, List, NoReturn, Optional, Tuple, TypeVar, Union
+from typing import Any, Callable, Dict, List, NoReturn, Optional, Tuple, Type, TypeVar, Union
 
 import numpy as np
 import torch
@@ -24,6 +25,18 @@ import torch
 TensorDataclassT = TypeVar("TensorDataclassT", bound="TensorDataclass")
 
 
+@functools.lru_cache(maxsize=None)
+def _get_fields(cls: type) -> Tuple[dataclasses.Field, ...]:
+    """Returns the dataclass fields of a TensorDataclass subclass, computed once per class.
+
+    dataclasses.fields walks the class dictionary on every call, which adds up for classes such as RayBundle and
+    RaySamples that are instantiated many times per training step.
+    """
+    if not dataclasses.is_dataclass(cls):
+        raise TypeError("TensorDataclass must be a dataclass")
+    return dataclasses.fields(cls)
+
+
 class TensorDataclass:
     """@dataclass of tensors with the same size batch. Allows indexing and standard tensor ops.
     Fields that are not Tensors will not be batched unless they are also a TensorDataclass.
@@ -75,24 +88,49 @@ class TensorDataclass:
                 isinstance(v, int) and v > 1
             ), f"Custom dimensions must be an integer greater than 1, since 1 is the default, received {k}: {v}"
 
-        # Shim to prevent pyright from narrowing `self` to DataclassInstance.
-        self_dc = self
-        if not dataclasses.is_dataclass(self_dc):
-            raise TypeError("TensorDataclass must be a dataclass")
-
-        batch_shapes = self._get_dict_batch_shapes({f.name: getattr(self, f.name) for f in dataclasses.fields(self_dc)})
+        fields = {f.name: getattr(self, f.name) for f in _get_fields(type(self))}
+        batch_shapes = self._get_dict_batch_shapes(fields)
         if len(batch_shapes) == 0:
             raise ValueError("TensorDataclass must have at least one tensor")
         batch_shape = torch.broadcast_shapes(*batch_shapes)
 
-        broadcasted_fields = self._broadcast_dict_fields(
-            {f.name: getattr(self, f.name) for f in dataclasses.fields(self_dc)}, batch_shape
-        )
+        broadcasted_fields = self._broadcast_dict_fields(fields, batch_shape)
         for f, v in broadcasted_fields.items():
             object.__setattr__(self, f, v)
 
         object.__setattr__(self, "_shape", batch_shape)
 
+    @classmethod
+    def from_broadcasted(
+        cls: Type[TensorDataclassT], batch_shape: Tuple[int, ...], **fields: Any
+    ) -> TensorDataclassT:
+        """Builds a TensorDataclass from fields that already have the given batch shape.
+
+        This skips __init__ and __post_init__, so nothing is validated or broadcasted. It is meant for hot code that
+        derives new fields from an existing instance, where the shapes are known to be consistent. Fields that are not
+        given take their default value.
+
+        Args:
+            batch_shape: Batch shape shared by all the fields.
+            fields: Values of the fields.
+
+        Returns:
+            The new TensorDataclass.
+        """
+        instance = cls.__new__(cls)
+        for f in _get_fields(cls):
+            if f.name in fields:
+                value = fields[f.name]
+            elif f.default is not dataclasses.MISSING:
+                value = f.default
+            elif f.default_factory is not dataclasses.MISSING:
+                value = f.default_factory()
+            else:
+                raise TypeError(f"{cls.__name__}.from_broadcasted() missing required field '{f.name}'")
+            object.__setattr__(instance, f.name, value)
+        object.__setattr__(instance, "_shape", torch.Size(batch_shape))
+        return instance
+
     def _get_dict_batch_shapes(self, dict_: Dict) -> List:
         """Returns batch shapes of all tensors in a dictionary
 
@@ -129,16 +167,17 @@ class TensorDataclass:
             if isinstance(v, torch.Tensor):
                 # Apply field-specific custom dimensions.
                 if isinstance(self._field_custom_dimensions, dict) and k in self._field_custom_dimensions:
-                    new_dict[k] = v.broadcast_to(
-                        (
-                            *batch_shape,
-                            *v.shape[-self._field_custom_dimensions[k] :],
-                        )
-                    )
+                    num_dims = self._field_custom_dimensions[k]
                 else:
-                    new_dict[k] = v.broadcast_to((*batch_shape, v.shape[-1]))
+                    num_dims = 1
+                # Broadcasting only creates a view, but tensors that already have the batch shape are kept as is to
+                # avoid even that, which is the common case.
+                if v.shape[:-num_dims] == batch_shape:
+                    new_dict[k] = v
+                else:
+                    new_dict[k] = v.broadcast_to((*batch_shape, *v.shape[-num_dims:]))
             elif isinstance(v, TensorDataclass):
-                new_dict[k] = v.broadcast_to(batch_shape)
+                new_dict[k] = v if v.shape == batch_shape else v.broadcast_to(batch_shape)
             elif isinstance(v, Dict):
                 new_dict[k] = self._broadcast_dict_fields(v, batch_shape)
         return new_dict
@@ -289,12 +328,17 @@ class TensorDataclass:
         self_dc = self
         assert dataclasses.is_dataclass(self_dc)
 
-        new_fields = self._apply_fn_to_dict(
-            {f.name: getattr(self, f.name) for f in dataclasses.fields(self_dc)},
-            fn,
-            dataclass_fn,
-            custom_tensor_dims_fn,
-        )
+        fields = {f.name: getattr(self, f.name) for f in _get_fields(type(self))}
+        new_fields = self._apply_fn_to_dict(fields, fn, dataclass_fn, custom_tensor_dims_fn)
+
+        # When every field still shares one batch shape, which is the case for indexing, reshaping and moving between
+        # devices, there is nothing to validate or broadcast and the instance can be built directly.
+        batch_shapes = self._get_dict_batch_shapes(new_fields)
+        if len(batch_shapes) > 0 and all(shape == batch_shapes[0] for shape in batch_shapes):
+            new = self.from_broadcasted(batch_shapes[0], **{**fields, **new_fields})
+            if "_field_custom_dimensions" in self.__dict__:
+                object.__setattr__(new, "_field_custom_dimensions", self._field_custom_dimensions)
+            return new
 
         return dataclasses.replace(self_dc, **new_fields)
 
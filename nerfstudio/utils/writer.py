@@ -17,12 +17,16 @@ Generic Writer class
 """
 from __future__ import annotations
 
+import atexit
 import enum
 import os
+import queue
+import threading
 from abc import abstractmethod
+from collections import defaultdict, deque
 from pathlib import Path
 from time import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import torch
 import wandb
@@ -44,6 +48,10 @@ def to8b(x):
 EVENT_WRITERS = []
 EVENT_STORAGE = []
 GLOBAL_BUFFER = {}
+_WRITE_QUEUE: Optional[queue.Queue] = None
+_WRITE_QUEUE_SIZE = 4
+"""Maximum number of batches of events waiting for the background writer thread, so that it never holds on to the
+tensors of more than a few logging steps when the loggers fall behind."""
 
 
 class EventName(enum.Enum):
@@ -79,7 +87,8 @@ def put_image(name, image: Float[Tensor, "H W C"], step: int):
     if isinstance(name, EventName):
         name = name.value
 
-    EVENT_STORAGE.append({"name": name, "write_type": EventType.IMAGE, "event": image.detach().cpu(), "step": step})
+    # The image is moved to the cpu when written out, so that this doesn't wait for the GPU.
+    EVENT_STORAGE.append({"name": name, "write_type": EventType.IMAGE, "event": image.detach(), "step": step})
 
 
 @check_main_thread
@@ -106,7 +115,8 @@ def put_dict(name: str, scalar_dict: Dict[str, Any], step: int):
         scalar_dict: values to write out
         step: step associated with dict
     """
-    EVENT_STORAGE.append({"name": name, "write_type": EventType.DICT, "event": scalar_dict, "step": step})
+    # Tensors are converted when written out, in place, so keep a copy of the dictionary.
+    EVENT_STORAGE.append({"name": name, "write_type": EventType.DICT, "event": dict(scalar_dict), "step": step})
 
 
 @check_main_thread
@@ -138,14 +148,18 @@ def put_time(name: str, duration: float, step: int, avg_over_steps: bool = True,
 
     if avg_over_steps:
         GLOBAL_BUFFER["step"] = step
-        curr_event = GLOBAL_BUFFER["events"].get(name, {"buffer": [], "avg": 0})
+        curr_event = GLOBAL_BUFFER["events"].get(name)
+        if curr_event is None:
+            curr_event = {"buffer": deque(maxlen=max(GLOBAL_BUFFER["max_buffer_size"], 1)), "sum": 0.0, "avg": 0}
+            GLOBAL_BUFFER["events"][name] = curr_event
         curr_buffer = curr_event["buffer"]
-        if len(curr_buffer) >= GLOBAL_BUFFER["max_buffer_size"]:
-            curr_buffer.pop(0)
+        # Keep a running sum of the window, so that updating the average doesn't depend on the window size.
+        if len(curr_buffer) == curr_buffer.maxlen:
+            curr_event["sum"] -= curr_buffer[0]
         curr_buffer.append(duration)
-        curr_avg = sum(curr_buffer) / len(curr_buffer)
-        put_scalar(name, curr_avg, step)
-        GLOBAL_BUFFER["events"][name] = {"buffer": curr_buffer, "avg": curr_avg}
+        curr_event["sum"] += duration
+        curr_event["avg"] = curr_event["sum"] / len(curr_buffer)
+        put_scalar(name, curr_event["avg"], step)
     else:
         put_scalar(name, duration, step)
 
@@ -159,16 +173,103 @@ def put_time(name: str, duration: float, step: int, avg_over_steps: bool = True,
 
 @check_main_thread
 def write_out_storage():
-    """Function that writes all the events in storage to all the writer locations"""
+    """Function that writes all the events in storage to all the writer locations
+
+    If logging.flush_in_background is set, the events are handed over to a background thread, so neither the
+    transfer of tensors to the cpu nor the loggers slow down the caller.
+    """
+    if len(EVENT_STORAGE) == 0:
+        return
+    events = EVENT_STORAGE[:]
+    del EVENT_STORAGE[: len(events)]
+    if GLOBAL_BUFFER.get("flush_in_background", False):
+        _detach_tensors(events)
+        # blocks while the queue is full, until the writer thread catches up
+        _get_write_queue().put(events)
+    else:
+        _write_events(events)
+
+
+def flush() -> None:
+    """Blocks until all the events written out so far have reached the writers."""
+    if _WRITE_QUEUE is not None:
+        _WRITE_QUEUE.join()
+
+
+def _detach_tensors(events: List[Dict[str, Any]]) -> None:
+    """Detaches the tensors of the events, so that the queued events don't keep the autograd graphs alive."""
+    for event in events:
+        if isinstance(event["event"], Tensor):
+            event["event"] = event["event"].detach()
+        elif event["write_type"] == EventType.DICT:
+            event["event"] = {
+                key: value.detach() if isinstance(value, Tensor) else value for key, value in event["event"].items()
+            }
+
+
+def _fetch_tensors(events: List[Dict[str, Any]]) -> None:
+    """Replaces the scalar tensors of the events by floats, and moves the images to the cpu.
+
+    All the scalars on a device are transferred at once, so this only synchronizes once per device instead of once
+    per scalar.
+    """
+    scalars: Dict[torch.device, List[Tuple[Dict, Any, Tensor]]] = defaultdict(list)
+    for event in events:
+        if event["write_type"] == EventType.IMAGE:
+            event["event"] = event["event"].cpu()
+        elif event["write_type"] == EventType.SCALAR and isinstance(event["event"], Tensor):
+            scalars[event["event"].device].append((event, "event", event["event"]))
+        elif event["write_type"] == EventType.DICT:
+            for key, value in event["event"].items():
+                if isinstance(value, Tensor) and value.numel() == 1:
+                    scalars[value.device].append((event["event"], key, value))
+    for entries in scalars.values():
+        values = torch.stack([tensor.detach().reshape(()).float() for _, _, tensor in entries]).cpu().tolist()
+        for (container, key, _), value in zip(entries, values):
+            container[key] = value
+
+
+def _write_events(events: List[Dict[str, Any]]) -> None:
+    """Writes a batch of events to all the writer locations."""
+    _fetch_tensors(events)
     for writer in EVENT_WRITERS:
-        if isinstance(writer, LocalWriter) and len(EVENT_STORAGE) > 0:
-            writer.write_stats_log(EVENT_STORAGE[0]["step"])
+        if isinstance(writer, LocalWriter):
+            writer.write_stats_log(events[0]["step"], events)
             continue
-        for event in EVENT_STORAGE:
+        for event in events:
             write_func = getattr(writer, event["write_type"].value)
             write_func(event["name"], event["event"], event["step"])
 
-    EVENT_STORAGE.clear()
+
+def _get_write_queue() -> queue.Queue:
+    """Returns the queue of the background writer thread, starting the thread on first use."""
+    global _WRITE_QUEUE
+    if _WRITE_QUEUE is None:
+        _WRITE_QUEUE = queue.Queue(maxsize=_WRITE_QUEUE_SIZE)
+        threading.Thread(target=_write_worker, args=(_WRITE_QUEUE,), name="event-writer", daemon=True).start()
+        atexit.register(flush)
+    return _WRITE_QUEUE
+
+
+def _write_worker(write_queue: queue.Queue) -> None:
+    """Writes out the batches of events put in the queue, until the program exits."""
+    while True:
+        batches = [write_queue.get()]
+        # Fetch the tensors of every batch that is already waiting in a single transfer.
+        while True:
+            try:
+                batches.append(write_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _fetch_tensors([event for batch in batches for event in batch])
+            for batch in batches:
+                _write_events(batch)
+        except Exception:  # pylint: disable=broad-except
+            CONSOLE.print_exception()
+        finally:
+            for _ in batches:
+                write_queue.task_done()
 
 
 def setup_local_writer(config: cfg.LoggingConfig, max_iter: int, banner_messages: Optional[List[str]] = None) -> None:
@@ -189,6 +290,7 @@ def setup_local_writer(config: cfg.LoggingConfig, max_iter: int, banner_messages
     GLOBAL_BUFFER["max_iter"] = max_iter
     GLOBAL_BUFFER["max_buffer_size"] = config.max_buffer_size
     GLOBAL_BUFFER["steps_per_log"] = config.steps_per_log
+    GLOBAL_BUFFER["flush_in_background"] = config.flush_in_background
     GLOBAL_BUFFER["events"] = {}
 
 
@@ -396,11 +498,12 @@ class LocalWriter:
             self.past_mssgs.extend(banner_messages)
         self.has_printed = False
 
-    def write_stats_log(self, step: int) -> None:
+    def write_stats_log(self, step: int, events: List[Dict[str, Any]]) -> None:
         """Function to write out scalars to terminal
 
         Args:
             step: current train step
+            events: events written out at this step
         """
         valid_step = step % GLOBAL_BUFFER["steps_per_log"] == 0
         if valid_step:
@@ -410,9 +513,9 @@ class LocalWriter:
                     "Set flag [yellow]--logging.local-writer.max-log-size=0[/yellow] "
                     "to disable line wrapping."
                 )
-            latest_map, new_key = self._consolidate_events()
-            self._update_header(latest_map, new_key)
-            self._print_stats(latest_map)
+            latest_map, new_key = self._consolidate_events(events)
+            self._update_header(step, latest_map, new_key)
+            self._print_stats(step, latest_map)
 
     def write_config(self, name: str, config_dict: Dict[str, Any], step: int):
         """Function that writes out the config to local
@@ -422,10 +525,10 @@ class LocalWriter:
         """
         # TODO: implement this
 
-    def _consolidate_events(self):
+    def _consolidate_events(self, events: List[Dict[str, Any]]):
         latest_map = {}
         new_key = False
-        for event in EVENT_STORAGE:
+        for event in events:
             name = event["name"]
             if name not in self.keys:
                 self.keys.add(name)
@@ -433,14 +536,15 @@ class LocalWriter:
             latest_map[name] = event["event"]
         return latest_map, new_key
 
-    def _update_header(self, latest_map, new_key):
+    def _update_header(self, step, latest_map, new_key):
         """helper to handle the printing of the header labels
 
         Args:
+            step: current train step
             latest_map: the most recent dictionary of stats that have been recorded
             new_key: indicator whether or not there is a new key added to logger
         """
-        full_log_cond = not self.config.max_log_size and GLOBAL_BUFFER["step"] <= GLOBAL_BUFFER["steps_per_log"]
+        full_log_cond = not self.config.max_log_size and step <= GLOBAL_BUFFER["steps_per_log"]
         capped_log_cond = self.config.max_log_size and (len(self.past_mssgs) - self.banner_len <= 2 or new_key)
         if full_log_cond or capped_log_cond:
             mssg = f"{'Step (% Done)':<20}"
@@ -453,14 +557,14 @@ class LocalWriter:
                 print(mssg)
                 print("-" * len(mssg))
 
-    def _print_stats(self, latest_map, padding=" "):
+    def _print_stats(self, step, latest_map, padding=" "):
         """helper to print out the stats in a readable format
 
         Args:
+            step: current train step
             latest_map: the most recent dictionary of stats that have been recorded
             padding: type of characters to print to pad open space
         """
-        step = GLOBAL_BUFFER["step"]
         fraction_done = step / GLOBAL_BUFFER["max_iter"]
         curr_mssg = f"{step} ({fraction_done*100:.02f}%)"
         curr_mssg = f"{curr_mssg:<20}"
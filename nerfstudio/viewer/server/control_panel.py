@@ -14,7 +14,7 @@
 
 """ Control panel for the viewer """
 from collections import defaultdict
-from typing import Callable, DefaultDict, List, Tuple, get_args
+from typing import Callable, DefaultDict, List, Optional, Tuple, get_args
 
 import torch
 
@@ -41,6 +41,9 @@ class ControlPanel:
             (eg train speed, max res, etc)
         crop_update_cb: a callback that will be called when the user changes the crop parameters
         update_output_cb: a callback that will be called when the user changes the output render
+        update_split_output_cb: a callback that will be called when the user changes the split output render
+        redisplay_cb: a callback that will be called when the user changes how the rendered outputs are displayed
+            (eg output render, colormap, split), which does not require a rerender. Defaults to rerender_cb.
     """
 
     def __init__(
@@ -51,7 +54,10 @@ class ControlPanel:
         crop_update_cb: Callable,
         update_output_cb: Callable,
         update_split_output_cb: Callable,
+        redisplay_cb: Optional[Callable] = None,
     ):
+        if redisplay_cb is None:
+            redisplay_cb = rerender_cb
         # elements holds a mapping from tag: [elements]
         self.viser_server = viser_server
         self._elements_by_tag: DefaultDict[str, List[ViewerElement]] = defaultdict(lambda: [])
@@ -66,48 +72,48 @@ class ControlPanel:
             "Output Render",
             "not set",
             ["not set"],
-            cb_hook=lambda han: [self.update_control_panel(), update_output_cb(han), rerender_cb(han)],
+            cb_hook=lambda han: [self.update_control_panel(), update_output_cb(han), redisplay_cb(han)],
             hint="The output to render",
         )
         self._colormap = ViewerDropdown[Colormaps](
-            "Colormap", "default", ["default"], cb_hook=rerender_cb, hint="The colormap to use"
+            "Colormap", "default", ["default"], cb_hook=redisplay_cb, hint="The colormap to use"
         )
-        self._invert = ViewerCheckbox("Invert", False, cb_hook=rerender_cb, hint="Invert the colormap")
-        self._normalize = ViewerCheckbox("Normalize", True, cb_hook=rerender_cb, hint="Normalize the colormap")
-        self._min = ViewerNumber("Min", 0.0, cb_hook=rerender_cb, hint="Min value of the colormap")
-        self._max = ViewerNumber("Max", 1.0, cb_hook=rerender_cb, hint="Max value of the colormap")
+        self._invert = ViewerCheckbox("Invert", False, cb_hook=redisplay_cb, hint="Invert the colormap")
+        self._normalize = ViewerCheckbox("Normalize", True, cb_hook=redisplay_cb, hint="Normalize the colormap")
+        self._min = ViewerNumber("Min", 0.0, cb_hook=redisplay_cb, hint="Min value of the colormap")
+        self._max = ViewerNumber("Max", 1.0, cb_hook=redisplay_cb, hint="Max value of the colormap")
 
         self._split = ViewerCheckbox(
             "Enable",
             False,
-            cb_hook=lambda han: [self.update_control_panel(), rerender_cb(han)],
+            cb_hook=lambda han: [self.update_control_panel(), redisplay_cb(han)],
             hint="Render two outputs",
         )
         self._split_percentage = ViewerSlider(
-            "Split Percentage", 0.5, 0.0, 1.0, 0.01, cb_hook=rerender_cb, hint="Where to split"
+            "Split Percentage", 0.5, 0.0, 1.0, 0.01, cb_hook=redisplay_cb, hint="Where to split"
         )
         self._split_output_render = ViewerDropdown(
             "Output Render Split",
             "not set",
             ["not set"],
-            cb_hook=lambda han: [self.update_control_panel(), update_split_output_cb(han), rerender_cb(han)],
+            cb_hook=lambda han: [self.update_control_panel(), update_split_output_cb(han), redisplay_cb(han)],
             hint="The second output",
         )
         # Hack: spaces are after at the end of the names to make them unique
         self._split_colormap = ViewerDropdown[Colormaps](
-            "Colormap ", "default", ["default"], cb_hook=rerender_cb, hint="Colormap of the second output"
+            "Colormap ", "default", ["default"], cb_hook=redisplay_cb, hint="Colormap of the second output"
         )
         self._split_invert = ViewerCheckbox(
-            "Invert ", False, cb_hook=rerender_cb, hint="Invert the colormap of the second output"
+            "Invert ", False, cb_hook=redisplay_cb, hint="Invert the colormap of the second output"
         )
         self._split_normalize = ViewerCheckbox(
-            "Normalize ", True, cb_hook=rerender_cb, hint="Normalize the colormap of the second output"
+            "Normalize ", True, cb_hook=redisplay_cb, hint="Normalize the colormap of the second output"
         )
         self._split_min = ViewerNumber(
-            "Min ", 0.0, cb_hook=rerender_cb, hint="Min value of the colormap of the second output"
+            "Min ", 0.0, cb_hook=redisplay_cb, hint="Min value of the colormap of the second output"
         )
         self._split_max = ViewerNumber(
-            "Max ", 1.0, cb_hook=rerender_cb, hint="Max value of the colormap of the second output"
+            "Max ", 1.0, cb_hook=redisplay_cb, hint="Max value of the colormap of the second output"
         )
 
         self._train_util = ViewerSlider(
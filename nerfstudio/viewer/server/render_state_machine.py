@@ -17,15 +17,19 @@ from __future__ import annotations
 
 import contextlib
 import threading
+import time
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Dict, Literal, Optional, Tuple, get_args
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Literal, Optional, Tuple, get_args
 
 import torch
+import torch.nn.functional as F
 
 from nerfstudio.cameras.cameras import Cameras
+from nerfstudio.cameras.rays import RayBundle
 from nerfstudio.model_components.renderers import background_color_override_context
 from nerfstudio.utils import colormaps, writer
-from nerfstudio.utils.writer import GLOBAL_BUFFER, EventName, TimeWriter
+from nerfstudio.utils.cancellation import CancellationToken, CancelledException, cancellation_context
+from nerfstudio.utils.writer import EventName, TimeWriter
 from nerfstudio.viewer.server import viewer_utils
 from nerfstudio.viewer.viser.messages import CameraMessage
 
@@ -33,7 +37,7 @@ if TYPE_CHECKING:
     from nerfstudio.viewer.server.viewer_state import ViewerState
 
 RenderStates = Literal["low_move", "low_static", "high"]
-RenderActions = Literal["rerender", "move", "static", "step"]
+RenderActions = Literal["rerender", "move", "static", "step", "redisplay"]
 
 
 @dataclass
@@ -73,11 +77,22 @@ class RenderStateMachine(threading.Thread):
         self.next_action: Optional[RenderAction] = None
         self.state: RenderStates = "low_static"
         self.render_trigger = threading.Event()
-        self.target_fps = 24
+        self.target_fps = viewer.config.target_fps
         self.viewer = viewer
-        self.interrupt_render_flag = False
+        self.cancellation_token = CancellationToken()
         self.daemon = True
         self.output_keys = {}
+        self.render_cache = viewer_utils.RenderCache(max_size=viewer.config.render_cache_size)
+        self.resolution_controller = viewer_utils.ResolutionController(target_fps=self.target_fps)
+        self.last_outputs: Optional[Dict[str, Any]] = None
+        """Outputs of the last completed render sent to the viewer, displayed again on redisplay actions"""
+        self.last_cam_msg: Optional[CameraMessage] = None
+        """Camera message of the last outputs"""
+        self.send_time = 0.0
+        """Time spent sending partial frames during the current render"""
+        self.redisplay_pending = False
+        """Whether the display settings changed since the last frame was sent, kept apart from the next action so
+        that no later action can replace it"""
 
     def action(self, action: RenderAction):
         """Takes an action and updates the state machine
@@ -85,6 +100,11 @@ class RenderStateMachine(threading.Thread):
         Args:
             action: the action to take
         """
+        if action.action == "redisplay":
+            # a pending render will use the new display settings, and a running render will for its next frame
+            self.redisplay_pending = True
+            self.render_trigger.set()
+            return
         if self.next_action is None:
             self.next_action = action
         elif action.action == "step" and (
@@ -103,7 +123,7 @@ class RenderStateMachine(threading.Thread):
 
         # handle interrupt logic
         if self.state == "high" and self.next_action.action in ("move", "rerender"):
-            self.interrupt_render_flag = True
+            self.cancellation_token.cancel()
         self.render_trigger.set()
 
     def _render_img(self, cam_msg: CameraMessage):
@@ -125,8 +145,18 @@ class RenderStateMachine(threading.Thread):
 
         camera: Optional[Cameras] = self.viewer.get_camera(image_height, image_width)
         assert camera is not None, "render called before viewer connected"
+        # only the final high resolution renders are cached, low resolution ones are superseded while moving
+        cache_key = self._get_render_cache_key(camera) if self.state == "high" else None
+        outputs = None if cache_key is None else self.render_cache.get(cache_key)
+        if outputs is not None:
+            self.viewer.viser_server.send_status_message(
+                eval_res=f"{image_height}x{image_width}px", step=self.viewer.step
+            )
+            return outputs
 
         with self.viewer.train_lock if self.viewer.train_lock is not None else contextlib.nullcontext():
+            # the wait for the training step is not part of the frame time, no resolution can make up for it
+            frame_start = time.time()
             camera_ray_bundle = camera.generate_rays(camera_indices=0, aabb_box=self.viewer.get_model().render_aabb)
 
             with TimeWriter(None, None, write=False) as vis_t:
@@ -142,13 +172,18 @@ class RenderStateMachine(threading.Thread):
                             device=self.viewer.get_model().device,
                         )
                     with background_color_override_context(background_color), torch.no_grad():
-                        outputs = self.viewer.get_model().get_outputs_for_camera_ray_bundle(camera_ray_bundle)
+                        outputs = self._render_outputs(camera_ray_bundle, cam_msg)
                 else:
                     with torch.no_grad():
-                        outputs = self.viewer.get_model().get_outputs_for_camera_ray_bundle(camera_ray_bundle)
+                        outputs = self._render_outputs(camera_ray_bundle, cam_msg)
                 self.viewer.get_model().train()
+        if cache_key is not None:
+            self.render_cache.put(cache_key, outputs)
         num_rays = len(camera_ray_bundle)
-        render_time = vis_t.duration
+        render_time = max(vis_t.duration - self.send_time, 1e-6)
+        self.resolution_controller.update(
+            self._get_resolution_key(), num_rays, time.time() - frame_start - self.send_time
+        )
         if writer.is_initialized():
             writer.put_time(
                 name=EventName.VIS_RAYS_PER_SEC, duration=num_rays / render_time, step=step, avg_over_steps=True
@@ -156,45 +191,116 @@ class RenderStateMachine(threading.Thread):
         self.viewer.viser_server.send_status_message(eval_res=f"{image_height}x{image_width}px", step=step)
         return outputs
 
+    def _render_outputs(self, camera_ray_bundle: RayBundle, cam_msg: CameraMessage) -> Dict[str, Any]:
+        """Renders the outputs of the camera ray bundle, tile by tile for progressive high resolution renders.
+
+        Args:
+            camera_ray_bundle: the ray bundle of the whole image
+            cam_msg: the camera message being rendered
+        """
+        self.send_time = 0.0
+        model = self.viewer.get_model()
+        if self.state != "high" or not self.viewer.config.progressive_render:
+            return model.get_outputs_for_camera_ray_bundle(camera_ray_bundle)
+
+        image_height, image_width = camera_ray_bundle.shape
+        # tiles are bands of rows, about one chunk of rays each
+        rows_per_tile = max(1, model.config.eval_num_rays_per_chunk // image_width)
+        outputs: Dict[str, Any] = {}
+        last_update = time.time()
+        for start in range(0, image_height, rows_per_tile):
+            tile_outputs = model.get_outputs_for_camera_ray_bundle(camera_ray_bundle[start : start + rows_per_tile])
+            if not outputs:
+                outputs = {
+                    name: self._get_progressive_base(name, output, image_height, image_width, cam_msg)
+                    for name, output in tile_outputs.items()
+                }
+            for name, output in tile_outputs.items():
+                outputs[name][start : start + rows_per_tile] = output
+            if start + rows_per_tile < image_height and (
+                time.time() - last_update > self.viewer.config.progressive_update_interval
+            ):
+                send_start = time.time()
+                self._send_output_to_viewer(outputs, cam_msg, complete=False)
+                last_update = time.time()
+                self.send_time += last_update - send_start
+        return outputs
+
+    def _get_progressive_base(
+        self, name: str, tile_output: torch.Tensor, image_height: int, image_width: int, cam_msg: CameraMessage
+    ) -> torch.Tensor:
+        """Returns the full resolution image that the tiles of an output are written into. It starts as the last
+        outputs upsampled, when they are a render of the same camera, and as zeros otherwise.
+        """
+        base = tile_output.new_zeros((image_height, image_width, tile_output.shape[-1]))
+        last_output = None if self.last_outputs is None else self.last_outputs.get(name)
+        if cam_msg is self.last_cam_msg and last_output is not None and last_output.shape[-1] == base.shape[-1]:
+            upsampled = F.interpolate(
+                last_output.permute(2, 0, 1)[None].float(), size=(image_height, image_width), mode="nearest"
+            )
+            base[:] = upsampled[0].permute(1, 2, 0).to(base)
+        return base
+
+    def _get_render_cache_key(self, camera: Cameras) -> Hashable:
+        """Returns the key of a render in the render cache: everything but the display settings that changes the
+        outputs of the model.
+
+        Args:
+            camera: the camera being rendered
+        """
+        control_panel = self.viewer.control_panel
+        crop = None
+        if control_panel.crop_viewport:
+            background_color = control_panel.background_color
+            crop = (
+                tuple(control_panel.crop_min),
+                tuple(control_panel.crop_max),
+                None if background_color is None else tuple(background_color),
+            )
+        return self.render_cache.get_key(camera, self.viewer.step, crop)
+
     def run(self):
         """Main loop for the render thread"""
         while True:
             self.render_trigger.wait()
             self.render_trigger.clear()
+            # a cancellation requested before this point was for a render that has already finished
+            self.cancellation_token.reset()
             action = self.next_action
-            assert action is not None, "Action should never be None at this point"
             self.next_action = None
-            if self.state == "high" and action.action == "static":
-                # if we are in high res and we get a static action, we don't need to do anything
+            redisplay = self.redisplay_pending
+            self.redisplay_pending = False
+            if action is None or (self.state == "high" and action.action == "static"):
+                # if we are in high res and we get a static action, we don't need to render, only to apply the
+                # display settings that changed
+                if redisplay and self.last_outputs is not None:
+                    self._send_output_to_viewer(self.last_outputs, self.last_cam_msg)
                 continue
             self.state = self.transitions[self.state][action.action]
             try:
-                with viewer_utils.SetTrace(self.check_interrupt):
+                with cancellation_context(self.cancellation_token):
                     outputs = self._render_img(action.cam_msg)
-            except viewer_utils.IOChangeException:
+            except CancelledException:
                 # if we got interrupted, don't send the output to the viewer
                 continue
-            self._send_output_to_viewer(outputs)
+            self._send_output_to_viewer(outputs, action.cam_msg)
             # if we rendered a static low res, we need to self-trigger a static high-res
             if self.state == "low_static":
                 self.action(RenderAction("static", action.cam_msg))
 
-    def check_interrupt(self, frame, event, arg):
-        """Raises interrupt when flag has been set and not already on lowest resolution.
-        Used in conjunction with SetTrace.
-        """
-        if event == "line":
-            if self.interrupt_render_flag:
-                self.interrupt_render_flag = False
-                raise viewer_utils.IOChangeException
-        return self.check_interrupt
-
-    def _send_output_to_viewer(self, outputs: Dict[str, Any]):
+    def _send_output_to_viewer(
+        self, outputs: Dict[str, Any], cam_msg: Optional[CameraMessage] = None, complete: bool = True
+    ):
         """Chooses the correct output and sends it to the viewer
 
         Args:
             outputs: the dictionary of outputs to choose from, from the model
+            cam_msg: the camera message the outputs were rendered for
+            complete: False for the partial frames of progressive renders, which are not displayed again on redisplay
         """
+        if complete:
+            self.last_outputs = outputs
+            self.last_cam_msg = cam_msg
         output_keys = set(outputs.keys())
         if self.output_keys != output_keys:
             self.output_keys = output_keys
@@ -234,6 +340,13 @@ class RenderStateMachine(threading.Thread):
             quality=self.viewer.config.jpeg_quality,
         )
 
+    def _get_resolution_key(self) -> Hashable:
+        """Returns the key of the latency model of the resolution controller: the output mode and crop state, which
+        render at different speeds.
+        """
+        control_panel = self.viewer.control_panel
+        return control_panel.output_render, control_panel.crop_viewport
+
     def _calculate_image_res(self, aspect_ratio: float) -> Tuple[int, int]:
         """Calculate the maximum image height that can be rendered in the time budget
 
@@ -254,19 +367,9 @@ class RenderStateMachine(threading.Thread):
                 image_width = max_res
                 image_height = int(image_width / aspect_ratio)
         elif self.state in ("low_move", "low_static"):
-            if writer.is_initialized() and EventName.VIS_RAYS_PER_SEC.value in GLOBAL_BUFFER["events"]:
-                vis_rays_per_sec = GLOBAL_BUFFER["events"][EventName.VIS_RAYS_PER_SEC.value]["avg"]
-            else:
-                vis_rays_per_sec = 100000
-            target_fps = self.target_fps
-            num_vis_rays = vis_rays_per_sec / target_fps
-            image_height = (num_vis_rays / aspect_ratio) ** 0.5
-            image_height = int(round(image_height, -1))
-            image_height = max(min(max_res, image_height), 30)
-            image_width = int(image_height * aspect_ratio)
-            if image_width > max_res:
-                image_width = max_res
-                image_height = int(image_width / aspect_ratio)
+            image_height, image_width = self.resolution_controller.get_image_res(
+                self._get_resolution_key(), aspect_ratio, max_res
+            )
         else:
             raise ValueError(f"Invalid state: {self.state}")
 
@@ -140,6 +140,7 @@ class ViewerState:
             self._crop_params_update,
             self._output_type_change,
             self._output_split_type_change,
+            self._redisplay,
         )
 
         def nested_folder_install(folder_labels: List[str], element: ViewerElement):
@@ -147,7 +148,7 @@ class ViewerState:
                 element.install(self.viser_server)
                 # also rewire the hook to rerender
                 prev_cb = element.cb_hook
-                element.cb_hook = lambda element: [prev_cb(element), self._interrupt_render(element)]
+                element.cb_hook = lambda element: [prev_cb(element), self._viewer_element_change(element)]
             else:
                 with self.viser_server.gui_folder(folder_labels[0]):
                     nested_folder_install(folder_labels[1:], element)
@@ -187,6 +188,16 @@ class ViewerState:
         if self.camera_message is not None:
             self.render_statemachine.action(RenderAction("rerender", self.camera_message))
 
+    def _viewer_element_change(self, element) -> None:
+        """Rerender after a change of a viewer element of the trainer or pipeline, which may change the model."""
+        self.render_statemachine.render_cache.clear()
+        self._interrupt_render(element)
+
+    def _redisplay(self, _) -> None:
+        """Display the last rendered outputs again, eg. with another colormap."""
+        if self.camera_message is not None:
+            self.render_statemachine.action(RenderAction("redisplay", self.camera_message))
+
     def _crop_params_update(self, _) -> None:
         """Update crop parameters"""
         crop_min = torch.tensor(self.control_panel.crop_min, dtype=torch.float32)
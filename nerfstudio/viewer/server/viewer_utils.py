@@ -19,13 +19,17 @@ from __future__ import annotations
 import os
 import socket
 import sys
+import threading
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Deque, Dict, Hashable, Optional, Tuple
 
 import torch
 
+from nerfstudio.cameras.cameras import Cameras
 from nerfstudio.data.scene_box import SceneBox
 from nerfstudio.models.base_model import Model
+from nerfstudio.utils.cancellation import CancelledException
 from nerfstudio.utils.io import load_from_json
 
 
@@ -49,7 +53,7 @@ def get_viewer_url(websocket_port: int) -> str:
     return f"https://viewer.nerf.studio/versions/{version}/?websocket_url={websocket_url}"
 
 
-class IOChangeException(Exception):
+class IOChangeException(CancelledException):
     """Basic camera exception to interrupt viewer"""
 
 
@@ -128,3 +132,187 @@ def update_render_aabb(
             model.render_aabb = SceneBox(aabb=torch.stack([crop_min_tensor, crop_max_tensor], dim=0))
     else:
         model.render_aabb = None
+
+
+class RenderCache:
+    """Small LRU cache of the raw model outputs of viewer renders, so that display-only changes (colormap, split,
+    output type) and returns to a previous view skip the model. The outputs are kept in host memory, so that the cache
+    doesn't take GPU memory away from training. The render state machines only cache the final high resolution
+    renders, so the low resolution frames rendered while moving are never copied.
+
+    Args:
+        max_size: maximum number of cached renders, 0 disables the cache
+        quantization: step of the quantization of the camera pose and intrinsics in the keys
+    """
+
+    def __init__(self, max_size: int = 8, quantization: float = 1e-4):
+        self.max_size = max_size
+        self.quantization = quantization
+        self.outputs: OrderedDict[Hashable, Dict[str, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_key(self, camera: Cameras, step: int, crop: Optional[Tuple] = None) -> Hashable:
+        """Returns the cache key of a render.
+
+        Args:
+            camera: the camera being rendered, which also defines the resolution
+            step: the training step of the model
+            crop: the crop box and background color if the viewport is cropped
+        """
+        values = [camera.camera_to_worlds, camera.fx, camera.fy, camera.cx, camera.cy]
+        if camera.times is not None:
+            values.append(camera.times)
+        quantized = torch.round(torch.cat([v.flatten().cpu() for v in values]) / self.quantization).long()
+        return (
+            tuple(quantized.tolist()),
+            int(camera.width.flatten()[0]),
+            int(camera.height.flatten()[0]),
+            int(camera.camera_type.flatten()[0]),
+            crop,
+            step,
+        )
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Returns the cached outputs of a render, if any."""
+        with self.lock:
+            outputs = self.outputs.get(key)
+            if outputs is not None:
+                self.outputs.move_to_end(key)
+            return outputs
+
+    def put(self, key: Hashable, outputs: Dict[str, Any]) -> None:
+        """Caches the outputs of a render, evicting the least recently used ones."""
+        if self.max_size <= 0:
+            return
+        outputs = {name: value.cpu() if isinstance(value, torch.Tensor) else value for name, value in outputs.items()}
+        with self.lock:
+            self.outputs[key] = outputs
+            self.outputs.move_to_end(key)
+            while len(self.outputs) > self.max_size:
+                self.outputs.popitem(last=False)
+
+    def clear(self) -> None:
+        """Empties the cache, eg. when a viewer element changes the model."""
+        with self.lock:
+            self.outputs.clear()
+
+
+class ResolutionController:
+    """Chooses the resolution of the viewer renders that fits a frame time budget.
+
+    The frame time is modeled as a fixed overhead plus a time per ray. Both are fitted by least squares on the most
+    recent frames, separately for each output mode and crop state since they render at different speeds. As the fit
+    only uses recent frames, it follows the throughput left by training, instead of the average over the whole session.
+    The time spent waiting for the training step is not part of the frame time: no resolution could make up for it.
+
+    Args:
+        target_fps: number of frames per second to render while moving
+        window_size: number of recent frames the latency model is fitted on
+        max_growth: largest factor by which the number of rays may grow from one frame to the next
+        min_res: smallest image height or width
+        default_rays_per_sec: throughput assumed before the first frame is measured
+        min_render_fraction: fraction of the frame time budget always spent on rays, even when the overhead alone
+            exceeds the budget
+    """
+
+    def __init__(
+        self,
+        target_fps: float = 24.0,
+        window_size: int = 8,
+        max_growth: float = 1.5,
+        min_res: int = 30,
+        default_rays_per_sec: float = 100000.0,
+        min_render_fraction: float = 0.25,
+    ):
+        self.target_fps = target_fps
+        self.window_size = window_size
+        self.max_growth = max_growth
+        self.min_res = min_res
+        self.default_rays_per_sec = default_rays_per_sec
+        self.min_render_fraction = min_render_fraction
+        self.frames: Dict[Hashable, Deque[Tuple[int, float]]] = {}
+        self.last_num_rays: Dict[Hashable, int] = {}
+        self.lock = threading.Lock()
+
+    def update(self, key: Hashable, num_rays: int, frame_time: float) -> None:
+        """Records the time taken by a frame.
+
+        Args:
+            key: the output mode and crop state of the frame
+            num_rays: number of rays of the frame
+            frame_time: time between the start of the frame and its outputs, in seconds, without waiting for the
+                training step
+        """
+        with self.lock:
+            self.frames.setdefault(key, deque(maxlen=self.window_size)).append((num_rays, frame_time))
+
+    def get_latency_model(self, key: Hashable) -> Tuple[float, float]:
+        """Returns the overhead in seconds and the time per ray in seconds of the frames of a key.
+
+        Args:
+            key: the output mode and crop state of the frames
+        """
+        with self.lock:
+            frames = list(self.frames.get(key, ()))
+        if not frames:
+            return 0.0, 1 / self.default_rays_per_sec
+        num_rays = torch.tensor([n for n, _ in frames], dtype=torch.float64)
+        frame_times = torch.tensor([t for _, t in frames], dtype=torch.float64)
+        if len(frames) > 1 and num_rays.var() > 0:
+            time_per_ray = ((num_rays - num_rays.mean()) * (frame_times - frame_times.mean())).sum() / (
+                (num_rays - num_rays.mean()) ** 2
+            ).sum()
+            overhead = frame_times.mean() - time_per_ray * num_rays.mean()
+            if time_per_ray > 0 and overhead >= 0:
+                return float(overhead), float(time_per_ray)
+        # not enough distinct resolutions to separate the overhead, attribute the whole frame time to the rays
+        return 0.0, float(frame_times.sum() / num_rays.sum().clamp(min=1))
+
+    def get_num_rays(self, key: Hashable) -> int:
+        """Returns the number of rays that the latency model predicts to fit in the frame time budget.
+
+        Args:
+            key: the output mode and crop state of the frame
+        """
+        overhead, time_per_ray = self.get_latency_model(key)
+        budget = 1 / self.target_fps
+        num_rays = max(budget - overhead, self.min_render_fraction * budget) / max(time_per_ray, 1e-12)
+        last_num_rays = self.last_num_rays.get(key)
+        if last_num_rays is not None:
+            num_rays = min(num_rays, last_num_rays * self.max_growth)
+        return int(num_rays)
+
+    def get_image_res(self, key: Hashable, aspect_ratio: float, max_res: int) -> Tuple[int, int]:
+        """Returns the image height and width of the next frame.
+
+        Args:
+            key: the output mode and crop state of the frame
+            aspect_ratio: the aspect ratio of the current view
+            max_res: the maximum image height or width
+        """
+        image_height = (self.get_num_rays(key) / aspect_ratio) ** 0.5
+        # round down, so that the frame stays within the budget
+        image_height = int(image_height // 10 * 10)
+        image_height = max(min(max_res, image_height), self.min_res)
+        image_width = int(image_height * aspect_ratio)
+        if image_width > max_res:
+            image_width = max_res
+            image_height = int(image_width / aspect_ratio)
+        self.last_num_rays[key] = image_height * image_width
+        return image_height, image_width
+
+    def get_state(self) -> Dict[str, Dict[str, float]]:
+        """Returns the latency model and the last number of rays of every key, eg. for display or logging."""
+        with self.lock:
+            keys = list(self.frames.keys())
+        state = {}
+        for key in keys:
+            overhead, time_per_ray = self.get_latency_model(key)
+            num_rays = self.last_num_rays.get(key, 0)
+            state[str(key)] = {
+                "rays_per_sec": 1 / max(time_per_ray, 1e-12),
+                "overhead_ms": 1e3 * overhead,
+                "num_rays": float(num_rays),
+                "predicted_frame_time_ms": 1e3 * (overhead + num_rays * time_per_ray),
+            }
+        return state
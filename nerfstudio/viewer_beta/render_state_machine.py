@@ -19,13 +19,15 @@ import contextlib
 import threading
 import time
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Dict, Literal, Optional, Tuple, get_args
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Literal, Optional, Tuple, get_args
 
 import torch
 
+from nerfstudio.cameras.cameras import Cameras
 from nerfstudio.model_components.renderers import background_color_override_context
 from nerfstudio.utils import colormaps, writer
-from nerfstudio.utils.writer import GLOBAL_BUFFER, EventName, TimeWriter
+from nerfstudio.utils.cancellation import CancellationToken, CancelledException, cancellation_context
+from nerfstudio.utils.writer import EventName, TimeWriter
 from nerfstudio.viewer.server import viewer_utils
 from nerfstudio.viewer_beta import utils
 from nerfstudio.viewer_beta.utils import CameraState, get_camera
@@ -74,11 +76,13 @@ class RenderStateMachine(threading.Thread):
         self.next_action: Optional[RenderAction] = None
         self.state: RenderStates = "low_static"
         self.render_trigger = threading.Event()
-        self.target_fps = 24
+        self.target_fps = viewer.config.target_fps
         self.viewer = viewer
-        self.interrupt_render_flag = False
+        self.cancellation_token = CancellationToken()
         self.daemon = True
         self.output_keys = {}
+        self.render_cache = viewer_utils.RenderCache(max_size=viewer.config.render_cache_size)
+        self.resolution_controller = viewer_utils.ResolutionController(target_fps=self.target_fps)
 
     def action(self, action: RenderAction):
         """Takes an action and updates the state machine
@@ -108,7 +112,7 @@ class RenderStateMachine(threading.Thread):
         # handle interrupt logic
         if self.state == "high" and self.next_action.action in ("move", "rerender"):
             print("interrupting render", self.next_action.action)
-            self.interrupt_render_flag = True
+            self.cancellation_token.cancel()
         self.render_trigger.set()
 
     def _render_img(self, camera_state: CameraState):
@@ -131,8 +135,15 @@ class RenderStateMachine(threading.Thread):
         camera = get_camera(camera_state, image_height, image_width)
         camera = camera.to(self.viewer.get_model().device)
         assert camera is not None, "render called before viewer connected"
+        # only the final high resolution renders are cached, low resolution ones are superseded while moving
+        cache_key = self._get_render_cache_key(camera) if self.state == "high" else None
+        outputs = None if cache_key is None else self.render_cache.get(cache_key)
+        if outputs is not None:
+            return outputs
 
         with self.viewer.train_lock if self.viewer.train_lock is not None else contextlib.nullcontext():
+            # the wait for the training step is not part of the frame time, no resolution can make up for it
+            frame_start = time.time()
             camera_ray_bundle = camera.generate_rays(camera_indices=0, aabb_box=self.viewer.get_model().render_aabb)
 
             with TimeWriter(None, None, write=False) as vis_t:
@@ -153,19 +164,42 @@ class RenderStateMachine(threading.Thread):
                     with torch.no_grad():
                         outputs = self.viewer.get_model().get_outputs_for_camera_ray_bundle(camera_ray_bundle)
                 self.viewer.get_model().train()
+        if cache_key is not None:
+            self.render_cache.put(cache_key, outputs)
         num_rays = len(camera_ray_bundle)
         render_time = vis_t.duration
+        self.resolution_controller.update(self._get_resolution_key(), num_rays, time.time() - frame_start)
         if writer.is_initialized():
             writer.put_time(
                 name=EventName.VIS_RAYS_PER_SEC, duration=num_rays / render_time, step=step, avg_over_steps=True
             )
         return outputs
 
+    def _get_render_cache_key(self, camera: Cameras) -> Hashable:
+        """Returns the key of a render in the render cache: everything but the display settings that changes the
+        outputs of the model.
+
+        Args:
+            camera: the camera being rendered
+        """
+        control_panel = self.viewer.control_panel
+        crop = None
+        if control_panel.crop_viewport:
+            background_color = control_panel.background_color
+            crop = (
+                tuple(control_panel.crop_min),
+                tuple(control_panel.crop_max),
+                None if background_color is None else tuple(background_color),
+            )
+        return self.render_cache.get_key(camera, self.viewer.step, crop)
+
     def run(self):
         """Main loop for the render thread"""
         while True:
             self.render_trigger.wait()
             self.render_trigger.clear()
+            # a cancellation requested before this point was for a render that has already finished
+            self.cancellation_token.reset()
             action = self.next_action
             assert action is not None, "Action should never be None at this point"
             self.next_action = None
@@ -174,9 +208,9 @@ class RenderStateMachine(threading.Thread):
                 continue
             self.state = self.transitions[self.state][action.action]
             try:
-                with viewer_utils.SetTrace(self.check_interrupt):
+                with cancellation_context(self.cancellation_token):
                     outputs = self._render_img(action.camera_state)
-            except viewer_utils.IOChangeException:
+            except CancelledException:
                 # if we got interrupted, don't send the output to the viewer
                 continue
             self._send_output_to_viewer(outputs)
@@ -187,16 +221,6 @@ class RenderStateMachine(threading.Thread):
             if self.state in ["low_static", "low_move"]:
                 self.action(RenderAction("static", action.camera_state))
 
-    def check_interrupt(self, frame, event, arg):
-        """Raises interrupt when flag has been set and not already on lowest resolution.
-        Used in conjunction with SetTrace.
-        """
-        if event == "line":
-            if self.interrupt_render_flag:
-                self.interrupt_render_flag = False
-                raise viewer_utils.IOChangeException
-        return self.check_interrupt
-
     def _send_output_to_viewer(self, outputs: Dict[str, Any]):
         """Chooses the correct output and sends it to the viewer
 
@@ -241,6 +265,13 @@ class RenderStateMachine(threading.Thread):
             jpeg_quality=self.viewer.config.jpeg_quality,
         )
 
+    def _get_resolution_key(self) -> Hashable:
+        """Returns the key of the latency model of the resolution controller: the output mode and crop state, which
+        render at different speeds.
+        """
+        control_panel = self.viewer.control_panel
+        return control_panel.output_render, control_panel.crop_viewport
+
     def _calculate_image_res(self, aspect_ratio: float) -> Tuple[int, int]:
         """Calculate the maximum image height that can be rendered in the time budget
 
@@ -259,19 +290,9 @@ class RenderStateMachine(threading.Thread):
                 image_width = max_res
                 image_height = int(image_width / aspect_ratio)
         elif self.state in ("low_move", "low_static"):
-            if writer.is_initialized() and EventName.VIS_RAYS_PER_SEC.value in GLOBAL_BUFFER["events"]:
-                vis_rays_per_sec = GLOBAL_BUFFER["events"][EventName.VIS_RAYS_PER_SEC.value]["avg"]
-            else:
-                vis_rays_per_sec = 100000
-            target_fps = self.target_fps
-            num_vis_rays = vis_rays_per_sec / target_fps
-            image_height = (num_vis_rays / aspect_ratio) ** 0.5
-            image_height = int(round(image_height, -1))
-            image_height = max(min(max_res, image_height), 30)
-            image_width = int(image_height * aspect_ratio)
-            if image_width > max_res:
-                image_width = max_res
-                image_height = int(image_width / aspect_ratio)
+            image_height, image_width = self.resolution_controller.get_image_res(
+                self._get_resolution_key(), aspect_ratio, max_res
+            )
         else:
             raise ValueError(f"Invalid state: {self.state}")
 
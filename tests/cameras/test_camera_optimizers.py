@@ -0,0 +1,81 @@
+"""
+Test the pose correction of the camera optimizer
+"""
+import pytest
+import torch
+
+from nerfstudio.cameras.camera_optimizers import CameraOptimizerConfig
+from nerfstudio.cameras.cameras import Cameras, CameraType
+from nerfstudio.cameras.lie_groups import exp_map_SO3xR3
+from nerfstudio.model_components.ray_generators import RayGenerator
+from nerfstudio.utils import poses as pose_utils
+
+
+def _cameras(num_cameras: int) -> Cameras:
+    camera_to_worlds = torch.eye(4)[None, :3, :].repeat(num_cameras, 1, 1)
+    camera_to_worlds[:, :, 3] = torch.randn((num_cameras, 3))
+    return Cameras(camera_to_worlds=camera_to_worlds, fx=10.0, fy=12.0, cx=8.0, cy=6.0, width=16, height=12)
+
+
+def test_pose_correction_per_camera():
+    """The correction of each index matches the correction computed per index, skipping non-trainable cameras"""
+    config = CameraOptimizerConfig(mode="SO3xR3", position_noise_std=0.1, orientation_noise_std=0.1)
+    optimizer = config.setup(num_cameras=5, device="cpu", non_trainable_camera_indices=torch.tensor([3]))
+    with torch.no_grad():
+        optimizer.pose_adjustment.normal_()
+    indices = torch.tensor([4, 0, 4, 3, 0, 1])
+
+    expected = pose_utils.multiply(exp_map_SO3xR3(optimizer.pose_adjustment[indices]), optimizer.pose_noise[indices])
+    expected[3] = optimizer.pose_noise[3]
+    assert torch.allclose(optimizer(indices), expected, atol=1e-6)
+
+
+@pytest.mark.parametrize("per_ray_pose_correction", [False, True])
+def test_ray_generator_pose_correction(per_ray_pose_correction: bool):
+    """Rays generated from the corrected cameras match the rays of the per ray correction"""
+    cameras = _cameras(4)
+    optimizer = CameraOptimizerConfig(mode="SE3").setup(num_cameras=4, device="cpu")
+    with torch.no_grad():
+        optimizer.pose_adjustment.normal_(std=0.1)
+    ray_generator = RayGenerator(cameras, optimizer)
+    assert not ray_generator.per_ray_pose_correction
+    ray_generator.per_ray_pose_correction = per_ray_pose_correction
+    ray_indices = torch.stack(
+        [torch.randint(0, 4, (64,)), torch.randint(0, 12, (64,)), torch.randint(0, 16, (64,))], dim=-1
+    )
+
+    ray_bundle = ray_generator(ray_indices)
+    expected = cameras.generate_rays(
+        camera_indices=ray_indices[:, :1],
+        coords=ray_generator.image_coords[ray_indices[:, 1], ray_indices[:, 2]],
+        camera_opt_to_camera=optimizer(ray_indices[:, 0]),
+    )
+    assert torch.equal(ray_bundle.camera_indices, ray_indices[:, :1])
+    assert torch.allclose(ray_bundle.origins, expected.origins, atol=1e-6)
+    assert torch.allclose(ray_bundle.directions, expected.directions, atol=1e-6)
+    assert torch.allclose(ray_bundle.pixel_area, expected.pixel_area, atol=1e-6)
+
+
+def test_ray_generator_per_ray_pose_correction():
+    """Cameras whose ray origins are overwritten per ray keep the per ray pose correction"""
+    optimizer = CameraOptimizerConfig(mode="SE3").setup(num_cameras=2, device="cpu")
+    for camera_type in (CameraType.OMNIDIRECTIONALSTEREO_L, CameraType.VR180_R):
+        cameras = _cameras(2)
+        cameras.camera_type[1] = camera_type.value
+        assert RayGenerator(cameras, optimizer).per_ray_pose_correction
+
+
+def test_single_camera_pose_correction():
+    """A full image composes the broadcasted correction once, with the same rays as a per pixel correction"""
+    cameras = _cameras(3)
+    camera_opt_to_camera = exp_map_SO3xR3(torch.randn((1, 6)) * 0.1)[0]
+
+    ray_bundle = cameras.generate_rays(camera_indices=1, camera_opt_to_camera=camera_opt_to_camera)
+    expected = cameras.generate_rays(
+        camera_indices=torch.ones((12, 16, 1), dtype=torch.long),
+        coords=cameras.get_image_coords(),
+        camera_opt_to_camera=camera_opt_to_camera.repeat(12, 16, 1, 1),
+    )
+    assert ray_bundle.shape == (12, 16)
+    assert torch.allclose(ray_bundle.origins, expected.origins, atol=1e-6)
+    assert torch.allclose(ray_bundle.directions, expected.directions, atol=1e-6)
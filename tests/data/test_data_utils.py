@@ -0,0 +1,74 @@
+"""
+Test image decoding backends
+"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from nerfstudio.data.utils.data_utils import get_image_from_path, get_image_mask_tensor_from_path
+
+
+@pytest.mark.parametrize("decoder", ["pil", "pil-draft", "opencv"])
+@pytest.mark.parametrize("scale_factor", [1.0, 0.5, 0.3])
+def test_image_decoders_match_pil(tmp_path: Path, decoder, scale_factor):
+    """Every decoder should produce the same shape and approximately the same pixels as PIL"""
+    # Smooth image so that JPEG and reduced-resolution decoding stay close to the reference.
+    y, x = np.meshgrid(np.linspace(0, 1, 104), np.linspace(0, 1, 136), indexing="ij")
+    image = (255 * np.stack([x, y, 0.5 + 0.5 * np.sin(6 * x * y)], axis=-1)).astype(np.uint8)
+    # a phone JPEG rotated by its EXIF orientation, which no decoder applies
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    for name, save_kwargs in [("image.png", {}), ("image.jpg", {}), ("rotated.jpg", {"exif": exif})]:
+        path = tmp_path / name
+        Image.fromarray(image).save(path, quality=95, **save_kwargs)
+        reference = get_image_from_path(path, scale_factor=scale_factor, decoder="pil")
+        decoded = get_image_from_path(path, scale_factor=scale_factor, decoder=decoder)
+        assert decoded.dtype == torch.uint8
+        assert decoded.shape == reference.shape == (int(104 * scale_factor), int(136 * scale_factor), 3)
+        assert (decoded.float() - reference.float()).abs().mean() < 2
+
+        out = torch.empty_like(reference)
+        assert get_image_from_path(path, scale_factor=scale_factor, decoder=decoder, out=out) is out
+        assert torch.equal(out, decoded)
+
+
+@pytest.mark.parametrize("decoder", ["pil", "opencv"])
+def test_grayscale_decoding_into_out(tmp_path: Path, decoder):
+    """Single channel images are resized straight into the preallocated output"""
+    image = np.arange(64 * 48, dtype=np.uint8).reshape(64, 48)
+    path = tmp_path / "gray.png"
+    Image.fromarray(image).save(path)
+    reference = get_image_from_path(path, scale_factor=0.5, decoder=decoder, nearest=True)
+    out = torch.empty((32, 24), dtype=torch.uint8)
+    assert get_image_from_path(path, scale_factor=0.5, decoder=decoder, nearest=True, out=out) is out
+    assert torch.equal(out, reference)
+    with pytest.raises(ValueError):
+        get_image_from_path(path, decoder=decoder, out=torch.empty((64, 48)))
+
+
+def test_mask_decoding_is_exact(tmp_path: Path):
+    """Masks must never be blurred by reduced-resolution decoding"""
+    mask = np.zeros((64, 48), dtype=np.uint8)
+    mask[10:40, 5:30] = 255
+    path = tmp_path / "mask.png"
+    Image.fromarray(mask).save(path)
+    decoded = get_image_mask_tensor_from_path(path, scale_factor=0.5)
+    assert decoded.shape == (32, 24, 1)
+    assert decoded.dtype == torch.bool
+    expected = torch.zeros((32, 24, 1), dtype=torch.bool)
+    expected[5:20, 2:15] = True
+    assert torch.equal(decoded, expected)
+
+
+def test_palette_mask_keeps_indices(tmp_path: Path):
+    """Palette PNG masks are read as indices, not as the colors of their palette"""
+    mask = Image.fromarray(np.array([[0, 1], [1, 0]], dtype=np.uint8), mode="P")
+    # index 1 is black, so reading the palette colors would invert the mask
+    mask.putpalette([255, 255, 255, 0, 0, 0])
+    path = tmp_path / "mask.png"
+    mask.save(path)
+    decoded = get_image_mask_tensor_from_path(path)
+    assert torch.equal(decoded[..., 0], torch.tensor([[False, True], [True, False]]))
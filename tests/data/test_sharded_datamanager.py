@@ -0,0 +1,77 @@
+"""
+Test the sharding of the training images over distributed processes
+"""
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import torch
+from PIL import Image
+
+from nerfstudio.cameras.cameras import Cameras
+from nerfstudio.configs.base_config import InstantiateConfig
+from nerfstudio.data.datamanagers.base_datamanager import DataparserOutputs, VanillaDataManagerConfig
+from nerfstudio.engine.trainer import TrainerConfig
+from nerfstudio.scripts.train import launch
+
+NUM_IMAGES = 8
+
+
+class ImageFolderDataParser:
+    """Dataparser returning the images of a folder, with identity cameras"""
+
+    def __init__(self, config, *args, **kwargs):
+        self.data = config.data
+
+    def __getattr__(self, __name: str) -> Any:
+        if __name.startswith("_"):
+            return object.__getattribute__(self, __name)
+        return None
+
+    def get_dataparser_outputs(self, *args, **kwargs):
+        image_filenames = sorted(self.data.glob("*.png"))
+        num_images = len(image_filenames)
+        camera_to_worlds = torch.eye(4)[None, :3].repeat(num_images, 1, 1)
+        cameras = Cameras(camera_to_worlds, fx=8.0, fy=8.0, cx=4.0, cy=4.0, width=8, height=8)
+        return DataparserOutputs(image_filenames, cameras)
+
+
+def _record_cached_images(local_rank: int, world_size: int, config: TrainerConfig, global_rank: int = 0):
+    """Writes the images cached by each process"""
+    datamanager = config.pipeline.datamanager.setup(device="cpu", world_size=world_size, local_rank=local_rank)
+    batch = next(datamanager.iter_train_image_dataloader)
+    record = {"shard": datamanager.get_train_image_indices(), "cached": batch["image_idx"].tolist()}
+    (config.output_dir / f"rank_{global_rank}.json").write_text(json.dumps(record))
+
+
+def _run(tmp_path: Path, output_dir: Path):
+    config = TrainerConfig(output_dir=output_dir)
+    config.machine.device_type = "cpu"
+    dataparser = InstantiateConfig(_target=ImageFolderDataParser)
+    setattr(dataparser, "data", tmp_path / "images")
+    config.pipeline.datamanager = VanillaDataManagerConfig(
+        dataparser=dataparser,  # type: ignore
+        shard_train_images=True,
+        train_cache_budget_gb=2.5e-6,
+        train_num_times_to_repeat_images=10,
+        sampling_seed=0,
+    )
+    output_dir.mkdir()
+    launch(_record_cached_images, num_devices_per_machine=2, config=config, device_type="cpu")
+    return [json.loads((output_dir / f"rank_{rank}.json").read_text()) for rank in range(2)]
+
+
+def test_sharded_training_images(tmp_path: Path):
+    """Each process caches a disjoint shard of the images within its budget, the same way on every run"""
+    (tmp_path / "images").mkdir()
+    for i in range(NUM_IMAGES):
+        Image.fromarray(np.full((8, 8, 3), i, dtype=np.uint8)).save(tmp_path / "images" / f"{i}.png")
+
+    records = _run(tmp_path, tmp_path / "run_0")
+    assert records[0]["shard"] == [0, 2, 4, 6] and records[1]["shard"] == [1, 3, 5, 7]
+    for record in records:
+        # 8x8 images take 1024 bytes with 4 channels, so 2 fit in the budget
+        assert len(record["cached"]) == 2
+        assert set(record["cached"]) <= set(record["shard"])
+    assert _run(tmp_path, tmp_path / "run_1") == records
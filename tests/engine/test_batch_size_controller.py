@@ -0,0 +1,58 @@
+"""
+Test the adaptive number of rays per batch
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import torch
+
+from nerfstudio.data.datamanagers.base_datamanager import VanillaDataManagerConfig
+from nerfstudio.data.pixel_samplers import PixelSamplerConfig
+from nerfstudio.engine.batch_size_controller import BatchSizeControllerConfig
+from nerfstudio.models.base_model import ModelConfig
+from nerfstudio.pipelines.base_pipeline import VanillaPipeline
+from nerfstudio.utils import writer
+
+
+def _mocked_pipeline(num_rays_per_batch: int, eval_num_rays_per_chunk: int):
+    datamanager = SimpleNamespace(
+        config=VanillaDataManagerConfig(train_num_rays_per_batch=num_rays_per_batch),
+        train_pixel_sampler=PixelSamplerConfig().setup(num_rays_per_batch=num_rays_per_batch),
+    )
+    datamanager.get_train_rays_per_batch = lambda: datamanager.config.train_num_rays_per_batch
+    model = SimpleNamespace(config=ModelConfig(eval_num_rays_per_chunk=eval_num_rays_per_chunk))
+    pipeline = MagicMock(spec=VanillaPipeline)
+    pipeline.datamanager = datamanager
+    pipeline.model = model
+    return pipeline
+
+
+def test_batch_size_controller():
+    """The number of rays follows the tightest budget, within the change factor and the bounds"""
+    pipeline = _mocked_pipeline(num_rays_per_batch=1024, eval_num_rays_per_chunk=4096)
+    config = BatchSizeControllerConfig(
+        target_step_time=0.1, target_num_samples=1 << 16, steps_per_update=3, max_num_rays_per_batch=3000
+    )
+    controller = config.setup(pipeline=pipeline, device="cpu")
+
+    def run_window(step_time: float, num_samples: int):
+        for _ in range(3):
+            controller.update(0, step_time, {"num_samples_per_batch": torch.tensor(num_samples)})
+
+    # Steps are 4x faster than the target, but the samples only allow 1.5x more rays.
+    run_window(0.025, (1 << 16) * 2 // 3)
+    assert controller.num_rays_per_batch == 1536
+    assert pipeline.datamanager.train_pixel_sampler.num_rays_per_batch == 1536
+    assert pipeline.datamanager.get_train_rays_per_batch() == 1536
+    assert pipeline.model.config.eval_num_rays_per_chunk == 6144
+
+    # Growth is limited to a factor of 2 per decision, and to the upper bound.
+    run_window(0.001, 1)
+    assert controller.num_rays_per_batch == 3000
+
+    # Within the tolerance of the budget, nothing changes.
+    run_window(0.105, 1)
+    assert controller.num_rays_per_batch == 3000
+    run_window(0.2, 1)
+    assert controller.num_rays_per_batch == 1500
+    writer.EVENT_STORAGE.clear()
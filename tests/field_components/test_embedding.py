@@ -1,6 +1,8 @@
 """
 Embedding tests
 """
+import torch
+
 from nerfstudio.field_components.embedding import Embedding
 
 
@@ -12,3 +14,14 @@ def test_indexing():
     embedding = Embedding(in_dim, out_dim)
     assert embedding
     # TODO
+
+
+def test_mean_cache():
+    """The mean embedding is only cached outside of autograd, until the weights are updated"""
+    embedding = Embedding(10, 4)
+    with torch.no_grad():
+        mean = embedding.mean(dim=0)
+        assert embedding.mean(dim=0) is mean
+        embedding.embedding.weight.add_(1.0)
+        assert torch.allclose(embedding.mean(dim=0), mean + 1.0)
+    assert embedding.mean(dim=0).requires_grad
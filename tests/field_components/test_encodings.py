@@ -121,6 +121,27 @@ def test_tensor_cp_encoder():
     encoder.upsample_grid(resolution=64)
 
 
+@pytest.mark.parametrize(
+    "encoding", [encodings.TensorVMEncoding, encodings.TensorCPEncoding, encodings.TriplaneEncoding]
+)
+def test_tensor_grid_shrinking(encoding):
+    """Shrunk grids give the features of the sub box they were cropped to"""
+    encoder = encoding(resolution=16, num_components=4)
+    with torch.no_grad():
+        # features linear along the grids are resampled exactly
+        for coef in encoder.parameters():
+            ramps = torch.meshgrid(*[torch.linspace(0.0, 1.0, size) for size in coef.shape[-2:]], indexing="ij")
+            slopes = torch.rand((2,) + coef.shape[:2] + (1, 1))
+            coef.copy_(slopes[0] * ramps[0] + slopes[1] * ramps[1])
+    bounds = torch.tensor([[-0.5, -0.2, 0.1], [0.3, 0.9, 0.7]])
+    positions = torch.rand((100, 3)) * (bounds[1] - bounds[0]) + bounds[0]
+    expected = encoder(positions)
+
+    encoder.shrink_grid(bounds, resolution=8)
+    assert encoder.resolution == 8
+    assert torch.allclose(encoder((positions - bounds[0]) / (bounds[1] - bounds[0]) * 2 - 1), expected, atol=1e-5)
+
+
 def test_tensor_sh_encoder():
     """Test Spherical Harmonic encoder"""
 
@@ -168,6 +189,41 @@ def test_tensor_hash_encoder():
     assert encoded_tcnn.shape == (10, out_dim)
 
 
+def test_hash_encoder_mixed_precision():
+    """Inference under autocast looks the features up in a cached reduced precision copy of the hash table"""
+    encoder = encodings.HashEncoding(num_levels=4, log2_hashmap_size=5, implementation="torch")
+    in_tensor = torch.rand((10, 3))
+    encoded = encoder(in_tensor)
+    with torch.no_grad(), torch.autocast("cpu", dtype=torch.bfloat16):
+        encoded_mixed = encoder(in_tensor)
+        hash_table = encoder.get_hash_table()
+        assert hash_table.dtype == torch.bfloat16 and encoder.get_hash_table() is hash_table
+    assert encoded_mixed.dtype == torch.float32
+    assert torch.allclose(encoded_mixed, encoded, atol=1e-4)
+
+    with torch.no_grad():
+        encoder.hash_table.add_(1.0)
+    with torch.no_grad(), torch.autocast("cpu", dtype=torch.bfloat16):
+        assert encoder.get_hash_table() is not hash_table
+    with torch.autocast("cpu", dtype=torch.bfloat16):
+        assert encoder.get_hash_table() is encoder.hash_table
+
+
+def test_hash_encoder_reduced_precision_storage():
+    """The hash table can be stored in reduced precision for inference, without a float32 copy"""
+    encoder = encodings.HashEncoding(num_levels=4, log2_hashmap_size=5, implementation="torch")
+    in_tensor = torch.rand((10, 3))
+    encoded = encoder(in_tensor)
+    encoder.store_reduced_precision(torch.bfloat16)
+    assert encoder.hash_table.dtype == torch.bfloat16 and not encoder.hash_table.requires_grad
+    assert [param.dtype for param in encoder.parameters()] == [torch.bfloat16]
+    with torch.autocast("cpu", dtype=torch.bfloat16):
+        assert encoder.get_hash_table() is encoder.hash_table
+    encoded_reduced = encoder(in_tensor)
+    assert encoded_reduced.dtype == torch.float32
+    assert torch.allclose(encoded_reduced, encoded, atol=1e-4)
+
+
 def test_kplane_encoder():
     """Test K-Planes encoder"""
 
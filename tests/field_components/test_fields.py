@@ -4,7 +4,11 @@ Test the fields
 import torch
 
 from nerfstudio.cameras.rays import Frustums, RaySamples
+from nerfstudio.field_components.encodings import Identity, TensorVMEncoding
+from nerfstudio.field_components.field_heads import FieldHeadNames
+from nerfstudio.fields.base_field import compute_per_ray
 from nerfstudio.fields.nerfacto_field import NerfactoField
+from nerfstudio.fields.tensorf_field import TensoRFField
 
 
 def test_nerfacto_field():
@@ -45,5 +49,130 @@ def test_nerfacto_field():
     field.forward(ray_samples)
 
 
+def test_nerfacto_field_culled_outputs():
+    """The heads only run on the samples above the weight threshold, with the outputs of forward"""
+    aabb = torch.tensor([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]])
+    field = NerfactoField(aabb, num_images=2, use_semantics=True, num_semantic_classes=4, implementation="torch")
+    field.eval()
+    num_rays, num_samples = 8, 32
+    # rays leave the scene box half way, the samples outside of it have a zero density
+    bins = torch.linspace(0.0, 4.0, num_samples + 1)[None, :, None].expand(num_rays, -1, -1)
+    origins = torch.tensor([-1.0, 0.0, 0.0]).expand(num_rays, num_samples, 3)
+    directions = torch.nn.functional.normalize(torch.tensor([1.0, 0.1, 0.0]), dim=-1).expand(num_rays, num_samples, 3)
+    ray_samples = RaySamples(
+        frustums=Frustums(
+            origins=origins,
+            directions=directions,
+            starts=bins[:, :-1],
+            ends=bins[:, 1:],
+            pixel_area=torch.ones((num_rays, num_samples, 1)),
+        ),
+        camera_indices=torch.ones((num_rays, num_samples, 1), dtype=torch.int32),
+        deltas=bins[:, 1:] - bins[:, :-1],
+    )
+    with torch.no_grad():
+        field_outputs = field.forward(ray_samples)
+        culled_outputs = field.get_culled_outputs(ray_samples, weight_threshold=0.0)
+    weights = ray_samples.get_weights(field_outputs[FieldHeadNames.DENSITY])
+    kept = weights[..., 0] > 0
+    assert 0 < kept.sum() < num_rays * num_samples
+
+    assert torch.equal(culled_outputs[FieldHeadNames.DENSITY], field_outputs[FieldHeadNames.DENSITY])
+    for name in [FieldHeadNames.RGB, FieldHeadNames.SEMANTICS]:
+        assert torch.allclose(culled_outputs[name][kept], field_outputs[name][kept], atol=1e-6)
+        assert torch.all(culled_outputs[name][~kept] == 0)
+    rgb = (weights * field_outputs[FieldHeadNames.RGB]).sum(dim=-2)
+    culled_rgb = (weights * culled_outputs[FieldHeadNames.RGB]).sum(dim=-2)
+    assert torch.allclose(culled_rgb, rgb, atol=1e-6)
+
+
+def test_per_ray_features():
+    """Values broadcast along the samples are only processed once per ray, with the same outputs per sample"""
+    num_rays, num_samples = 16, 8
+    num_processed = []
+
+    def encoding(values):
+        num_processed.append(len(values))
+        return torch.cat([values.sin(), values.cos()], dim=-1)
+
+    directions = torch.nn.functional.normalize(torch.randn((num_rays, 1, 3)), dim=-1).expand(-1, num_samples, -1)
+    encoded = compute_per_ray(directions, encoding)
+    assert num_processed == [num_rays]
+    assert encoded.shape == (num_rays, num_samples, 6)
+    assert torch.equal(encoded, compute_per_ray(directions.contiguous(), encoding))
+    assert num_processed[-1] == num_rays * num_samples
+
+    aabb = torch.tensor([[-1.0, -1.0, -1.0], [1.0, 1.0, 1.0]])
+    field = NerfactoField(aabb, num_images=2, implementation="torch", use_transient_embedding=True)
+    bins = torch.linspace(0.0, 1.0, num_samples + 1)[None, :, None].expand(num_rays, -1, -1)
+    ray_samples = RaySamples(
+        frustums=Frustums(
+            origins=torch.zeros((num_rays, 1, 3)),
+            directions=directions[:, :1],
+            starts=bins[:, :-1],
+            ends=bins[:, 1:],
+            pixel_area=torch.ones((num_rays, 1, 1)),
+        ),
+        camera_indices=torch.randint(0, 2, (num_rays, 1, 1)),
+    )
+    for training in [True, False]:
+        field.train(training)
+        with torch.no_grad():
+            field_outputs = field.forward(ray_samples)
+            packed_outputs = field.forward(ray_samples[torch.ones(ray_samples.shape, dtype=torch.bool)])
+        assert torch.allclose(field_outputs[FieldHeadNames.RGB].view(-1, 3), packed_outputs[FieldHeadNames.RGB])
+        if training:
+            transient_rgb = field_outputs[FieldHeadNames.TRANSIENT_RGB].view(-1, 3)
+            assert torch.allclose(transient_rgb, packed_outputs[FieldHeadNames.TRANSIENT_RGB])
+
+
+def test_tensorf_alpha_mask():
+    """Samples in empty voxels are skipped, and the grids shrink to the occupied box with the same densities"""
+
+    def tensorf_field():
+        aabb = torch.tensor([[-2.0, -2.0, -2.0], [2.0, 2.0, 2.0]])
+        return TensoRFField(
+            aabb,
+            feature_encoding=Identity(in_dim=27),
+            density_encoding=TensorVMEncoding(resolution=32),
+            color_encoding=TensorVMEncoding(resolution=32),
+            appearance_dim=27,
+        )
+
+    field = tensorf_field()
+    with torch.no_grad():
+        field.density_encoding.plane_coef.zero_()
+        field.density_encoding.line_coef.zero_()
+        field.density_encoding.plane_coef[:, :, 10:20, 12:18] = 1.0
+        field.density_encoding.line_coef[:, :, 11:19] = 1.0
+    positions = torch.rand((64, 16, 3)) * 4 - 2
+    ray_samples = RaySamples(
+        frustums=Frustums(
+            origins=positions,
+            directions=torch.ones_like(positions),
+            starts=torch.zeros_like(positions[..., :1]),
+            ends=torch.zeros_like(positions[..., :1]),
+            pixel_area=torch.ones_like(positions[..., :1]),
+        )
+    )
+    expected = field.get_density(ray_samples)
+
+    field.update_alpha_mask(resolution=32, step_size=4 / 31)
+    assert 0 < field.alpha_mask.sum() < 0.1 * field.alpha_mask.numel()
+    assert torch.allclose(field.get_density(ray_samples), expected, atol=1e-5)
+    assert torch.all(field.get_outputs(ray_samples)[~field.get_occupancy(positions / 2)] == 0)
+
+    bounds = field.get_alpha_mask_bounds()
+    field.shrink(bounds, resolution=64)
+    assert torch.all(field.aabb[1] - field.aabb[0] < 2)
+    # the grids are resampled, which only blurs the edges of the occupied box
+    assert torch.mean(torch.abs(field.get_density(ray_samples) - expected)) < 0.02 * torch.mean(expected)
+
+    reloaded_field = tensorf_field()
+    reloaded_field.load_state_dict(field.state_dict())
+    assert reloaded_field.density_encoding.resolution == 64
+    assert torch.equal(reloaded_field.get_density(ray_samples), field.get_density(ray_samples))
+
+
 if __name__ == "__main__":
     test_nerfacto_field()
@@ -27,5 +27,20 @@ def test_mlp():
     assert y.shape[-1] == out_dim
 
 
+def test_mlp_inference_path():
+    """Outside of autograd, the flattened in place forward matches the autograd forward and keeps the batch shape"""
+    mlp = MLP(in_dim=6, num_layers=4, layer_width=32, out_dim=3, skip_connections=(2,), out_activation=nn.Sigmoid())
+    x = torch.randn((5, 7, 6))
+    y = mlp(x)
+    with torch.no_grad():
+        y_inference = mlp(x)
+    assert y_inference.shape == (5, 7, 3)
+    assert torch.allclose(y_inference, y, atol=1e-6)
+
+    with torch.no_grad(), torch.autocast("cpu", dtype=torch.bfloat16):
+        y_mixed = mlp(x)
+    assert torch.allclose(y_mixed.float(), y, atol=5e-2)
+
+
 if __name__ == "__main__":
     test_mlp()
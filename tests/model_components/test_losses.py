@@ -2,9 +2,22 @@
 Test losses
 """
 
+import pytest
 import torch
 
-from nerfstudio.model_components.losses import tv_loss
+from nerfstudio.cameras.rays import Frustums, RaySamples
+from nerfstudio.model_components.losses import (
+    EPS,
+    GradientLoss,
+    distortion_loss,
+    ds_nerf_depth_loss,
+    interlevel_loss,
+    lossfun_distortion,
+    lossfun_outer,
+    nerfstudio_distortion_loss,
+    tv_loss,
+    urban_radiance_field_depth_loss,
+)
 
 
 def test_tv_loss():
@@ -24,5 +37,127 @@ def test_tv_loss():
     assert tv_loss(grids).item() == 4.0
 
 
+@pytest.mark.parametrize("loss_type", ["ds_nerf", "urf"])
+def test_depth_losses(loss_type):
+    """The depth losses and their gradients match the per sample computation kept in the autograd graph"""
+    num_rays, num_samples = 64, 48
+    weights = torch.rand((num_rays, num_samples, 1)).requires_grad_()
+    predicted_depth = torch.rand((num_rays, 1)).requires_grad_()
+    bins = torch.sort(torch.rand((num_rays, num_samples + 1, 1)) * 4, dim=-2).values
+    steps = (bins[:, 1:] + bins[:, :-1]) / 2
+    lengths = bins[:, 1:] - bins[:, :-1]
+    termination_depth = torch.rand((num_rays, 1)) * 4
+    termination_depth[:8] = 0
+    sigma = torch.tensor([0.2])
+
+    depth_mask = termination_depth > 0
+    if loss_type == "ds_nerf":
+        loss = ds_nerf_depth_loss(weights, termination_depth, steps, lengths, sigma)
+        expected = -torch.log(weights + EPS) * torch.exp(-((steps - termination_depth[:, None]) ** 2) / (2 * sigma))
+        expected = torch.mean((expected * lengths).sum(-2) * depth_mask)
+    else:
+        loss = urban_radiance_field_depth_loss(weights, termination_depth, predicted_depth, steps, sigma)
+        target = torch.distributions.normal.Normal(0.0, sigma / 3.0).log_prob(steps - termination_depth[:, None]).exp()
+        near = (steps <= termination_depth[:, None] + sigma) & (steps >= termination_depth[:, None] - sigma)
+        empty = steps < termination_depth[:, None] - sigma
+        line_of_sight = (near * (weights - target) ** 2).sum(-2) + (empty * weights**2).sum(-2)
+        expected = torch.mean(((termination_depth - predicted_depth) ** 2 + line_of_sight) * depth_mask)
+    inputs = [weights, predicted_depth] if loss_type == "urf" else [weights]
+    grads = torch.autograd.grad(loss, inputs)
+    expected_grads = torch.autograd.grad(expected, inputs)
+    assert torch.allclose(loss, expected)
+    for grad, expected_grad in zip(grads, expected_grads):
+        assert torch.allclose(grad, expected_grad, atol=1e-6)
+
+
+@pytest.mark.parametrize("reduction_type", ["batch", "image"])
+def test_gradient_loss(reduction_type):
+    """The multiscale gradient loss and its gradient match the sum of the single scale losses"""
+    prediction = torch.rand((2, 32, 24)).requires_grad_()
+    target = torch.rand((2, 32, 24))
+    mask = torch.rand((2, 32, 24)) > 0.2
+    loss_fn = GradientLoss(scales=4, reduction_type=reduction_type)
+
+    loss = loss_fn(prediction, target, mask)
+    expected = sum(
+        loss_fn.gradient_loss(prediction[:, ::step, ::step], target[:, ::step, ::step], mask[:, ::step, ::step])
+        for step in (1, 2, 4, 8)
+    )
+    assert isinstance(expected, torch.Tensor)
+    assert torch.allclose(loss, expected)
+    assert torch.allclose(torch.autograd.grad(loss, prediction)[0], torch.autograd.grad(expected, prediction)[0])
+
+
+def _ray_samples(num_rays: int, num_samples: int) -> RaySamples:
+    bins = torch.sort(torch.rand((num_rays, num_samples + 1, 1)), dim=-2).values
+    return RaySamples(
+        frustums=Frustums(
+            origins=torch.zeros((num_rays, num_samples, 3)),
+            directions=torch.ones((num_rays, num_samples, 3)),
+            starts=bins[:, :-1],
+            ends=bins[:, 1:],
+            pixel_area=torch.ones((num_rays, num_samples, 1)),
+        ),
+        spacing_starts=bins[:, :-1],
+        spacing_ends=bins[:, 1:],
+    )
+
+
+def test_distortion_loss():
+    """The prefix sum distortion losses and their gradients match the pairwise computation"""
+    ray_samples = _ray_samples(16, 32)
+    weights = torch.rand((16, 32, 1)).requires_grad_()
+    assert ray_samples.spacing_starts is not None and ray_samples.spacing_ends is not None
+    t = torch.cat([ray_samples.spacing_starts[..., 0], ray_samples.spacing_ends[..., -1:, 0]], dim=-1)
+    w = weights[..., 0]
+    ut = (t[..., 1:] + t[..., :-1]) / 2
+    loss_inter = torch.sum(w * torch.sum(w[..., None, :] * torch.abs(ut[..., :, None] - ut[..., None, :]), dim=-1), -1)
+    expected = loss_inter + torch.sum(w**2 * (t[..., 1:] - t[..., :-1]), dim=-1) / 3
+
+    for loss in (distortion_loss([weights], [ray_samples]), nerfstudio_distortion_loss(ray_samples, weights=weights)):
+        assert torch.allclose(loss.mean(), expected.mean())
+        grad = torch.autograd.grad(loss.mean(), weights)[0]
+        assert torch.allclose(grad, torch.autograd.grad(expected.mean(), weights, retain_graph=True)[0], atol=1e-6)
+
+
+def test_distortion_loss_sample_distance_gradients():
+    """Sample distances that require gradients are differentiated too"""
+    weights = torch.rand((16, 32)).requires_grad_()
+    t = torch.sort(torch.rand((16, 33)), dim=-1)[0].requires_grad_()
+    ut = (t[..., 1:] + t[..., :-1]) / 2
+    pairwise = torch.abs(ut[..., :, None] - ut[..., None, :])
+    loss_inter = torch.sum(weights * torch.sum(weights[..., None, :] * pairwise, dim=-1), -1)
+    expected = loss_inter + torch.sum(weights**2 * (t[..., 1:] - t[..., :-1]), dim=-1) / 3
+
+    loss = lossfun_distortion(t, weights)
+    assert torch.allclose(loss, expected)
+    grads = torch.autograd.grad(loss.mean(), [t, weights])
+    expected_grads = torch.autograd.grad(expected.mean(), [t, weights])
+    for grad, expected_grad in zip(grads, expected_grads):
+        assert torch.allclose(grad, expected_grad, atol=1e-6)
+
+
+def test_interlevel_loss():
+    """The single pass interlevel loss and its gradients match the sum of the losses of each proposal level"""
+    ray_samples_list = [_ray_samples(16, 64), _ray_samples(16, 24), _ray_samples(16, 32)]
+    weights_list = [torch.rand((16, num_samples, 1)).requires_grad_() for num_samples in (64, 24, 32)]
+    sdists = [
+        torch.cat([ray_samples.spacing_starts[..., 0], ray_samples.spacing_ends[..., -1:, 0]], dim=-1)  # type: ignore
+        for ray_samples in ray_samples_list
+    ]
+
+    loss = interlevel_loss(weights_list, ray_samples_list)
+    expected = sum(
+        torch.mean(lossfun_outer(sdists[-1], weights_list[-1][..., 0].detach(), sdist, weights[..., 0]))
+        for sdist, weights in zip(sdists[:-1], weights_list[:-1])
+    )
+    assert isinstance(expected, torch.Tensor)
+    assert torch.allclose(loss, expected)
+    grads = torch.autograd.grad(loss, weights_list[:-1])
+    expected_grads = torch.autograd.grad(expected, weights_list[:-1])
+    for grad, expected_grad in zip(grads, expected_grads):
+        assert torch.allclose(grad, expected_grad, atol=1e-6)
+
+
 if __name__ == "__main__":
     test_tv_loss()
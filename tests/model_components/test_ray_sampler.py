@@ -4,14 +4,19 @@ Test samplers
 
 import torch
 
-from nerfstudio.cameras.rays import RayBundle
+from nerfstudio.cameras.rays import RayBundle, RaySamples
+from nerfstudio.field_components.field_heads import FieldHeadNames
 from nerfstudio.model_components.ray_samplers import (
     LinearDisparitySampler,
     LogSampler,
     PDFSampler,
+    ProposalNetworkSampler,
+    SegmentedRayMarcher,
+    SphereTracingSampler,
     SqrtSampler,
     UniformSampler,
 )
+from nerfstudio.model_components.renderers import RGBRenderer
 from nerfstudio.model_components.scene_colliders import NearFarCollider
 
 
@@ -108,6 +113,132 @@ def test_pdf_sampler():
     # TODO Tancik: Add more precise tests
 
 
+def test_pack_ray_samples():
+    """Only the samples in weighted proposal intervals, and the last sample of each ray, are packed"""
+    origins = torch.zeros((3, 3))
+    ray_bundle = RayBundle(origins=origins, directions=torch.ones_like(origins), pixel_area=torch.ones((3, 1)))
+    ray_bundle = NearFarCollider(near_plane=2, far_plane=4)(ray_bundle)
+    proposal_ray_samples = UniformSampler(num_samples=4, train_stratified=False)(ray_bundle)
+    ray_samples = UniformSampler(num_samples=8, train_stratified=False)(ray_bundle)
+    # the first ray hits a surface in its second interval, the second ray is empty, the third one is all weighted
+    proposal_weights = torch.tensor([[0.0, 0.9, 0.0, 0.0], [0.0, 0.0, 0.0, 0.0], [0.2, 0.2, 0.2, 0.2]])[..., None]
+
+    packed_samples, ray_indices = ProposalNetworkSampler.pack_ray_samples(
+        ray_samples, proposal_ray_samples, proposal_weights, weight_threshold=0.01
+    )
+    assert ray_indices.tolist() == [0, 0, 0, 1] + [2] * 8
+    expected_starts = ray_samples.frustums.starts[[0, 0, 0, 1], [2, 3, 7, 7], 0]
+    assert torch.equal(packed_samples.frustums.starts[:4, 0], expected_starts)
+
+
+def test_segmented_ray_marcher():
+    """Rays stop being queried behind an opaque wall, with a negligible change of the rendered colors"""
+    num_rays = 256
+    origins = torch.zeros((num_rays, 3))
+    directions = torch.nn.functional.normalize(torch.rand((num_rays, 3)) + 0.5, dim=-1)
+    ray_bundle = RayBundle(origins=origins, directions=directions, pixel_area=torch.ones((num_rays, 1)))
+    ray_bundle = NearFarCollider(near_plane=0.5, far_plane=6)(ray_bundle)
+    ray_samples = UniformSampler(num_samples=128, train_stratified=False)(ray_bundle)
+    num_evaluated = []
+
+    def field_fn(samples: RaySamples):
+        # an opaque wall behind a thin fog, with a hole in it
+        num_evaluated.append(samples.shape.numel())
+        positions = samples.frustums.get_positions()
+        density = 0.05 + 20.0 * (positions[..., :1] > 0.8) * (samples.frustums.directions[..., :1] < 0.8)
+        rgb = torch.sigmoid(torch.sin(4 * positions))
+        return {FieldHeadNames.DENSITY: density, FieldHeadNames.RGB: rgb}
+
+    renderer = RGBRenderer(background_color="white")
+    field_outputs = field_fn(ray_samples)
+    weights = ray_samples.get_weights(field_outputs[FieldHeadNames.DENSITY])
+    expected = renderer(rgb=field_outputs[FieldHeadNames.RGB], weights=weights)
+    expected_terminated = renderer(field_outputs[FieldHeadNames.RGB], weights, transmittance_threshold=1e-3)
+
+    num_evaluated.clear()
+    field_outputs = SegmentedRayMarcher(transmittance_threshold=1e-3, segment_size=16)(ray_samples, field_fn)
+    weights = ray_samples.get_weights(field_outputs[FieldHeadNames.DENSITY])
+    rgb = renderer(rgb=field_outputs[FieldHeadNames.RGB], weights=weights, transmittance_threshold=1e-3)
+
+    assert torch.allclose(rgb, expected_terminated, atol=1e-5)
+    psnr = -10 * torch.log10(torch.mean((rgb - expected) ** 2))
+    assert psnr > 50
+    assert sum(num_evaluated) < 0.4 * ray_samples.shape.numel()
+
+    ray_mask = torch.arange(num_rays) < 100
+    field_outputs = SegmentedRayMarcher()(ray_samples, field_fn, ray_mask=ray_mask)
+    assert torch.all(field_outputs[FieldHeadNames.DENSITY][~ray_mask] == 0)
+
+
+def test_sphere_tracing_sampler():
+    """Sphere tracing finds the first intersection with a sphere in a few queries, and bands the samples around it"""
+    num_rays = 256
+    directions = torch.randn((num_rays, 3)) * 0.3 + torch.tensor([0.0, 0.0, 1.0])
+    directions = torch.nn.functional.normalize(directions, dim=-1)
+    origins = torch.tensor([0.0, 0.0, -2.0]).expand(num_rays, 3)
+    ray_bundle = RayBundle(
+        origins=origins,
+        directions=directions,
+        pixel_area=torch.ones((num_rays, 1)),
+        nears=torch.full((num_rays, 1), 0.05),
+        fars=torch.full((num_rays, 1), 4.0),
+    )
+    num_queries = []
+
+    def sdf_fn(ray_samples: RaySamples) -> torch.Tensor:
+        num_queries.append(ray_samples.shape[0])
+        return ray_samples.frustums.get_start_positions().norm(dim=-1, keepdim=True) - 0.5
+
+    # distance to the first intersection with the sphere of radius 0.5
+    b = (origins * directions).sum(-1)
+    discriminant = b**2 - (origins**2).sum(-1) + 0.25
+    expected_hit = discriminant > 0
+    expected_t = -b - discriminant.clamp(min=0).sqrt()
+
+    sampler = SphereTracingSampler(num_samples=8, band_width=0.04)
+    surface_t, hit = sampler.find_surface(ray_bundle, sdf_fn)
+    # rays grazing the sphere within the convergence threshold may count as hits
+    not_grazing = discriminant.abs() > 1e-2
+    assert torch.equal(hit[not_grazing, 0], expected_hit[not_grazing])
+    well_hit = expected_hit & not_grazing
+    assert torch.allclose(surface_t[well_hit, 0], expected_t[well_hit], atol=1e-2)
+    surface_points = origins + directions * surface_t
+    assert torch.all((surface_points[expected_hit].norm(dim=-1) - 0.5).abs() < 1e-3)
+    assert sum(num_queries) < 16 * num_rays
+
+    ray_samples = sampler(ray_bundle, sdf_fn=sdf_fn)
+    assert ray_samples.shape == (num_rays, 8)
+    starts, ends = ray_samples.frustums.starts[..., 0], ray_samples.frustums.ends[..., 0]
+    assert torch.all(starts[expected_hit, 0] < expected_t[expected_hit])
+    assert torch.all(expected_t[expected_hit] < ends[expected_hit, -1])
+    assert torch.allclose(ends[~hit[:, 0], -1], ray_bundle.fars[~hit[:, 0], 0])
+
+
+def test_sphere_tracing_sampler_unconverged_rays():
+    """Rays that have not reached a far surface after the last step are misses"""
+    num_rays = 4
+    ray_bundle = RayBundle(
+        origins=torch.zeros((num_rays, 3)),
+        directions=torch.tensor([[0.0, 0.0, 1.0]]).expand(num_rays, -1),
+        pixel_area=torch.ones((num_rays, 1)),
+        nears=torch.zeros((num_rays, 1)),
+        fars=torch.full((num_rays, 1), 10.0),
+    )
+
+    def sdf_fn(ray_samples: RaySamples) -> torch.Tensor:
+        # plane at z = 8, reached in about 30 steps of half the SDF value
+        return 8.0 - ray_samples.frustums.get_start_positions()[..., 2:]
+
+    _, hit = SphereTracingSampler(num_steps=8, step_scale=0.5).find_surface(ray_bundle, sdf_fn)
+    assert not hit.any()
+    ray_samples = SphereTracingSampler(num_samples=8, num_steps=8, step_scale=0.5)(ray_bundle, sdf_fn=sdf_fn)
+    assert torch.allclose(ray_samples.frustums.ends[:, -1, 0], ray_bundle.fars[:, 0])
+
+    surface_t, hit = SphereTracingSampler(num_steps=64, step_scale=0.5).find_surface(ray_bundle, sdf_fn)
+    assert hit.all()
+    assert torch.allclose(surface_t, torch.full((num_rays, 1), 8.0), atol=1e-2)
+
+
 if __name__ == "__main__":
     test_uniform_sampler()
     test_pdf_sampler()
@@ -82,6 +82,46 @@ def test_depth_renderer():
     assert torch.min(depth) > 0
 
 
+def test_packed_rendering():
+    """Packed samples render like the dense samples they come from, when the dropped samples are empty"""
+    num_rays, num_samples = 4, 8
+    bins = torch.linspace(1.0, 3.0, num_samples + 1)[None, :, None].expand(num_rays, -1, -1)
+    frustums = Frustums(
+        origins=torch.zeros((num_rays, num_samples, 3)),
+        directions=torch.ones((num_rays, num_samples, 3)),
+        starts=bins[:, :-1],
+        ends=bins[:, 1:],
+        pixel_area=torch.ones((num_rays, num_samples, 1)),
+    )
+    ray_samples = RaySamples(frustums=frustums, deltas=bins[:, 1:] - bins[:, :-1])
+    keep = torch.rand((num_rays, num_samples)) > 0.5
+    keep[:, -1] = True
+    densities = torch.rand((num_rays, num_samples, 1)) * 4 * keep[..., None]
+    rgb = torch.rand((num_rays, num_samples, 3))
+    normals = torch.nn.functional.normalize(torch.randn((num_rays, num_samples, 3)), dim=-1)
+
+    weights = ray_samples.get_weights(densities)
+    ray_indices = torch.nonzero(keep)[:, 0]
+    packed_samples = ray_samples[keep]
+    packed_weights = packed_samples.get_weights(densities[keep], ray_indices=ray_indices)
+    assert torch.allclose(packed_weights, weights[keep], atol=1e-6)
+
+    packed = {"ray_indices": ray_indices, "num_rays": num_rays}
+    for background_color in ["last_sample", "white"]:
+        rgb_renderer = renderers.RGBRenderer(background_color=background_color)
+        expected = rgb_renderer(rgb=rgb, weights=weights)
+        assert torch.allclose(rgb_renderer(rgb=rgb[keep], weights=packed_weights, **packed), expected, atol=1e-6)
+    for method in ["median", "expected"]:
+        depth_renderer = renderers.DepthRenderer(method=method)  # type: ignore
+        expected = depth_renderer(weights=weights, ray_samples=ray_samples)
+        depth = depth_renderer(weights=packed_weights, ray_samples=packed_samples, **packed)
+        assert torch.allclose(depth, expected, atol=1e-6)
+    expected = renderers.NormalsRenderer()(normals=normals, weights=weights)
+    assert torch.allclose(renderers.NormalsRenderer()(normals[keep], packed_weights, **packed), expected, atol=1e-6)
+    expected = renderers.AccumulationRenderer()(weights=weights)
+    assert torch.allclose(renderers.AccumulationRenderer()(packed_weights, **packed), expected, atol=1e-6)
+
+
 if __name__ == "__main__":
     test_rgb_renderer()
     test_sh_renderer()
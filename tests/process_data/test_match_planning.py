@@ -0,0 +1,53 @@
+"""
+Test image pair planning for feature matching
+"""
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from nerfstudio.process_data.match_planning_utils import get_image_gps, plan_image_pairs, write_image_pairs
+
+
+def _to_dms(degrees: float):
+    return float(int(degrees)), float(int(degrees * 60) % 60), (degrees * 3600) % 60
+
+
+def _save_image_with_gps(path: Path, image: np.ndarray, latitude: float, longitude: float):
+    exif = Image.Exif()
+    gps = exif.get_ifd(0x8825)
+    gps[1], gps[2] = "N", _to_dms(latitude)
+    gps[3], gps[4] = "W", _to_dms(-longitude)
+    Image.fromarray(image).save(path, exif=exif)
+
+
+def test_plan_image_pairs(tmp_path: Path):
+    """Pairs should combine capture order, GPS proximity and visual similarity, and stay far below exhaustive"""
+    rng = np.random.default_rng(0)
+    textures = [rng.integers(0, 255, (8, 8), dtype=np.uint8) for _ in range(2)]
+    image_paths = []
+    for i in range(20):
+        # Two visually distinct places, alternating every image, with GPS positions increasing along a line.
+        image = np.kron(textures[i % 2], np.ones((16, 16), dtype=np.uint8))
+        image_paths.append(tmp_path / f"frame_{i:05d}.jpg")
+        _save_image_with_gps(image_paths[-1], image, 37.0 + 1e-4 * i, -122.0 + 1e-4 * i)
+
+    gps = get_image_gps(image_paths[3])
+    assert gps is not None
+    np.testing.assert_allclose(gps[:2], [37.0003, -121.9997], atol=1e-6)
+
+    pairs = plan_image_pairs(image_paths, sequential_overlap=1, num_retrieval_neighbors=0, num_gps_neighbors=0)
+    assert pairs == list(zip(image_paths[:-1], image_paths[1:]))
+
+    pairs = plan_image_pairs(image_paths, sequential_overlap=0, num_retrieval_neighbors=0, num_gps_neighbors=2)
+    assert (image_paths[5], image_paths[6]) in pairs
+    assert all(abs(image_paths.index(a) - image_paths.index(b)) <= 2 for a, b in pairs)
+
+    pairs = plan_image_pairs(image_paths, sequential_overlap=0, num_retrieval_neighbors=3, num_gps_neighbors=0)
+    assert len(pairs) > 0
+    assert all((image_paths.index(a) - image_paths.index(b)) % 2 == 0 for a, b in pairs)
+
+    pairs = plan_image_pairs(image_paths, sequential_overlap=2, num_retrieval_neighbors=3, num_gps_neighbors=2)
+    assert len(pairs) == len(set(pairs)) < 20 * 19 // 2
+    write_image_pairs(pairs, tmp_path, tmp_path / "pairs.txt")
+    assert (tmp_path / "pairs.txt").read_text().splitlines()[0] == "frame_00000.jpg frame_00001.jpg"
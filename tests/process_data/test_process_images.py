@@ -12,7 +12,9 @@ from nerfstudio.data.dataparsers.nerfstudio_dataparser import NerfstudioDataPars
 from nerfstudio.data.utils.colmap_parsing_utils import Camera
 from nerfstudio.data.utils.colmap_parsing_utils import Image as ColmapImage
 from nerfstudio.data.utils.colmap_parsing_utils import qvec2rotmat, write_cameras_binary, write_images_binary
+from nerfstudio.process_data import process_data_utils
 from nerfstudio.process_data.images_to_nerfstudio_dataset import ImagesToNerfstudioDataset
+from nerfstudio.utils.io import load_from_json
 
 
 def random_quaternion(num_poses: int):
@@ -102,3 +104,82 @@ def test_process_images_skip_colmap(tmp_path: Path):
     )
     dataparser_poses = np.linalg.inv(dataparser_poses)
     np.testing.assert_allclose(gt_poses, dataparser_poses, rtol=0, atol=1e-5)
+
+
+def test_process_images_copies_only_added_images(tmp_path: Path, monkeypatch):
+    """
+    Test that an incremental rerun of ns-process-data images with an added image keeps the copied frame names
+    """
+    sparse_path = tmp_path / "sparse" / "0"
+    sparse_path.mkdir(parents=True)
+    (tmp_path / "images").mkdir()
+    write_cameras_binary(
+        {1: Camera(1, "OPENCV", 100, 150, [110, 110, 50, 75, 0, 0, 0, 0, 0, 0])}, sparse_path / "cameras.bin"
+    )
+
+    # Mock missing COLMAP and ffmpeg in the dev env
+    (tmp_path / "mocked_bin").mkdir()
+    (tmp_path / "mocked_bin" / "colmap").touch(mode=0o777)
+    (tmp_path / "mocked_bin" / "ffmpeg").touch(mode=0o777)
+    monkeypatch.setenv("PATH", str(tmp_path / "mocked_bin") + f":{os.environ.get('PATH', '')}")
+
+    def run(image_names):
+        frames = {}
+        for i, image_name in enumerate(image_names):
+            frames[i + 1] = ColmapImage(i + 1, np.array([1.0, 0, 0, 0]), np.zeros(3), 1, image_name, [], [])
+            if not (tmp_path / "images" / image_name).exists():
+                Image.new("RGB", (100, 150), (i, 0, 0)).save(tmp_path / "images" / image_name)
+        write_images_binary(frames, sparse_path / "images.bin")
+        ImagesToNerfstudioDataset(
+            data=tmp_path / "images",
+            output_dir=tmp_path / "nerfstudio",
+            colmap_model_path=sparse_path,
+            skip_colmap=True,
+            num_downscales=0,
+            incremental=True,
+        ).main()
+        return {
+            Path(frame["file_path"]).name: frame["colmap_im_id"]
+            for frame in load_from_json(tmp_path / "nerfstudio" / "transforms.json")["frames"]
+        }
+
+    assert run(["image_0.png", "image_2.png"]) == {"frame_00001.png": 1, "frame_00002.png": 2}
+    copied_image = tmp_path / "nerfstudio" / "images" / "frame_00001.png"
+    os.utime(copied_image, ns=(0, 0))
+
+    # The added image sorts between the others but gets the next frame number, and the others are not copied again.
+    assert run(["image_0.png", "image_1.png", "image_2.png"]) == {
+        "frame_00001.png": 1,
+        "frame_00003.png": 2,
+        "frame_00002.png": 3,
+    }
+    assert copied_image.stat().st_mtime_ns == 0
+    for frame_name, source_name in [("frame_00001", "image_0"), ("frame_00002", "image_2"), ("frame_00003", "image_1")]:
+        copied = np.asarray(Image.open(tmp_path / "nerfstudio" / "images" / f"{frame_name}.png"))
+        assert np.array_equal(copied, np.asarray(Image.open(tmp_path / "images" / f"{source_name}.png")))
+
+
+def test_copy_images_list_start_index(tmp_path: Path, monkeypatch):
+    """
+    Test that images appended to an output directory are numbered from the start index in every downscale directory
+    """
+    commands = []
+    monkeypatch.setattr(process_data_utils, "run_command", lambda cmd, verbose=False: commands.append(cmd))
+    image_paths = []
+    for i in range(2):
+        image_paths.append(tmp_path / f"image_{i}.png")
+        Image.new("RGB", (16, 16), (i, 0, 0)).save(image_paths[-1])
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "frame_00001.png").write_bytes(b"existing")
+
+    copied = process_data_utils.copy_images_list(
+        image_paths, tmp_path / "images", num_downscales=2, keep_image_dir=True, start_index=4
+    )
+
+    assert [path.name for path in copied] == ["frame_00004.png", "frame_00005.png"]
+    assert (tmp_path / "images" / "frame_00001.png").read_bytes() == b"existing"
+    assert len(commands) == 1
+    # The input pattern and the pattern of every output are numbered from the start index.
+    assert commands[0].count("-start_number 4") == 4
+    for output_dir in ["images", "images_2", "images_4"]:
+        assert f'-start_number 4 "{tmp_path / output_dir / "frame_%05d.png"}"' in commands[0]
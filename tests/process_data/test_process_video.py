@@ -0,0 +1,90 @@
+"""
+Process video test
+"""
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import av
+import cv2
+import numpy as np
+import pytest
+
+from nerfstudio.process_data import process_data_utils
+
+
+@pytest.mark.parametrize("rotation", [0, 90])
+def test_convert_video_to_images_sharpest(tmp_path: Path, monkeypatch, rotation: int):
+    """
+    Frame extraction should keep the sharpest frame of each window, also when split into parallel segments, rotated
+    as ffmpeg autorotates portrait phone videos
+    """
+    num_frames, spacing = 40, 4
+    rng = np.random.default_rng(0)
+    texture = np.kron(rng.integers(0, 2, (11, 8), dtype=np.uint8) * 255, np.ones((8, 8), dtype=np.uint8))
+    video_path = tmp_path / "video.mp4"
+    frames = []
+    with av.open(str(video_path), mode="w") as container:
+        stream = container.add_stream("mpeg4", rate=10)
+        stream.width, stream.height, stream.pix_fmt = 64, 48, "yuv420p"
+        stream.bit_rate = 10_000_000
+        stream.options = {"g": "8"}
+        stream.set_display_rotation(rotation)
+        for i in range(num_frames):
+            # A translating texture, where only the second frame of every window is in focus.
+            image = np.repeat(texture[i : i + 48, :, None], 3, axis=-1)
+            if i % spacing != 1:
+                image = cv2.GaussianBlur(image, (9, 9), 5)
+            displayed = image if rotation == 0 else cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+            frames.append(displayed[..., 0].astype(np.float32))
+            for packet in stream.encode(av.VideoFrame.from_ndarray(image, format="rgb24")):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    monkeypatch.setattr(process_data_utils, "get_num_frames_in_video", lambda _: num_frames)
+
+    image_dir = tmp_path / "images"
+    _, num_extracted = process_data_utils.convert_video_to_images(
+        video_path,
+        image_dir,
+        num_frames_target=num_frames // spacing,
+        num_downscales=1,
+        frame_selection="sharpest",
+        image_format="jpg",
+        num_workers=3,
+    )
+    assert num_extracted == num_frames // spacing
+    images = sorted(image_dir.glob("*.jpg"))
+    assert [p.name for p in images] == [f"frame_{i:05d}.jpg" for i in range(1, num_extracted + 1)]
+    # Identify each extracted image by the closest frame of the video.
+    extracted = [cv2.imread(str(p), cv2.IMREAD_GRAYSCALE).astype(np.float32) for p in images]
+    frame_ids = [int(np.argmin([np.square(image - frame).mean() for frame in frames])) for image in extracted]
+    assert frame_ids == list(range(1, num_frames, spacing))
+    height, width = frames[0].shape
+    assert cv2.imread(str(tmp_path / "images_2" / "frame_00001.jpg")).shape == (height // 2, width // 2, 3)
+
+
+def test_display_rotation_without_frame_rotation(tmp_path: Path):
+    """
+    PyAV releases without VideoFrame.rotation read the rotation from the display matrix or the stream rotate tag
+    """
+    video_path = tmp_path / "video.mp4"
+    with av.open(str(video_path), mode="w") as container:
+        stream = container.add_stream("mpeg4", rate=10)
+        stream.width, stream.height, stream.pix_fmt = 32, 16, "yuv420p"
+        stream.set_display_rotation(90)
+        for packet in stream.encode(av.VideoFrame.from_ndarray(np.zeros((16, 32, 3), np.uint8), format="rgb24")):
+            container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        frame = next(container.decode(stream))
+        old_frame = MagicMock(spec=av.VideoFrame)
+        old_frame.rotation = None
+        old_frame.side_data = frame.side_data
+        assert process_data_utils._get_display_rotation(old_frame, stream) == pytest.approx(90)
+
+        old_frame.side_data = []
+        old_stream = MagicMock(spec=av.video.stream.VideoStream)
+        old_stream.metadata = {"rotate": "270"}
+        assert process_data_utils._get_display_rotation(old_frame, old_stream) % 360 == pytest.approx(90)
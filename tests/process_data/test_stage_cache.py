@@ -0,0 +1,38 @@
+"""
+Test the ns-process-data stage cache
+"""
+from pathlib import Path
+
+from nerfstudio.process_data.stage_cache import StageCache
+
+
+def test_stage_cache_tracks_params_and_content(tmp_path: Path):
+    """Stages are up to date only for identical parameters, input content and existing outputs"""
+    image = tmp_path / "image.png"
+    image.write_bytes(b"content")
+    output = tmp_path / "output"
+    output.mkdir()
+
+    cache = StageCache(tmp_path)
+    fingerprint = cache.fingerprint({"num_downscales": 3}, cache.hash_files([image]))
+    assert not cache.is_up_to_date("copy", fingerprint, [output])
+    cache.record("copy", fingerprint, {"num_frames": 1})
+
+    # The manifest is persisted for the next run.
+    cache = StageCache(tmp_path)
+    assert cache.is_up_to_date("copy", cache.fingerprint({"num_downscales": 3}, cache.hash_files([image])), [output])
+    assert cache.get_metadata("copy") == {"num_frames": 1}
+    assert not cache.is_up_to_date("copy", cache.fingerprint({"num_downscales": 2}, cache.hash_files([image])))
+    assert not cache.is_up_to_date("copy", fingerprint, [tmp_path / "missing"])
+
+    image.write_bytes(b"other content")
+    assert not cache.is_up_to_date("copy", cache.fingerprint({"num_downscales": 3}, cache.hash_files([image])))
+
+
+def test_disabled_stage_cache(tmp_path: Path):
+    """A disabled cache never skips a stage and never writes a manifest"""
+    cache = StageCache(tmp_path, enabled=False)
+    fingerprint = cache.fingerprint({})
+    cache.record("copy", fingerprint)
+    assert not cache.is_up_to_date("copy", fingerprint)
+    assert not cache.path.exists()
@@ -0,0 +1,116 @@
+"""
+Test the streaming ingest of Polycam and Record3D captures
+"""
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from nerfstudio.process_data import polycam_utils, record3d_utils
+from nerfstudio.process_data.process_data_utils import TransformsJsonWriter, imap_ordered
+
+
+@pytest.mark.parametrize("header,frames", [({}, []), ({"w": 4}, []), ({"w": 4, "h": [1.0]}, [{"a": 1}, {"b": [[1]]}])])
+def test_transforms_json_writer(tmp_path: Path, header, frames):
+    """The incrementally written file is identical to a single json.dump"""
+    with TransformsJsonWriter(tmp_path / "transforms.json", header) as writer:
+        for frame in frames:
+            writer.write_frame(frame)
+    assert (tmp_path / "transforms.json").read_text() == json.dumps({**header, "frames": frames}, indent=4)
+    assert list(tmp_path.iterdir()) == [tmp_path / "transforms.json"]
+
+
+def test_imap_ordered_is_lazy():
+    """Results come back in order, without consuming the whole input first"""
+    consumed = []
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    results = imap_ordered(lambda x: x * 2, items(), num_workers=2)
+    assert next(results) == 0
+    assert len(consumed) <= 5
+    assert list(results) == [2 * i for i in range(1, 100)]
+
+
+def test_process_polycam(tmp_path: Path):
+    """Images and upscaled depth maps are cropped and downscaled, and blurry frames are skipped"""
+    image_dir = tmp_path / "keyframes" / "images"
+    depth_dir = tmp_path / "keyframes" / "depth"
+    cameras_dir = tmp_path / "keyframes" / "cameras"
+    for directory in (image_dir, depth_dir, cameras_dir):
+        directory.mkdir(parents=True)
+    image_filenames, depth_filenames = [], []
+    for i in range(6):
+        image_filenames.append(image_dir / f"{i}.jpg")
+        cv2.imwrite(str(image_filenames[-1]), np.full((96, 128, 3), 10 * i, dtype=np.uint8))
+        depth_filenames.append(depth_dir / f"{i}.png")
+        cv2.imwrite(str(depth_filenames[-1]), np.full((24, 32), 1000 + i, dtype=np.uint16))
+        camera = {"fx": 100.0, "fy": 100.0, "cx": 64.0, "cy": 48.0, "width": 128, "height": 96}
+        camera.update({f"t_{r}{c}": float(r == c) for r in range(3) for c in range(4)})
+        camera["blur_score"] = 10.0 if i == 3 else 50.0
+        (cameras_dir / f"{i}.json").write_text(json.dumps(camera))
+
+    output_dir = tmp_path / "output"
+    summary = polycam_utils.process_polycam(
+        image_filenames,
+        depth_filenames,
+        cameras_dir,
+        output_dir,
+        min_blur_score=25,
+        crop_border_pixels=8,
+        num_downscales=1,
+        num_workers=3,
+    )
+    assert "Skipped 1 frames due to low blur score." in summary
+
+    transforms = json.loads((output_dir / "transforms.json").read_text())
+    assert [frame["file_path"] for frame in transforms["frames"]] == [
+        f"./images/frame_{i:05d}.jpg" for i in (1, 2, 3, 5, 6)
+    ]
+    assert transforms["frames"][0]["w"] == 112 and transforms["frames"][0]["cx"] == 56.0
+    assert not (output_dir / "images" / "frame_00004.jpg").exists()
+    assert cv2.imread(str(output_dir / "images" / "frame_00001.jpg")).shape == (80, 112, 3)
+    assert cv2.imread(str(output_dir / "images_2" / "frame_00001.jpg")).shape == (40, 56, 3)
+    depth = cv2.imread(str(output_dir / "depth" / "frame_00006.png"), cv2.IMREAD_UNCHANGED)
+    assert depth.shape == (80, 112) and depth.dtype == np.uint16 and np.all(depth == 1005)
+    depth = cv2.imread(str(output_dir / "depth_2" / "frame_00006.png"), cv2.IMREAD_UNCHANGED)
+    assert depth.shape == (40, 56) and np.all(depth == 1005)
+
+    # The list-based helper writes the same transforms.json
+    json_dir = tmp_path / "json_output"
+    json_dir.mkdir()
+    polycam_utils.polycam_to_json(
+        image_filenames, depth_filenames, cameras_dir, json_dir, min_blur_score=25, crop_border_pixels=8
+    )
+    assert (json_dir / "transforms.json").read_text() == (output_dir / "transforms.json").read_text()
+
+
+def test_process_record3d(tmp_path: Path):
+    """The streamed transforms.json matches the one written from the full list of frames"""
+    image_filenames = []
+    for i in range(5):
+        image_filenames.append(tmp_path / f"{i}.png")
+        cv2.imwrite(str(image_filenames[-1]), np.full((16, 16, 3), i, dtype=np.uint8))
+    poses = np.concatenate([np.tile([0.0, 0.0, 0.0, 1.0], (5, 1)), np.arange(15.0).reshape(5, 3)], axis=-1)
+    metadata = {"poses": poses.tolist(), "K": [10.0, 0, 0, 0, 10.0, 0, 8.0, 8.0, 1.0], "w": 16, "h": 16}
+    (tmp_path / "metadata.json").write_text(json.dumps(metadata))
+    indices = np.array([0, 2, 4])
+    sampled_filenames = [image_filenames[i] for i in indices]
+
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    num_frames = record3d_utils.process_record3d(
+        sampled_filenames, tmp_path / "metadata.json", output_dir, indices, num_downscales=1
+    )
+    assert num_frames == 3
+    streamed = json.loads((output_dir / "transforms.json").read_text())
+
+    copied_paths = [Path(f"images/frame_{i + 1:05d}.png") for i in range(3)]
+    record3d_utils.record3d_to_json(copied_paths, tmp_path / "metadata.json", output_dir, indices)
+    assert streamed == json.loads((output_dir / "transforms.json").read_text())
+    assert (output_dir / "images_2" / "frame_00003.png").exists()
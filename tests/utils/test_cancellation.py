@@ -0,0 +1,59 @@
+"""
+Test the cooperative cancellation of renders
+"""
+import threading
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from nerfstudio.cameras.rays import RayBundle
+from nerfstudio.models.base_model import Model
+from nerfstudio.utils.cancellation import (
+    CancellationToken,
+    CancelledException,
+    cancellation_context,
+    check_cancelled,
+    get_current_token,
+)
+
+
+def test_cancellation_context():
+    """Tokens are only checked by the thread they were entered in, and a cancellation is raised once"""
+    token = CancellationToken()
+    token.cancel()
+    check_cancelled()
+    with cancellation_context(token):
+        assert get_current_token() is token
+        other_thread = threading.Thread(target=check_cancelled)
+        other_thread.start()
+        other_thread.join()
+        assert token.cancelled
+        with pytest.raises(CancelledException):
+            check_cancelled()
+        assert not token.cancelled
+        check_cancelled()
+    assert get_current_token() is None
+
+
+def test_render_cancelled_between_chunks():
+    """Rendering a camera stops at the first chunk after the cancellation"""
+    token = CancellationToken()
+    num_chunks = []
+
+    def forward(ray_bundle: RayBundle):
+        num_chunks.append(len(ray_bundle))
+        token.cancel()
+        return {"rgb": ray_bundle.origins}
+
+    model = SimpleNamespace(
+        config=SimpleNamespace(eval_num_rays_per_chunk=4, eval_mixed_precision=False), forward=forward
+    )
+    origins = torch.zeros((4, 4, 3))
+    camera_ray_bundle = RayBundle(origins=origins, directions=origins, pixel_area=origins[..., :1])
+    with cancellation_context(token), pytest.raises(CancelledException):
+        Model.get_outputs_for_camera_ray_bundle(model, camera_ray_bundle)  # type: ignore
+    assert num_chunks == [4]
+
+    outputs = Model.get_outputs_for_camera_ray_bundle(model, camera_ray_bundle)  # type: ignore
+    assert outputs["rgb"].shape == (4, 4, 3) and len(num_chunks) == 5
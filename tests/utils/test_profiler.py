@@ -0,0 +1,49 @@
+"""
+Test the span tracer
+"""
+import json
+from pathlib import Path
+
+from nerfstudio.utils import profiler
+from nerfstudio.utils.profiler import SpanTracer
+
+
+def test_trace_span_disabled():
+    """Spans are a shared no-op when tracing is disabled"""
+    assert profiler.TRACER is None
+    assert profiler.trace_span("field") is profiler.trace_span("loss")
+    with profiler.trace_span("field"):
+        pass
+
+
+def test_span_tracer(tmp_path: Path, monkeypatch):
+    """Nested spans are recorded with their step and each span is exported once"""
+    tracer = SpanTracer(tmp_path, buffer_size=4, steps_per_export=2)
+    monkeypatch.setattr(profiler, "TRACER", tracer)
+
+    profiler.set_trace_step(1)
+    with profiler.trace_span("train_iteration"):
+        with profiler.trace_span("field"):
+            pass
+    assert [(span.name, span.step, span.depth) for span in tracer.spans] == [
+        ("field", 1, 1),
+        ("train_iteration", 1, 0),
+    ]
+    outer, inner = tracer.spans[1], tracer.spans[0]
+    assert outer.start_ns <= inner.start_ns and inner.duration_ns <= outer.duration_ns
+
+    profiler.set_trace_step(2)
+    lines = (tmp_path / "spans.jsonl").read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["field", "train_iteration"]
+
+    # The ring buffer only keeps the last spans, and only new spans are appended at the next export.
+    for name in ["a", "b", "c", "d", "e"]:
+        with profiler.trace_span(name):
+            pass
+    profiler.set_trace_step(4)
+    lines = (tmp_path / "spans.jsonl").read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["field", "train_iteration", "b", "c", "d", "e"]
+
+    trace = json.loads((tmp_path / "spans_trace.json").read_text())
+    assert [event["name"] for event in trace["traceEvents"]] == ["b", "c", "d", "e"]
+    assert all(event["ph"] == "X" and event["args"]["step"] == 2 for event in trace["traceEvents"])
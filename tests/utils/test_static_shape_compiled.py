@@ -0,0 +1,77 @@
+"""
+Test the static shape compiled wrapper
+"""
+import pytest
+import torch
+
+from nerfstudio.utils import misc
+from nerfstudio.utils.misc import StaticShapeCompiled
+
+
+def test_static_shape_compiled(monkeypatch):
+    """Only the shapes of the first call with gradients enabled run compiled"""
+    compiled_calls = []
+
+    def fake_compile(**kwargs):
+        def compile_fn(fn):
+            return lambda *args: compiled_calls.append(args[0].shape) or fn(*args)
+
+        return compile_fn
+
+    monkeypatch.setattr(misc, "torch_compile", fake_compile)
+    fn = StaticShapeCompiled(lambda x: 2 * x)
+    with torch.no_grad():
+        assert torch.equal(fn(torch.ones(3)), torch.full((3,), 2.0))
+    assert fn.signature is None and not compiled_calls
+
+    fn(torch.ones(4))
+    fn(torch.ones(4))
+    fn(torch.ones(5))
+    fn(torch.ones(4))
+    with torch.no_grad():
+        fn(torch.ones(4))
+    assert compiled_calls == [torch.Size([4])] * 3
+    assert fn.num_recaptures == 0
+
+
+def test_static_shape_compiled_recapture(monkeypatch):
+    """Training shapes that change for good are captured again, a bounded number of times"""
+    compiled_calls = []
+
+    def fake_compile(**kwargs):
+        def compile_fn(fn):
+            return lambda *args: compiled_calls.append(args[0].shape) or fn(*args)
+
+        return compile_fn
+
+    monkeypatch.setattr(misc, "torch_compile", fake_compile)
+    fn = StaticShapeCompiled(lambda x: 2 * x, max_recaptures=1, recapture_after=2)
+    fn(torch.ones(4))
+    fn(torch.ones(6))
+    fn(torch.ones(6))
+    fn(torch.ones(6))
+    assert fn.num_recaptures == 1
+    assert compiled_calls == [torch.Size([4])] + [torch.Size([6])] * 2
+
+    fn(torch.ones(8))
+    with pytest.warns(RuntimeWarning, match="changed more than 1 times"):
+        fn(torch.ones(8))
+    fn(torch.ones(8))
+    assert compiled_calls == [torch.Size([4])] + [torch.Size([6])] * 2
+
+
+def test_static_shape_compiled_fallback(monkeypatch):
+    """A failed compilation falls back to eager execution for good"""
+
+    def failing_compile(**kwargs):
+        def compile_fn(fn):
+            raise RuntimeError("no compiler")
+
+        return compile_fn
+
+    monkeypatch.setattr(misc, "torch_compile", failing_compile)
+    fn = StaticShapeCompiled(lambda x: 2 * x)
+    with pytest.warns(RuntimeWarning, match="no compiler"):
+        assert torch.equal(fn(torch.ones(2)), torch.full((2,), 2.0))
+    assert fn.failed
+    assert torch.equal(fn(torch.ones(2)), torch.full((2,), 2.0))
@@ -7,6 +7,7 @@ from typing import Generic, Optional, TypeVar
 import pytest
 import torch
 
+from nerfstudio.cameras.cameras import Cameras
 from nerfstudio.utils.tensor_dataclass import TensorDataclass
 
 
@@ -179,9 +180,44 @@ def test_iter():
         assert batch.b.shape == (4, 5)
 
 
+def test_from_broadcasted():
+    """Test building a tensor dataclass without validation"""
+    tensor_dataclass = DummyTensorDataclass.from_broadcasted(
+        (4, 6), a=torch.ones((4, 6, 3)), b=torch.ones((4, 6, 2)), c=None
+    )
+    assert tensor_dataclass.shape == (4, 6)
+    assert tensor_dataclass.c is None
+    assert tensor_dataclass.d == {}
+    assert tensor_dataclass[1:3].a.shape == (2, 6, 3)
+
+    with pytest.raises(TypeError):
+        DummyNestedClass.from_broadcasted((4,))
+
+
+def test_ops_skip_broadcasting():
+    """Test that operations keep fields as they are when the batch shapes already match"""
+    a = torch.ones((4, 6, 3))
+    tensor_dataclass = DummyTensorDataclass(a=a, b=torch.ones((6, 2)), c=None, d={"t1": torch.ones((4, 6, 1))})
+    assert tensor_dataclass.a is a
+    assert tensor_dataclass.b.stride() == (0, 2, 1)
+
+    # A field reassigned with a smaller batch shape is still broadcast.
+    tensor_dataclass.a = torch.ones((1, 6, 3))
+    assert tensor_dataclass[0:2].a.shape == (2, 6, 3)
+
+    # Custom dimensions set on the instance are kept.
+    cameras = Cameras(camera_to_worlds=torch.eye(4)[:3].expand(5, 3, 4), fx=1.0, fy=1.0, cx=1.0, cy=1.0)
+    sliced = cameras[1:3]
+    assert sliced.shape == (2,)
+    assert sliced.camera_to_worlds.shape == (2, 3, 4)
+    assert sliced._field_custom_dimensions == {"camera_to_worlds": 2}
+
+
 if __name__ == "__main__":
     test_init()
     test_broadcasting()
     test_tensor_ops()
     test_iter()
     test_nested_class()
+    test_from_broadcasted()
+    test_ops_skip_broadcasting()
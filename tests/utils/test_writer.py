@@ -0,0 +1,91 @@
+"""
+Test the event writer
+"""
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pytest
+import torch
+
+from nerfstudio.configs.base_config import LocalWriterConfig, LoggingConfig
+from nerfstudio.utils import writer
+
+
+class RecordingWriter(writer.Writer):
+    """Writer that keeps everything it is given"""
+
+    def __init__(self) -> None:
+        self.scalars: List[Tuple[str, Any, int]] = []
+        self.images: List[Tuple[str, torch.Tensor, int]] = []
+
+    def write_image(self, name: str, image: torch.Tensor, step: int) -> None:
+        self.images.append((name, image, step))
+
+    def write_scalar(self, name: str, scalar: Any, step: int) -> None:
+        self.scalars.append((name, scalar, step))
+
+    def write_config(self, name: str, config_dict: Dict[str, Any], step: int) -> None:
+        pass
+
+
+@pytest.fixture(name="recording_writer")
+def fixture_recording_writer(request):
+    """Sets up the global writer state with a recording writer"""
+    config = LoggingConfig(
+        max_buffer_size=4, local_writer=LocalWriterConfig(enable=False), flush_in_background=request.param
+    )
+    writer.setup_local_writer(config, max_iter=100)
+    recording_writer = RecordingWriter()
+    writer.EVENT_WRITERS.append(recording_writer)
+    yield recording_writer
+    writer.EVENT_WRITERS.clear()
+    writer.GLOBAL_BUFFER.clear()
+
+
+@pytest.mark.parametrize("recording_writer", [False, True], indirect=True)
+def test_write_out_storage(recording_writer: RecordingWriter):
+    """Tensors reach the writers as python floats, and images on the cpu"""
+    writer.put_scalar("loss", torch.tensor(0.5, requires_grad=True), step=3)
+    writer.put_dict("losses", {"rgb": torch.tensor([0.25]), "count": 2}, step=3)
+    writer.put_image("image", torch.zeros((2, 2, 3)), step=3)
+    writer.write_out_storage()
+    writer.flush()
+
+    assert recording_writer.scalars == [("loss", 0.5, 3), ("losses/rgb", 0.25, 3), ("losses/count", 2.0, 3)]
+    assert all(isinstance(scalar, float) for _, scalar, _ in recording_writer.scalars)
+    assert recording_writer.images[0][1].device == torch.device("cpu")
+    assert len(writer.EVENT_STORAGE) == 0
+
+
+@pytest.mark.parametrize("recording_writer", [True], indirect=True)
+def test_background_queue(recording_writer: RecordingWriter, monkeypatch):
+    """The background queue is bounded, and only holds detached tensors"""
+    fetched_requires_grad = []
+    fetch_tensors = writer._fetch_tensors
+
+    def recording_fetch_tensors(events):
+        tensors = [event["event"] for event in events if isinstance(event["event"], torch.Tensor)]
+        fetched_requires_grad.extend(tensor.requires_grad for tensor in tensors)
+        fetch_tensors(events)
+
+    monkeypatch.setattr(writer, "_fetch_tensors", recording_fetch_tensors)
+    for step in range(3 * writer._WRITE_QUEUE_SIZE):
+        writer.put_scalar("loss", torch.tensor(0.5, requires_grad=True) * 2, step=step)
+        writer.write_out_storage()
+    writer.flush()
+
+    assert writer._get_write_queue().maxsize == writer._WRITE_QUEUE_SIZE
+    assert fetched_requires_grad and not any(fetched_requires_grad)
+    assert [step for _, _, step in recording_writer.scalars] == list(range(3 * writer._WRITE_QUEUE_SIZE))
+
+
+@pytest.mark.parametrize("recording_writer", [False], indirect=True)
+def test_put_time_rolling_average(recording_writer: RecordingWriter):
+    """The running average is computed over the last max_buffer_size values"""
+    durations = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+    for step, duration in enumerate(durations):
+        writer.put_time("time", duration, step=step)
+        expected = np.mean(durations[max(0, step - 3) : step + 1])
+        assert writer.GLOBAL_BUFFER["events"]["time"]["avg"] == pytest.approx(expected)
+    writer.write_out_storage()
+    assert [scalar for _, scalar, _ in recording_writer.scalars][-1] == pytest.approx(5.5)
@@ -0,0 +1,45 @@
+"""
+Test the cache of viewer renders
+"""
+import torch
+
+from nerfstudio.cameras.cameras import Cameras
+from nerfstudio.viewer.server.viewer_utils import RenderCache
+
+
+def _camera(x: float, width: int = 8) -> Cameras:
+    camera_to_worlds = torch.eye(4)[None, :3]
+    camera_to_worlds[0, 0, 3] = x
+    return Cameras(camera_to_worlds, fx=10.0, fy=10.0, cx=4.0, cy=4.0, width=width, height=8)
+
+
+def test_render_cache_keys():
+    """Keys ignore pose differences below the quantization, but not resolution, crop or step changes"""
+    cache = RenderCache(quantization=1e-3)
+    key = cache.get_key(_camera(0.5), step=10)
+    assert cache.get_key(_camera(0.5 + 1e-5), step=10) == key
+    assert cache.get_key(_camera(0.51), step=10) != key
+    assert cache.get_key(_camera(0.5, width=16), step=10) != key
+    assert cache.get_key(_camera(0.5), step=11) != key
+    assert cache.get_key(_camera(0.5), step=10, crop=((-1, -1, -1), (1, 1, 1), None)) != key
+
+
+def test_render_cache_lru():
+    """The least recently used renders are evicted first"""
+    cache = RenderCache(max_size=2)
+    cache.put("a", {"rgb": torch.zeros(1)})
+    cache.put("b", {"rgb": torch.ones(1)})
+    assert cache.get("a") is not None
+    cache.put("c", {"rgb": torch.ones(1)})
+    assert cache.get("b") is None and cache.get("a") is not None and cache.get("c") is not None
+    cache.clear()
+    assert cache.get("a") is None
+
+    # Outputs are cached in host memory, other values are kept as is.
+    cache.put("d", {"rgb": torch.ones(1), "num_rays": 1})
+    cached = cache.get("d")
+    assert cached is not None and cached["rgb"].device.type == "cpu" and cached["num_rays"] == 1
+
+    disabled = RenderCache(max_size=0)
+    disabled.put("a", {"rgb": torch.zeros(1)})
+    assert disabled.get("a") is None
@@ -0,0 +1,97 @@
+"""
+Test the progressive rendering of the viewer
+"""
+import threading
+from types import SimpleNamespace
+from typing import Optional
+from unittest.mock import MagicMock
+
+import torch
+
+from nerfstudio.cameras.rays import RayBundle
+from nerfstudio.configs.base_config import ViewerConfig
+from nerfstudio.viewer.server import render_state_machine
+from nerfstudio.viewer.server.render_state_machine import RenderAction, RenderStateMachine
+from nerfstudio.viewer.server.viewer_state import ViewerState
+from nerfstudio.viewer.viser.messages import CameraMessage
+
+
+class RowIndexModel:
+    """Model rendering the row index of each ray"""
+
+    def __init__(self, eval_num_rays_per_chunk: int):
+        self.config = SimpleNamespace(eval_num_rays_per_chunk=eval_num_rays_per_chunk)
+        self.num_rendered_rays = 0
+
+    def get_outputs_for_camera_ray_bundle(self, camera_ray_bundle: RayBundle):
+        self.num_rendered_rays += len(camera_ray_bundle)
+        return {"rgb": camera_ray_bundle.origins[..., :1].clone()}
+
+
+def _ray_bundle(image_height: int, image_width: int) -> RayBundle:
+    origins = torch.arange(image_height, dtype=torch.float32)[:, None, None].expand(image_height, image_width, 3)
+    return RayBundle(origins=origins, directions=torch.ones_like(origins), pixel_area=torch.ones_like(origins[..., :1]))
+
+
+def _render_state_machine(monkeypatch, config: ViewerConfig, model: Optional[RowIndexModel] = None):
+    # The viewer state is only imported for type checking by the state machine, expose it to the runtime checks.
+    monkeypatch.setattr(render_state_machine, "ViewerState", ViewerState, raising=False)
+    viewer = MagicMock(spec=ViewerState)
+    viewer.config = config
+    viewer.get_model.return_value = model
+    return RenderStateMachine(viewer)
+
+
+def test_progressive_render(monkeypatch):
+    """High resolution renders are sent tile by tile over the upsampled low resolution frame"""
+    model = RowIndexModel(eval_num_rays_per_chunk=16)
+    state_machine = _render_state_machine(monkeypatch, ViewerConfig(progressive_update_interval=0.0), model)
+    sent = []
+    complete_flags = []
+
+    def send_output_to_viewer(outputs, cam_msg=None, complete=True):
+        sent.append(outputs["rgb"].clone())
+        complete_flags.append(complete)
+        if complete:
+            state_machine.last_outputs, state_machine.last_cam_msg = outputs, cam_msg
+
+    state_machine._send_output_to_viewer = send_output_to_viewer  # type: ignore
+    cam_msg = MagicMock(spec=CameraMessage)
+
+    state_machine.state = "low_static"
+    low_res = state_machine._render_outputs(_ray_bundle(4, 4), cam_msg)
+    state_machine._send_output_to_viewer(low_res, cam_msg)
+    state_machine.state = "high"
+    high_res = state_machine._render_outputs(_ray_bundle(8, 8), cam_msg)
+
+    assert torch.equal(high_res["rgb"], _ray_bundle(8, 8).origins[..., :1])
+    # 2 rows per tile, partial frames are sent after the first three tiles
+    assert len(sent) == 4
+    assert torch.equal(sent[1][:2], high_res["rgb"][:2])
+    assert torch.equal(sent[1][2:, 0, 0], torch.tensor([1.0, 1.0, 2.0, 2.0, 3.0, 3.0]))
+    # partial frames are never displayed again by a redisplay
+    assert complete_flags == [True, False, False, False]
+    assert model.num_rendered_rays == 16 + 64
+
+
+def test_redisplay(monkeypatch):
+    """Display changes do not replace pending renders, and are not lost when a later action needs no render"""
+    state_machine = _render_state_machine(monkeypatch, ViewerConfig())
+    cam_msg = MagicMock(spec=CameraMessage)
+    state_machine.action(RenderAction("redisplay", cam_msg))
+    assert state_machine.redisplay_pending and state_machine.next_action is None
+    state_machine.action(RenderAction("move", cam_msg))
+    state_machine.action(RenderAction("redisplay", cam_msg))
+    assert state_machine.next_action is not None and state_machine.next_action.action == "move"
+
+    # a static action in high resolution renders nothing, but the changed display settings are still applied
+    state_machine = _render_state_machine(monkeypatch, ViewerConfig())
+    redisplayed = threading.Event()
+    state_machine._send_output_to_viewer = lambda *args, **kwargs: redisplayed.set()  # type: ignore
+    state_machine.last_outputs, state_machine.last_cam_msg = {"rgb": torch.zeros((2, 2, 3))}, cam_msg
+    state_machine.state = "high"
+    state_machine.action(RenderAction("redisplay", cam_msg))
+    state_machine.action(RenderAction("static", cam_msg))
+    state_machine.start()
+    assert redisplayed.wait(timeout=10)
+    assert state_machine.state == "high"
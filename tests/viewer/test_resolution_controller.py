@@ -0,0 +1,50 @@
+"""
+Test the resolution controller of the viewer
+"""
+import pytest
+
+from nerfstudio.viewer.server.viewer_utils import ResolutionController
+
+
+def test_latency_model():
+    """The overhead and time per ray are fitted separately for each key"""
+    controller = ResolutionController(target_fps=10, max_growth=100.0)
+    for num_rays in [1000, 2000, 4000]:
+        controller.update(("rgb", False), num_rays, 0.02 + num_rays * 1e-5)
+        controller.update(("depth", True), num_rays, num_rays * 2e-5)
+    overhead, time_per_ray = controller.get_latency_model(("rgb", False))
+    assert overhead == pytest.approx(0.02)
+    assert time_per_ray == pytest.approx(1e-5)
+    assert controller.get_num_rays(("rgb", False)) == pytest.approx(8000, abs=1)
+    assert controller.get_num_rays(("depth", True)) == pytest.approx(5000, abs=1)
+    assert controller.get_latency_model(("rgb", True)) == (0.0, 1e-5)
+
+    state = controller.get_state()
+    assert state[str(("rgb", False))]["overhead_ms"] == pytest.approx(20.0)
+
+
+def test_image_res():
+    """The resolution fits the frame budget, only grows gradually and follows a slowdown"""
+    controller = ResolutionController(target_fps=10, max_growth=1.5, min_res=30)
+    key = ("rgb", False)
+    controller.update(key, 100 * 100, 0.1)
+    assert controller.get_image_res(key, aspect_ratio=1.0, max_res=512) == (100, 100)
+    for _ in range(8):
+        controller.update(key, 100 * 100, 0.025)
+    image_height, image_width = controller.get_image_res(key, aspect_ratio=2.0, max_res=512)
+    assert image_height * image_width <= 1.5 * 100 * 100
+    # training taking more of the device slows down the recent frames
+    for _ in range(8):
+        controller.update(key, 100 * 100, 1.0)
+    assert controller.get_image_res(key, aspect_ratio=1.0, max_res=512) == (30, 30)
+
+
+def test_overhead_above_budget():
+    """An overhead longer than the frame budget still leaves a part of the budget to the rays"""
+    controller = ResolutionController(target_fps=10, max_growth=100.0, min_res=30, min_render_fraction=0.25)
+    key = ("rgb", False)
+    for num_rays in [1000, 2000, 4000]:
+        controller.update(key, num_rays, 0.2 + num_rays * 1e-6)
+    assert controller.get_latency_model(key)[0] == pytest.approx(0.2)
+    assert controller.get_num_rays(key) == pytest.approx(25000, abs=1)
+    assert controller.get_image_res(key, aspect_ratio=1.0, max_res=512) == (150, 150)